@@ -0,0 +1,51 @@
+"""
+analysis_job.py - Background thread for analyze-tab runs
+Usage: job = AnalysisJob(steps, folder); job.start()
+       then drain job.events from the GUI until it yields None; job.cancel()
+
+steps(*args, cancelled=event) is a generator that does the numeric work
+and yields events (tuples whose first item names the kind, e.g. ("log",
+text) or ("chip", chip, payload)). The thread never touches Tk; the GUI
+polls the queue with after(). cancel() stops the job at the next yield.
+"""
+
+import queue
+import threading
+import traceback
+
+
+class AnalysisJob(threading.Thread):
+    def __init__(self, steps, *args):
+        super().__init__(daemon=True)
+        self.steps = steps
+        self.args = args
+        self.events = queue.Queue()
+        self.cancelled = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            for event in self.steps(*self.args, cancelled=self.cancelled):
+                if self.cancelled.is_set():
+                    break
+                self.events.put(event)
+        except Exception as e:
+            self.error = e
+            traceback.print_exc()
+        finally:
+            self.events.put(None)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def drain(self):
+        """Events queued so far; None (the end) is included when the job is over"""
+        events = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return events
+            events.append(event)
+            if event is None:
+                return events
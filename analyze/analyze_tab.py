@@ -1,3 +1,4 @@
+import json
 import os
 import re
 import tkinter as tk
@@ -7,6 +8,27 @@ import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
+from collect.run_format import run_path_for
+
+from .analysis_job import AnalysisJob
+from .bootstrap import BOOTSTRAP_RESAMPLES, BOOTSTRAP_SEED, CI_LEVEL, bootstrap_chips
+from .calibration import (
+    CONCENTRATION_FILE,
+    calibration_assay,
+    evaluate,
+    fit_calibrations,
+    load_concentrations,
+    save_calibrations,
+)
+from .catalog import Catalog
+from .catalog_picker import create_catalog_picker
+from .knee import detect_knee, knee_windows
+from .layouts import DATA_ROOT
+from .model_fit import fit_families, output_family
+from .pipeline import PIPELINE
+from .replicates import LOAD_WORKERS, load_sweep, load_sweeps, stack_replicates
+from .vectorized import chip_parameter_maps, heatmap_grid, maps_table
+
 
 # =============================
 # Configuration
@@ -21,14 +43,13 @@ CHIP_FILES = {
     "5WT7": ["T3_VSD_ISID_v1.csv", "T4_VSD_ISID_v1.csv", "T5_VSD_ISID_v1.csv"],
 }
 
-DILUTION_MAP = {
-    "5WT7": (7, "1:7"),
-    "5WT6": (6, "1:6"),
-    "5WT5": (5, "1:5"),
-    "5WT4": (4, "1:4"),
-    "5WT3": (3, "1:3"),
-    "5WT2": (2, "1:2"),
-    "5WT1": (1, "1:1"),
+# Chip concentrations come from <folder>/concentrations.csv (calibration.py).
+# Calibrated responses: name -> (results key, unit); dI is Id_sat minus the
+# blank's (or the lowest concentration's) Id_sat
+CALIBRATION_RESPONSES = {
+    "Id_sat": ("Isd_sat_two_slope_A", "A"),
+    "gm": ("gm_S", "S"),
+    "dI": ("Isd_sat_two_slope_A", "A"),
 }
 
 TARGET_VSG = 0.4
@@ -121,15 +142,9 @@ BASELINE_ID = baseline_ID
 baseline_Id_detrended = BASELINE_ID - np.median(BASELINE_ID)
 BASELINE_RMS = float(np.std(baseline_Id_detrended))
 
-TWO_SLOPE_WINDOWS = {
-    "5WT1": {"steeper": (2.8, 3.1), "flatter": (3.4, 3.5)},
-    "5WT2": {"steeper": (2.8, 3.1), "flatter": (3.4, 3.5)},
-    "5WT3": {"steeper": (2.8, 3.1), "flatter": (3.4, 3.5)},
-    "5WT4": {"steeper": (2.8, 3.1), "flatter": (3.4, 3.5)},
-    "5WT5": {"steeper": (2.8, 3.1), "flatter": (3.4, 3.5)},
-    "5WT6": {"steeper": (2.8, 3.1), "flatter": (3.4, 3.5)},
-    "5WT7": {"steeper": (2.8, 3.1), "flatter": (3.4, 3.5)},
-}
+# Optional manual overrides, e.g. {"5WT1": {"steeper": (2.8, 3.1), "flatter": (3.4, 3.5)}};
+# chips without an entry use the knee found by segmented regression (knee.py)
+TWO_SLOPE_WINDOWS = {}
 
 
 # =============================
@@ -144,17 +159,14 @@ def clean_vgs(val):
 
 
 def extract_values(file_path):
-    """Extract Vd, VGS, Is, Id, and ISD from CSV file."""
+    """Extract Vd, VGS, Is, Id, and ISD from a CSV or native run file."""
     try:
-        df0 = pd.read_csv(file_path, header=None)
-        vgs_vals = [clean_vgs(v) for v in df0.iloc[4, 1:].tolist()]
-        mid = len(vgs_vals) // 2
-        vgs_vals = vgs_vals[:mid]
-
-        df = pd.read_csv(file_path, skiprows=4).apply(pd.to_numeric, errors="coerce")
-        vd = df.iloc[:, 0].tolist()
-        is_df = df.iloc[:, 1 : mid + 1]
-        id_df = df.iloc[:, mid + 1 : 2 * mid + 1]
+        # A newer .run.npz next to the file wins; CSVs come from PARSE_CACHE
+        sweep = load_sweep(file_path)
+        vgs_vals = [None if np.isnan(v) else float(v) for v in sweep["vgs"]]
+        vd = sweep["vd"].tolist()
+        is_df = pd.DataFrame(sweep["is"], columns=sweep["is_columns"], copy=True)
+        id_df = pd.DataFrame(sweep["id"], columns=sweep["id_columns"], copy=True)
         isd_df = is_df.subtract(id_df.values)
 
         if VERBOSE:
@@ -166,29 +178,73 @@ def extract_values(file_path):
         return None, None, None, None, None
 
 
-def average_isd_over_files(chip, files, folder):
-    vd_vals = vgs_vals = None
-    acc = None
-    n_found = 0
-    for fn in files:
-        fp = os.path.join(folder, chip, fn)
-        if not os.path.exists(fp):
-            if VERBOSE:
-                print(f"Missing: {fp}")
+def chip_files_for(folder):
+    """CHIP_FILES entries present under folder; otherwise the output sweeps the
+    catalog knows under folder, grouped by chip subfolder"""
+    present = {
+        chip: files
+        for chip, files in CHIP_FILES.items()
+        if os.path.isdir(os.path.join(folder, chip))
+    }
+    root = os.path.abspath(DATA_ROOT)
+    folder = os.path.abspath(folder)
+    if present or os.path.commonpath([root, folder]) != root:
+        return present or CHIP_FILES
+
+    prefix = os.path.relpath(folder, root)
+    chip_files = {}
+    seen = set()
+    for row in Catalog(root).query(mode="output"):
+        # extract_values() reads Genesys CSVs and run files with an Id block
+        if row["layout"] != "genesys_csv" and row["file_type"] != "run":
             continue
-        vd, vgs, _, _, isd = extract_values(fp)
-        if isd is None:
+        if "ISIG" in os.path.basename(row["path"]).upper():
             continue
-        if acc is None:
-            acc = isd.copy()
-            vd_vals = vd
-            vgs_vals = vgs
-        else:
-            acc = acc.add(isd, fill_value=np.nan)
-        n_found += 1
-    if acc is None or n_found == 0:
+        if prefix != "." and not row["path"].startswith(prefix + os.sep):
+            continue
+        # A migrated .run.npz stands in for its source; list each sweep once
+        native = run_path_for(row["abs_path"])
+        if native in seen:
+            continue
+        seen.add(native)
+        chip_dir, name = os.path.split(os.path.relpath(row["abs_path"], folder))
+        chip_files.setdefault(chip_dir or os.curdir, []).append(name)
+    return chip_files
+
+
+def average_isd_over_files(chip, files, folder):
+    """Replicate mean of Isd for one chip; returns (vd, vgs, mean DataFrame)"""
+    replicates = average_chips({chip: files}, folder).get(chip)
+    if replicates is None:
         return None, None, None
-    return vd_vals, vgs_vals, acc / n_found
+    return replicates_to_avg(replicates)
+
+
+def average_chips(chip_files, folder, workers=LOAD_WORKERS):
+    """Load every chip's files in one parallel pass and stack each chip's
+    replicates; returns {chip: stack_replicates() result}"""
+    paths = {
+        chip: [os.path.join(folder, chip, fn) for fn in files]
+        for chip, files in chip_files.items()
+    }
+    sweeps, errors = load_sweeps([p for ps in paths.values() for p in ps], workers)
+    for path, error in errors.items():
+        if VERBOSE or error != "missing":
+            print(f"Error reading {path}: {error}")
+
+    replicates = {}
+    for chip, chip_paths in paths.items():
+        found = [sweeps[p] for p in chip_paths if p in sweeps]
+        if found:
+            replicates[chip] = stack_replicates(found)
+    return replicates
+
+
+def replicates_to_avg(replicates):
+    """(vd, vgs, mean DataFrame) in the shape avg_by_chip has always used"""
+    vgs = replicates["vgs"].tolist()
+    mean = pd.DataFrame(replicates["mean"], columns=[f"{v:g}" for v in vgs])
+    return replicates["vd"].tolist(), vgs, mean
 
 
 def _ma_once(y, window=5, pad_mode="reflect"):
@@ -319,14 +375,22 @@ def sat_region_mask(
     edge_pad=0,
     chip=None,
     two_slope_windows=None,
+    Isd=None,
 ):
-    """Determine saturation region mask."""
+    """Determine saturation region mask.
+
+    Without a two-slope window for chip, the flat side of the detected knee
+    is used when Isd is given.
+    """
     Vsd = np.asarray(Vsd, float)
     n = len(Vsd)
     mask = None
 
-    if two_slope_windows is not None and chip in two_slope_windows:
-        lo, hi = two_slope_windows[chip]["flatter"]
+    w = two_slope_windows.get(chip) if two_slope_windows is not None else None
+    if w is None and Isd is not None:
+        w = knee_windows(Vsd, detect_knee(Vsd, Isd))
+    if w is not None:
+        lo, hi = w["flatter"]
         mask = (Vsd >= lo) & (Vsd <= hi)
         if mask.sum() < 3:
             pad = 0.05
@@ -367,6 +431,7 @@ def output_params(
         edge_pad=edge_pad,
         chip=chip,
         two_slope_windows=two_slope_windows,
+        Isd=Isd,
     )
     xs, ys = Vsd[mask], Isd[mask]
     if len(xs) > 2:
@@ -396,14 +461,22 @@ def output_params(
     }
 
 
-def two_slope_intersection(Vsd, Isd, steeper, flatter):
+def two_slope_intersection(Vsd, Isd, steeper=None, flatter=None):
+    """Intersection of lines fitted in the two windows; without windows the
+    detected knee's segments are used (NaN if there is no confident knee)"""
+    if steeper is None or flatter is None:
+        w = knee_windows(Vsd, detect_knee(Vsd, Isd))
+        if w is None:
+            return np.nan, np.nan, (np.nan, np.nan, np.nan, np.nan)
+        steeper, flatter = w["steeper"], w["flatter"]
     m1mask = (Vsd >= steeper[0]) & (Vsd <= steeper[1])
     m2mask = (Vsd >= flatter[0]) & (Vsd <= flatter[1])
     if m1mask.sum() < 2 or m2mask.sum() < 2:
         return np.nan, np.nan, (np.nan, np.nan, np.nan, np.nan)
     m1, b1 = fit_line(Vsd[m1mask], Isd[m1mask])
     m2, b2 = fit_line(Vsd[m2mask], Isd[m2mask])
-    if np.isclose(m1, m2):
+    # Relative test: slopes are ~1e-8 A/V, below np.isclose's default atol
+    if np.isclose(m1, m2, rtol=1e-9, atol=0.0):
         return np.nan, np.nan, (m1, b1, m2, b2)
     vx = (b2 - b1) / (m1 - m2)
     iy = m1 * vx + b1
@@ -433,7 +506,15 @@ def compute_snr(signal_A, baseline_trace_A=None, baseline_rms_A=None):
 
 
 def _idsat_for_chip_over_vgs(
-    chip, avg_by_chip, two_slope_windows, filt_window, filt_passes, pad_mode, zero_phase
+    chip,
+    avg_by_chip,
+    two_slope_windows,
+    filt_window,
+    filt_passes,
+    pad_mode,
+    zero_phase,
+    frac_start=SAT_FRAC_START,
+    edge_pad=EDGE_PAD_FOR_FITS,
 ):
     """Compute Id_sat across VGS."""
     vd_vals, vgs_vals, avg_isd = avg_by_chip[chip]
@@ -441,8 +522,6 @@ def _idsat_for_chip_over_vgs(
     vsd_base = -np.asarray(vd_vals, float)
     idsat_list, vgs_list = [], []
 
-    w = two_slope_windows.get(chip) if two_slope_windows is not None else None
-
     for j, vgs in enumerate(vgs_vals):
         isd_col = np.asarray(avg_isd.iloc[:, j].tolist(), float)
         m = np.isfinite(vsd_base) & np.isfinite(isd_col)
@@ -467,6 +546,7 @@ def _idsat_for_chip_over_vgs(
         )
 
         idsat = np.nan
+        w = two_slope_windows_for(chip, vsd, isd_f, two_slope_windows)
         if w is not None:
             vx, iy, (m1, b1, m2, b2) = two_slope_intersection(
                 vsd, isd_f, w["steeper"], w["flatter"]
@@ -480,11 +560,11 @@ def _idsat_for_chip_over_vgs(
                 isd_f,
                 vth=None,
                 gate_voltage=0.0,
-                frac_start=SAT_FRAC_START,
+                frac_start=frac_start,
                 vds_ref=None,
-                edge_pad=EDGE_PAD_FOR_FITS,
+                edge_pad=edge_pad,
                 chip=chip,
-                two_slope_windows=two_slope_windows,
+                two_slope_windows={chip: w} if w is not None else None,
             )
             idsat = float(out_alt["Id_sat_ref"])
 
@@ -494,6 +574,16 @@ def _idsat_for_chip_over_vgs(
     return np.asarray(vgs_list, float), np.asarray(idsat_list, float)
 
 
+def two_slope_windows_for(chip, Vsd, Isd, two_slope_windows=None):
+    """Manual two-slope windows for chip if set, else those of the knee
+    detected in (Vsd, Isd); None when neither exists"""
+    if two_slope_windows is None:
+        two_slope_windows = TWO_SLOPE_WINDOWS
+    if chip in two_slope_windows:
+        return two_slope_windows[chip]
+    return knee_windows(Vsd, detect_knee(Vsd, Isd))
+
+
 def _compute_gm_at_target_vgs(chip, target_vsg_abs, avg_by_chip, two_slope_windows):
     """Compute gm = d(Id_sat)/d(VGS) at target VSG."""
     if chip not in avg_by_chip:
@@ -508,6 +598,11 @@ def _compute_gm_at_target_vgs(chip, target_vsg_abs, avg_by_chip, two_slope_windo
         pad_mode=PAD_MODE,
         zero_phase=ZERO_PHASE,
     )
+    return gm_from_idsat(vgs_all, idsat_all, target_vsg_abs)
+
+
+def gm_from_idsat(vgs_all, idsat_all, target_vsg_abs, gm_window=GM_WINDOW):
+    """gm and R² of a line through Id_sat(VGS) around the target VSG."""
     if vgs_all.size < 2 or idsat_all.size < 2:
         return np.nan, np.nan
 
@@ -525,7 +620,7 @@ def _compute_gm_at_target_vgs(chip, target_vsg_abs, avg_by_chip, two_slope_windo
     if idx is None:
         return np.nan, np.nan
 
-    half = max(1, int(GM_WINDOW // 2))
+    half = max(1, int(gm_window // 2))
     lo = max(0, idx - half)
     hi = min(len(vgs_all), idx + half + 1)
     if (hi - lo) < 2:
@@ -557,8 +652,11 @@ def analyze_tab(tab_analyze):
         "focused_raw": {},
         "focused_filt": {},
         "results": {},
+        "replicates": {},
         "_cache": {},
+        "vgs_maps": {},
         "current_plot": [1],
+        "params": default_params(),
     }
 
     tab_analyze.grid_rowconfigure(0, weight=1)
@@ -573,6 +671,12 @@ def analyze_tab(tab_analyze):
     notebook_analyze.pack(fill="both", expand=True)
 
     create_data_setup_frame(notebook_analyze, folder_path, selected_folder_display)
+
+    def on_catalog_select(path):
+        folder_path.set(path)
+        selected_folder_display.set(os.path.relpath(path, DATA_ROOT))
+
+    create_catalog_picker(notebook_analyze, on_catalog_select, log=log_analyze)
     output_text = create_console_log_frame(notebook_analyze)
 
     plot_frame_analyze = tk.Frame(tab_analyze)
@@ -593,6 +697,9 @@ def analyze_tab(tab_analyze):
     create_controls_frame(
         notebook_analyze, folder_path, output_text, ax, canvas, fig, analysis_data
     )
+    create_parameters_frame(
+        notebook_analyze, folder_path, output_text, ax, canvas, fig, analysis_data
+    )
 
     button_frame = tk.Frame(plot_frame_analyze)
     button_frame.pack(side=tk.BOTTOM, fill=tk.X, expand=False, pady=5)
@@ -623,7 +730,7 @@ def create_data_setup_frame(parent, folder_path_var, selected_folder_display_var
 
     def select_folder():
         selected_folder = filedialog.askdirectory(
-            title="Select a Folder", initialdir="/home/pi/Desktop/Biosensor V2/data"
+            title="Select a Folder", initialdir=DATA_ROOT
         )
         if selected_folder:
             folder_path_var.set(selected_folder)
@@ -656,6 +763,12 @@ def create_data_setup_frame(parent, folder_path_var, selected_folder_display_var
 output_text_analyze = None
 
 
+def log_analyze(message):
+    if output_text_analyze is not None:
+        output_text_analyze.insert(tk.END, message + "\n")
+        output_text_analyze.see(tk.END)
+
+
 def create_console_log_frame(parent):
     global output_text_analyze  # Use the global variable for analyze tab
 
@@ -694,175 +807,672 @@ def create_controls_frame(
             folder_path.get(), log_widget, ax, canvas, fig, analysis_data
         ),
     )
-    run_button.pack(padx=5, pady=10)
+    run_button.pack(padx=5, pady=(10, 5))
 
+    cancel_button = tk.Button(
+        frame_controls,
+        text="Cancel",
+        width=15,
+        command=lambda: cancel_analysis(analysis_data, log_widget),
+    )
+    cancel_button.pack(padx=5, pady=(0, 5))
 
-def run_analysis(folder, log_widget, ax, canvas, fig, analysis_data):
-    """Run comprehensive analysis on selected folder."""
-    if not folder:
-        log_widget.insert(tk.END, "Please select a folder first!\n")
-        log_widget.see(tk.END)
-        return
+    export_button = tk.Button(
+        frame_controls,
+        text="Export VGS Maps",
+        width=15,
+        command=lambda: export_vgs_maps(analysis_data, log_widget),
+    )
+    export_button.pack(padx=5, pady=(0, 5))
 
-    log_widget.insert(tk.END, "Starting analysis...\n")
-    log_widget.see(tk.END)
+    calibration_button = tk.Button(
+        frame_controls,
+        text="Export Calibration",
+        width=15,
+        command=lambda: export_calibration(analysis_data, log_widget),
+    )
+    calibration_button.pack(padx=5, pady=(0, 10))
 
-    # Build average per chip
-    avg_by_chip = {}
-    for chip, files in CHIP_FILES.items():
-        vd, vgs, avg_isd = average_isd_over_files(chip, files, folder)
-        if vgs is not None and avg_isd is not None:
-            avg_by_chip[chip] = (vd, vgs, avg_isd)
-            log_widget.insert(tk.END, f"Processed {chip} with {len(files)} files.\n")
-        else:
-            log_widget.insert(tk.END, f"Error processing {chip}.\n")
-    log_widget.see(tk.END)
 
-    if not avg_by_chip:
-        log_widget.insert(tk.END, "No data found. Check folder structure.\n")
-        log_widget.see(tk.END)
-        return
+def loaded_vsg_grid(analysis_data):
+    """Sorted |VGS| values present in the loaded chips"""
+    values = set()
+    for _, vgs_vals, _ in analysis_data.get("avg_by_chip", {}).values():
+        values.update(round(abs(float(v)), 6) for v in vgs_vals if np.isfinite(v))
+    return sorted(values)
 
-    # Focus traces at target VSG and filter
-    focused_raw = build_traces_at_vsg(avg_by_chip, TARGET_VSG, interpret_as_vsg=True)
-    focused_filt = apply_filter(
-        focused_raw,
-        window=FILTER_WINDOW,
-        passes=FILTER_PASSES,
-        pad_mode=PAD_MODE,
-        zero_phase=ZERO_PHASE,
+
+def create_parameters_frame(
+    parent, folder_path, log_widget, ax, canvas, fig, analysis_data
+):
+    """Sliders for the analysis parameters; a change recomputes only the
+    stages that depend on it (see pipeline.py)"""
+    frame_params = tk.LabelFrame(
+        parent, text="Parameters", relief=tk.SUNKEN, borderwidth=2
     )
+    frame_params.pack(fill="x", padx=10, pady=5)
+
+    params = analysis_data.setdefault("params", default_params())
+    pending = [None]
+
+    def apply_params():
+        pending[0] = None
+        target = target_scale.get()
+        grid = loaded_vsg_grid(analysis_data)
+        if grid:
+            # Snap to a VSG that was actually swept
+            target = min(grid, key=lambda v: abs(v - target))
+            target_scale.set(target)
+        new_params = {
+            "target_vsg": float(target),
+            "filter_window": int(window_scale.get()),
+            "ohmic_vcap": float(vcap_scale.get()),
+            "sat_frac_start": float(frac_scale.get()),
+        }
+        if new_params == params:
+            return
+        params.update(new_params)
+        if folder_path.get() and analysis_data.get("avg_by_chip"):
+            run_analysis(
+                folder_path.get(), log_widget, ax, canvas, fig, analysis_data, restart=True
+            )
 
-    # Color palette for chips
-    _palette = [
-        "#1f77b4",
-        "#ff7f0e",
-        "#2ca02c",
-        "#d62728",
-        "#9467bd",
-        "#8c564b",
-        "#e377c2",
-        "#7f7f7f",
-        "#bcbd22",
-        "#17becf",
-    ]
-    chip_colors = {
-        chip: _palette[i % len(_palette)]
-        for i, chip in enumerate(sorted(focused_filt.keys()))
+    def on_change(_value):
+        if pending[0] is not None:
+            frame_params.after_cancel(pending[0])
+        pending[0] = frame_params.after(PARAM_DEBOUNCE_MS, apply_params)
+
+    def make_scale(label, lo, hi, step, value):
+        scale = tk.Scale(
+            frame_params,
+            label=label,
+            from_=lo,
+            to=hi,
+            resolution=step,
+            orient=tk.HORIZONTAL,
+            length=200,
+        )
+        scale.set(value)
+        scale.config(command=on_change)
+        scale.pack(fill="x", padx=5, pady=2)
+        return scale
+
+    target_scale = make_scale("Target VSG (V)", 0.0, 2.8, 0.1, params["target_vsg"])
+    window_scale = make_scale("Filter window", 1, 15, 2, params["filter_window"])
+    vcap_scale = make_scale("Ohmic Vcap (V)", 0.02, 0.5, 0.01, params["ohmic_vcap"])
+    frac_scale = make_scale("Sat. fraction start", 0.3, 0.95, 0.05, params["sat_frac_start"])
+
+    def follow_grid():
+        # Range the target slider over the VGS grid once data is loaded
+        grid = loaded_vsg_grid(analysis_data)
+        if grid and (target_scale.cget("from"), target_scale.cget("to")) != (grid[0], grid[-1]):
+            target_scale.config(from_=grid[0], to=grid[-1])
+        frame_params.after(GRID_POLL_MS, follow_grid)
+
+    follow_grid()
+
+
+# Heatmaps after the four fixed plots: (parameter, label, display scale)
+MAP_PLOTS = [
+    ("Id_sat_A", "Id_sat (µA)", 1e6),
+    ("gm_S", "gm (µS)", 1e6),
+    ("Ron_ohm", "Ron (kΩ)", 1e-3),
+    ("SNR_dB", "SNR (dB)", 1.0),
+]
+PLOT_COUNT = 4 + len(MAP_PLOTS)
+
+# Milliseconds between polls of a running analysis job
+JOB_POLL_MS = 100
+# Slider changes within this many ms trigger one recompute
+PARAM_DEBOUNCE_MS = 150
+GRID_POLL_MS = 500
+CHIP_PALETTE = [
+    "#1f77b4",
+    "#ff7f0e",
+    "#2ca02c",
+    "#d62728",
+    "#9467bd",
+    "#8c564b",
+    "#e377c2",
+    "#7f7f7f",
+    "#bcbd22",
+    "#17becf",
+]
+
+
+def default_params():
+    """Parameters the UI can change, starting from the module settings"""
+    return {
+        "target_vsg": float(TARGET_VSG),
+        "filter_window": int(FILTER_WINDOW),
+        "ohmic_vcap": float(OHMIC_VCAP),
+        "sat_frac_start": float(SAT_FRAC_START),
     }
 
-    # Analysis per chip
-    results = {}
-    _cache = {}
 
-    for chip, (Vsd_arr, Isd_f) in focused_filt.items():
-        color = chip_colors[chip]
-        est_rms = None
-        if BASELINE_RMS is None:
-            k = max(5, int(0.15 * len(Isd_f)))
-            local = Isd_f[:k] - np.median(Isd_f[:k])
-            est_rms = float(np.std(local))
-
-        Ron, m_lin, b_lin, lin_mask, r2_lin = robust_small_v_fit(
-            Vsd_arr, Isd_f, v_cap=OHMIC_VCAP
-        )
+def analysis_settings(params):
+    """Everything that changes the results besides the input files"""
+    return (
+        tuple(sorted(params.items())),
+        APPLY_FILTER,
+        FILTER_PASSES,
+        PAD_MODE,
+        ZERO_PHASE,
+        GM_WINDOW,
+        repr(TWO_SLOPE_WINDOWS),
+    )
+
+
+def analysis_data_key(folder, chip_files):
+    """Identifies the input data: folder and every file with its size/mtime"""
+    stats = []
+    for chip, files in sorted(chip_files.items()):
+        for fn in files:
+            fp = os.path.join(folder, chip, fn)
+            for path in (fp, run_path_for(fp)):
+                if os.path.exists(path):
+                    st = os.stat(path)
+                    stats.append((path, st.st_size, st.st_mtime_ns))
+    table = os.path.join(folder, CONCENTRATION_FILE)
+    if os.path.exists(table):
+        st = os.stat(table)
+        stats.append((table, st.st_size, st.st_mtime_ns))
+    return (os.path.abspath(folder), tuple(stats))
+
+
+def analyze_chip(chip, avg_by_chip, color, data_key, params, cache=PIPELINE):
+    """Staged analysis of one chip at params["target_vsg"].
+
+    Every stage goes through the stage cache keyed by the inputs it reads,
+    so a parameter change only recomputes the stages that depend on it.
+    Returns None if the chip has no sweep at the target VSG.
+    """
+    target = params["target_vsg"]
+    window = params["filter_window"]
+    edge_pad = (window // 2) if APPLY_FILTER else 0
+    windows_key = repr(TWO_SLOPE_WINDOWS.get(chip))
+
+    trace_key = (data_key, chip, target)
+    raw = cache.get(
+        "focus",
+        trace_key,
+        lambda: build_traces_at_vsg({chip: avg_by_chip[chip]}, target).get(chip),
+    )
+    if raw is None:
+        return None
+
+    filt_key = trace_key + (window, FILTER_PASSES, PAD_MODE, ZERO_PHASE, APPLY_FILTER)
+    Vsd_arr, Isd_f = cache.get(
+        "filter",
+        filt_key,
+        lambda: apply_filter(
+            {chip: raw},
+            window=window,
+            passes=FILTER_PASSES,
+            pad_mode=PAD_MODE,
+            zero_phase=ZERO_PHASE,
+        )[chip],
+    )
+
+    windows = cache.get(
+        "knee",
+        filt_key + (windows_key,),
+        lambda: two_slope_windows_for(chip, Vsd_arr, Isd_f),
+    )
+    chip_windows = {chip: windows} if windows is not None else None
+
+    Ron, m_lin, b_lin, lin_mask, r2_lin = cache.get(
+        "ohmic",
+        filt_key + (params["ohmic_vcap"],),
+        lambda: robust_small_v_fit(Vsd_arr, Isd_f, v_cap=params["ohmic_vcap"]),
+    )
 
-        out = output_params(
+    out = cache.get(
+        "output_params",
+        filt_key + (params["sat_frac_start"], edge_pad, windows_key),
+        lambda: output_params(
             Vsd_arr,
             Isd_f,
             vth=None,
             gate_voltage=0.0,
-            frac_start=SAT_FRAC_START,
+            frac_start=params["sat_frac_start"],
             vds_ref=None,
-            edge_pad=EDGE_PAD_FOR_FITS,
+            edge_pad=edge_pad,
             chip=chip,
-            two_slope_windows=TWO_SLOPE_WINDOWS,
-        )
-        xs_sat = Vsd_arr[out["sat_mask"]]
-        ys_sat = Isd_f[out["sat_mask"]]
+            two_slope_windows=chip_windows,
+        ),
+    )
+    xs_sat = Vsd_arr[out["sat_mask"]]
+    ys_sat = Isd_f[out["sat_mask"]]
 
-        if chip in TWO_SLOPE_WINDOWS:
-            w = TWO_SLOPE_WINDOWS[chip]
-            vx, iy, (m1, b1, m2, b2) = two_slope_intersection(
-                Vsd_arr, Isd_f, w["steeper"], w["flatter"]
+    vx, iy, (m1, b1, m2, b2), r2_steep, r2_flat = cache.get(
+        "two_slope", filt_key + (windows_key,), lambda: two_slope_fit(Vsd_arr, Isd_f, windows)
+    )
+
+    SNR = cache.get("snr", filt_key, lambda: chip_snr(Isd_f))
+
+    # Parameters at every VGS (Id_sat(VGS) for gm); independent of the target
+    maps = cache.get(
+        "vgs_maps",
+        vgs_maps_key(data_key, chip, params),
+        lambda: vgs_maps_for(chip, avg_by_chip, params),
+    )
+    measured = maps["valid"].any(axis=0)
+    gm_S, gm_R2 = gm_from_idsat(
+        maps["vgs"][measured], maps["Id_sat_A"][measured], target
+    )
+
+    result = {
+        "Ron_ohm": Ron,
+        "R2_lin": r2_lin,
+        "gsd_S": out["gsd"],
+        "ro_ohm": out["ro"],
+        "VA_V": out["VA"],
+        "Id_sat_ref_A": out["Id_sat_ref"],
+        "Vds_ref_V": out["vds_ref"],
+        "Vx_two_slope_V": vx,
+        "Isd_sat_two_slope_A": iy,
+        "R2_steep": r2_steep,
+        "R2_flat": r2_flat,
+        "noise_rms_A": SNR["noise_rms_A"],
+        "I_det_A": SNR["I_det_A"],
+        "SNR_dB": SNR["snr_db"],
+        "DynRange_dB": SNR["dynamic_range_db"],
+        "gm_S": gm_S,
+        "gm_R2": gm_R2,
+    }
+    plot_cache = {
+        "color": color,
+        "lin_mask": lin_mask,
+        "m_lin": m_lin,
+        "b_lin": b_lin,
+        "xs_sat": xs_sat,
+        "ys_sat": ys_sat,
+        "a_sat": out["a"],
+        "b_sat": out["b"],
+        "two": {"vx": vx, "iy": iy, "m1": m1, "b1": b1, "m2": m2, "b2": b2},
+        "windows": windows,
+        "raw": raw,
+    }
+    return {
+        "raw": raw,
+        "filt": (Vsd_arr, Isd_f),
+        "result": result,
+        "cache": plot_cache,
+        "maps": maps,
+    }
+
+
+def vgs_map_settings(chip, params):
+    """chip_parameter_maps() keyword arguments for the analysis settings"""
+    window = params["filter_window"]
+    return dict(
+        window=window,
+        passes=FILTER_PASSES,
+        pad_mode=PAD_MODE,
+        zero_phase=ZERO_PHASE,
+        apply_filter=APPLY_FILTER,
+        v_cap=params["ohmic_vcap"],
+        frac_start=params["sat_frac_start"],
+        edge_pad=(window // 2) if APPLY_FILTER else 0,
+        two_slope_window=TWO_SLOPE_WINDOWS.get(chip),
+        noise_rms=float(np.std(baseline_Id_detrended)),
+        gm_window=GM_WINDOW,
+        gm_positive=GM_POSITIVE_BY_CONVENTION,
+    )
+
+
+def vgs_maps_key(data_key, chip, params):
+    """Cache key of everything vgs_map_settings() depends on"""
+    window = params["filter_window"]
+    return (data_key, chip, window, FILTER_PASSES, PAD_MODE, ZERO_PHASE, APPLY_FILTER) + (
+        params["ohmic_vcap"],
+        params["sat_frac_start"],
+        (window // 2) if APPLY_FILTER else 0,
+        repr(TWO_SLOPE_WINDOWS.get(chip)),
+    )
+
+
+def vgs_maps_for(chip, avg_by_chip, params):
+    """chip_parameter_maps() of one chip's average with the analysis settings"""
+    vd_vals, vgs_vals, avg_isd = avg_by_chip[chip]
+    return chip_parameter_maps(
+        vd_vals, vgs_vals, avg_isd.to_numpy(dtype=float), **vgs_map_settings(chip, params)
+    )
+
+
+def two_slope_fit(Vsd_arr, Isd_f, w):
+    """two_slope_intersection() plus the R² of both segment fits"""
+    if w is None:
+        return np.nan, np.nan, (np.nan,) * 4, np.nan, np.nan
+    vx, iy, (m1, b1, m2, b2) = two_slope_intersection(
+        Vsd_arr, Isd_f, w["steeper"], w["flatter"]
+    )
+    r2_steep = np.nan
+    r2_flat = np.nan
+    if np.isfinite(m1) and np.isfinite(m2):
+        m1mask = (Vsd_arr >= w["steeper"][0]) & (Vsd_arr <= w["steeper"][1])
+        m2mask = (Vsd_arr >= w["flatter"][0]) & (Vsd_arr <= w["flatter"][1])
+
+        if m1mask.sum() >= 2:
+            yhat1 = m1 * Vsd_arr[m1mask] + b1
+            r2_steep = r_squared(Isd_f[m1mask], yhat1)
+        if m2mask.sum() >= 2:
+            yhat2 = m2 * Vsd_arr[m2mask] + b2
+            r2_flat = r_squared(Isd_f[m2mask], yhat2)
+    return vx, iy, (m1, b1, m2, b2), r2_steep, r2_flat
+
+
+def chip_snr(Isd_f):
+    est_rms = None
+    if BASELINE_RMS is None:
+        k = max(5, int(0.15 * len(Isd_f)))
+        local = Isd_f[:k] - np.median(Isd_f[:k])
+        est_rms = float(np.std(local))
+    return compute_snr(
+        Isd_f,
+        baseline_trace_A=baseline_Id_detrended,
+        baseline_rms_A=(BASELINE_RMS or est_rms),
+    )
+
+
+def model_columns(fit):
+    """Summary-table entries of a fit_family() result (NaN if it failed)"""
+    ok = fit.get("success", False)
+    return {
+        "Vth_model_V": fit["vth_V"] if ok else np.nan,
+        "k_model_A_V2": fit["k_A_V2"] if ok else np.nan,
+        "lambda_model_1_V": fit["lambda_1_V"] if ok else np.nan,
+        "Rs_model_ohm": fit["rs_ohm"] if ok else np.nan,
+        "SS_model_V_dec": fit["ss_V_dec"] if ok else np.nan,
+        "R2_model": fit["r2"] if ok else np.nan,
+        "model_at_bounds": fit.get("at_bounds", []),
+    }
+
+
+def target_intervals(intervals, target_vsg):
+    """Summary-table entries (<name>_ci = (lo, hi)) of a chip_bootstrap()
+    result at the target VSG; empty if that VSG was not bootstrapped"""
+    if "error" in intervals:
+        return {}
+    at_target = np.isclose(np.abs(intervals["vgs"]), abs(float(target_vsg)), atol=1e-6)
+    if not at_target.any():
+        return {}
+    j = int(np.argmax(at_target))
+    return {
+        name[:-3] + "_ci": (float(intervals[name][j]), float(intervals[name[:-3] + "_hi"][j]))
+        for name in intervals
+        if name.endswith("_lo")
+    }
+
+
+def calibration_assays(results, concentrations):
+    """calibration_assay() of every analyte x CALIBRATION_RESPONSES entry,
+    over the analysed chips listed in the concentrations table"""
+    assays = {}
+    if concentrations is None:
+        return assays
+    rows = concentrations[concentrations["chip"].isin(list(results))]
+    for analyte, group in rows.groupby("analyte", sort=True):
+        chips = group["chip"].tolist()
+        conc = group["concentration"].to_numpy(dtype=float)
+        for response, (key, unit) in CALIBRATION_RESPONSES.items():
+            y = np.array([results[chip].get(key, np.nan) for chip in chips], dtype=float)
+            noise = BASELINE_RMS if unit == "A" else np.nan
+            if response == "dI":
+                reference = (conc == 0) if (conc == 0).any() else (conc == conc.min())
+                y = y - np.nanmean(y[reference])
+                noise *= np.sqrt(2)
+            assays[f"{analyte} {response}".strip()] = calibration_assay(
+                conc,
+                y,
+                noise,
+                analyte=analyte,
+                response_name=response,
+                response_unit=unit,
+                concentration_unit=group["unit"].iloc[0],
+                chips=chips,
+                labels=group["label"].tolist(),
+            )
+    return assays
+
+
+def analysis_steps(folder, chip_files, data_key, params, cancelled):
+    """The analysis as a generator of job events (runs on the worker thread)"""
+    PIPELINE.reset_stats()
+    n_files = sum(len(files) for files in chip_files.values())
+    yield ("log", f"Loading {n_files} files for {len(chip_files)} chips...")
+
+    # Build average per chip (all chips' files are loaded in parallel)
+    replicates_by_chip = PIPELINE.get(
+        "load", data_key, lambda: average_chips(chip_files, folder)
+    )
+    avg_by_chip = {}
+    for chip, files in chip_files.items():
+        replicates = replicates_by_chip.get(chip)
+        if replicates is not None and len(replicates["vgs"]):
+            avg_by_chip[chip] = PIPELINE.get(
+                "average", (data_key, chip), lambda: replicates_to_avg(replicates)
+            )
+            yield (
+                "log",
+                f"Processed {chip} with {len(replicates['paths'])}/{len(files)} files.",
             )
         else:
-            vx = iy = m1 = b1 = m2 = b2 = np.nan
-
-        r2_steep = np.nan
-        r2_flat = np.nan
-        if chip in TWO_SLOPE_WINDOWS and np.isfinite(m1) and np.isfinite(m2):
-            w = TWO_SLOPE_WINDOWS[chip]
-            m1mask = (Vsd_arr >= w["steeper"][0]) & (Vsd_arr <= w["steeper"][1])
-            m2mask = (Vsd_arr >= w["flatter"][0]) & (Vsd_arr <= w["flatter"][1])
-
-            if m1mask.sum() >= 2:
-                yhat1 = m1 * Vsd_arr[m1mask] + b1
-                r2_steep = r_squared(Isd_f[m1mask], yhat1)
-            if m2mask.sum() >= 2:
-                yhat2 = m2 * Vsd_arr[m2mask] + b2
-                r2_flat = r_squared(Isd_f[m2mask], yhat2)
-
-        SNR = compute_snr(
-            Isd_f,
-            baseline_trace_A=baseline_Id_detrended,
-            baseline_rms_A=(BASELINE_RMS or est_rms),
+            yield ("log", f"Error processing {chip}.")
+
+    if not avg_by_chip:
+        yield ("log", "No data found. Check folder structure.")
+        return
+
+    # Colours follow the chips that have a sweep at the target VSG
+    focused = [
+        chip
+        for chip in avg_by_chip
+        if PIPELINE.get(
+            "focus",
+            (data_key, chip, params["target_vsg"]),
+            lambda: build_traces_at_vsg(
+                {chip: avg_by_chip[chip]}, params["target_vsg"]
+            ).get(chip),
         )
+        is not None
+    ]
+    chip_colors = {
+        chip: CHIP_PALETTE[i % len(CHIP_PALETTE)] for i, chip in enumerate(sorted(focused))
+    }
+    yield (
+        "loaded",
+        {"avg_by_chip": avg_by_chip, "replicates": replicates_by_chip, "params": dict(params)},
+    )
 
-        results[chip] = {
-            "Ron_ohm": Ron,
-            "R2_lin": r2_lin,
-            "gsd_S": out["gsd"],
-            "ro_ohm": out["ro"],
-            "VA_V": out["VA"],
-            "Id_sat_ref_A": out["Id_sat_ref"],
-            "Vds_ref_V": out["vds_ref"],
-            "Vx_two_slope_V": vx,
-            "Isd_sat_two_slope_A": iy,
-            "R2_steep": r2_steep,
-            "R2_flat": r2_flat,
-            "noise_rms_A": SNR["noise_rms_A"],
-            "I_det_A": SNR["I_det_A"],
-            "SNR_dB": SNR["snr_db"],
-            "DynRange_dB": SNR["dynamic_range_db"],
-        }
-        _cache[chip] = {
-            "color": color,
-            "lin_mask": lin_mask,
-            "m_lin": m_lin,
-            "b_lin": b_lin,
-            "xs_sat": xs_sat,
-            "ys_sat": ys_sat,
-            "a_sat": out["a"],
-            "b_sat": out["b"],
-            "two": {"vx": vx, "iy": iy, "m1": m1, "b1": b1, "m2": m2, "b2": b2},
-            "raw": focused_raw.get(chip, (Vsd_arr, Isd_f)),
-        }
+    try:
+        concentrations = load_concentrations(folder)
+    except (OSError, ValueError) as e:
+        concentrations = None
+        yield ("log", f"Could not read {CONCENTRATION_FILE}: {e}")
+
+    # Compact-model fit of each chip's whole family; chips not cached are
+    # fitted together in a process pool
+    if focused:
+        yield ("log", "Fitting compact model...")
+    model_fits = PIPELINE.get_many(
+        "model",
+        {chip: (data_key, chip) for chip in focused},
+        lambda chips: fit_families(
+            {chip: output_family(*avg_by_chip[chip]) for chip in chips}
+        ),
+    )
 
-    # Compute gm at TARGET_VSG
-    for chip in sorted(avg_by_chip.keys()):
-        gm_S, gm_R2 = _compute_gm_at_target_vgs(
-            chip, TARGET_VSG, avg_by_chip, TWO_SLOPE_WINDOWS
+    # Analysis per chip; each chip is shown as soon as it is done
+    results = {}
+    for i, chip in enumerate(focused):
+        if cancelled.is_set():
+            return
+        payload = analyze_chip(chip, avg_by_chip, chip_colors[chip], data_key, params)
+        payload["result"].update(model_columns(model_fits[chip]))
+        payload["progress"] = (i + 1, len(focused))
+        results[chip] = payload["result"]
+        yield ("chip", chip, payload)
+
+    # Calibration curves of every analyte and response, cached per assay
+    assays = calibration_assays(results, concentrations)
+    if assays:
+        calibrations = PIPELINE.get_many(
+            "calibration",
+            {name: json.dumps(assay, sort_keys=True) for name, assay in assays.items()},
+            lambda names: fit_calibrations({name: assays[name] for name in names}),
+        )
+        yield ("calibration", calibrations)
+
+    # Bootstrap intervals once every chip is shown; chips not cached are
+    # resampled together in a process pool
+    if focused and not cancelled.is_set():
+        yield ("log", f"Bootstrapping {BOOTSTRAP_RESAMPLES} resamples per chip...")
+        intervals = PIPELINE.get_many(
+            "bootstrap",
+            {
+                chip: vgs_maps_key(data_key, chip, params) + (BOOTSTRAP_RESAMPLES, BOOTSTRAP_SEED)
+                for chip in focused
+            },
+            lambda chips: bootstrap_chips(
+                {
+                    chip: (
+                        replicates_by_chip[chip]["vd"],
+                        replicates_by_chip[chip]["vgs"],
+                        replicates_by_chip[chip]["stack"],
+                        vgs_map_settings(chip, params),
+                    )
+                    for chip in chips
+                }
+            ),
         )
-        if chip in results:
-            results[chip]["gm_S"] = gm_S
-            results[chip]["gm_R2"] = gm_R2
-
-    # Store in analysis_data
-    analysis_data["avg_by_chip"] = avg_by_chip
-    analysis_data["focused_raw"] = focused_raw
-    analysis_data["focused_filt"] = focused_filt
-    analysis_data["results"] = results
-    analysis_data["_cache"] = _cache
-    analysis_data["current_plot"] = [1]
-
-    log_widget.insert(
-        tk.END, "Analysis complete! Use navigation buttons to view plots.\n"
+        for chip in focused:
+            if "error" in intervals[chip]:
+                yield ("log", f"Bootstrap failed for {chip}: {intervals[chip]['error']}")
+        yield ("intervals", intervals)
+    yield ("log", PIPELINE.format_stats())
+    yield ("complete",)
+
+
+def run_analysis(folder, log_widget, ax, canvas, fig, analysis_data, restart=False):
+    """Run comprehensive analysis on selected folder (in a background job).
+
+    restart=True (parameter changes) cancels a running job instead of refusing.
+    """
+    if not folder:
+        log_widget.insert(tk.END, "Please select a folder first!\n")
+        log_widget.see(tk.END)
+        return
+
+    job = analysis_data.get("job")
+    if job is not None and job.is_alive():
+        if not restart:
+            log_widget.insert(tk.END, "Analysis already running; cancel it first.\n")
+            log_widget.see(tk.END)
+            return
+        job.cancel()
+
+    params = dict(analysis_data.setdefault("params", default_params()))
+    chip_files = chip_files_for(folder)
+    data_key = analysis_data_key(folder, chip_files)
+    key = (data_key, analysis_settings(params))
+    if key == analysis_data.get("key") and analysis_data.get("results"):
+        if not restart:
+            log_widget.insert(tk.END, "Inputs unchanged; showing the previous results.\n")
+            log_widget.see(tk.END)
+        switch_plot("current", analysis_data, ax, canvas, fig, log_widget)
+        return
+
+    if not restart:
+        analysis_data["current_plot"][0] = 1
+        log_widget.insert(tk.END, "Starting analysis...\n")
+        log_widget.see(tk.END)
+
+    job = AnalysisJob(analysis_steps, folder, chip_files, data_key, params)
+    analysis_data["job"] = job
+    job.start()
+    log_widget.after(
+        JOB_POLL_MS, drain_analysis_job, job, key, log_widget, ax, canvas, fig, analysis_data
     )
+
+
+def cancel_analysis(analysis_data, log_widget):
+    job = analysis_data.get("job")
+    if job is not None and job.is_alive():
+        job.cancel()
+        log_widget.insert(tk.END, "Cancelling analysis...\n")
+        log_widget.see(tk.END)
+
+
+def drain_analysis_job(job, key, log_widget, ax, canvas, fig, analysis_data):
+    """Apply the job's events on the Tk thread; redraw once per poll"""
+    if analysis_data.get("job") is not job:
+        return  # superseded by a restart; its leftover events are stale
+    redraw = False
+    complete = False
+    for event in job.drain():
+        if event is None:
+            if job.cancelled.is_set():
+                log_widget.insert(tk.END, "Analysis cancelled.\n")
+            elif job.error is not None:
+                log_widget.insert(tk.END, f"Analysis failed: {job.error}\n")
+            elif complete:
+                analysis_data["key"] = key
+                log_widget.insert(
+                    tk.END, "Analysis complete! Use navigation buttons to view plots.\n"
+                )
+            log_widget.see(tk.END)
+            if redraw:
+                switch_plot("current", analysis_data, ax, canvas, fig, log_widget)
+            return
+
+        kind = event[0]
+        if kind == "log":
+            log_widget.insert(tk.END, event[1] + "\n")
+        elif kind == "loaded":
+            # Fresh results for this run; chips are added as they finish
+            analysis_data["avg_by_chip"] = event[1]["avg_by_chip"]
+            analysis_data["replicates"] = event[1]["replicates"]
+            analysis_data["shown_params"] = event[1]["params"]
+            analysis_data["focused_raw"] = {}
+            analysis_data["focused_filt"] = {}
+            analysis_data["results"] = {}
+            analysis_data["_cache"] = {}
+            analysis_data["vgs_maps"] = {}
+            analysis_data["vgs_intervals"] = {}
+            analysis_data["calibrations"] = {}
+            analysis_data["key"] = None
+        elif kind == "chip":
+            chip, payload = event[1], event[2]
+            analysis_data["focused_raw"][chip] = payload["raw"]
+            analysis_data["focused_filt"][chip] = payload["filt"]
+            analysis_data["results"][chip] = payload["result"]
+            analysis_data["_cache"][chip] = payload["cache"]
+            analysis_data["vgs_maps"][chip] = payload["maps"]
+            done, total = payload["progress"]
+            log_widget.insert(tk.END, f"Analyzed {chip} ({done}/{total}).\n")
+            redraw = True
+        elif kind == "calibration":
+            analysis_data["calibrations"] = event[1]
+            for name, calibration in event[1].items():
+                log_widget.insert(tk.END, calibration_line(name, calibration) + "\n")
+            redraw = True
+        elif kind == "intervals":
+            target = analysis_data["shown_params"]["target_vsg"]
+            for chip, intervals in event[1].items():
+                analysis_data["vgs_intervals"][chip] = intervals
+                analysis_data["results"][chip].update(target_intervals(intervals, target))
+            redraw = True
+        elif kind == "complete":
+            complete = True
     log_widget.see(tk.END)
 
-    # Display first plot
-    switch_plot("current", analysis_data, ax, canvas, fig, log_widget)
+    if redraw:
+        switch_plot("current", analysis_data, ax, canvas, fig, log_widget)
+    log_widget.after(
+        JOB_POLL_MS, drain_analysis_job, job, key, log_widget, ax, canvas, fig, analysis_data
+    )
 
 
 def switch_plot(direction, analysis_data, ax, canvas, fig, log_widget):
@@ -870,10 +1480,16 @@ def switch_plot(direction, analysis_data, ax, canvas, fig, log_widget):
     if direction == "previous":
         analysis_data["current_plot"][0] = max(1, analysis_data["current_plot"][0] - 1)
     elif direction == "next":
-        analysis_data["current_plot"][0] = min(4, analysis_data["current_plot"][0] + 1)
+        analysis_data["current_plot"][0] = min(
+            PLOT_COUNT, analysis_data["current_plot"][0] + 1
+        )
 
     plot_num = analysis_data["current_plot"][0]
 
+    colorbar = analysis_data.pop("_colorbar", None)
+    if colorbar is not None:
+        colorbar.remove()
+
     if plot_num == 1:
         plot_output_characteristics(analysis_data, ax, canvas, fig, log_widget)
     elif plot_num == 2:
@@ -882,6 +1498,30 @@ def switch_plot(direction, analysis_data, ax, canvas, fig, log_widget):
         plot_concentration_vs_id_sat(analysis_data, ax, canvas, fig, log_widget)
     elif plot_num == 4:
         plot_summary_table(analysis_data, ax, canvas, fig, log_widget)
+    else:
+        plot_vgs_map(
+            analysis_data, ax, canvas, fig, log_widget, *MAP_PLOTS[plot_num - 5]
+        )
+
+
+def shown_target(analysis_data):
+    """Target VSG of the results currently shown"""
+    return analysis_data.get("shown_params", {}).get("target_vsg", TARGET_VSG)
+
+
+def stderr_band(analysis_data, chip):
+    """(Vsd, mean - SE, mean + SE) of the raw replicate mean at the target VSG"""
+    replicates = analysis_data.get("replicates", {}).get(chip)
+    if replicates is None or len(replicates["paths"]) < 2:
+        return None
+    vd, vgs, mean = replicates_to_avg(replicates)
+    stderr = pd.DataFrame(replicates["stderr"], columns=mean.columns)
+    target = shown_target(analysis_data)
+    lo = build_traces_at_vsg({chip: (vd, vgs, mean - stderr)}, target).get(chip)
+    hi = build_traces_at_vsg({chip: (vd, vgs, mean + stderr)}, target).get(chip)
+    if lo is None or hi is None or len(lo[0]) != len(hi[0]):
+        return None
+    return lo[0], lo[1], hi[1]
 
 
 def plot_output_characteristics(analysis_data, ax, canvas, fig, log_widget):
@@ -900,6 +1540,9 @@ def plot_output_characteristics(analysis_data, ax, canvas, fig, log_widget):
         c = _cache[chip]["color"]
         Vsd_raw, Isd_raw = _cache[chip]["raw"]
         ax.plot(Vsd_raw, Isd_raw, "-", color=c, alpha=0.25)
+        band = stderr_band(analysis_data, chip)
+        if band is not None:
+            ax.fill_between(*band, color=c, alpha=0.15, linewidth=0)
         ax.plot(Vsd_arr, Isd_f, "o-", color=c, label=chip)
 
     ax.set_xlim(
@@ -907,7 +1550,7 @@ def plot_output_characteristics(analysis_data, ax, canvas, fig, log_widget):
     )
     ax.set_xlabel("VSD (V)", fontsize=11)
     ax.set_ylabel("ISD (A)", fontsize=11)
-    VSG_LABEL = f"{abs(float(TARGET_VSG)):.2f}"
+    VSG_LABEL = f"{abs(float(shown_target(analysis_data))):.2f}"
     ax.set_title(f"ISD–VSD (filtered) at VSG = {VSG_LABEL} V", fontsize=12)
     ax.grid(True, ls=":")
     ax.legend()
@@ -932,13 +1575,13 @@ def plot_raw_vs_filtered(analysis_data, ax, canvas, fig, log_widget):
     ax.clear()
     xmax = max(np.max(v[0]) for v in focused_filt.values())
 
-    VSG_LABEL = f"{abs(float(TARGET_VSG)):.2f}"
+    VSG_LABEL = f"{abs(float(shown_target(analysis_data))):.2f}"
 
     for chip, (Vsd_arr, Isd_f) in focused_filt.items():
         color = _cache[chip]["color"]
         Vsd_r, Isd_r = _cache[chip]["raw"]
 
-        w = TWO_SLOPE_WINDOWS.get(chip)
+        w = _cache[chip]["windows"]
         if w is not None:
             vx_r, iy_r, (m1r, b1r, m2r, b2r) = two_slope_intersection(
                 Vsd_r, Isd_r, w["steeper"], w["flatter"]
@@ -1017,51 +1660,56 @@ def plot_raw_vs_filtered(analysis_data, ax, canvas, fig, log_widget):
     log_widget.see(tk.END)
 
 
+def calibration_line(name, calibration):
+    """One log line: best model, R², LOD and LOQ of a fitted assay"""
+    best = calibration["best"]
+    fit = calibration["models"][best]
+    unit = calibration.get("concentration_unit", "")
+    return (
+        f"Calibration {name}: {best}, R² {fit.get('r2', np.nan):.3f}, "
+        f"LOD {fit.get('lod', np.nan):.3g} {unit}, LOQ {fit.get('loq', np.nan):.3g} {unit}"
+    )
+
+
 def plot_concentration_vs_id_sat(analysis_data, ax, canvas, fig, log_widget):
-    """Plot 3: Concentration (Dilution) vs Id_sat."""
+    """Plot 3: Calibration of Id_sat against concentration."""
     results = analysis_data.get("results", {})
     _cache = analysis_data.get("_cache", {})
+    calibrations = [
+        calibration
+        for calibration in analysis_data.get("calibrations", {}).values()
+        if calibration.get("response_name") == "Id_sat"
+    ]
 
+    ax.clear()
     if not results:
-        ax.clear()
         ax.set_title("No Data for Concentration Plot")
         canvas.draw_idle()
         return
+    if not calibrations:
+        ax.set_title(f"No concentrations for these chips ({CONCENTRATION_FILE})")
+        canvas.draw_idle()
+        return
 
-    ax.clear()
-    VSG_LABEL = f"{abs(float(TARGET_VSG)):.2f}"
-
-    chip_order = ["5WT7", "5WT6", "5WT5", "5WT4", "5WT3", "5WT2", "5WT1"]
-
-    dilution_values = []
-    dilution_labels = []
-    id_sats = []
-    chip_names = []
-    colors_plot = []
-
-    for chip in chip_order:
-        if chip in results and chip in DILUTION_MAP:
-            dil_num, dil_label = DILUTION_MAP[chip]
-            id_sat = results[chip]["Isd_sat_two_slope_A"]
-            if np.isfinite(id_sat):
-                dilution_values.append(dil_num)
-                dilution_labels.append(dil_label)
-                id_sats.append(id_sat * 1e6)
-                chip_names.append(chip)
-                colors_plot.append(_cache[chip]["color"])
-
-    if dilution_values:
-        ax.plot(
-            dilution_values, id_sats, "o-", linewidth=2, markersize=8, color="#1f77b4"
-        )
+    VSG_LABEL = f"{abs(float(shown_target(analysis_data))):.2f}"
+    concentrations = np.concatenate([c["concentration"] for c in calibrations])
+    log_x = bool(np.all(concentrations > 0))
 
-        for dil_val, idsat, chip, color in zip(
-            dilution_values, id_sats, chip_names, colors_plot
+    ticks = {}
+    for calibration, marker in zip(calibrations, "osD^v<>"):
+        conc = np.asarray(calibration["concentration"])
+        id_sats = np.asarray(calibration["response"]) * 1e6
+        for c, idsat, chip, label in zip(
+            conc, id_sats, calibration["chips"], calibration["labels"]
         ):
+            if not np.isfinite(idsat):
+                continue
+            color = _cache[chip]["color"] if chip in _cache else "#1f77b4"
             ax.scatter(
-                [dil_val],
+                [c],
                 [idsat],
                 s=100,
+                marker=marker,
                 color=color,
                 edgecolors="black",
                 linewidths=1.5,
@@ -1069,7 +1717,7 @@ def plot_concentration_vs_id_sat(analysis_data, ax, canvas, fig, log_widget):
             )
             ax.annotate(
                 chip,
-                (dil_val, idsat),
+                (c, idsat),
                 textcoords="offset points",
                 xytext=(0, 10),
                 ha="center",
@@ -1077,21 +1725,54 @@ def plot_concentration_vs_id_sat(analysis_data, ax, canvas, fig, log_widget):
                 color=color,
                 weight="bold",
             )
+            ticks[c] = label
 
-        ax.set_xticks(dilution_values)
-        ax.set_xticklabels(dilution_labels)
+        lo, hi = np.min(conc), np.max(conc)
+        if log_x:
+            grid = np.geomspace(lo, hi, 200)
+        else:
+            grid = np.linspace(lo, hi, 200)
+        best = calibration["best"]
+        for model, fit in calibration["models"].items():
+            if not fit.get("success"):
+                continue
+            ax.plot(
+                grid,
+                evaluate(calibration, grid, model) * 1e6,
+                "-" if model == best else "--",
+                linewidth=2.5 if model == best else 1.0,
+                alpha=1.0 if model == best else 0.6,
+                label=f"{calibration['analyte']} {model} (R² {fit['r2']:.3f})",
+            )
+        fit = calibration["models"][best]
+        for limit, style in (("lod", ":"), ("loq", "-.")):
+            value = fit.get(limit, np.nan)
+            if np.isfinite(value) and (not log_x or value > 0):
+                ax.axvline(
+                    value,
+                    color="gray",
+                    linestyle=style,
+                    linewidth=1.5,
+                    label=f"{limit.upper()} = {value:.3g} {calibration['concentration_unit']}",
+                )
 
-        ax.set_xlabel("[C]", fontsize=13, weight="bold")
-        ax.set_ylabel("ID sat (µA)", fontsize=12)
-        ax.set_title(
-            f"Concentration vs Saturation Current @ VSG = {VSG_LABEL} V", fontsize=13
-        )
-        ax.grid(True, ls=":", alpha=0.6)
-        ax.spines["top"].set_visible(False)
-        ax.spines["right"].set_visible(False)
-        ax.invert_xaxis()
-    else:
-        ax.set_title("No valid concentration data")
+    if log_x:
+        ax.set_xscale("log")
+        ax.minorticks_off()
+    ax.set_xticks(list(ticks))
+    ax.set_xticklabels(list(ticks.values()))
+
+    unit = calibrations[0]["concentration_unit"]
+    ax.set_xlabel(f"[C] ({unit})" if unit else "[C]", fontsize=13, weight="bold")
+    ax.set_ylabel("ID sat (µA)", fontsize=12)
+    ax.set_title(
+        f"Calibration: Concentration vs Saturation Current @ VSG = {VSG_LABEL} V",
+        fontsize=13,
+    )
+    ax.legend(fontsize=8, loc="best")
+    ax.grid(True, ls=":", alpha=0.6)
+    ax.spines["top"].set_visible(False)
+    ax.spines["right"].set_visible(False)
 
     fig.subplots_adjust(left=0.15, right=0.95, top=0.9, bottom=0.15)
     canvas.draw_idle()
@@ -1099,6 +1780,35 @@ def plot_concentration_vs_id_sat(analysis_data, ax, canvas, fig, log_widget):
     log_widget.see(tk.END)
 
 
+def model_cells(r):
+    """Compact-model cells of a summary row; '*' marks a value at its bound"""
+    at_bounds = r.get("model_at_bounds", [])
+    cells = []
+    for key, fit_name, scale, fmt in (
+        ("Vth_model_V", "vth_V", 1.0, "{:.2f}"),
+        ("k_model_A_V2", "k_A_V2", 1e6, "{:.3g}"),
+        ("lambda_model_1_V", "lambda_1_V", 1.0, "{:.3f}"),
+        ("Rs_model_ohm", "rs_ohm", 1e-3, "{:.3g}"),
+        ("SS_model_V_dec", "ss_V_dec", 1e3, "{:.0f}"),
+        ("R2_model", None, 1.0, "{:.3f}"),
+    ):
+        value = r.get(key, np.nan)
+        if not np.isfinite(value):
+            cells.append("—")
+            continue
+        mark = "*" if fit_name in at_bounds else ""
+        cells.append(fmt.format(value * scale) + mark)
+    return cells
+
+
+def ci_cell(r, name, scale):
+    """'lo–hi' of a bootstrap interval in display units ('—' if missing)"""
+    lo, hi = r.get(f"{name}_ci", (np.nan, np.nan))
+    if not (np.isfinite(lo) and np.isfinite(hi)):
+        return "—"
+    return f"{lo * scale:.3g}–{hi * scale:.3g}"
+
+
 def plot_summary_table(analysis_data, ax, canvas, fig, log_widget):
     """Plot 4: Summary table."""
     results = analysis_data.get("results", {})
@@ -1111,7 +1821,7 @@ def plot_summary_table(analysis_data, ax, canvas, fig, log_widget):
         canvas.draw_idle()
         return
 
-    VSG_LABEL = f"{abs(float(TARGET_VSG)):.2f}"
+    VSG_LABEL = f"{abs(float(shown_target(analysis_data))):.2f}"
 
     headers = [
         "Chip",
@@ -1135,6 +1845,16 @@ def plot_summary_table(analysis_data, ax, canvas, fig, log_widget):
         "signal_rms (µA)",
         "SNR (dB)",
         "DynRange (dB)",
+        "Vth model (V)",
+        "k model (µA/V²)",
+        "λ model (1/V)",
+        "Rs model (kΩ)",
+        "SS model (mV/dec)",
+        "R² model",
+        f"Ron {CI_LEVEL:.0%} CI (MΩ)",
+        f"Vx {CI_LEVEL:.0%} CI (V)",
+        f"Id_sat {CI_LEVEL:.0%} CI (µA)",
+        f"gm {CI_LEVEL:.0%} CI (µS)",
     ]
     rows = []
     for chip in sorted(results.keys()):
@@ -1185,6 +1905,11 @@ def plot_summary_table(analysis_data, ax, canvas, fig, log_widget):
                 f"{sig_rms_uA:.2f}",
                 f"{r['SNR_dB']:.1f}",
                 f"{r['DynRange_dB']:.1f}",
+                *model_cells(r),
+                ci_cell(r, "Ron_ohm", 1e-6),
+                ci_cell(r, "Vx_two_slope_V", 1.0),
+                ci_cell(r, "Id_sat_A", 1e6),
+                ci_cell(r, "gm_S", 1e6),
             ]
         )
 
@@ -1216,3 +1941,74 @@ def plot_summary_table(analysis_data, ax, canvas, fig, log_widget):
     canvas.draw_idle()
     log_widget.insert(tk.END, "Displayed: Summary Table\n")
     log_widget.see(tk.END)
+
+
+def plot_vgs_map(analysis_data, ax, canvas, fig, log_widget, param, label, scale):
+    """Plots 5+: one parameter over chips x VSG as a heatmap."""
+    vgs_maps = analysis_data.get("vgs_maps", {})
+
+    ax.clear()
+    if not vgs_maps:
+        ax.set_title(f"No Data for {label} Map")
+        canvas.draw_idle()
+        return
+
+    fig.suptitle("")
+    fig.subplots_adjust(left=0.15, right=0.95, top=0.9, bottom=0.15)
+    chips, grid, matrix = heatmap_grid(vgs_maps, param)
+    values = np.where(np.isfinite(matrix), matrix * scale, np.nan)
+    image = ax.imshow(values, aspect="auto", cmap="viridis", origin="upper")
+    ax.set_xticks(range(len(grid)))
+    ax.set_xticklabels([f"{v:.1f}" for v in grid])
+    ax.set_yticks(range(len(chips)))
+    ax.set_yticklabels(chips)
+    ax.set_xlabel("VSG (V)", fontsize=11)
+    ax.set_title(f"{label} across VSG", fontsize=12)
+    analysis_data["_colorbar"] = fig.colorbar(image, ax=ax, label=label)
+    canvas.draw_idle()
+    log_widget.insert(tk.END, f"Displayed: {label} map\n")
+    log_widget.see(tk.END)
+
+
+def export_calibration(analysis_data, log_widget):
+    """Save the fitted calibrations as JSON (quantify new samples with
+    python -m analyze.calibration <file> <assay> <response>...)."""
+    calibrations = analysis_data.get("calibrations", {})
+    if not calibrations:
+        log_widget.insert(tk.END, "No calibration to export (run with a concentrations table).\n")
+        log_widget.see(tk.END)
+        return
+    path = filedialog.asksaveasfilename(
+        title="Save calibration",
+        defaultextension=".json",
+        initialfile="calibration.json",
+        filetypes=[("JSON", "*.json")],
+    )
+    if not path:
+        return
+    save_calibrations(path, calibrations)
+    log_widget.insert(tk.END, f"Calibration saved to {path}\n")
+    log_widget.see(tk.END)
+
+
+def export_vgs_maps(analysis_data, log_widget):
+    """Save the parameter-vs-VGS table of every chip as CSV."""
+    vgs_maps = analysis_data.get("vgs_maps", {})
+    if not vgs_maps:
+        log_widget.insert(tk.END, "Run the analysis before exporting VGS maps.\n")
+        log_widget.see(tk.END)
+        return
+    path = filedialog.asksaveasfilename(
+        title="Save VGS maps",
+        defaultextension=".csv",
+        initialfile="vgs_maps.csv",
+        filetypes=[("CSV", "*.csv")],
+    )
+    if not path:
+        return
+    maps_table(vgs_maps, intervals=analysis_data.get("vgs_intervals")).to_csv(
+        path, index=False
+    )
+    log_widget.insert(tk.END, f"VGS maps saved to {path}\n")
+    log_widget.see(tk.END)
+
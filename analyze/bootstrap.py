@@ -0,0 +1,184 @@
+"""
+bootstrap.py - Bootstrap confidence intervals of extracted device parameters
+Usage: ci = chip_bootstrap(vd, vgs, stack, settings, seed=chip_seed("5WT1"))
+       cis = bootstrap_chips({"5WT1": (vd, vgs, stack, settings)})  # process pool
+       lo, hi, se = trace_bootstrap(x, y, extract)                # one trace
+
+The analyze tab reports one value per parameter although every chip is
+measured in several trials (T3/T4/T5). A bootstrap resample of a chip
+combines two sources of spread:
+- the trials are drawn with replacement and averaged (trial-to-trial
+  variation of the whole curve);
+- the residuals of the replicate mean around a local quadratic smooth are
+  added to the smoothed resampled mean with random signs (a wild bootstrap
+  of the point noise within a sweep; each residual stays at its own Vd, as
+  the noise grows with the current).
+
+All resamples of a chip are built as one B x n x k array and fitted by
+chip_parameter_maps() in a few batches, so 1000 resamples cost a handful of
+vectorized passes rather than 1000 separate fits. Intervals are percentile
+intervals per VGS. Each chip's generator is seeded from BOOTSTRAP_SEED and
+the chip name, so its intervals do not depend on which other chips are
+analysed or on how the chips are spread over the workers.
+
+With three trials there are only 10 distinct trial draws, and one trial
+that differs from the other two (as T3 often does in data/5MWT-Oligio)
+widens the interval a lot; that is the trial-to-trial uncertainty of this
+chip, not chip-to-chip spread.
+"""
+
+import warnings
+import zlib
+
+import numpy as np
+from scipy.signal import savgol_filter
+
+from .pool import POOL_WORKERS, pool_map
+from .vectorized import _fill_nans, chip_parameter_maps
+
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_SEED = 0
+CI_LEVEL = 0.95
+# Resamples per chip_parameter_maps() call (bounds the memory of one batch)
+BOOTSTRAP_BATCH = 250
+# Quadratic Savitzky-Golay smooth the residuals are taken around; unlike the
+# moving average it keeps the slope at the sweep ends and through the knee
+RESIDUAL_WINDOW = 7
+BOOTSTRAP_WORKERS = POOL_WORKERS
+CI_PARAMS = (
+    "Ron_ohm",
+    "gsd_S",
+    "VA_V",
+    "Id_sat_A",
+    "Vx_two_slope_V",
+    "gm_S",
+    "SNR_dB",
+)
+
+
+def chip_seed(chip, seed=BOOTSTRAP_SEED):
+    """Seed of one chip's generator (stable across runs and processes)"""
+    return [int(seed), zlib.crc32(str(chip).encode())]
+
+
+def residual_smooth(Y, window=RESIDUAL_WINDOW):
+    """Quadratic Savitzky-Golay smooth down every column (missing points
+    interpolated first); Y itself when the columns are too short"""
+    Y = _fill_nans(Y)
+    window = min(int(window), Y.shape[0] - (1 - Y.shape[0] % 2))
+    if window < 3:
+        return Y
+    return savgol_filter(Y, window, 2, axis=0, mode="interp")
+
+
+def resample_stack(stack, n_boot, rng, window=RESIDUAL_WINDOW):
+    """n_boot resampled Vd x VGS matrices (n_boot x n x k) of a trial x Vd x VGS stack"""
+    stack = np.asarray(stack, dtype=np.float64)
+    trials, n, k = stack.shape
+    picks = rng.integers(0, trials, size=(n_boot, trials))
+    with warnings.catch_warnings():
+        # All-NaN points are expected where a VGS is missing from some trials
+        warnings.simplefilter("ignore", RuntimeWarning)
+        means = np.nanmean(stack[picks], axis=1)
+        mean = np.nanmean(stack, axis=0)
+    missing = ~np.isfinite(means)
+
+    resid = np.where(np.isfinite(mean), mean - residual_smooth(mean, window), 0.0)
+    smoothed = residual_smooth(means.transpose(1, 0, 2).reshape(n, -1), window)
+    smoothed = smoothed.reshape(n, n_boot, k).transpose(1, 0, 2)
+
+    signs = rng.integers(0, 2, size=(n_boot, n, k)) * 2.0 - 1.0
+    out = smoothed + signs * resid
+    out[missing] = np.nan
+    return out
+
+
+def percentile_ci(samples, level=CI_LEVEL):
+    """Lower and upper percentile bounds over the first axis (NaN-aware)"""
+    tail = 100.0 * (1.0 - level) / 2.0
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        lo, hi = np.nanpercentile(samples, [tail, 100.0 - tail], axis=0)
+    return lo, hi
+
+
+def chip_bootstrap(
+    vd,
+    vgs,
+    stack,
+    settings,
+    n_boot=BOOTSTRAP_RESAMPLES,
+    seed=None,
+    level=CI_LEVEL,
+    batch=BOOTSTRAP_BATCH,
+    params=CI_PARAMS,
+):
+    """Bootstrap intervals of every params entry at every VGS of one chip.
+
+    stack is the trial x Vd x VGS array of stack_replicates() and settings
+    the chip_parameter_maps() keyword arguments. Returns a dict with vgs,
+    n_boot, level and, per parameter, <name>_lo, <name>_hi and <name>_se
+    (arrays over VGS).
+    """
+    rng = np.random.default_rng(seed)
+    samples = {name: [] for name in params}
+    done = 0
+    while done < n_boot:
+        size = min(batch, n_boot - done)
+        isd = resample_stack(stack, size, rng)
+        maps = chip_parameter_maps(vd, vgs, isd, **settings)
+        for name in params:
+            samples[name].append(maps[name])
+        done += size
+
+    out = {"vgs": np.asarray(vgs, dtype=np.float64), "n_boot": int(n_boot), "level": level}
+    for name, parts in samples.items():
+        values = np.concatenate(parts)
+        values = np.where(np.isfinite(values), values, np.nan)
+        out[f"{name}_lo"], out[f"{name}_hi"] = percentile_ci(values, level)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            out[f"{name}_se"] = np.nanstd(values, axis=0, ddof=1)
+    return out
+
+
+def trace_bootstrap(
+    x, y, extract, n_boot=BOOTSTRAP_RESAMPLES, seed=None, level=CI_LEVEL, window=RESIDUAL_WINDOW
+):
+    """Bootstrap interval of a parameter of one measured trace (no replicates).
+
+    The residuals of y around residual_smooth() are resampled with
+    random signs as in resample_stack(); extract(x, Y) gets the resamples as
+    the columns of Y (n x n_boot) and returns one value per column.
+    Returns (lo, hi, se).
+    """
+    rng = np.random.default_rng(seed)
+    y = np.asarray(y, dtype=np.float64)
+    smooth = residual_smooth(y[:, None], window)
+    resid = np.where(np.isfinite(y[:, None]), y[:, None] - smooth, 0.0)
+    signs = rng.integers(0, 2, size=(len(y), n_boot)) * 2.0 - 1.0
+    x = np.asarray(x, dtype=np.float64)
+    values = np.asarray(extract(x, smooth + signs * resid), dtype=np.float64)
+    values = np.where(np.isfinite(values), values, np.nan)
+    lo, hi = percentile_ci(values, level)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        se = np.nanstd(values, ddof=1)
+    return float(lo), float(hi), float(se)
+
+
+def _bootstrap_task(item):
+    chip, (vd, vgs, stack, settings), n_boot, seed = item
+    try:
+        return chip, chip_bootstrap(vd, vgs, stack, settings, n_boot, chip_seed(chip, seed))
+    except Exception as e:
+        return chip, {"error": f"{type(e).__name__}: {e}"}
+
+
+def bootstrap_chips(
+    chips, n_boot=BOOTSTRAP_RESAMPLES, seed=BOOTSTRAP_SEED, workers=BOOTSTRAP_WORKERS
+):
+    """chip_bootstrap() of every {chip: (vd, vgs, stack, settings)} entry,
+    on the shared pool; a chip that fails gets {"error": message}"""
+    items = [(chip, task, n_boot, seed) for chip, task in chips.items()]
+    return dict(pool_map(_bootstrap_task, items, workers))
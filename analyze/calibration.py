@@ -0,0 +1,440 @@
+"""
+calibration.py - Dose-response calibration of a device response against concentration
+Usage: table = load_concentrations(folder)             # <folder>/concentrations.csv
+       fits = fit_calibrations({"oligo Id_sat": points})
+       conc = quantify(fits["oligo Id_sat"], measured_response)
+       python -m analyze.calibration calibration.json "oligo Id_sat" 1.8e-8 2.1e-8
+
+concentrations.csv gives every chip's analyte and concentration:
+
+    chip,analyte,concentration,unit,label
+    5WT1,oligo,1,x stock,1:1
+
+A concentration of 0 marks a blank. Each assay (one analyte and one
+response such as Id_sat, gm or ΔI) is fitted with four models:
+
+    linear      y = a + b c
+    log_linear  y = a + b log10(c)                  (blanks left out)
+    4pl         y = y_inf + (y0 - y_inf) / (1 + (c / ec50)^slope)
+    hill        y = y0 + (top - y0) c^n / (k^n + c^n)   (y0 pinned to the blank)
+
+The linear and log-linear fits of all assays are one batched least-squares
+pass; the 4PL and Hill fits use least_squares with analytic Jacobians and
+are spread over a process pool. The model with the lowest AICc is "best".
+
+LOD and LOQ follow the blank + k sigma rule: the concentration at which the
+model reaches the blank response plus 3.3 (LOD) or 10 (LOQ) noise RMS in the
+direction of the response's trend. The noise is the measured baseline RMS
+when given, else the fit's residual standard deviation. The blank response is
+the mean of the blank chips, else the model at zero (at the lowest
+calibrator for log_linear).
+
+Fitted assays are plain dicts (JSON-serialisable), kept in the analysis stage
+cache and saved with save_calibrations() so new samples can be quantified
+later without refitting.
+"""
+
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares
+
+from .pool import POOL_WORKERS, pool_map
+from .vectorized import line_fits
+
+CONCENTRATION_FILE = "concentrations.csv"
+MODELS = ("linear", "log_linear", "4pl", "hill")
+PARAM_NAMES = {
+    "linear": ("a", "b"),
+    "log_linear": ("a", "b"),
+    "4pl": ("y0", "y_inf", "ec50", "slope"),
+    "hill": ("top", "k", "n"),
+}
+LOD_SIGMAS = 3.3
+LOQ_SIGMAS = 10.0
+# Hill/4PL slope range; wider is not identifiable from a few calibrators
+SLOPE_BOUNDS = (0.1, 10.0)
+CALIBRATION_WORKERS = POOL_WORKERS
+MAX_NFEV = 200
+
+
+def load_concentrations(folder):
+    """Rows of <folder>/concentrations.csv (chip, analyte, concentration,
+    unit, label), or None when the folder has no such file"""
+    path = os.path.join(folder, CONCENTRATION_FILE)
+    if not os.path.exists(path):
+        return None
+    table = pd.read_csv(path, comment="#", skipinitialspace=True, dtype=str)
+    table.columns = [c.strip().lower() for c in table.columns]
+    missing = {"chip", "concentration"} - set(table.columns)
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+    for column in ("analyte", "unit", "label"):
+        if column not in table.columns:
+            table[column] = ""
+        table[column] = table[column].fillna("").str.strip()
+    table["chip"] = table["chip"].str.strip()
+    table["concentration"] = pd.to_numeric(table["concentration"], errors="coerce")
+    table = table.dropna(subset=["concentration"]).reset_index(drop=True)
+    no_label = table["label"] == ""
+    table.loc[no_label, "label"] = table.loc[no_label, "concentration"].map("{:g}".format)
+    return table[["chip", "analyte", "concentration", "unit", "label"]]
+
+
+# Models: response and Jacobian (one column per parameter) at concentrations c
+
+
+def _linear(p, c):
+    a, b = p
+    return a + b * c, np.column_stack([np.ones_like(c), c])
+
+
+def _log_linear(p, c):
+    a, b = p
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lc = np.log10(c)
+    return a + b * lc, np.column_stack([np.ones_like(c), lc])
+
+
+def _ratio(c, scale, power):
+    """(c / scale)^power and its log, 0 and 0 at c = 0"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_ratio = np.where(c > 0, np.log(np.where(c > 0, c, 1.0) / scale), 0.0)
+    r = np.where(c > 0, np.exp(power * log_ratio), 0.0)
+    return r, log_ratio
+
+
+def _four_pl(p, c):
+    y0, y_inf, ec50, slope = p
+    r, log_ratio = _ratio(c, ec50, slope)
+    den = 1.0 + r
+    span = y0 - y_inf
+    y = y_inf + span / den
+    jac = np.column_stack(
+        [
+            1.0 / den,
+            r / den,
+            span * slope * r / (ec50 * den * den),
+            -span * r * log_ratio / (den * den),
+        ]
+    )
+    return y, jac
+
+
+def _hill(p, c, y0):
+    top, k, n = p
+    r, log_ratio = _ratio(c, k, n)
+    frac = r / (1.0 + r)
+    dfrac_dr = 1.0 / (1.0 + r) ** 2
+    span = top - y0
+    y = y0 + span * frac
+    jac = np.column_stack(
+        [frac, -span * dfrac_dr * n * r / k, span * dfrac_dr * r * log_ratio]
+    )
+    return y, jac
+
+
+def evaluate(calibration, concentration, model=None):
+    """Response of a fitted model (default: the best) at the given concentrations"""
+    model = model or calibration["best"]
+    fit = calibration["models"][model]
+    c = np.asarray(concentration, dtype=np.float64)
+    p = fit["params"]
+    if model == "linear":
+        return _linear(p, c)[0]
+    if model == "log_linear":
+        return _log_linear(p, c)[0]
+    if model == "4pl":
+        return _four_pl(p, c)[0]
+    return _hill(p, c, calibration["blank_response"])[0]
+
+
+def inverse(calibration, response, model=None):
+    """Concentration at which a fitted model gives the response (NaN outside
+    the model's range)"""
+    model = model or calibration["best"]
+    p = calibration["models"][model]["params"]
+    y = np.asarray(response, dtype=np.float64)
+    with np.errstate(all="ignore"):
+        if model == "linear":
+            c = (y - p[0]) / p[1]
+        elif model == "log_linear":
+            c = 10.0 ** ((y - p[0]) / p[1])
+        elif model == "4pl":
+            y0, y_inf, ec50, slope = p
+            c = ec50 * ((y0 - y_inf) / (y - y_inf) - 1.0) ** (1.0 / slope)
+        else:
+            top, k, n = p
+            y0 = calibration["blank_response"]
+            u = (y - y0) / (top - y0)
+            c = k * (u / (1.0 - u)) ** (1.0 / n)
+    c = np.where(np.isfinite(c) & (c >= 0), c, np.nan)
+    return c if c.ndim else float(c)
+
+
+quantify = inverse
+
+
+def _aicc(rss, n, k):
+    if n - k - 1 <= 0 or rss <= 0:
+        return np.inf
+    return n * np.log(rss / n) + 2 * k + 2 * k * (k + 1) / (n - k - 1)
+
+
+def _summary(name, params, y, predicted, success=True, message=""):
+    resid = y - predicted
+    rss = float(np.sum(resid**2))
+    tss = float(np.sum((y - y.mean()) ** 2))
+    k = len(params)
+    return {
+        "params": [float(v) for v in params],
+        "param_names": list(PARAM_NAMES[name]),
+        "points": int(len(y)),
+        "r2": 1.0 - rss / tss if tss > 0 else 0.0,
+        "rmse": float(np.sqrt(rss / len(y))),
+        "residual_sd": float(np.sqrt(rss / (len(y) - k))) if len(y) > k else np.nan,
+        "aicc": float(_aicc(rss, len(y), k)),
+        "success": bool(success and np.all(np.isfinite(params))),
+        "message": message,
+    }
+
+
+def _line_models(assays):
+    """linear and log_linear fits of every assay in one batched pass"""
+    names = list(assays)
+    n_max = max(len(assays[a]["concentration"]) for a in names)
+    C = np.full((n_max, len(names)), np.nan)
+    Y = np.full((n_max, len(names)), np.nan)
+    for j, a in enumerate(names):
+        c, y = assays[a]["concentration"], assays[a]["response"]
+        C[: len(c), j], Y[: len(y), j] = c, y
+    ok = np.isfinite(C) & np.isfinite(Y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logC = np.where(ok & (C > 0), np.log10(C), np.nan)
+    out = {a: {} for a in names}
+    for model, X, mask in (
+        ("linear", C, ok),
+        ("log_linear", logC, ok & np.isfinite(logC)),
+    ):
+        slope, intercept, _, _ = line_fits(
+            np.where(mask, X, 0.0), np.where(mask, Y, 0.0), mask
+        )
+        for j, a in enumerate(names):
+            m = mask[:, j]
+            params = (intercept[j], slope[j])
+            predicted = intercept[j] + slope[j] * X[m, j]
+            out[a][model] = _summary(model, params, Y[m, j], predicted)
+    return out
+
+
+def _curve_models(assay):
+    """4pl and hill fits of one assay"""
+    c = np.asarray(assay["concentration"], dtype=np.float64)
+    y = np.asarray(assay["response"], dtype=np.float64)
+    ok = np.isfinite(c) & np.isfinite(y)
+    c, y = c[ok], y[ok]
+    y0 = assay["blank_response"]
+    positive = c[c > 0]
+    out = {}
+    if len(positive) < 2:
+        return out
+    order = np.argsort(c)
+    y_lo, y_hi = float(y[order][0]), float(y[order][-1])
+    mid = float(np.sqrt(positive.min() * positive.max()))
+    c_hi = float(positive.max())
+    scale = max(float(np.max(np.abs(y))), 1e-30)
+
+    fits = {
+        "4pl": (
+            lambda p: _four_pl(p, c),
+            [y0 if np.isfinite(y0) else y_lo, y_hi, mid, 1.0],
+            (
+                [-np.inf, -np.inf, 1e-6 * positive.min(), SLOPE_BOUNDS[0]],
+                [np.inf, np.inf, 1e3 * c_hi, SLOPE_BOUNDS[1]],
+            ),
+        ),
+        "hill": (
+            lambda p: _hill(p, c, y0),
+            [y_hi, mid, 1.0],
+            (
+                [-np.inf, 1e-6 * positive.min(), SLOPE_BOUNDS[0]],
+                [np.inf, 1e3 * c_hi, SLOPE_BOUNDS[1]],
+            ),
+        ),
+    }
+    for name, (model, x0, bounds) in fits.items():
+        if len(y) <= len(x0):
+            continue
+        try:
+            result = least_squares(
+                lambda p: (model(p)[0] - y) / scale,
+                x0,
+                jac=lambda p: model(p)[1] / scale,
+                bounds=bounds,
+                x_scale="jac",
+                max_nfev=MAX_NFEV,
+            )
+        except ValueError as e:
+            out[name] = {"success": False, "message": str(e)}
+            continue
+        out[name] = _summary(
+            name, result.x, y, model(result.x)[0], result.success, str(result.message)
+        )
+    return out
+
+
+def _limits(calibration):
+    """LOD and LOQ of every successful model, in place"""
+    c = np.asarray(calibration["concentration"], dtype=np.float64)
+    positive = c[c > 0]
+    for name, fit in calibration["models"].items():
+        fit["lod"] = fit["loq"] = np.nan
+        if not fit.get("success") or not len(positive):
+            continue
+        sigma = calibration["noise"]
+        if not np.isfinite(sigma) or sigma <= 0:
+            sigma = fit["residual_sd"]
+        blank = calibration["measured_blank"]
+        if not np.isfinite(blank):
+            at = positive.min() if name == "log_linear" else 0.0
+            blank = float(evaluate(calibration, at, name))
+        trend = np.sign(
+            evaluate(calibration, positive.max(), name)
+            - evaluate(calibration, positive.min(), name)
+        )
+        if trend == 0 or not np.isfinite(sigma):
+            continue
+        fit["lod"] = inverse(calibration, blank + trend * LOD_SIGMAS * sigma, name)
+        fit["loq"] = inverse(calibration, blank + trend * LOQ_SIGMAS * sigma, name)
+
+
+def _curve_task(item):
+    name, assay = item
+    try:
+        return name, _curve_models(assay)
+    except Exception as e:
+        failed = {"success": False, "message": f"{type(e).__name__}: {e}"}
+        return name, {"4pl": dict(failed), "hill": dict(failed)}
+
+
+def calibration_assay(concentration, response, noise=np.nan, **info):
+    """An assay to fit: concentrations and responses (blanks have
+    concentration 0), the noise RMS of the response (NaN: use the residuals)
+    and any descriptive fields (analyte, response_name, response_unit,
+    concentration_unit, chips, labels, ...)"""
+    c = np.asarray(concentration, dtype=np.float64)
+    y = np.asarray(response, dtype=np.float64)
+    ok = np.isfinite(c) & np.isfinite(y)
+    blanks = ok & (c == 0)
+    measured_blank = float(np.mean(y[blanks])) if blanks.any() else np.nan
+    if blanks.any():
+        blank_response = measured_blank
+    elif ok.any():
+        blank_response = float(y[ok][np.argmin(c[ok])])
+    else:
+        blank_response = np.nan
+    return {
+        **info,
+        "concentration": [float(v) for v in c],
+        "response": [float(v) for v in y],
+        "noise": float(noise),
+        "measured_blank": measured_blank,
+        "blank_response": blank_response,
+    }
+
+
+def fit_calibrations(assays, workers=CALIBRATION_WORKERS):
+    """Every model of every {name: calibration_assay()} entry.
+
+    Returns {name: assay dict + "models" ({model: fit}) + "best"}; a fit has
+    params, param_names, r2, rmse, residual_sd, aicc, lod, loq, success.
+    """
+    assays = {
+        name: assay
+        for name, assay in assays.items()
+        if np.sum(np.isfinite(assay["concentration"]) & np.isfinite(assay["response"])) >= 3
+    }
+    if not assays:
+        return {}
+    lines = _line_models(
+        {
+            name: {k: np.asarray(a[k]) for k in ("concentration", "response")}
+            for name, a in assays.items()
+        }
+    )
+    curves = dict(pool_map(_curve_task, assays.items(), workers))
+
+    out = {}
+    for name, assay in assays.items():
+        calibration = dict(assay)
+        calibration["models"] = {**lines[name], **curves[name]}
+        _limits(calibration)
+        ranked = [
+            (fit["aicc"], model)
+            for model, fit in calibration["models"].items()
+            if fit.get("success") and np.isfinite(fit.get("aicc", np.inf))
+        ]
+        calibration["best"] = min(ranked)[1] if ranked else "linear"
+        out[name] = calibration
+    return out
+
+
+def save_calibrations(path, calibrations):
+    """Write fitted assays as JSON (NaN kept as null)"""
+
+    def clean(value):
+        if isinstance(value, dict):
+            return {k: clean(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple, np.ndarray)):
+            return [clean(v) for v in value]
+        if isinstance(value, (float, np.floating)):
+            return float(value) if np.isfinite(value) else None
+        if isinstance(value, np.integer):
+            return int(value)
+        return value
+
+    with open(path, "w") as f:
+        json.dump(clean(calibrations), f, indent=1)
+
+
+def load_calibrations(path):
+    """Fitted assays saved by save_calibrations()"""
+
+    def restore(value):
+        if isinstance(value, dict):
+            return {k: restore(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [restore(v) for v in value]
+        return np.nan if value is None else value
+
+    with open(path) as f:
+        return restore(json.load(f))
+
+
+def main(argv):
+    if len(argv) < 2:
+        print("Usage: python -m analyze.calibration calibration.json [assay response...]")
+        return 2
+    calibrations = load_calibrations(argv[0])
+    if argv[1] not in calibrations:
+        print(f"Unknown assay {argv[1]!r}; saved: {', '.join(calibrations)}")
+        return 1
+    calibration = calibrations[argv[1]]
+    fit = calibration["models"][calibration["best"]]
+    unit = calibration.get("concentration_unit", "")
+    print(
+        f"{argv[1]}: {calibration['best']}, R² {fit['r2']:.4f}, "
+        f"LOD {fit['lod']:.4g} {unit}, LOQ {fit['loq']:.4g} {unit}"
+    )
+    for value in argv[2:]:
+        print(f"{value} -> {inverse(calibration, float(value)):.4g} {unit}")
+    return 0
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", RuntimeWarning)
+    sys.exit(main(sys.argv[1:]))
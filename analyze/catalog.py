@@ -0,0 +1,377 @@
+"""
+catalog.py - SQLite index of the data/ tree
+Usage: catalog = Catalog(root); catalog.scan()
+       catalog.query(chip="Default Chip", mode="transfer", since="2025-06-01")
+       python -m analyze.catalog [root] [--chip C] [--trial T] [--mode M] [--since D] [--until D]
+
+Every run folder (data/<Chip>/<Trial - YYYYMMDD_HHMMSS>/) and data file in
+it (.xlsx, .csv, .run.npz, .journal.jsonl, .table.npz) gets one row with the
+chip, trial, timestamp, mode, sweep range and constant voltages. Only the
+first rows of spreadsheets are read. scan() revisits files whose size or
+mtime changed and drops files that are gone, so a rescan of an unchanged
+tree only stats it.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from collect.journal import JOURNAL_SUFFIX
+from collect.run_format import RUN_SUFFIX, TABLE_SUFFIX, read_meta
+
+from .layouts import DATA_ROOT, describe_file, parse_location
+
+CATALOG_NAME = ".catalog.sqlite"
+SCHEMA_VERSION = 1
+TIMESTAMP_RE = re.compile(r"(\d{8}_\d{6})")
+
+# Longest suffix first so x.run.npz is not taken for a plain .npz
+FILE_TYPES = (
+    (RUN_SUFFIX, "run"),
+    (TABLE_SUFFIX, "table"),
+    (JOURNAL_SUFFIX, "journal"),
+    (".xlsx", "xlsx"),
+    (".csv", "csv"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    folder TEXT,
+    chip TEXT,
+    trial TEXT,
+    folder_kind TEXT,
+    timestamp TEXT,
+    started TEXT,
+    file_type TEXT,
+    layout TEXT,
+    mode TEXT,
+    sweep_start REAL,
+    sweep_end REAL,
+    number_of_steps REAL,
+    constant_voltages TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS files_chip ON files (chip, trial);
+CREATE INDEX IF NOT EXISTS files_started ON files (started);
+CREATE INDEX IF NOT EXISTS files_mode ON files (mode);
+CREATE VIEW IF NOT EXISTS runs AS
+    SELECT folder, chip, trial, folder_kind, timestamp, started,
+           group_concat(DISTINCT mode) AS modes, count(*) AS files
+    FROM files GROUP BY folder;
+"""
+
+COLUMNS = (
+    "path",
+    "folder",
+    "chip",
+    "trial",
+    "folder_kind",
+    "timestamp",
+    "started",
+    "file_type",
+    "layout",
+    "mode",
+    "sweep_start",
+    "sweep_end",
+    "number_of_steps",
+    "constant_voltages",
+    "size",
+    "mtime_ns",
+    "error",
+)
+
+
+def file_type(name):
+    lower = name.lower()
+    if lower.startswith("~$") or lower.endswith("#"):
+        return None
+    for suffix, kind in FILE_TYPES:
+        if lower.endswith(suffix):
+            return kind
+    return None
+
+
+def timestamp_iso(timestamp):
+    """'20250625_132749' -> '2025-06-25T13:27:49' (None if it does not parse)"""
+    try:
+        return datetime.datetime.strptime(timestamp, "%Y%m%d_%H%M%S").isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def _bound(value, end=False):
+    # since/until accept datetime, date, 'YYYY-MM-DD[...]' or 'YYYYMMDD_HHMMSS'
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(timespec="seconds")
+    if isinstance(value, datetime.date):
+        value = value.isoformat()
+    value = str(value)
+    if TIMESTAMP_RE.fullmatch(value):
+        return timestamp_iso(value)
+    if end and len(value) == 10:
+        # A bare date includes the whole day
+        return value + "T23:59:59"
+    return value
+
+
+def describe(root, path):
+    """Catalog row (dict) for one data file; read errors go into "error" """
+    rel = os.path.relpath(path, root)
+    stat = os.stat(path)
+    location = parse_location(root, path)
+    row = dict.fromkeys(COLUMNS)
+    row.update(
+        {
+            "path": rel,
+            "folder": os.path.dirname(rel),
+            "chip": location.get("chip_name"),
+            "trial": location.get("trial_name"),
+            "folder_kind": location.get("folder_kind"),
+            "timestamp": location.get("timestamp"),
+            "file_type": file_type(os.path.basename(path)),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+    )
+    if row["timestamp"] is None:
+        m = TIMESTAMP_RE.search(os.path.basename(path))
+        row["timestamp"] = m.group(1) if m else None
+    row["started"] = timestamp_iso(row["timestamp"])
+
+    try:
+        if row["file_type"] in ("run", "table"):
+            meta = read_meta(path)
+            layout = meta.get("layout", row["file_type"])
+        elif row["file_type"] == "journal":
+            with open(path, encoding="utf-8") as f:
+                meta = json.loads(f.readline())
+            layout = "journal"
+        else:
+            described = describe_file(path)
+            meta, layout = described["meta"], described["layout"]
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        return row
+
+    row["layout"] = layout
+    row["mode"] = meta.get("mode")
+    if row["mode"] is None and layout == "baseline_xlsx":
+        row["mode"] = "baseline"
+    for key in ("sweep_start", "sweep_end", "number_of_steps"):
+        value = meta.get(key)
+        row[key] = value if isinstance(value, (int, float)) else None
+    voltages = meta.get("constant_voltage_values")
+    if voltages:
+        row["constant_voltages"] = json.dumps(voltages)
+    # A run file written by collect knows its chip/trial better than the path does
+    for key, column in (("chip_name", "chip"), ("trial_name", "trial")):
+        if row["file_type"] in ("run", "journal") and meta.get(key):
+            row[column] = meta[key]
+    return row
+
+
+class Catalog:
+    """Index of the data files under root, stored in root/.catalog.sqlite"""
+
+    def __init__(self, root=DATA_ROOT, path=None):
+        self.root = root
+        self.path = path or os.path.join(root, CATALOG_NAME)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+            db.execute(
+                "INSERT OR REPLACE INTO info VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+
+    def _connect(self):
+        # One short-lived connection per call, so the GUI can query while a
+        # background thread rescans
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def scan(self, progress=None):
+        """Bring the index up to date; returns counts of what changed"""
+        started = time.perf_counter()
+        with self._connect() as db:
+            known = {
+                r["path"]: (r["size"], r["mtime_ns"])
+                for r in db.execute("SELECT path, size, mtime_ns FROM files")
+            }
+        seen = set()
+        changed = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if file_type(name) is None:
+                    continue
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.root)
+                seen.add(rel)
+                stat = os.stat(path)
+                if known.get(rel) != (stat.st_size, stat.st_mtime_ns):
+                    changed.append(path)
+
+        rows = []
+        for i, path in enumerate(changed):
+            rows.append(describe(self.root, path))
+            if progress is not None:
+                progress(i + 1, len(changed))
+        removed = sorted(set(known) - seen)
+
+        with self._connect() as db:
+            db.executemany(
+                f"INSERT OR REPLACE INTO files ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(COLUMNS))})",
+                [tuple(row[c] for c in COLUMNS) for row in rows],
+            )
+            db.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+            db.execute(
+                "INSERT OR REPLACE INTO info VALUES ('scanned', ?)",
+                (datetime.datetime.now().isoformat(timespec="seconds"),),
+            )
+        return {
+            "files": len(seen),
+            "added": sum(os.path.relpath(p, self.root) not in known for p in changed),
+            "updated": sum(os.path.relpath(p, self.root) in known for p in changed),
+            "removed": len(removed),
+            "errors": sum(row["error"] is not None for row in rows),
+            "elapsed": time.perf_counter() - started,
+        }
+
+    def query(
+        self,
+        chip=None,
+        trial=None,
+        mode=None,
+        file_type=None,
+        layout=None,
+        folder=None,
+        since=None,
+        until=None,
+        constant_voltage=None,
+    ):
+        """Matching files as dicts (oldest first); "abs_path" is added to each.
+
+        since/until take a date, datetime or string and bound the run
+        timestamp; constant_voltage keeps files that swept that condition.
+        """
+        where, args = [], []
+        for column, value in (
+            ("chip", chip),
+            ("trial", trial),
+            ("mode", mode),
+            ("file_type", file_type),
+            ("layout", layout),
+            ("folder", folder),
+        ):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        if since is not None:
+            where.append("started >= ?")
+            args.append(_bound(since))
+        if until is not None:
+            where.append("started <= ?")
+            args.append(_bound(until, end=True))
+        sql = "SELECT * FROM files"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started, path"
+
+        with self._connect() as db:
+            rows = [dict(r) for r in db.execute(sql, args)]
+        matches = []
+        for row in rows:
+            voltages = json.loads(row["constant_voltages"] or "[]")
+            row["constant_voltages"] = voltages
+            if constant_voltage is not None and not any(
+                abs(v - constant_voltage) < 1e-6 for v in voltages
+            ):
+                continue
+            row["abs_path"] = os.path.join(self.root, row["path"])
+            matches.append(row)
+        return matches
+
+    def chips(self):
+        with self._connect() as db:
+            return [
+                r["chip"]
+                for r in db.execute(
+                    "SELECT DISTINCT chip FROM files WHERE chip IS NOT NULL ORDER BY chip"
+                )
+            ]
+
+    def runs(self, chip=None):
+        """Run folders (newest first) with their trial, timestamp and modes"""
+        sql = "SELECT * FROM runs WHERE folder != ''"
+        args = []
+        if chip is not None:
+            sql += " AND chip = ?"
+            args.append(chip)
+        sql += " ORDER BY started DESC, folder"
+        with self._connect() as db:
+            return [dict(r) for r in db.execute(sql, args)]
+
+
+def run_label(run):
+    """'Trial 1 - 2025-06-25 13:27 (output)' for pickers"""
+    label = os.path.basename(run["folder"])
+    if run["started"]:
+        label = f"{run['trial'] or run['folder_kind']} - {run['started'].replace('T', ' ')[:16]}"
+    if run["modes"]:
+        label += f" ({run['modes']})"
+    return label
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m analyze.catalog", description="Rescan and query the data catalog"
+    )
+    parser.add_argument("root", nargs="?", default=DATA_ROOT)
+    parser.add_argument("--chip")
+    parser.add_argument("--trial")
+    parser.add_argument("--mode", help="output, transfer or baseline")
+    parser.add_argument("--type", dest="file_type", help="xlsx, csv, run, journal or table")
+    parser.add_argument("--since", help="YYYY-MM-DD")
+    parser.add_argument("--until", help="YYYY-MM-DD")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        print(f"{args.root} is not a directory")
+        return 2
+    catalog = Catalog(args.root)
+    counts = catalog.scan()
+    print(
+        f"{counts['files']} files indexed in {counts['elapsed']:.2f} s "
+        f"({counts['added']} added, {counts['updated']} updated, "
+        f"{counts['removed']} removed, {counts['errors']} unreadable)"
+    )
+    rows = catalog.query(
+        chip=args.chip,
+        trial=args.trial,
+        mode=args.mode,
+        file_type=args.file_type,
+        since=args.since,
+        until=args.until,
+    )
+    for row in rows:
+        print(f"{row['started'] or '-':19}  {row['mode'] or '-':10}  {row['path']}")
+    print(f"{len(rows)} matches")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
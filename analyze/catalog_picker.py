@@ -0,0 +1,139 @@
+"""
+catalog_picker.py - Chip / run (/ file) picker backed by the data catalog
+Usage: create_catalog_picker(parent, on_select, with_files=False)
+
+The catalog is rescanned on a worker thread when the picker is built and
+when Refresh is pressed; the combo boxes are filled from the index.
+on_select(path) gets the chip folder, the run folder or (with_files) the
+data file that was picked; log(message) receives scan results.
+"""
+
+import os
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from .catalog import Catalog, run_label
+from .layouts import DATA_ROOT
+
+ALL_RUNS = "(all runs)"
+POLL_MS = 100
+# Files offered by the plot tab's picker
+PLOT_FILE_TYPES = ("run", "xlsx")
+
+
+def create_catalog_picker(parent, on_select, with_files=False, root=DATA_ROOT, log=None):
+    frame = tk.LabelFrame(parent, text="Catalog", relief=tk.SUNKEN, borderwidth=2)
+    frame.pack(fill="x", padx=10, pady=5)
+    frame.grid_columnconfigure(1, weight=1)
+
+    chip_var = tk.StringVar()
+    run_var = tk.StringVar()
+    file_var = tk.StringVar()
+    status_var = tk.StringVar(value="Indexing...")
+    state = {"catalog": None, "runs": [], "files": []}
+
+    tk.Label(frame, text="Chip:").grid(row=0, column=0, sticky="e", padx=5, pady=2)
+    chip_box = ttk.Combobox(frame, textvariable=chip_var, state="readonly", width=24)
+    chip_box.grid(row=0, column=1, sticky="ew", padx=5, pady=2)
+    tk.Label(frame, text="Run:").grid(row=1, column=0, sticky="e", padx=5, pady=2)
+    run_box = ttk.Combobox(frame, textvariable=run_var, state="readonly", width=24)
+    run_box.grid(row=1, column=1, sticky="ew", padx=5, pady=2)
+    file_box = None
+    if with_files:
+        tk.Label(frame, text="File:").grid(row=2, column=0, sticky="e", padx=5, pady=2)
+        file_box = ttk.Combobox(frame, textvariable=file_var, state="readonly", width=24)
+        file_box.grid(row=2, column=1, sticky="ew", padx=5, pady=2)
+
+    refresh_button = tk.Button(frame, text="Refresh", width=8)
+    refresh_button.grid(row=3, column=0, padx=5, pady=5)
+    tk.Label(frame, textvariable=status_var, anchor="w", bg="lightgrey").grid(
+        row=3, column=1, sticky="ew", padx=5, pady=5
+    )
+
+    def report(message):
+        if log is not None:
+            log(message)
+
+    def on_chip(event=None):
+        chip = chip_var.get()
+        state["runs"] = state["catalog"].runs(chip)
+        run_box["values"] = [ALL_RUNS] + [run_label(r) for r in state["runs"]]
+        run_var.set(ALL_RUNS)
+        if file_box is not None:
+            file_box["values"] = []
+            file_var.set("")
+        on_select(os.path.join(root, chip))
+
+    def on_run(event=None):
+        index = run_box.current()
+        if index <= 0:
+            return on_chip()
+        run = state["runs"][index - 1]
+        if file_box is not None:
+            state["files"] = [
+                f
+                for f in state["catalog"].query(folder=run["folder"])
+                if f["file_type"] in PLOT_FILE_TYPES and f["mode"] is not None
+            ]
+            file_box["values"] = [os.path.basename(f["path"]) for f in state["files"]]
+            file_var.set("")
+        on_select(os.path.join(root, run["folder"]))
+
+    def on_file(event=None):
+        index = file_box.current()
+        if index >= 0:
+            on_select(state["files"][index]["abs_path"])
+
+    def fill_chips():
+        chips = state["catalog"].chips()
+        chip_box["values"] = chips
+        if chip_var.get() in chips:
+            on_chip()
+
+    def refresh():
+        if not os.path.isdir(root):
+            status_var.set(f"{root} not found")
+            return
+        refresh_button.config(state=tk.DISABLED)
+        status_var.set("Indexing...")
+        result = {}
+
+        def work():
+            try:
+                catalog = Catalog(root)
+                result["counts"] = catalog.scan()
+                result["catalog"] = catalog
+            except Exception as e:
+                result["error"] = e
+
+        def poll():
+            if thread.is_alive():
+                frame.after(POLL_MS, poll)
+                return
+            refresh_button.config(state=tk.NORMAL)
+            if "error" in result:
+                status_var.set("Catalog unavailable")
+                report(f"Catalog scan failed: {result['error']}")
+                return
+            counts = result["counts"]
+            state["catalog"] = result["catalog"]
+            status_var.set(f"{counts['files']} files indexed")
+            if counts["added"] or counts["updated"] or counts["removed"]:
+                report(
+                    f"Catalog: {counts['added']} added, {counts['updated']} updated, "
+                    f"{counts['removed']} removed ({counts['elapsed']:.1f} s)"
+                )
+            fill_chips()
+
+        thread = threading.Thread(target=work, daemon=True)
+        thread.start()
+        frame.after(POLL_MS, poll)
+
+    chip_box.bind("<<ComboboxSelected>>", on_chip)
+    run_box.bind("<<ComboboxSelected>>", on_run)
+    if file_box is not None:
+        file_box.bind("<<ComboboxSelected>>", on_file)
+    refresh_button.config(command=refresh)
+    refresh()
+    return frame
@@ -0,0 +1,150 @@
+"""
+knee.py - Automatic two-slope knee detection by segmented regression
+Usage: knee = detect_knee(vsd, isd)              # one trace
+       knees = knee_fits(vsd, isd_matrix)        # every column at once
+
+Fits a pair of straight lines to a trace, one left and one right of a
+breakpoint, and picks the breakpoint with the least total squared error.
+Prefix sums of 1, x, y, x², xy and y² give the line fit on either side of
+every candidate in O(1), so all candidates of a trace are scored in O(n),
+batched over the columns of a Vd x VGS matrix (and over chips sharing a grid
+when x is given per column).
+
+The knee is where the two lines intersect, as in two_slope_intersection().
+confidence = 1 - SSE(two lines) / SSE(one line) is how much of the single
+line's residual the break explains; traces below KNEE_MIN_CONFIDENCE are
+treated as having no knee.
+"""
+
+import numpy as np
+
+MIN_SEGMENT_POINTS = 3
+KNEE_MIN_CONFIDENCE = 0.5
+# Only the forward-biased part of the sweep (Vsd >= 0) is searched
+KNEE_X_MIN = 0.0
+
+
+def _prefix(values):
+    out = np.zeros((values.shape[0] + 1,) + values.shape[1:])
+    np.cumsum(values, axis=0, out=out[1:])
+    return out
+
+
+def _segment_fit(s0, sx, sy, sxx, sxy, syy):
+    """Slope, intercept and SSE of the least-squares line from raw sums"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vxx = sxx - sx * sx / s0
+        vxy = sxy - sx * sy / s0
+        vyy = syy - sy * sy / s0
+        slope = vxy / vxx
+        intercept = (sy - slope * sx) / s0
+        sse = np.maximum(vyy - slope * vxy, 0.0)
+        r2 = np.where(vyy > 0, 1 - sse / vyy, 0.0)
+    return slope, intercept, sse, r2
+
+
+def knee_fits(x, Y, valid=None, min_points=MIN_SEGMENT_POINTS, x_min=KNEE_X_MIN):
+    """Best two-line breakpoint of every column of Y (n x k).
+
+    x is ascending, shared (n,) or per column (n, k). Returns a dict of
+    length-k arrays: index (first row of the right segment), breakpoint
+    (x there), knee_v/knee_i (intersection of the lines), m1, b1 (left),
+    m2, b2 (right), r2_left, r2_right and confidence. Columns with fewer
+    than 2 * min_points usable points get NaN and confidence 0.
+    """
+    Y = np.asarray(Y, dtype=np.float64)
+    if Y.ndim == 1:
+        Y = Y[:, None]
+    n, k = Y.shape
+    X = np.broadcast_to(np.asarray(x, dtype=np.float64).reshape(n, -1), (n, k))
+    use = np.isfinite(X) & np.isfinite(Y) & (X >= x_min)
+    if valid is not None:
+        use &= np.asarray(valid, dtype=bool).reshape(n, -1)
+
+    # Centre and scale per column so the raw-sum formulas keep their precision
+    w = use.astype(np.float64)
+    count = w.sum(axis=0)
+    safe = np.maximum(count, 1)
+    x0 = np.where(use, X, 0).sum(axis=0) / safe
+    y0 = np.where(use, Y, 0).sum(axis=0) / safe
+    xs = np.where(use, X - x0, 0.0)
+    ys = np.where(use, Y - y0, 0.0)
+    x_scale = np.sqrt((xs * xs).sum(axis=0) / safe)
+    y_scale = np.sqrt((ys * ys).sum(axis=0) / safe)
+    x_scale = np.where(x_scale > 0, x_scale, 1.0)
+    y_scale = np.where(y_scale > 0, y_scale, 1.0)
+    xs /= x_scale
+    ys /= y_scale
+
+    sums = [_prefix(v) for v in (w, xs, ys, xs * xs, xs * ys, ys * ys)]
+    left = [s[1:n] for s in sums]  # rows [0, b) for b = 1 .. n-1
+    right = [s[n] - s[1:n] for s in sums]
+
+    m1, b1, sse1, r2_1 = _segment_fit(*left)
+    m2, b2, sse2, r2_2 = _segment_fit(*right)
+    total = sse1 + sse2
+    ok = (left[0] >= min_points) & (right[0] >= min_points)
+    total = np.where(ok & np.isfinite(total), total, np.inf)
+    best = np.argmin(total, axis=0)
+    cols = np.arange(k)
+    found = np.isfinite(total[best, cols])
+
+    _, _, sse_single, _ = _segment_fit(*[s[n] for s in sums])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        confidence = np.where(sse_single > 0, 1 - total[best, cols] / sse_single, 0.0)
+    confidence = np.where(found, np.clip(confidence, 0.0, 1.0), 0.0)
+
+    # Back to the original units: y = y0 + y_scale * (m * (x - x0) / x_scale + b)
+    def unscale(m, b):
+        slope = m[best, cols] * y_scale / x_scale
+        intercept = y0 + y_scale * b[best, cols] - slope * x0
+        return np.where(found, slope, np.nan), np.where(found, intercept, np.nan)
+
+    m1, b1 = unscale(m1, b1)
+    m2, b2 = unscale(m2, b2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        knee_v = (b2 - b1) / (m1 - m2)
+    knee_v = np.where(np.isclose(m1, m2, rtol=1e-9, atol=0.0), np.nan, knee_v)
+    index = best + 1
+    return {
+        "index": np.where(found, index, -1),
+        "breakpoint": np.where(found, X[np.minimum(index, n - 1), cols], np.nan),
+        "knee_v": knee_v,
+        "knee_i": m1 * knee_v + b1,
+        "m1": m1,
+        "b1": b1,
+        "m2": m2,
+        "b2": b2,
+        "r2_left": np.where(found, r2_1[best, cols], np.nan),
+        "r2_right": np.where(found, r2_2[best, cols], np.nan),
+        "confidence": confidence,
+    }
+
+
+def detect_knee(x, y, min_points=MIN_SEGMENT_POINTS, x_min=KNEE_X_MIN):
+    """knee_fits() of a single trace, as plain floats"""
+    fits = knee_fits(x, np.asarray(y, dtype=np.float64)[:, None], None, min_points, x_min)
+    out = {name: float(values[0]) for name, values in fits.items()}
+    out["index"] = int(fits["index"][0])
+    return out
+
+
+def knee_windows(x, knee, min_confidence=KNEE_MIN_CONFIDENCE):
+    """A detected knee as a TWO_SLOPE_WINDOWS entry, or None if not confident.
+
+    The left segment becomes "steeper" and the right (saturation side)
+    "flatter"; the inclusive windows select exactly the fitted points.
+    """
+    if knee["index"] < 1 or not knee["confidence"] >= min_confidence:
+        return None
+    x = np.asarray(x, dtype=np.float64)
+    left = x[: knee["index"]]
+    left = left[np.isfinite(left) & (left >= KNEE_X_MIN)]
+    right = x[knee["index"] :]
+    right = right[np.isfinite(right)]
+    if not len(left) or not len(right):
+        return None
+    return {
+        "steeper": (float(left[0]), float(left[-1])),
+        "flatter": (float(right[0]), float(right[-1])),
+    }
@@ -0,0 +1,266 @@
+"""
+layouts.py - Readers for the xlsx/csv layouts found under data/
+Usage: parsed = parse_file(path); run_data = sweep_run_data(parsed)
+
+Layouts:
+    genesys_csv   SoftPlot for Genesys Testlink export: rows 1-4 Start/Stop/Points,
+                  row 5 "X-Axis (V)" + two blocks (Is, Id or Ig) per VGS
+    sweep_xlsx    collect tab *_VSD_ISID_*, *_VSD_ISIG_*, *_VSG_IDIS_*: rows 1-4
+                  title/Sweep Min/Max/Points, row 5 X + two blocks per DAC1
+    spa_xlsx      SPA_Analysis_*: rows 1-4 as above, row 5 Vsd + one Is block
+    baseline_xlsx Baseline_*: key/value rows, then a Time (s) table
+    table         anything else with a header row (Characterization_* files,
+                  summary CSVs); stored column by column
+Each file is read in one pass; rows are kept as floats (NaN for blanks).
+"""
+
+import csv
+import itertools
+import os
+import re
+
+import numpy as np
+
+from collect.run_data import ConditionData, RunData
+
+# Same default as collect.config.DATA_DIR, without importing the hardware drivers
+DATA_ROOT = os.environ.get("BIOSENSOR_DATA_DIR", "/home/pi/Desktop/Biosensor V2/data")
+
+HEADER_ROW = 5
+NUMBER_RE = re.compile(r"[-+]?(?:[0-9]*\.[0-9]+|[0-9]+\.?)(?:[eE][-+]?[0-9]+)?")
+
+# data/<Chip>/<Trial - timestamp>/, Baseline_<trial>_<timestamp>/, ...
+FOLDER_RE = re.compile(
+    r"^(?:(?P<kind>Baseline|Characterization|SPA_Analysis)[_ -]*)?"
+    r"(?P<trial>.*?)[_ -]*(?P<timestamp>\d{8}_\d{6})(?P<suffix>.*)$"
+)
+
+SWEEP_LAYOUTS = ("genesys_csv", "sweep_xlsx", "spa_xlsx")
+GENESYS_TITLE = "SoftPlot for Genesys Testlink"
+META_KEYS = {
+    "sweep min:": "sweep_start",
+    "start": "sweep_start",
+    "sweep max:": "sweep_end",
+    "stop": "sweep_end",
+    "sweep points:": "number_of_steps",
+    "points": "number_of_steps",
+}
+
+
+class LayoutError(Exception):
+    pass
+
+
+def read_rows(path, limit=None):
+    """Rows of the first sheet (xlsx) or the file (csv) as lists of cell values;
+    only the first limit rows when limit is given"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig", errors="replace") as f:
+            return [list(row) for row in itertools.islice(csv.reader(f), limit)]
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(max_row=limit, values_only=True)
+        return [list(row) for row in rows]
+    finally:
+        workbook.close()
+
+
+def to_float(value):
+    if value is None or value == "":
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def header_number(value):
+    """Constant voltage from a header such as '-0.400000 (none)' or 'Is @ Vg=0.500V'"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = NUMBER_RE.search(str(value or ""))
+    return float(m.group(0)) if m else None
+
+
+def _text(value):
+    return "" if value is None else str(value).strip()
+
+
+def _trim(row):
+    row = list(row)
+    while row and (row[-1] is None or row[-1] == ""):
+        row.pop()
+    return row
+
+
+def detect_layout(path, rows):
+    name = os.path.basename(path).upper()
+    first = _text(rows[0][0]) if rows and rows[0] else ""
+    if first == GENESYS_TITLE:
+        return "genesys_csv"
+    header = _trim(rows[HEADER_ROW - 1]) if len(rows) >= HEADER_ROW else []
+    has_sweep_meta = len(rows) >= 4 and _text(rows[1][0] if rows[1] else "").lower() in META_KEYS
+    if has_sweep_meta and header and _text(header[0]).lower().startswith(("x-axis", "vsd", "vsg")):
+        if name.startswith("SPA_ANALYSIS"):
+            return "spa_xlsx"
+        return "sweep_xlsx"
+    if first.lower().startswith("baseline"):
+        return "baseline_xlsx"
+    return "table"
+
+
+def parse_file(path):
+    """Read path once and split it into layout, metadata, header and a float matrix"""
+    rows = read_rows(path)
+    if not rows:
+        raise LayoutError(f"{path} is empty")
+    layout = detect_layout(path, rows)
+
+    meta = {}
+    if layout in SWEEP_LAYOUTS:
+        meta["title"] = _text(rows[0][0])
+        for row in rows[1:4]:
+            key = META_KEYS.get(_text(row[0] if row else "").lower())
+            if key and len(row) > 1:
+                meta[key] = to_float(row[1])
+        header_index = HEADER_ROW - 1
+    elif layout == "baseline_xlsx":
+        meta["title"] = _text(rows[0][0])
+        header_index = None
+        for i, row in enumerate(rows):
+            if row and _text(row[0]).lower().startswith("time"):
+                header_index = i
+                break
+            if row and len(row) > 1 and row[0] is not None and i > 0:
+                meta[_text(row[0])] = row[1] if isinstance(row[1], (int, float)) else _text(row[1])
+        if header_index is None:
+            raise LayoutError(f"{path}: no Time (s) header row")
+    else:
+        header_index = next((i for i, row in enumerate(rows) if _trim(row)), None)
+        if header_index is None:
+            raise LayoutError(f"{path} has no header row")
+
+    header = [_text(h) for h in _trim(rows[header_index])]
+    width = len(header)
+    body = [row for row in rows[header_index + 1 :] if _trim(row)]
+    data = np.full((len(body), width), np.nan)
+    for i, row in enumerate(body):
+        for j, value in enumerate(row[:width]):
+            data[i, j] = to_float(value)
+    return {"path": path, "layout": layout, "meta": meta, "header": header, "data": data}
+
+
+def describe_file(path):
+    """Layout, sweep metadata and header of path from its first rows only"""
+    rows = read_rows(path, limit=HEADER_ROW)
+    if not rows:
+        raise LayoutError(f"{path} is empty")
+    layout = detect_layout(path, rows)
+    described = {"path": path, "layout": layout, "meta": {}, "header": []}
+    if layout not in SWEEP_LAYOUTS:
+        return described
+    described["meta"]["title"] = _text(rows[0][0])
+    for row in rows[1:4]:
+        key = META_KEYS.get(_text(row[0] if row else "").lower())
+        if key and len(row) > 1:
+            described["meta"][key] = to_float(row[1])
+    described["header"] = [_text(h) for h in _trim(rows[HEADER_ROW - 1])]
+    mode, _, _, b_key = _sweep_keys(described)
+    n_conditions = (len(described["header"]) - 1) // (1 if b_key is None else 2)
+    voltages = [header_number(h) for h in described["header"][1 : 1 + n_conditions]]
+    described["meta"]["mode"] = mode
+    described["meta"]["constant_voltage_values"] = [v for v in voltages if v is not None]
+    return described
+
+
+def _sweep_keys(parsed):
+    """(mode, x key, first block key, second block key) for a sweep layout"""
+    name = os.path.basename(parsed["path"]).upper()
+    if parsed["layout"] == "spa_xlsx":
+        return "output", "vsd", "i_source", None
+    if "VSG" in name:
+        return "transfer", "vsg", "i_drain", "i_source"
+    if parsed["layout"] == "genesys_csv":
+        return "output", "vsd", "i_source", "i_gate" if "ISIG" in name else "i_drain"
+    return "output", "vsd", "isd", "i_source" if "ISIG" in name else "i_drain"
+
+
+def sweep_run_data(parsed):
+    """RunData for a sweep layout; returns (meta, run_data)"""
+    if parsed["layout"] not in SWEEP_LAYOUTS:
+        raise LayoutError(f"{parsed['path']} is not a sweep file")
+    mode, x_key, a_key, b_key = _sweep_keys(parsed)
+    header, data = parsed["header"], parsed["data"]
+
+    n_values = len(header) - 1
+    n_blocks = 1 if b_key is None else 2
+    n_conditions = n_values // n_blocks
+    if n_conditions == 0:
+        raise LayoutError(f"{parsed['path']} has no data columns")
+
+    x = data[:, 0]
+    keep = ~np.isnan(x) | ~np.isnan(data[:, 1:]).all(axis=1)
+    data, x = data[keep], x[keep]
+
+    run_data = RunData(channels=())
+    skipped = []
+    for j in range(n_conditions):
+        constant_voltage = header_number(header[1 + j])
+        if constant_voltage is None or constant_voltage in run_data:
+            skipped.append(header[1 + j])
+            continue
+        columns = {x_key: x, a_key: data[:, 1 + j]}
+        if b_key is not None:
+            columns[b_key] = data[:, 1 + n_conditions + j]
+        _derive_currents(columns)
+        run_data.add_condition(
+            constant_voltage,
+            ConditionData.from_arrays(np.zeros((len(x), 0), np.int32), columns, ()),
+        )
+
+    meta = dict(parsed["meta"])
+    meta["mode"] = mode
+    meta["layout"] = parsed["layout"]
+    meta["constant_voltage_values"] = list(run_data)
+    if skipped:
+        meta["skipped_columns"] = skipped
+    return meta, run_data
+
+
+def _derive_currents(columns):
+    # The collect tab stores Isd with one of its terms; recover the other
+    if "isd" in columns and "i_drain" in columns:
+        columns["i_source"] = columns["isd"] + columns["i_drain"]
+    elif "isd" in columns and "i_source" in columns:
+        columns["i_drain"] = columns["i_source"] - columns["isd"]
+    elif "i_source" in columns and "i_drain" in columns:
+        columns["isd"] = columns["i_source"] - columns["i_drain"]
+
+
+def parse_folder(name):
+    """Split a run folder name such as 'Trial 1 - 20250625_132749' or
+    'Baseline_Trial 1_20250826_041844' into kind, trial and timestamp"""
+    m = FOLDER_RE.match(name)
+    if not m:
+        return {"kind": "trial", "trial": name, "timestamp": None}
+    return {
+        "kind": (m.group("kind") or "trial").lower(),
+        "trial": m.group("trial") or None,
+        "timestamp": m.group("timestamp"),
+    }
+
+
+def parse_location(root, path):
+    """chip / trial / timestamp for a file under data/<Chip>/<Trial - timestamp>/"""
+    parts = os.path.relpath(path, root).split(os.sep)
+    location = {"chip_name": parts[0] if len(parts) > 1 else None}
+    if len(parts) > 2:
+        folder = parse_folder(parts[-2])
+        location["trial_name"] = folder["trial"]
+        location["timestamp"] = folder["timestamp"]
+        location["folder_kind"] = folder["kind"]
+    return location
@@ -0,0 +1,268 @@
+"""
+migrate.py - Convert the data/ tree to the columnar run format
+Usage: python -m analyze.migrate [data root] [--out DIR] [--workers N] [--force]
+
+Walks every .csv/.xlsx under the data root, recognises its layout (see
+layouts.py) and writes a compressed columnar copy: sweeps become
+<name>.run.npz next to the source (so the analyze and plot tabs pick them
+up), everything else <name>.table.npz. With --out the tree is mirrored
+under DIR instead and the sources are left untouched either way.
+
+Files are converted in a process pool. migration_manifest.json in the
+output root records the size, mtime and SHA-256 of every source and of its
+output; unchanged files are skipped on the next run.
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from collect.run_format import TABLE_SUFFIX, run_path_for, write_run, write_table
+
+from .layouts import (
+    DATA_ROOT,
+    SWEEP_LAYOUTS,
+    parse_file,
+    parse_location,
+    sweep_run_data,
+)
+from .pool import pool_context
+
+MANIFEST_NAME = "migration_manifest.json"
+MANIFEST_VERSION = 1
+SOURCE_EXTENSIONS = (".csv", ".xlsx")
+HASH_BLOCK = 1 << 20
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_sources(root):
+    """Relative paths of every spreadsheet under root, sorted"""
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in filenames:
+            # Office lock files and editor backups
+            if name.startswith("~$") or name.endswith("#"):
+                continue
+            if name.lower().endswith(SOURCE_EXTENSIONS):
+                sources.append(os.path.relpath(os.path.join(dirpath, name), root))
+    return sorted(sources)
+
+
+def output_base(rel, root, out_dir):
+    return os.path.join(out_dir or root, rel)
+
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest.get("files", {})
+
+
+def save_manifest(path, files, root):
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "root": os.path.abspath(root),
+        "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+        "files": dict(sorted(files.items())),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def is_unchanged(entry, stat, force):
+    """Cheap check: same size and mtime as last time and the output still exists"""
+    return (
+        not force
+        and entry is not None
+        and entry.get("size") == stat.st_size
+        and entry.get("mtime_ns") == stat.st_mtime_ns
+        and os.path.exists(entry.get("output_path", ""))
+    )
+
+
+def migrate_file(task):
+    """Worker: convert one source file; returns a manifest entry (or an error)"""
+    root, rel, base, previous, force = task
+    path = os.path.join(root, rel)
+    started = time.perf_counter()
+    stat = os.stat(path)
+    result = {"source": rel, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    try:
+        result["sha256"] = sha256_file(path)
+        if (
+            not force
+            and previous is not None
+            and previous.get("sha256") == result["sha256"]
+            and os.path.exists(previous.get("output_path", ""))
+        ):
+            # Touched but not modified (copied, re-synced, ...)
+            result.update({k: v for k, v in previous.items() if k not in result})
+            result["status"] = "unchanged"
+            return result
+
+        parsed = parse_file(path)
+        meta = {
+            "source": rel,
+            "source_sha256": result["sha256"],
+            "migrated": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        meta.update(parse_location(root, path))
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        if parsed["layout"] in SWEEP_LAYOUTS:
+            sweep_meta, run_data = sweep_run_data(parsed)
+            meta.update(sweep_meta)
+            output_path = write_run(run_path_for(base), run_data, meta)
+            rows = run_data.samples
+        else:
+            meta.update(parsed["meta"])
+            meta["layout"] = parsed["layout"]
+            output_path = write_table(
+                os.path.splitext(base)[0] + TABLE_SUFFIX,
+                parsed["header"],
+                parsed["data"],
+                meta,
+            )
+            rows = len(parsed["data"])
+        result.update(
+            {
+                "status": "converted",
+                "layout": parsed["layout"],
+                "rows": rows,
+                "output_path": output_path,
+                "output_sha256": sha256_file(output_path),
+                "output_size": os.path.getsize(output_path),
+            }
+        )
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def migrate(root, out_dir=None, workers=None, force=False):
+    """Convert everything under root; returns a report dict"""
+    started = time.perf_counter()
+    manifest_path = os.path.join(out_dir or root, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+    sources = find_sources(root)
+
+    files = {}
+    tasks = []
+    skipped = 0
+    outputs = {}
+    collisions = []
+    for rel in sources:
+        base = output_base(rel, root, out_dir)
+        # X.csv and X.xlsx in one folder would share an output
+        stem = os.path.splitext(base)[0]
+        if stem in outputs:
+            collisions.append((rel, f"output name clashes with {outputs[stem]}"))
+            continue
+        outputs[stem] = rel
+
+        entry = previous.get(rel)
+        if is_unchanged(entry, os.stat(os.path.join(root, rel)), force):
+            files[rel] = entry
+            skipped += 1
+            continue
+        tasks.append((root, rel, base, entry, force))
+
+    report = {
+        "sources": len(sources),
+        "skipped": skipped,
+        "converted": 0,
+        "unchanged": 0,
+        "errors": list(collisions),
+        "layouts": {},
+        "bytes_read": 0,
+        "bytes_written": 0,
+    }
+    if tasks:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(tasks) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=pool_context()) as pool:
+            for result in pool.map(migrate_file, tasks, chunksize=chunksize):
+                rel = result.pop("source")
+                status = result.pop("status")
+                result.pop("seconds", None)
+                if status == "error":
+                    report["errors"].append((rel, result["error"]))
+                    continue
+                files[rel] = result
+                if status == "unchanged":
+                    report["unchanged"] += 1
+                    continue
+                report["converted"] += 1
+                report["bytes_read"] += result["size"]
+                report["bytes_written"] += result["output_size"]
+                report["layouts"][result["layout"]] = report["layouts"].get(result["layout"], 0) + 1
+
+    removed = sorted(set(previous) - set(sources))
+    report["removed"] = removed
+    os.makedirs(os.path.dirname(os.path.abspath(manifest_path)), exist_ok=True)
+    save_manifest(manifest_path, files, root)
+    report["manifest"] = manifest_path
+    report["elapsed"] = time.perf_counter() - started
+    return report
+
+
+def format_report(report):
+    elapsed = max(report["elapsed"], 1e-9)
+    processed = report["converted"] + report["unchanged"]
+    lines = [
+        f"{report['sources']} files: {report['converted']} converted, "
+        f"{report['skipped'] + report['unchanged']} unchanged, {len(report['errors'])} errors",
+        f"{elapsed:.1f} s, {processed / elapsed:.1f} files/s, "
+        f"{report['bytes_read'] / 1e6 / elapsed:.2f} MB/s read, "
+        f"{report['bytes_written'] / 1e6:.2f} MB written "
+        f"(from {report['bytes_read'] / 1e6:.2f} MB)",
+    ]
+    for layout, count in sorted(report["layouts"].items()):
+        lines.append(f"  {layout:<14} {count}")
+    if report["removed"]:
+        lines.append(f"{len(report['removed'])} sources no longer exist and were dropped from the manifest")
+    for rel, error in report["errors"]:
+        lines.append(f"  ERROR {rel}: {error}")
+    lines.append(f"Manifest: {report['manifest']}")
+    return "\n".join(lines)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m analyze.migrate",
+        description="Convert the data/ tree to .run.npz / .table.npz files",
+    )
+    parser.add_argument("root", nargs="?", default=DATA_ROOT)
+    parser.add_argument("--out", help="mirror the converted tree here instead of next to the sources")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="convert every file again")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        print(f"{args.root} is not a directory")
+        return 2
+    report = migrate(args.root, args.out, args.workers, args.force)
+    print(format_report(report))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,171 @@
+"""
+model_fit.py - Global compact-model fits of output/transfer families
+Usage: fit = fit_family(vsg, vsd, isd)                 # one run, all curves
+       fits = fit_families({"5WT1": (vsg, vsd, isd)})  # chips in a process pool
+
+Instead of separate straight lines per region and per VGS, one set of
+p-type parameters is fitted to every point of a run (output and transfer
+curves alike), in source-referenced magnitudes (VSG, VSD, ISD > 0 on):
+
+    Vov  = s * ln(1 + exp((VSG - Vth) / s))        s = SS / ln(10)
+    Vde  = Vov * tanh(VSD / Vov)                    smooth min(VSD, Vov)
+    ISD  = k (Vov Vde - Vde^2 / 2) (1 + lambda VSD) / (1 + k Rs Vov)
+
+The soft-plus overdrive gives the subthreshold slope SS (V/decade), and
+the 1 + k Rs Vov term is the usual first-order series-resistance
+degradation. scipy.optimize.least_squares minimises the vectorized residuals
+of all points at once, using the analytic Jacobian below.
+"""
+
+import numpy as np
+from scipy.optimize import least_squares
+from scipy.special import expit
+
+from .pool import POOL_WORKERS, pool_map
+
+PARAM_NAMES = ("vth_V", "k_A_V2", "lambda_1_V", "rs_ohm", "ss_V_dec")
+LN10 = np.log(10.0)
+# Lower/upper bounds in PARAM_NAMES order
+BOUNDS = (
+    [-10.0, 1e-15, -0.5, 0.0, 0.01],
+    [10.0, 1.0, 10.0, 1e9, 5.0],
+)
+FIT_WORKERS = POOL_WORKERS
+MAX_NFEV = 200
+
+
+def model_current(params, vsg, vsd):
+    """Model ISD (A) at every (VSG, VSD) point"""
+    return _model(params, np.asarray(vsg, float), np.asarray(vsd, float))[0]
+
+
+def _model(params, vsg, vsd):
+    vth, k, lam, rs, ss = params
+    s = ss / LN10
+    u = (vsg - vth) / s
+    sp = np.logaddexp(0.0, u)
+    sig = expit(u)
+    vov = np.maximum(s * sp, 1e-12)
+    t = vsd / vov
+    th = np.tanh(t)
+    vde = vov * th
+    f = vov * vde - 0.5 * vde * vde
+    m = 1.0 + lam * vsd
+    den = 1.0 + k * rs * vov
+    current = k * f * m / den
+
+    # Analytic Jacobian, one column per parameter
+    dvde_dvov = th - t * (1.0 - th * th)
+    df_dvov = vde + (vov - vde) * dvde_dvov
+    di_dvov = k * m * (df_dvov * den - f * k * rs) / (den * den)
+    jac = np.empty((len(current), 5))
+    jac[:, 0] = -di_dvov * sig
+    jac[:, 1] = f * m / (den * den)
+    jac[:, 2] = k * f * vsd / den
+    jac[:, 3] = -k * k * f * m * vov / (den * den)
+    jac[:, 4] = di_dvov * (sp - u * sig) / LN10
+    return current, jac
+
+
+def initial_guess(vsg, vsd, isd):
+    """Rough start: Vth below the lowest VSG, k from the largest current"""
+    vth = float(np.min(vsg)) - 0.5
+    vov = max(float(np.max(vsg)) - vth, 0.1)
+    k = max(2.0 * float(np.max(np.abs(isd))) / (vov * vov), 1e-14)
+    return np.array([vth, k, 0.05, 1.0, 0.3])
+
+
+def fit_family(vsg, vsd, isd, x0=None, max_nfev=MAX_NFEV):
+    """Fit the compact model to every point of a family of curves.
+
+    vsg, vsd and isd are flat arrays (one entry per measured point). The
+    current's sign is taken from the data so either convention works.
+    Returns a dict with the PARAM_NAMES values, their standard errors
+    (<name>_se), at_bounds (names pinned at a bound), rmse_A, r2, points,
+    nfev, success and message.
+    """
+    vsg = np.asarray(vsg, float).ravel()
+    vsd = np.asarray(vsd, float).ravel()
+    isd = np.asarray(isd, float).ravel()
+    ok = np.isfinite(vsg) & np.isfinite(vsd) & np.isfinite(isd)
+    vsg, vsd, isd = vsg[ok], vsd[ok], isd[ok]
+    if len(isd) < len(PARAM_NAMES) + 1:
+        return {"success": False, "message": "too few points", "points": int(len(isd))}
+
+    polarity = 1.0 if np.sum(isd * vsd) >= 0 else -1.0
+    target = polarity * isd
+    scale = max(float(np.max(np.abs(target))), 1e-18)
+
+    def residuals(p):
+        return (_model(p, vsg, vsd)[0] - target) / scale
+
+    def jacobian(p):
+        return _model(p, vsg, vsd)[1] / scale
+
+    x0 = initial_guess(vsg, vsd, target) if x0 is None else np.asarray(x0, float)
+    x0 = np.clip(x0, BOUNDS[0], BOUNDS[1])
+    result = least_squares(
+        residuals,
+        x0,
+        jac=jacobian,
+        bounds=BOUNDS,
+        x_scale="jac",
+        max_nfev=max_nfev,
+    )
+
+    resid = result.fun * scale
+    ss_res = float(np.sum(resid**2))
+    ss_tot = float(np.sum((target - target.mean()) ** 2))
+    out = dict(zip(PARAM_NAMES, (float(v) for v in result.x)))
+    dof = max(len(target) - len(PARAM_NAMES), 1)
+    try:
+        # Columns differ by many decades (k vs Rs), so invert the normalised J'J
+        jac = result.jac * scale
+        norms = np.linalg.norm(jac, axis=0)
+        norms[norms == 0] = 1.0
+        jn = jac / norms
+        cov = np.linalg.pinv(jn.T @ jn) / np.outer(norms, norms) * ss_res / dof
+        se = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+    except np.linalg.LinAlgError:
+        se = np.full(len(PARAM_NAMES), np.nan)
+    for name, value in zip(PARAM_NAMES, se):
+        out[f"{name}_se"] = float(value)
+    # Parameters pinned at a bound mean the model does not describe the data
+    at_bounds = [
+        name
+        for name, value, lo, hi in zip(PARAM_NAMES, result.x, *BOUNDS)
+        if np.isclose(value, lo, rtol=1e-6, atol=0) or np.isclose(value, hi, rtol=1e-6, atol=0)
+    ]
+    out.update(
+        at_bounds=at_bounds,
+        rmse_A=float(np.sqrt(ss_res / len(target))),
+        r2=1.0 - ss_res / ss_tot if ss_tot > 0 else 0.0,
+        points=int(len(target)),
+        nfev=int(result.nfev),
+        success=bool(result.success),
+        message=str(result.message),
+        polarity=polarity,
+    )
+    return out
+
+
+def output_family(vd, vgs, isd):
+    """Flat (VSG, VSD, ISD) of an avg_by_chip-style output matrix (Vd x VGS)"""
+    vd = np.asarray(vd, float)
+    vgs = np.asarray(vgs, float)
+    isd = np.asarray(isd, float).reshape(len(vd), len(vgs))
+    vsd_grid, vsg_grid = np.meshgrid(-vd, -vgs, indexing="ij")
+    return vsg_grid.ravel(), vsd_grid.ravel(), isd.ravel()
+
+
+def _fit_task(item):
+    name, family = item
+    try:
+        return name, fit_family(*family)
+    except Exception as e:
+        return name, {"success": False, "message": f"{type(e).__name__}: {e}"}
+
+
+def fit_families(families, workers=FIT_WORKERS):
+    """fit_family() of every {name: (vsg, vsd, isd)} entry, on the shared pool"""
+    return dict(pool_map(_fit_task, families.items(), workers))
@@ -0,0 +1,162 @@
+"""
+noise_psd.py - Streaming Welch PSD and 1/f noise fit with the true sample rate
+Usage: psd = StreamingWelch(segment=4096); psd.update(t, x) as samples arrive
+       fit = psd.fit()        # 1/f coefficient and exponent, white floor, corner
+       fit = fit_1f(freqs, density)
+
+Samples are held only until a segment is complete. Every segment of
+`segment` points (Hann window, 50 % overlap) is detrended, transformed and
+added to a running mean of periodograms, so memory is set by the segment
+length however long the capture runs. The sample rate comes from the
+timestamps, not from the sweep settings:
+- a segment whose intervals match the nominal interval within
+  JITTER_TOLERANCE is used as it is;
+- one with more jitter is interpolated linearly onto a uniform grid at the
+  nominal rate;
+- one with a gap of more than GAP_TOLERANCE intervals (dropped samples)
+  gets a Lomb-Scargle periodogram at the same frequencies instead.
+The nominal rate is the one given, else the median rate of the first
+segment.
+
+fit_1f() fits S(f) = A / f^alpha over FIT_BAND (a line in log-log
+coordinates, as analyze_1f_noise does) and takes the white floor S_w as the
+median density of the upper quarter of the spectrum. The corner frequency
+is where the two meet, f_c = (A / S_w)^(1 / alpha).
+"""
+
+import numpy as np
+from scipy.signal import get_window, lombscargle
+
+SEGMENT = 4096
+OVERLAP = 0.5
+# Frequency band of the 1/f line, Hz
+FIT_BAND = (0.1, 10.0)
+MIN_FIT_POINTS = 5
+JITTER_TOLERANCE = 0.02
+GAP_TOLERANCE = 1.5
+
+
+def fit_1f(freqs, density, band=FIT_BAND):
+    """1/f fit of a one-sided PSD; None with fewer than MIN_FIT_POINTS in band"""
+    freqs = np.asarray(freqs, dtype=np.float64)
+    density = np.asarray(density, dtype=np.float64)
+    mask = (freqs > band[0]) & (freqs < band[1]) & (density > 0)
+    if mask.sum() < MIN_FIT_POINTS:
+        return None
+    slope, intercept = np.polyfit(np.log10(freqs[mask]), np.log10(density[mask]), 1)
+    coefficient = float(10**intercept)
+    exponent = float(-slope)
+
+    upper = freqs >= freqs[-1] * 0.75
+    white = float(np.median(density[upper])) if upper.any() else float("nan")
+    if exponent > 0 and white > 0:
+        corner = float((coefficient / white) ** (1.0 / exponent))
+    else:
+        corner = float("nan")
+    return {
+        "1f_coefficient": coefficient,
+        "1f_exponent": exponent,
+        "noise_at_1hz": coefficient,
+        "white_psd": white,
+        "corner_hz": corner,
+        "fit_points": int(mask.sum()),
+    }
+
+
+class StreamingWelch:
+    """Welch PSD of a timestamped stream, in fixed memory"""
+
+    def __init__(self, segment=SEGMENT, overlap=OVERLAP, fs=None):
+        self.segment = int(segment)
+        self.step = max(1, int(round(self.segment * (1 - overlap))))
+        self.fs = fs
+        self.window = get_window("hann", self.segment)
+        self.window_power = float(np.sum(self.window**2))
+        self.t = np.empty(self.segment)
+        self.x = np.empty(self.segment)
+        self.filled = 0
+        self.psd_sum = None
+        self.segments = 0
+        self.resampled = 0
+        self.lomb_scargle = 0
+
+    @property
+    def freqs(self):
+        if self.fs is None:
+            return None
+        return np.fft.rfftfreq(self.segment, 1.0 / self.fs)
+
+    def update(self, t, x):
+        """Add samples taken at times t (s)"""
+        t = np.asarray(t, dtype=np.float64).ravel()
+        x = np.asarray(x, dtype=np.float64).ravel()
+        i = 0
+        while i < len(x):
+            take = min(len(x) - i, self.segment - self.filled)
+            self.t[self.filled : self.filled + take] = t[i : i + take]
+            self.x[self.filled : self.filled + take] = x[i : i + take]
+            self.filled += take
+            i += take
+            if self.filled == self.segment:
+                self._add_segment()
+                keep = self.segment - self.step
+                self.t[:keep] = self.t[self.step :]
+                self.x[:keep] = self.x[self.step :]
+                self.filled = keep
+
+    def _add_segment(self):
+        dt = np.diff(self.t)
+        if self.fs is None:
+            self.fs = 1.0 / float(np.median(dt))
+        nominal = 1.0 / self.fs
+
+        if np.max(dt) > GAP_TOLERANCE * nominal:
+            density = self._lomb_scargle()
+            self.lomb_scargle += 1
+        else:
+            x = self.x
+            if np.max(np.abs(dt - nominal)) > JITTER_TOLERANCE * nominal:
+                grid = self.t[0] + np.arange(self.segment) * nominal
+                x = np.interp(grid, self.t, self.x)
+                self.resampled += 1
+            spectrum = np.fft.rfft((x - x.mean()) * self.window)
+            density = np.abs(spectrum) ** 2 / (self.fs * self.window_power)
+            # One-sided: every bin but DC (and Nyquist, for an even segment) twice
+            density[1:] *= 2
+            if self.segment % 2 == 0:
+                density[-1] /= 2
+
+        if self.psd_sum is None:
+            self.psd_sum = density
+        else:
+            self.psd_sum += density
+        self.segments += 1
+
+    def _lomb_scargle(self):
+        freqs = self.freqs
+        density = np.zeros(len(freqs))
+        t = self.t - self.t[0]
+        y = (self.x - self.x.mean()) * np.interp(
+            t, np.linspace(0, t[-1], self.segment), self.window
+        )
+        power = lombscargle(t, y, 2 * np.pi * freqs[1:])
+        # Unnormalized Lomb-Scargle power of white noise averages its
+        # variance; the one-sided density is twice that over fs
+        density[1:] = 2 * power / (self.fs * self.window_power / self.segment)
+        return density
+
+    def psd(self):
+        """(freqs, mean one-sided density) so far; (None, None) before the first segment"""
+        if not self.segments:
+            return None, None
+        return self.freqs, self.psd_sum / self.segments
+
+    def fit(self, band=FIT_BAND):
+        """fit_1f() of the PSD so far, with the segment count and sample rate"""
+        freqs, density = self.psd()
+        if freqs is None:
+            return None
+        fit = fit_1f(freqs, density, band)
+        if fit is not None:
+            fit.update(segments=self.segments, fs=float(self.fs))
+        return fit
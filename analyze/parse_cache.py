@@ -0,0 +1,214 @@
+"""
+parse_cache.py - Persistent cache of parsed sweep CSVs
+Usage: parsed = PARSE_CACHE.get(path)  # {"vd", "vgs", "is", "id", "is_columns", "id_columns"}
+
+extract_values() used to read each Genesys CSV twice through pandas. Here
+the file is parsed once (parse_sweep_csv) and the arrays are kept in memory
+and in one .npz per source under CACHE_DIR. An entry is reused while the
+source keeps its size and mtime; if only the mtime moved, the SHA-256 of the
+content decides. The disk cache is trimmed to MAX_BYTES, least recently used
+first (hits refresh the entry's mtime).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .layouts import header_number, parse_file
+
+CACHE_VERSION = 1
+CACHE_DIR = os.environ.get(
+    "BIOSENSOR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "biosensor")
+)
+MAX_BYTES = 64 * 1024 * 1024
+MEMORY_ENTRIES = 64
+HASH_BLOCK = 1 << 20
+PARSED_KEYS = ("vd", "vgs", "is", "id", "is_columns", "id_columns")
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _column_names(names):
+    # Same names pandas.read_csv gives repeated/blank headers: X, X.1, Unnamed: k
+    seen = {}
+    out = []
+    for k, name in enumerate(names):
+        name = name or f"Unnamed: {k}"
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        out.append(name if count == 0 else f"{name}.{count}")
+    return out
+
+
+def parse_sweep_csv(path):
+    """Row-5 header and numeric block of a two-block (Is | Id) sweep CSV, in one read"""
+    parsed = parse_file(path)
+    header, data = parsed["header"], parsed["data"]
+    names = _column_names(header)
+    mid = (len(header) - 1) // 2
+    vgs = [header_number(h) for h in header[1 : mid + 1]]
+    return {
+        "vd": data[:, 0],
+        "vgs": np.array([np.nan if v is None else v for v in vgs], dtype=np.float64),
+        "is": data[:, 1 : mid + 1],
+        "id": data[:, mid + 1 : 2 * mid + 1],
+        "is_columns": names[1 : mid + 1],
+        "id_columns": names[mid + 1 : 2 * mid + 1],
+    }
+
+
+class ParseCache:
+    """Memory + on-disk LRU cache of parse_sweep_csv() results"""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES, memory_entries=MEMORY_ENTRIES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "rehashed": 0, "misses": 0}
+
+    def entry_path(self, path):
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + ".npz")
+
+    def get(self, path):
+        """Parsed arrays for path, from memory, disk or a fresh parse"""
+        key = self._key(path)
+        path = key[0]
+        with self.lock:
+            parsed = self.memory.get(key)
+            if parsed is not None:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return parsed
+
+        stat = os.stat(path)
+        parsed = self._load(path, stat)
+        if parsed is None:
+            parsed = parse_sweep_csv(path)
+            self._store(path, stat, parsed)
+            self.stats["misses"] += 1
+        self.remember(path, parsed)
+        return parsed
+
+    def _key(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        return (path, stat.st_size, stat.st_mtime_ns)
+
+    def cached(self, path):
+        """True if path is in the memory layer (get() will not touch the disk)"""
+        try:
+            key = self._key(path)
+        except OSError:
+            return False
+        with self.lock:
+            return key in self.memory
+
+    def remember(self, path, parsed):
+        """Put arrays parsed elsewhere (e.g. a worker process) in the memory layer"""
+        key = self._key(path)
+        parsed = {name: parsed[name] for name in PARSED_KEYS}
+        with self.lock:
+            self.memory[key] = parsed
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def _load(self, path, stat):
+        entry = self.entry_path(path)
+        try:
+            with np.load(entry, allow_pickle=False) as archive:
+                meta = json.loads(str(archive["meta"]))
+                if meta.get("version") != CACHE_VERSION or meta.get("path") != path:
+                    return None
+                if (meta["size"], meta["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+                    # Touched or copied: reuse only if the bytes are the same
+                    if meta["size"] != stat.st_size or meta["sha256"] != sha256_file(path):
+                        return None
+                    self.stats["rehashed"] += 1
+                    meta.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                    rewrite = True
+                else:
+                    rewrite = False
+                parsed = {name: archive[name] for name in ("vd", "vgs", "is", "id")}
+        except (OSError, KeyError, ValueError):
+            return None
+        parsed["is_columns"] = meta["is_columns"]
+        parsed["id_columns"] = meta["id_columns"]
+        if rewrite:
+            self._store(path, stat, parsed, meta["sha256"])
+        else:
+            try:
+                # Mark the entry recently used for evict()
+                os.utime(entry)
+            except OSError:
+                # Read-only cache directory, or evicted by another process
+                pass
+        self.stats["disk_hits"] += 1
+        return parsed
+
+    def _store(self, path, stat, parsed, sha256=None):
+        meta = {
+            "version": CACHE_VERSION,
+            "path": path,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256 or sha256_file(path),
+            "is_columns": list(parsed["is_columns"]),
+            "id_columns": list(parsed["id_columns"]),
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            entry = self.entry_path(path)
+            tmp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    vd=parsed["vd"],
+                    vgs=parsed["vgs"],
+                    id=parsed["id"],
+                    **{"is": parsed["is"]},
+                    meta=np.array(json.dumps(meta)),
+                )
+            os.replace(tmp_path, entry)
+            self.evict()
+        except OSError as e:
+            # A read-only or full cache directory only costs speed
+            print(f"Parse cache not written for {path}: {e}")
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                full = os.path.join(self.directory, name)
+                stat = os.stat(full)
+                entries.append((stat.st_mtime_ns, stat.st_size, full))
+        total = sum(size for _, size, _ in entries)
+        for _, size, full in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(full)
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".npz"):
+                    os.remove(os.path.join(self.directory, name))
+
+
+PARSE_CACHE = ParseCache()
@@ -0,0 +1,101 @@
+"""
+pipeline.py - Memoized analysis stages
+Usage: value = PIPELINE.get("filter", key, lambda: apply_filter(...))
+       print(PIPELINE.format_stats())
+
+Each analysis stage result is cached under (stage, key), where the key
+holds exactly the inputs the stage depends on (data version, chip and the
+parameters it reads). Changing one parameter therefore recomputes only the
+stages whose key contains it. The cache is a bounded LRU shared by all
+stages; hits, misses and compute time are counted per stage.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+STAGE_CACHE_ENTRIES = 4096
+
+
+class StageCache:
+    def __init__(self, max_entries=STAGE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def _stage_stats(self, stage):
+        return self.stats.setdefault(stage, {"hits": 0, "misses": 0, "seconds": 0.0})
+
+    def get(self, stage, key, compute):
+        """Cached result of stage for key, computing (outside the lock) on a miss"""
+        full_key = (stage, key)
+        with self.lock:
+            stats = self._stage_stats(stage)
+            if full_key in self.entries:
+                self.entries.move_to_end(full_key)
+                stats["hits"] += 1
+                return self.entries[full_key]
+            stats["misses"] += 1
+
+        start = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            stats["seconds"] += elapsed
+            self.entries[full_key] = value
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def get_many(self, stage, keys, compute_many):
+        """{name: result} for {name: key}; the misses are computed together by
+        compute_many(names) -> {name: value} (e.g. one process-pool batch)"""
+        found, missing = {}, []
+        with self.lock:
+            stats = self._stage_stats(stage)
+            for name, key in keys.items():
+                full_key = (stage, key)
+                if full_key in self.entries:
+                    self.entries.move_to_end(full_key)
+                    stats["hits"] += 1
+                    found[name] = self.entries[full_key]
+                else:
+                    stats["misses"] += 1
+                    missing.append(name)
+        if not missing:
+            return found
+
+        start = time.perf_counter()
+        computed = compute_many(missing)
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            stats["seconds"] += elapsed
+            for name in missing:
+                self.entries[(stage, keys[name])] = computed[name]
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        found.update(computed)
+        return found
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.stats = {}
+
+    def format_stats(self):
+        with self.lock:
+            parts = [
+                f"{stage} {s['hits']}/{s['hits'] + s['misses']} ({s['seconds'] * 1e3:.0f} ms)"
+                for stage, s in self.stats.items()
+            ]
+        return "Stage cache hits: " + ", ".join(parts) if parts else "Stage cache: idle"
+
+
+PIPELINE = StageCache()
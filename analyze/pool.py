@@ -0,0 +1,71 @@
+"""
+pool.py - Worker processes shared by the analysis stages
+Usage: results = pool_map(task, items, workers)
+       executor = shared_executor(workers); context = pool_context()
+
+Analyses run on the AnalysisJob thread of the running Tk application, so
+workers are started with forkserver (spawn where that is unavailable)
+rather than fork: a forked child would inherit the GUI's threads, locks
+and Tk state. Such workers import the task's module afresh, so tasks must
+be module-level functions, and main.py keeps its hardware-touching imports
+inside main().
+
+One executor is kept between Run clicks and shared by file loading, model
+fits, bootstrap and calibration fits; it is replaced when the worker count
+changes or a worker dies.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+POOL_WORKERS = os.cpu_count() or 1
+START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def pool_context():
+    """multiprocessing context for every worker pool of the application"""
+    return multiprocessing.get_context(START_METHOD)
+
+
+def shared_executor(workers=POOL_WORKERS):
+    """The persistent executor, (re)created with `workers` processes"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context())
+            _pool_workers = workers
+        return _pool
+
+
+def _drop_executor(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def pool_map(task, items, workers=POOL_WORKERS, chunksize=1):
+    """[task(item) for item in items], on the shared executor when there is
+    more than one item and more than one worker"""
+    items = list(items)
+    if len(items) < 2 or workers < 2:
+        return [task(item) for item in items]
+    pool = shared_executor(workers)
+    try:
+        return list(pool.map(task, items, chunksize=chunksize))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start clean next time
+        _drop_executor(pool)
+        raise
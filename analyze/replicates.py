@@ -0,0 +1,147 @@
+"""
+replicates.py - Parallel loading and replicate averaging of output sweeps
+Usage: sweeps = load_sweeps(paths); stack = stack_replicates([sweeps[p] for p in paths])
+
+load_sweeps() reads the Is/Id blocks of many files at once: files already
+in PARSE_CACHE's memory are served directly, the rest are spread over the
+shared worker pool of pool.py, which is kept between Run clicks. stack_replicates() aligns the
+Isd = Is - Id grids of one chip's trials (VGS by value, Vd by linear
+interpolation when the sweep points differ) into a trial x Vd x VGS array
+and reduces it with nanmean/nanstd, so one missing point no longer blanks
+the average.
+"""
+
+import os
+import warnings
+
+import numpy as np
+
+from collect.run_format import is_run_file, read_run, run_path_for, sweep_blocks
+
+from .parse_cache import PARSE_CACHE
+from .pool import POOL_WORKERS, pool_map
+
+LOAD_WORKERS = POOL_WORKERS
+VD_ATOL = 1e-6
+VGS_ATOL = 1e-6
+
+
+def native_path(path):
+    """A .run.npz next to path (migrated or collected) unless it is stale"""
+    native = run_path_for(path)
+    if os.path.exists(native) and (
+        not os.path.exists(path) or os.path.getmtime(native) >= os.path.getmtime(path)
+    ):
+        return native
+    return path
+
+
+def load_sweep(path):
+    """vd, vgs, Is and Id blocks (points x VGS) and column names of one file"""
+    path = native_path(path)
+    if is_run_file(path):
+        _, run_data = read_run(path)
+        vd, vgs, is_block, id_block = sweep_blocks(run_data)
+        columns = [f"{v:g}" for v in vgs]
+        return {
+            "path": path,
+            "vd": vd,
+            "vgs": np.asarray(vgs, dtype=np.float64),
+            "is": is_block,
+            "id": id_block,
+            "is_columns": columns,
+            "id_columns": columns,
+        }
+    sweep = dict(PARSE_CACHE.get(path))
+    sweep["path"] = path
+    return sweep
+
+
+def _load_task(path):
+    try:
+        return path, load_sweep(path), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def load_sweeps(paths, workers=LOAD_WORKERS):
+    """{path: sweep dict} and {path: error} for every path, loaded in parallel"""
+    sweeps, errors, pending = {}, {}, []
+    for path in dict.fromkeys(paths):
+        if not os.path.exists(path) and not os.path.exists(run_path_for(path)):
+            errors[path] = "missing"
+        elif not is_run_file(native_path(path)) and PARSE_CACHE.cached(path):
+            sweeps[path] = load_sweep(path)
+        else:
+            pending.append(path)
+
+    chunksize = max(1, len(pending) // (2 * max(1, workers)))
+    for path, sweep, error in pool_map(_load_task, pending, workers, chunksize):
+        if error is not None:
+            errors[path] = error
+            continue
+        sweeps[path] = sweep
+        if not is_run_file(sweep["path"]):
+            # Parsed in a worker; keep it for the next Run in this process
+            PARSE_CACHE.remember(sweep["path"], sweep)
+    return sweeps, errors
+
+
+def _align_vd(vd, block, ref_vd):
+    """block (len(vd) x n) resampled onto ref_vd; NaN outside the measured range"""
+    if len(vd) == len(ref_vd) and np.allclose(vd, ref_vd, atol=VD_ATOL, equal_nan=True):
+        return block
+    out = np.full((len(ref_vd), block.shape[1]), np.nan)
+    for j in range(block.shape[1]):
+        ok = np.isfinite(vd) & np.isfinite(block[:, j])
+        if ok.sum() < 2:
+            continue
+        order = np.argsort(vd[ok])
+        x, y = vd[ok][order], block[ok, j][order]
+        out[:, j] = np.interp(ref_vd, x, y, left=np.nan, right=np.nan)
+    return out
+
+
+def stack_replicates(sweeps):
+    """Align replicate sweeps and reduce them.
+
+    Returns a dict with vd and vgs (the grid of the first sweep, VGS values
+    seen only in later sweeps appended), stack (trial x Vd x VGS Isd),
+    mean, std (ddof=1), stderr and count (finite replicates per point).
+    """
+    if not sweeps:
+        raise ValueError("no sweeps to stack")
+    ref_vd = np.asarray(sweeps[0]["vd"], dtype=np.float64)
+    ref_vgs = []
+    for sweep in sweeps:
+        for v in sweep["vgs"]:
+            if np.isfinite(v) and not any(np.isclose(v, r, atol=VGS_ATOL) for r in ref_vgs):
+                ref_vgs.append(float(v))
+
+    stack = np.full((len(sweeps), len(ref_vd), len(ref_vgs)), np.nan)
+    for i, sweep in enumerate(sweeps):
+        isd = np.asarray(sweep["is"], dtype=np.float64) - np.asarray(sweep["id"], dtype=np.float64)
+        isd = _align_vd(np.asarray(sweep["vd"], dtype=np.float64), isd, ref_vd)
+        for k, v in enumerate(sweep["vgs"]):
+            j = next((j for j, r in enumerate(ref_vgs) if np.isclose(v, r, atol=VGS_ATOL)), None)
+            if j is not None:
+                stack[i, :, j] = isd[:, k]
+
+    count = np.isfinite(stack).sum(axis=0)
+    with warnings.catch_warnings():
+        # All-NaN points and single replicates are expected
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(stack, axis=0)
+        std = np.nanstd(stack, axis=0, ddof=1)
+    std[count < 2] = np.nan
+    stderr = std / np.sqrt(np.maximum(count, 1))
+    return {
+        "vd": ref_vd,
+        "vgs": np.asarray(ref_vgs),
+        "stack": stack,
+        "mean": mean,
+        "std": std,
+        "stderr": stderr,
+        "count": count,
+        "paths": [sweep["path"] for sweep in sweeps],
+    }
@@ -0,0 +1,458 @@
+"""
+vectorized.py - Output-curve parameters at every VGS in one pass
+Usage: maps = chip_parameter_maps(vd, vgs, isd, two_slope_window=w)
+       table = maps_table({"5WT1": maps, ...})
+
+The analyze tab fits a single trace at the target VSG. Id_sat(VGS) is built
+by looping over the VGS columns in Python and filtering and fitting each one
+separately. This module takes a chip's whole Vd x VGS matrix at once:
+- the moving average runs down the Vd axis of every column;
+- the ohmic, saturation and two-slope line fits are batched least squares,
+  using masked sums per column;
+- gm comes from local fits through Id_sat(VGS).
+
+Chips without manual two-slope windows get their knees from knee_fits(),
+for all columns at once.
+
+For complete columns the results match the per-column functions of
+analyze_tab. A column with missing points is interpolated before it is
+filtered, instead of being shortened, and the missing points are left out
+of the fits.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .knee import KNEE_MIN_CONFIDENCE, KNEE_X_MIN, knee_fits
+
+# Per-VGS outputs, in table order
+MAP_PARAMS = (
+    "Ron_ohm",
+    "R2_lin",
+    "gsd_S",
+    "ro_ohm",
+    "VA_V",
+    "Vds_ref_V",
+    "Id_sat_ref_A",
+    "Vx_two_slope_V",
+    "Isd_sat_two_slope_A",
+    "Id_sat_A",
+    "gm_S",
+    "gm_R2",
+    "SNR_dB",
+    "DynRange_dB",
+)
+
+
+def _fill_nans(Y):
+    """Interpolate missing points of every column over the row index"""
+    Y = np.array(Y, dtype=np.float64)
+    bad = ~np.isfinite(Y)
+    if not bad.any():
+        return Y
+    rows = np.arange(Y.shape[0])
+    for j in np.flatnonzero(bad.any(axis=0)):
+        ok = ~bad[:, j]
+        if ok.any():
+            Y[~ok, j] = np.interp(rows[~ok], rows[ok], Y[ok, j])
+    return Y
+
+
+def _ma_once_columns(Y, window, pad_mode):
+    half = window // 2
+    padded = np.pad(Y, ((half, window - 1 - half), (0, 0)), mode=pad_mode)
+    return sliding_window_view(padded, window, axis=0).mean(axis=-1)
+
+
+def moving_average_columns(Y, window=5, passes=1, pad_mode="reflect", zero_phase=True):
+    """nan_safe_moving_average() applied down every column of Y at once"""
+    Y = _fill_nans(Y)
+    window = int(max(1, window))
+    if window <= 1 or passes <= 0:
+        return Y
+    Z = Y
+    for _ in range(int(max(1, passes))):
+        Z = _ma_once_columns(Z, window, pad_mode)
+        if zero_phase:
+            Z = _ma_once_columns(Z[::-1], window, pad_mode)[::-1]
+    return Z
+
+
+def column_gradient(Y, x):
+    """np.gradient(Y, x, axis=0) with x shared by all columns (n,) or per
+    column (n, k); first-order at the ends, as np.gradient"""
+    Y = np.asarray(Y, dtype=np.float64)
+    X = np.broadcast_to(np.asarray(x, dtype=np.float64).reshape(len(Y), -1), Y.shape)
+    out = np.empty_like(Y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[0] = (Y[1] - Y[0]) / (X[1] - X[0])
+        out[-1] = (Y[-1] - Y[-2]) / (X[-1] - X[-2])
+        hd = X[1:-1] - X[:-2]
+        hs = X[2:] - X[1:-1]
+        a = -hs / (hd * (hd + hs))
+        b = (hs - hd) / (hd * hs)
+        c = hd / (hs * (hd + hs))
+        out[1:-1] = a * Y[:-2] + b * Y[1:-1] + c * Y[2:]
+    return out
+
+
+def line_fits(x, Y, M):
+    """Least-squares line through the masked points of every column.
+
+    x is shared by all columns (n,) or per column (n, k); Y and M are (n, k).
+    Returns slope, intercept, R² and point count per column; the fit values
+    are NaN where fewer than two points are masked in.
+    """
+    M = np.asarray(M, dtype=bool)
+    X = np.broadcast_to(np.asarray(x, dtype=np.float64).reshape(len(M), -1), M.shape)
+    Y = np.where(M, Y, 0.0)
+    X = np.where(M, X, 0.0)
+    count = M.sum(axis=0)
+    n = np.maximum(count, 1)
+    x_mean = X.sum(axis=0) / n
+    y_mean = Y.sum(axis=0) / n
+    dx = np.where(M, X - x_mean, 0.0)
+    dy = np.where(M, Y - y_mean, 0.0)
+    sxx = (dx * dx).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (dx * dy).sum(axis=0) / sxx
+        intercept = y_mean - slope * x_mean
+        resid = np.where(M, Y - (slope * X + intercept), 0.0)
+        ss_res = (resid * resid).sum(axis=0)
+        ss_tot = (dy * dy).sum(axis=0)
+        r2 = np.where(ss_tot != 0, 1 - ss_res / ss_tot, 0.0)
+    bad = (count < 2) | (sxx == 0)
+    slope[bad] = intercept[bad] = r2[bad] = np.nan
+    return slope, intercept, r2, count
+
+
+def _ranks(valid):
+    """Position of each valid point among its column's valid points"""
+    return np.cumsum(valid, axis=0) - 1
+
+
+def _drop_last(mask, count):
+    """mask without the last `count` True points of each column"""
+    if count <= 0:
+        return mask
+    from_end = np.cumsum(mask[::-1], axis=0)[::-1]
+    return mask & (from_end > count)
+
+
+def _last_valid(values, valid):
+    """Last valid value of every column (NaN for empty columns)"""
+    idx = valid.shape[0] - 1 - np.argmax(valid[::-1], axis=0)
+    values = np.broadcast_to(np.asarray(values).reshape(valid.shape[0], -1), valid.shape)
+    last = values[idx, np.arange(valid.shape[1])]
+    return np.where(valid.any(axis=0), last, np.nan)
+
+
+def ohmic_fits(vsd, Y, valid, v_cap=0.10, max_iter=3, z_thresh=3.0):
+    """robust_small_v_fit() for every column: Ron, slope, intercept, used mask, R²"""
+    n_valid = valid.sum(axis=0)
+    used = valid & ((vsd >= 0) & (vsd <= v_cap))[:, None]
+    short = used.sum(axis=0) < 3
+    if short.any():
+        k = np.maximum(3, (0.2 * n_valid).astype(int))
+        first = valid & (_ranks(valid) < k)
+        used[:, short] = first[:, short]
+
+    active = np.ones(Y.shape[1], dtype=bool)
+    for _ in range(max_iter):
+        active &= used.sum(axis=0) >= 3
+        if not active.any():
+            break
+        m, b, _, count = line_fits(vsd, Y, used)
+        resid = np.where(used, Y - (m * vsd[:, None] + b), 0.0)
+        mean = resid.sum(axis=0) / np.maximum(count, 1)
+        s = np.sqrt((np.where(used, resid - mean, 0.0) ** 2).sum(axis=0) / np.maximum(count, 1))
+        s = np.where(s > 0, s, 1e-18)
+        new_used = used & ~(np.abs(resid) > z_thresh * s)
+        changed = (new_used != used).any(axis=0)
+        update = active & changed
+        used[:, update] = new_used[:, update]
+        active &= changed
+
+    m, b, r2, count = line_fits(vsd, Y, used)
+    ok = count >= 2
+    m = np.where(ok, m, 0.0)
+    b = np.where(ok, b, 0.0)
+    r2 = np.where(ok, r2, 0.0)
+    with np.errstate(divide="ignore"):
+        ron = np.where(m == 0, np.inf, 1.0 / np.where(m == 0, 1.0, m))
+    return ron, m, b, used, r2
+
+
+def saturation_fits(
+    vsd, Y, valid, frac_start=0.7, edge_pad=0, flatter=None, flatter_mask=None
+):
+    """output_params() (without vth) for every column; the saturation window
+    is the flatter range, or per column flatter_mask (e.g. a knee's right
+    segment), else the last (1 - frac_start) of the points"""
+    mask = None
+    if flatter_mask is not None:
+        mask = valid & flatter_mask
+    elif flatter is not None:
+        lo, hi = flatter
+        mask = valid & ((vsd >= lo) & (vsd <= hi))[:, None]
+        short = mask.sum(axis=0) < 3
+        if short.any():
+            padded = valid & ((vsd >= lo - 0.05) & (vsd <= hi + 0.05))[:, None]
+            mask[:, short] = padded[:, short]
+    start = (frac_start * valid.sum(axis=0)).astype(int)
+    by_fraction = valid & (_ranks(valid) >= start)
+    if mask is None:
+        mask = by_fraction
+    else:
+        short = mask.sum(axis=0) < 3
+        mask[:, short] = by_fraction[:, short]
+    mask = _drop_last(mask, edge_pad)
+
+    a, b, _, count = line_fits(vsd, Y, mask)
+    fitted = count > 2
+    a = np.where(fitted, a, 0.0)
+    b = np.where(fitted, b, 0.0)
+    gsd = np.abs(a)
+    with np.errstate(divide="ignore"):
+        ro = np.where(gsd == 0, np.inf, 1.0 / np.where(gsd == 0, 1.0, gsd))
+        va = np.where(a == 0, np.inf, np.abs(-b / np.where(a == 0, 1.0, a)))
+
+    masked_v = np.where(mask, vsd[:, None], np.nan)
+    has_points = count > 0
+    with np.errstate(all="ignore"):
+        vds_ref = np.where(
+            has_points,
+            np.nanmedian(np.where(has_points, masked_v, 0.0), axis=0),
+            _last_valid(vsd, valid),
+        )
+    id_sat_ref = np.where(has_points, a * vds_ref + b, _last_valid(Y, valid))
+    return {
+        "gsd": gsd,
+        "ro": ro,
+        "VA": va,
+        "a": a,
+        "b": b,
+        "vds_ref": vds_ref,
+        "Id_sat_ref": id_sat_ref,
+        "sat_mask": mask,
+    }
+
+
+def two_slope_fits(vsd, Y, valid, steeper, flatter):
+    """two_slope_intersection() for every column: vx, iy, (m1, b1, m2, b2)"""
+    m1mask = valid & ((vsd >= steeper[0]) & (vsd <= steeper[1]))[:, None]
+    m2mask = valid & ((vsd >= flatter[0]) & (vsd <= flatter[1]))[:, None]
+    return two_slope_from_masks(vsd, Y, m1mask, m2mask)
+
+
+def two_slope_from_masks(vsd, Y, m1mask, m2mask):
+    """Intersection of the lines fitted to two masked segments per column"""
+    m1, b1, _, _ = line_fits(vsd, Y, m1mask)
+    m2, b2, _, _ = line_fits(vsd, Y, m2mask)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vx = (b2 - b1) / (m1 - m2)
+    vx = np.where(np.isclose(m1, m2, rtol=1e-9, atol=0.0), np.nan, vx)
+    iy = m1 * vx + b1
+    return vx, iy, (m1, b1, m2, b2)
+
+
+def knee_masks(vsd, Y, valid, min_confidence=KNEE_MIN_CONFIDENCE):
+    """Left/right segment masks of the knee detected in every column;
+    empty for columns without a confident knee"""
+    knees = knee_fits(vsd, Y, valid)
+    rows = np.arange(len(vsd))[:, None]
+    found = (knees["index"] >= 1) & (knees["confidence"] >= min_confidence)
+    left = valid & found & (rows < knees["index"]) & (vsd >= KNEE_X_MIN)[:, None]
+    right = valid & found & (rows >= knees["index"])
+    return left, right
+
+
+def snr_columns(Y, valid, noise_rms):
+    """compute_snr() for every column given the baseline noise RMS"""
+    noise_rms = float(noise_rms)
+    count = np.maximum(valid.sum(axis=0), 1)
+    signal_rms = np.sqrt(np.where(valid, Y * Y, 0.0).sum(axis=0) / count)
+    snr_linear = signal_rms / max(noise_rms, 1e-18)
+    i_det = 3 * noise_rms
+    peak = np.where(valid, np.abs(Y), 0.0).max(axis=0)
+    return {
+        "snr_db": 20 * np.log10(np.maximum(snr_linear, 1e-18)),
+        "dynamic_range_db": 20 * np.log10(np.maximum(peak / max(i_det, 1e-18), 1e-18)),
+        "signal_rms_A": signal_rms,
+    }
+
+
+def gm_over_vgs(vgs, id_sat, gm_window=3, positive=True):
+    """gm and R² of a local line through Id_sat(VGS) at every VGS.
+
+    id_sat is (k,) or (k, m) for m curves on the same VGS grid (e.g.
+    bootstrap resamples); gm and R² have the same shape.
+    """
+    vgs = np.asarray(vgs, dtype=np.float64)
+    id_sat = np.asarray(id_sat, dtype=np.float64)
+    gm = np.full(id_sat.shape, np.nan)
+    r2 = np.full(id_sat.shape, np.nan)
+    if len(vgs) < 2:
+        return gm, r2
+    order = np.argsort(vgs)
+    x, y = vgs[order], id_sat[order].reshape(len(vgs), -1)
+    n, m = y.shape
+    half = max(1, int(gm_window // 2))
+    # Column i holds the window around point i, clipped to the ends
+    rows = np.arange(-half, half + 1)[:, None] + np.arange(n)[None, :]
+    inside = (rows >= 0) & (rows < n)
+    rows = np.clip(rows, 0, n - 1)
+    X = np.repeat(x[rows], m, axis=1)
+    Yw = y[rows].reshape(len(rows), -1)
+    inside = np.repeat(inside, m, axis=1)
+    slope, _, fit_r2, _ = line_fits(X, np.where(inside, Yw, 0.0), inside)
+    finite = np.where(inside, np.isfinite(X) & np.isfinite(Yw), True).all(axis=0)
+    slope = np.where(finite, slope, np.nan).reshape(n, m)
+    fit_r2 = np.where(finite, fit_r2, np.nan).reshape(n, m)
+    gm[order] = (np.abs(slope) if positive else slope).reshape(gm[order].shape)
+    r2[order] = fit_r2.reshape(r2[order].shape)
+    return gm, r2
+
+
+def chip_parameter_maps(
+    vd,
+    vgs,
+    isd,
+    window=5,
+    passes=1,
+    pad_mode="reflect",
+    zero_phase=True,
+    apply_filter=True,
+    v_cap=0.10,
+    frac_start=0.7,
+    edge_pad=0,
+    two_slope_window=None,
+    noise_rms=1e-12,
+    gm_window=3,
+    gm_positive=True,
+):
+    """Every MAP_PARAMS entry at every VGS of one chip.
+
+    vd (n), vgs (k) and isd (n x k, e.g. a replicate mean) as in avg_by_chip.
+    The matrix is turned into Isd(Vsd) traces (Vsd = -Vd, ascending) like
+    build_traces_at_vsg(). Returns a dict with vgs, vsd, raw, filtered and
+    valid (n x k), the saturation and ohmic masks, and one array of length
+    k per MAP_PARAMS entry.
+
+    isd may also be a stack of B matrices (B x n x k, e.g. bootstrap
+    resamples), fitted as B * k columns in the same pass; the per-VGS
+    arrays are then B x k and the matrices n x B x k.
+    """
+    vsd = -np.asarray(vd, dtype=np.float64)
+    isd = np.asarray(isd, dtype=np.float64)
+    n_batch = isd.shape[0] if isd.ndim == 3 else None
+    if n_batch is not None:
+        raw = isd.transpose(1, 0, 2).reshape(len(vsd), -1)
+    else:
+        raw = isd.reshape(len(vsd), -1)
+    keep = np.isfinite(vsd)
+    order = np.argsort(vsd[keep])
+    vsd = vsd[keep][order]
+    raw = raw[keep][order]
+    valid = np.isfinite(raw)
+
+    if apply_filter:
+        filtered = moving_average_columns(raw, window, passes, pad_mode, zero_phase)
+    else:
+        filtered = np.array(raw)
+    Y = np.where(valid, filtered, 0.0)
+
+    ron, _, _, lin_mask, r2_lin = ohmic_fits(vsd, Y, valid, v_cap=v_cap)
+    if two_slope_window:
+        sat = saturation_fits(
+            vsd, Y, valid, frac_start, edge_pad, flatter=two_slope_window["flatter"]
+        )
+        vx, iy, _ = two_slope_fits(
+            vsd, Y, valid, two_slope_window["steeper"], two_slope_window["flatter"]
+        )
+    else:
+        # No manual windows: the knee of every column, found in one batch
+        left, right = knee_masks(vsd, Y, valid)
+        sat = saturation_fits(vsd, Y, valid, frac_start, edge_pad, flatter_mask=right)
+        vx, iy, _ = two_slope_from_masks(vsd, Y, left, right)
+    snr = snr_columns(Y, valid, noise_rms)
+
+    # Id_sat as _idsat_for_chip_over_vgs(): the knee, else the saturation fit
+    id_sat = np.where(np.isfinite(iy), iy, sat["Id_sat_ref"])
+    vgs = np.asarray(vgs, dtype=np.float64)
+    k = len(vgs)
+    by_vgs = id_sat.reshape(-1, k).T
+    measured = valid.reshape(len(vsd), -1, k).any(axis=(0, 1))
+    gm = np.full(by_vgs.shape, np.nan)
+    gm_r2 = np.full(by_vgs.shape, np.nan)
+    gm[measured], gm_r2[measured] = gm_over_vgs(
+        vgs[measured], by_vgs[measured], gm_window, gm_positive
+    )
+    gm = gm.T.reshape(id_sat.shape)
+    gm_r2 = gm_r2.T.reshape(id_sat.shape)
+
+    maps = {
+        "vgs": vgs,
+        "vsd": vsd,
+        "raw": raw,
+        "filtered": filtered,
+        "valid": valid,
+        "lin_mask": lin_mask,
+        "sat_mask": sat["sat_mask"],
+        "Ron_ohm": ron,
+        "R2_lin": r2_lin,
+        "gsd_S": sat["gsd"],
+        "ro_ohm": sat["ro"],
+        "VA_V": sat["VA"],
+        "Vds_ref_V": sat["vds_ref"],
+        "Id_sat_ref_A": sat["Id_sat_ref"],
+        "Vx_two_slope_V": vx,
+        "Isd_sat_two_slope_A": iy,
+        "Id_sat_A": id_sat,
+        "gm_S": gm,
+        "gm_R2": gm_r2,
+        "SNR_dB": snr["snr_db"],
+        "DynRange_dB": snr["dynamic_range_db"],
+    }
+    if n_batch is not None:
+        for name, values in maps.items():
+            if name not in ("vgs", "vsd"):
+                maps[name] = values.reshape(values.shape[:-1] + (n_batch, k))
+    return maps
+
+
+def maps_table(maps_by_chip, params=MAP_PARAMS, intervals=None):
+    """Long table (one row per chip and VGS) of parameter maps; with
+    intervals ({chip: chip_bootstrap() result}) the <name>_lo/_hi bounds
+    follow each parameter that has them"""
+    intervals = intervals or {}
+    frames = []
+    for chip, maps in maps_by_chip.items():
+        columns = {}
+        for name in params:
+            columns[name] = maps[name]
+            ci = intervals.get(chip, {})
+            if f"{name}_lo" in ci:
+                columns[f"{name}_lo"] = ci[f"{name}_lo"]
+                columns[f"{name}_hi"] = ci[f"{name}_hi"]
+        frame = pd.DataFrame(columns)
+        frame.insert(0, "VSG_V", np.abs(maps["vgs"]))
+        frame.insert(0, "VGS_V", maps["vgs"])
+        frame.insert(0, "Chip", chip)
+        frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["Chip", "VGS_V", "VSG_V", *params])
+    return pd.concat(frames, ignore_index=True)
+
+
+def heatmap_grid(maps_by_chip, param):
+    """(chips, |VGS| grid, chips x VGS matrix) of one parameter for a heatmap"""
+    chips = sorted(maps_by_chip)
+    grid = sorted({round(abs(float(v)), 6) for m in maps_by_chip.values() for v in m["vgs"]})
+    matrix = np.full((len(chips), len(grid)), np.nan)
+    for i, chip in enumerate(chips):
+        maps = maps_by_chip[chip]
+        for v, value in zip(maps["vgs"], maps[param]):
+            matrix[i, grid.index(round(abs(float(v)), 6))] = value
+    return chips, np.asarray(grid), matrix
@@ -0,0 +1,63 @@
+"""
+bench_adc_scan.py - ADS1256 scan throughput
+Usage (from the repository root): python -m benchmarks.bench_adc_scan [seconds]
+
+Compares the per-channel GetChannalValue loop with the pipelined
+ADS1256_Scan for the sweep channel set (1-6) and for all 8 inputs.
+Both paths clock the same bytes and wait the same settling conversion per
+input, so the two differ only by SPI call and CS overhead (within a few
+percent on the simulator); the channel set is what moves the scan rate.
+"""
+
+import sys
+import time
+
+from collect import ADS1256
+
+SWEEP_CHANNELS = [1, 2, 3, 4, 5, 6]
+ALL_CHANNELS = list(range(8))
+
+
+def scans_per_second(scan, duration):
+    """Run scan() repeatedly for duration seconds; return scans per second"""
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        scan()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def run(duration=3.0):
+    ADC = ADS1256.ADS1256()
+    if ADC.ADS1256_init() != 0:
+        print("ADS1256 init failed")
+        return None
+
+    cases = {
+        "per-channel 1-6": lambda: [
+            ADC.ADS1256_GetChannalValue(c) for c in SWEEP_CHANNELS
+        ],
+        "pipelined 1-6": lambda: ADC.ADS1256_Scan(SWEEP_CHANNELS),
+        "per-channel 0-7": lambda: [
+            ADC.ADS1256_GetChannalValue(c) for c in ALL_CHANNELS
+        ],
+        "pipelined 0-7": lambda: ADC.ADS1256_Scan(ALL_CHANNELS),
+    }
+
+    results = {}
+    for name, scan in cases.items():
+        ADC.ADS1256_ResetWaitStats()
+        rate = scans_per_second(scan, duration)
+        stats = ADC.ADS1256_WaitStats()
+        results[name] = rate
+        print(
+            f"{name:<18} {rate:8.1f} scans/s   "
+            f"DRDY wait {stats['wait_s_mean']*1e6:7.1f} us/conv   "
+            f"wait CPU {stats['cpu_s_total']:.3f} s"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
@@ -0,0 +1,76 @@
+"""
+bench_bootstrap.py - Bootstrap intervals: one fit per resample vs batched
+Usage (from the repository root): python -m benchmarks.bench_bootstrap [resamples]
+
+Times BOOTSTRAP_RESAMPLES resamples of every chip of data/5MWT-Oligio (or
+of the synthetic set of bench_vectorized when the data is missing), three
+ways: chip_parameter_maps() once per resample, batched chip_bootstrap() on
+one core, and bootstrap_chips() across the process pool. The per-resample
+loop is timed on a tenth of the resamples and scaled up.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from analyze import analyze_tab as at
+from analyze.bootstrap import (
+    BOOTSTRAP_RESAMPLES,
+    bootstrap_chips,
+    chip_seed,
+    resample_stack,
+)
+from analyze.vectorized import chip_parameter_maps
+from benchmarks.bench_vectorized import DATA_SET, SYNTHETIC, synthetic_set
+
+
+def chip_tasks():
+    params = at.default_params()
+    if os.path.isdir(DATA_SET):
+        replicates = at.average_chips(at.CHIP_FILES, DATA_SET)
+        label = "5MWT-Oligio"
+    else:
+        print(f"{DATA_SET} not found; synthetic set")
+        rng = np.random.default_rng(1)
+        replicates = {}
+        for chip, (vd, vgs, mean) in synthetic_set(**SYNTHETIC).items():
+            stack = mean.to_numpy()[None] * (1 + rng.normal(0, 0.05, (3, 1, 1)))
+            replicates[chip] = {"vd": np.asarray(vd), "vgs": np.asarray(vgs), "stack": stack}
+        label = "synthetic"
+    tasks = {
+        chip: (r["vd"], r["vgs"], r["stack"], at.vgs_map_settings(chip, params))
+        for chip, r in replicates.items()
+    }
+    return label, tasks
+
+
+def per_resample(tasks, n_boot):
+    for chip, (vd, vgs, stack, settings) in tasks.items():
+        rng = np.random.default_rng(chip_seed(chip))
+        for isd in resample_stack(stack, n_boot, rng):
+            chip_parameter_maps(vd, vgs, isd, **settings)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def run(n_boot=BOOTSTRAP_RESAMPLES):
+    label, tasks = chip_tasks()
+    loop_n = max(1, n_boot // 10)
+    loop_s = timed(per_resample, tasks, loop_n) * n_boot / loop_n
+    serial_s = timed(bootstrap_chips, tasks, n_boot, 0, 1)
+    pool_s = timed(bootstrap_chips, tasks, n_boot)
+    print(f"{label}: {len(tasks)} chips x {n_boot} resamples")
+    print(f"  one fit per resample  {loop_s:8.2f} s (from {loop_n} resamples)")
+    print(f"  batched, one core     {serial_s:8.2f} s   ({loop_s / serial_s:.1f}x)")
+    print(f"  batched, pool         {pool_s:8.2f} s   ({os.cpu_count() or 1} workers)")
+    return {"loop_s": loop_s, "serial_s": serial_s, "pool_s": pool_s}
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else BOOTSTRAP_RESAMPLES)
@@ -0,0 +1,78 @@
+"""
+bench_export.py - Column export vs per-cell workbook writes
+Usage (from the repository root): python -m benchmarks.bench_export [seconds] [rate_hz]
+
+Builds a synthetic baseline capture (time + 4 channels) and times the
+per-cell openpyxl loop run_baseline_and_save used before against
+write_columns() into .xlsx, .csv and .table.npz.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import openpyxl
+
+from collect.export import write_columns
+
+HEADERS = ["Time (s)", "VSD (V)", "IS (A)", "ID (A)", "IDIS (A)"]
+
+
+def synthetic_baseline(seconds, rate_hz, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate_hz)
+    vsd = rng.normal(0.0, 2e-5, n)
+    i_source = rng.normal(0.0, 2e-7, n)
+    i_drain = rng.normal(0.0, 2e-7, n)
+    return [np.arange(n) / rate_hz, vsd, i_source, i_drain, i_source - i_drain]
+
+
+def write_cells(path, columns):
+    """The per-cell layout of the old baseline export"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    for col, header in enumerate(HEADERS, 1):
+        worksheet.cell(row=8, column=col, value=header)
+    for i in range(len(columns[0])):
+        for col, column in enumerate(columns, 1):
+            worksheet.cell(row=9 + i, column=col, value=float(column[i]))
+    workbook.save(path)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def run(seconds=60.0, rate_hz=100.0):
+    columns = synthetic_baseline(seconds, rate_hz)
+    preamble = [["Baseline"], [], [], [], [], [], []]
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {"cells_xlsx_s": timed(write_cells, os.path.join(tmp, "cells.xlsx"), columns)}
+        for suffix in (".xlsx", ".csv", ".table.npz"):
+            path = os.path.join(tmp, f"columns{suffix}")
+            results[f"columns{suffix}_s"] = timed(
+                write_columns, path, HEADERS, columns, preamble
+            )
+            results[f"columns{suffix}_kib"] = os.path.getsize(path) / 1024
+
+    cells_s = results["cells_xlsx_s"]
+    print(f"{len(columns[0])} samples x {len(columns)} columns ({seconds:.0f} s at {rate_hz:.0f} Hz)")
+    print(f"per-cell xlsx           {cells_s*1e3:8.1f} ms")
+    for suffix in (".xlsx", ".csv", ".table.npz"):
+        s = results[f"columns{suffix}_s"]
+        print(
+            f"write_columns {suffix:<10}{s*1e3:8.1f} ms  {cells_s / s:5.1f}x  "
+            f"{results[f'columns{suffix}_kib']:8.1f} KiB"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    run(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 60.0,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 100.0,
+    )
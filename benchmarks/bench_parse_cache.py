@@ -0,0 +1,86 @@
+"""
+bench_parse_cache.py - Analyze-tab file loading with and without the parse cache
+Usage (from the repository root): python -m benchmarks.bench_parse_cache [repeats]
+
+Loads the CHIP_FILES set of data/5MWT-Oligio the way extract_values() used
+to (two pandas reads per file) and through ParseCache: cold (parse + store),
+warm from disk (new process, same cache directory) and warm from memory
+(a second Run click).
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from analyze.parse_cache import ParseCache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_SET = os.path.join(REPO_ROOT, "data", "5MWT-Oligio")
+FILES = ["T3_VSD_ISID_v1.csv", "T4_VSD_ISID_v1.csv", "T5_VSD_ISID_v1.csv"]
+
+
+def paths():
+    found = []
+    for chip in sorted(os.listdir(DATA_SET)):
+        for name in FILES:
+            path = os.path.join(DATA_SET, chip, name)
+            if os.path.exists(path):
+                found.append(path)
+    return found
+
+
+def legacy_read(path):
+    df0 = pd.read_csv(path, header=None)
+    mid = (df0.shape[1] - 1) // 2
+    df = pd.read_csv(path, skiprows=4).apply(pd.to_numeric, errors="coerce")
+    return df.iloc[:, 1 : mid + 1], df.iloc[:, mid + 1 : 2 * mid + 1]
+
+
+def timed_pass(fn, files, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for path in files:
+            fn(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(repeats=3):
+    if not os.path.isdir(DATA_SET):
+        print(f"{DATA_SET} not found; nothing to benchmark")
+        return {}
+    files = paths()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        legacy_s = timed_pass(legacy_read, files, repeats)
+
+        cold = ParseCache(cache_dir)
+        start = time.perf_counter()
+        for path in files:
+            cold.get(path)
+        cold_s = time.perf_counter() - start
+
+        disk_s = float("inf")
+        for _ in range(repeats):
+            warm = ParseCache(cache_dir)
+            start = time.perf_counter()
+            for path in files:
+                warm.get(path)
+            disk_s = min(disk_s, time.perf_counter() - start)
+
+        memory_s = timed_pass(warm.get, files, repeats)
+
+    print(f"{len(files)} files ({sum(os.path.getsize(p) for p in files) / 1024:.0f} KiB)")
+    print(f"legacy pandas x2      {legacy_s * 1e3:8.1f} ms")
+    print(f"cache cold (parse)    {cold_s * 1e3:8.1f} ms")
+    print(f"cache warm, disk      {disk_s * 1e3:8.1f} ms")
+    print(f"cache warm, memory    {memory_s * 1e3:8.1f} ms")
+    print(f"hits: {warm.stats}")
+    return {"legacy_s": legacy_s, "cold_s": cold_s, "disk_s": disk_s, "memory_s": memory_s}
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,109 @@
+"""
+bench_run_format.py - Native run file vs xlsx, write and read
+Usage (from the repository root): python -m benchmarks.bench_run_format [points] [conditions]
+
+Builds a synthetic output-mode run and times save_excel_file against
+write_run, then openpyxl/pandas reads of the workbook against read_run.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from collect.export import save_excel_file
+from collect.run_data import RunData
+from collect.run_format import read_run, write_run
+
+
+def synthetic_run(points, conditions, seed=0):
+    rng = np.random.default_rng(seed)
+    constant_voltages = [round(0.5 * (i + 1), 3) for i in range(conditions)]
+    run_data = RunData(constant_voltages, points)
+    for v in constant_voltages:
+        for step, sweep in enumerate(np.linspace(3.0, 0.0, points)):
+            codes = rng.integers(-0x800000, 0x7FFFFF, size=6)
+            volts = codes * 5.0 / 0x7FFFFF
+            run_data.append(
+                {
+                    "constant_voltage": v,
+                    "codes": codes,
+                    "t": step * 0.1,
+                    "step": step,
+                    "sweep_voltage": sweep,
+                    **{f"voltages{ch}": volts[ch - 1] for ch in range(1, 7)},
+                    "vsd": volts[3] - volts[5],
+                    "vsg": volts[3] - volts[4],
+                    "i_source": (volts[3] - volts[0]) / 100.0,
+                    "i_gate": (volts[4] - volts[1]) / 1000.0,
+                    "i_drain": (volts[5] - volts[2]) / 100.0,
+                    "isd": (volts[3] - volts[0] - volts[5] + volts[2]) / 100.0,
+                }
+            )
+    return run_data
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def read_xlsx_openpyxl(path):
+    sheet = openpyxl.load_workbook(path, data_only=True).active
+    return [row for row in sheet.iter_rows(min_row=6, values_only=True)]
+
+
+def read_xlsx_pandas(path):
+    return pd.read_excel(path, skiprows=4)
+
+
+def run(points=1000, conditions=5):
+    run_data = synthetic_run(points, conditions)
+    meta = {"mode": "output", "chip_name": "Bench", "trial_name": "T1"}
+    with tempfile.TemporaryDirectory() as tmp:
+        xlsx_s, xlsx_path = timed(
+            save_excel_file,
+            tmp,
+            "bench_VSD_ISID.xlsx",
+            "OSDL Biosensor V1 - Output",
+            run_data,
+            3.0,
+            0.0,
+            points,
+            "i_drain",
+            "vsd",
+            "isd",
+        )
+        npz_path = os.path.join(tmp, "bench.run.npz")
+        npz_s, _ = timed(write_run, npz_path, run_data, meta)
+
+        openpyxl_s, _ = timed(read_xlsx_openpyxl, xlsx_path)
+        pandas_s, _ = timed(read_xlsx_pandas, xlsx_path)
+        read_s, (_, loaded) = timed(read_run, npz_path)
+        assert np.array_equal(loaded[0.5]["codes"], run_data[0.5]["codes"])
+
+        print(f"{conditions} conditions x {points} points")
+        print(
+            f"write  xlsx (3 columns/condition) {xlsx_s*1e3:8.1f} ms  "
+            f"{os.path.getsize(xlsx_path)/1024:8.1f} KiB"
+        )
+        print(
+            f"write  run.npz (all columns+codes) {npz_s*1e3:7.1f} ms  "
+            f"{os.path.getsize(npz_path)/1024:8.1f} KiB"
+        )
+        print(f"read   xlsx openpyxl {openpyxl_s*1e3:8.1f} ms")
+        print(f"read   xlsx pandas   {pandas_s*1e3:8.1f} ms")
+        print(f"read   run.npz       {read_s*1e3:8.1f} ms")
+    return {"write_xlsx_s": xlsx_s, "write_npz_s": npz_s, "read_xlsx_s": openpyxl_s, "read_npz_s": read_s}
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
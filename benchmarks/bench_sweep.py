@@ -0,0 +1,68 @@
+"""
+bench_sweep.py - Headless output-mode sweep
+Usage (from the repository root): python -m benchmarks.bench_sweep [points] [interval_s]
+
+Runs the collect tab's SweepEngine without Tk and reports step-interval
+accuracy and jitter. With BIOSENSOR_BACKEND=sim the curve comes from the
+simulated device.
+"""
+
+import sys
+
+import numpy as np
+
+from collect import ADS1256
+from collect import DAC8532
+from collect import config
+from collect.sweep_engine import SweepEngine, format_timing_stats
+
+
+def run(points=34, interval=0.1, constant_voltage=0.0):
+    config.select_wiring("output")
+    config.GPIO.setup(4, config.GPIO.OUT)
+    config.GPIO.output(4, config.GPIO.HIGH)
+    ADC = ADS1256.ADS1256()
+    DAC = DAC8532.DAC8532()
+    if ADC.ADS1256_init() != 0:
+        print("ADS1256 init failed")
+        return None
+
+    sweep_step = DAC8532.DAC_VREF / (points - 1)
+    engine = SweepEngine(
+        ADC,
+        DAC,
+        "output",
+        0.0,
+        DAC8532.DAC_VREF,
+        sweep_step,
+        interval,
+        points * interval + 1.0,
+        [constant_voltage],
+    )
+    engine.start()
+    samples = []
+    while True:
+        sample = engine.samples.get()
+        if sample is None:
+            break
+        samples.append(sample)
+    if engine.error is not None:
+        print(f"sweep failed: {engine.error}")
+        return None
+
+    vsd = np.array([s["vsd"] for s in samples])
+    isd = np.array([s["isd"] for s in samples])
+    print(f"sweep ({config.BACKEND}) {len(samples)} points", end="   ")
+    print(format_timing_stats(engine.stats, interval), end="")
+    print(
+        f"Vsd {vsd.min():.3f}..{vsd.max():.3f} V   "
+        f"Isd {isd.min()*1e3:.4f}..{isd.max()*1e3:.4f} mA"
+    )
+    return {"vsd": vsd, "isd": isd, "stats": engine.stats}
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 34,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.1,
+    )
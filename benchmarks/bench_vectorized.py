@@ -0,0 +1,124 @@
+"""
+bench_vectorized.py - All-VGS parameter extraction: per-column loop vs batched
+Usage (from the repository root): python -m benchmarks.bench_vectorized [repeats]
+
+Extracts Ron, gsd, ro, VA, Id_sat, knee, SNR and gm at every VGS of every
+chip, in two ways. The loop runs the analyze-tab functions once per VGS
+column, the way _idsat_for_chip_over_vgs() does. The batched version is
+chip_parameter_maps(). It is measured on data/5MWT-Oligio and on a
+synthetic set with a finer grid, and the largest relative difference
+between the two results is reported.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from analyze import analyze_tab as at
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_SET = os.path.join(REPO_ROOT, "data", "5MWT-Oligio")
+SYNTHETIC = {"chips": 16, "points": 401, "vgs": 29}
+
+
+def per_column(chip, avg_by_chip):
+    """The analyze-tab functions once per VGS column (knee detected per trace)"""
+    vd_vals, vgs_vals, avg_isd = avg_by_chip[chip]
+    params = {name: [] for name in ("Ron_ohm", "gsd_S", "VA_V", "Id_sat_A", "SNR_dB")}
+    for v in vgs_vals:
+        raw = at.build_traces_at_vsg({chip: avg_by_chip[chip]}, v, interpret_as_vsg=False)
+        vsd, isd_f = at.apply_filter(raw, window=at.FILTER_WINDOW)[chip]
+        ron = at.robust_small_v_fit(vsd, isd_f, v_cap=at.OHMIC_VCAP)[0]
+        w = at.two_slope_windows_for(chip, vsd, isd_f)
+        out = at.output_params(
+            vsd,
+            isd_f,
+            frac_start=at.SAT_FRAC_START,
+            edge_pad=at.EDGE_PAD_FOR_FITS,
+            chip=chip,
+            two_slope_windows={chip: w} if w is not None else None,
+        )
+        iy = at.two_slope_fit(vsd, isd_f, w)[1]
+        snr = at.compute_snr(isd_f, baseline_trace_A=at.baseline_Id_detrended)
+        params["Ron_ohm"].append(ron)
+        params["gsd_S"].append(out["gsd"])
+        params["VA_V"].append(out["VA"])
+        params["Id_sat_A"].append(iy if np.isfinite(iy) else out["Id_sat_ref"])
+        params["SNR_dB"].append(snr["snr_db"])
+    vgs_all, idsat_all = at._idsat_for_chip_over_vgs(
+        chip, avg_by_chip, at.TWO_SLOPE_WINDOWS, at.FILTER_WINDOW, 1, at.PAD_MODE, True
+    )
+    params["gm_S"] = [at.gm_from_idsat(vgs_all, idsat_all, abs(v))[0] for v in vgs_vals]
+    return {name: np.asarray(values) for name, values in params.items()}
+
+
+def batched(chip, avg_by_chip):
+    return at.vgs_maps_for(chip, avg_by_chip, at.default_params())
+
+
+def synthetic_set(chips, points, vgs):
+    """p-type output curves on a finer grid, with a little noise"""
+    rng = np.random.default_rng(0)
+    vd = np.linspace(0.5, -3.5, points)
+    vgs_vals = -np.round(np.linspace(0.0, 2.8, vgs), 6)
+    vsd = -vd
+    avg_by_chip = {}
+    for i in range(chips):
+        gain = 1e-6 * (1 + 0.1 * i)
+        vov = np.abs(vgs_vals)[None, :] + 0.5
+        isd = gain * vov * np.tanh(vsd[:, None] / vov) * (1 + 0.02 * vsd[:, None])
+        isd = isd + rng.normal(0, 2e-10, isd.shape)
+        columns = [f"{v:g}" for v in vgs_vals]
+        avg_by_chip[f"S{i:02d}"] = (vd.tolist(), vgs_vals.tolist(), pd.DataFrame(isd, columns=columns))
+    return avg_by_chip
+
+
+def timed(fn, avg_by_chip, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = {chip: fn(chip, avg_by_chip) for chip in avg_by_chip}
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def max_rel_diff(loop, maps):
+    worst = 0.0
+    for chip, params in loop.items():
+        for name, values in params.items():
+            other = maps[chip][name]
+            both = np.isfinite(values) & np.isfinite(other)
+            scale = np.maximum(np.abs(values[both]), 1e-30)
+            if both.any():
+                worst = max(worst, float(np.max(np.abs(values[both] - other[both]) / scale)))
+    return worst
+
+
+def compare(label, avg_by_chip, repeats):
+    loop_s, loop = timed(per_column, avg_by_chip, repeats)
+    vec_s, maps = timed(batched, avg_by_chip, repeats)
+    _, vgs, isd = next(iter(avg_by_chip.values()))
+    print(f"{label}: {len(avg_by_chip)} chips x {isd.shape[0]} points x {len(vgs)} VGS")
+    print(f"  per-column loop  {loop_s * 1e3:8.1f} ms")
+    print(f"  batched          {vec_s * 1e3:8.1f} ms   ({loop_s / vec_s:.1f}x)")
+    print(f"  max rel. diff    {max_rel_diff(loop, maps):.1e}")
+    return {"loop_s": loop_s, "batched_s": vec_s}
+
+
+def run(repeats=3):
+    results = {}
+    if os.path.isdir(DATA_SET):
+        replicates = at.average_chips(at.CHIP_FILES, DATA_SET)
+        avg_by_chip = {chip: at.replicates_to_avg(r) for chip, r in replicates.items()}
+        results["data"] = compare("5MWT-Oligio", avg_by_chip, repeats)
+    else:
+        print(f"{DATA_SET} not found; synthetic set only")
+    results["synthetic"] = compare("synthetic", synthetic_set(**SYNTHETIC), repeats)
+    return results
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
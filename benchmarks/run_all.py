@@ -0,0 +1,41 @@
+"""
+run_all.py - Run every benchmark
+Usage (from the repository root): python -m benchmarks.run_all [seconds]
+
+Defaults to the simulated bench so the suite runs off the Pi; export
+BIOSENSOR_BACKEND=hardware to measure the real HAT.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("BIOSENSOR_BACKEND", "sim")
+
+from benchmarks import bench_adc_scan  # noqa: E402
+from benchmarks import bench_bootstrap  # noqa: E402
+from benchmarks import bench_export  # noqa: E402
+from benchmarks import bench_parse_cache  # noqa: E402
+from benchmarks import bench_run_format  # noqa: E402
+from benchmarks import bench_sweep  # noqa: E402
+from benchmarks import bench_vectorized  # noqa: E402
+
+
+def main(duration=2.0):
+    print("== ADC scan ==")
+    bench_adc_scan.run(duration)
+    print("== Sweep ==")
+    bench_sweep.run()
+    print("== Run file format ==")
+    bench_run_format.run()
+    print("== Column export ==")
+    bench_export.run()
+    print("== Parse cache ==")
+    bench_parse_cache.run()
+    print("== All-VGS parameter maps ==")
+    bench_vectorized.run()
+    print("== Bootstrap intervals ==")
+    bench_bootstrap.run()
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0)
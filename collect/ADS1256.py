@@ -1,5 +1,7 @@
 from . import config
-import RPi.GPIO as GPIO
+from .config import GPIO
+import numpy as np
+import time
 
 
 ScanMode = 0
@@ -65,11 +67,46 @@ CMD = {'CMD_WAKEUP' : 0x00,     # Completes SYNC and Exits Standby Mode 0000  00
        'CMD_RESET' : 0xFE,      # Reset to Power-Up Values 1111   1110 (FEh)
       }
 
+def ADS1256_DecodeCodes(raw):
+    """Convert a buffer of big-endian 24-bit two's complement samples to int32 codes"""
+    b = np.frombuffer(bytes(raw), dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+    codes = (b[:, 0] << 16) | (b[:, 1] << 8) | b[:, 2]
+    codes -= (codes & 0x800000) << 1
+    return codes
+
+
+# DRDY wait: the slowest data rate (2.5 SPS) needs ~0.4 s after SYNC/WAKEUP
+DRDY_TIMEOUT_S = 2.0
+# Spin this long before blocking, so fast data rates never pay the edge-wait setup
+DRDY_SPIN_S = 200e-6
+# Back-off bounds for the polling fallback
+DRDY_POLL_MIN_S = 20e-6
+DRDY_POLL_MAX_S = 2e-3
+
+
+# Scan timing (datasheet t11 after SYNC, t6 after RDATA; 24 and 50 tCLKIN at 7.68 MHz)
+SCAN_T11_US = 4
+SCAN_T6_US = 7
+
+
+class DRDYTimeoutError(TimeoutError):
+    """DRDY did not go low within the wait timeout"""
+
+
 class ADS1256:
     def __init__(self):
         self.rst_pin = config.RST_PIN
         self.cs_pin = config.CS_PIN
         self.drdy_pin = config.DRDY_PIN
+        self.continuous = False
+        self.continuous_first = False
+        # 'edge' blocks on a GPIO falling-edge event, 'poll' sleeps with back-off
+        self.drdy_mode = 'edge'
+        self.drdy_timeout = DRDY_TIMEOUT_S
+        # Last values written by ADS1256_ConfigADC
+        self.gain = ADS1256_GAIN_E['ADS1256_GAIN_1']
+        self.drate = ADS1256_DRATE_E['ADS1256_30000SPS']
+        self.ADS1256_ResetWaitStats()
 
     # Hardware reset
     def ADS1256_reset(self):
@@ -97,15 +134,83 @@ class ADS1256:
 
         return data
         
-    def ADS1256_WaitDRDY(self):
-        for i in range(0,400000,1):
-            if(config.digital_read(self.drdy_pin) == 0):
-                
-                break
-        if(i >= 400000):
-            print ("Time Out ...\r\n")
-        
-        
+    def ADS1256_WaitDRDY(self, timeout=None):
+        if timeout is None:
+            timeout = self.drdy_timeout
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        deadline = start + timeout
+        try:
+            if not self.ADS1256_SpinDRDY(min(start + DRDY_SPIN_S, deadline)):
+                if self.drdy_mode == 'edge':
+                    try:
+                        ready = self.ADS1256_EdgeWaitDRDY(deadline)
+                    except RuntimeError as e:
+                        print("DRDY edge detection unavailable (%s), polling instead" % e)
+                        self.drdy_mode = 'poll'
+                        ready = self.ADS1256_PollDRDY(deadline)
+                else:
+                    ready = self.ADS1256_PollDRDY(deadline)
+                if not ready:
+                    self.drdy_timeouts += 1
+                    raise DRDYTimeoutError("DRDY stayed high for %.3f s" % timeout)
+        finally:
+            waited = time.perf_counter() - start
+            self.drdy_waits += 1
+            self.drdy_wait_s += waited
+            self.drdy_wait_cpu_s += time.thread_time() - cpu_start
+            if waited > self.drdy_wait_max_s:
+                self.drdy_wait_max_s = waited
+
+    def ADS1256_SpinDRDY(self, until):
+        while True:
+            if config.digital_read(self.drdy_pin) == 0:
+                return True
+            if time.perf_counter() >= until:
+                return False
+
+    def ADS1256_EdgeWaitDRDY(self, deadline):
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return config.digital_read(self.drdy_pin) == 0
+            # DRDY pulses once per conversion, so an edge that falls between the
+            # level check and arming the wait only costs one conversion period
+            config.wait_falling_edge(self.drdy_pin, remaining)
+            if config.digital_read(self.drdy_pin) == 0:
+                return True
+
+    def ADS1256_PollDRDY(self, deadline):
+        delay = DRDY_POLL_MIN_S
+        while True:
+            if config.digital_read(self.drdy_pin) == 0:
+                return True
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, DRDY_POLL_MAX_S)
+
+    def ADS1256_ResetWaitStats(self):
+        self.drdy_waits = 0
+        self.drdy_timeouts = 0
+        self.drdy_wait_s = 0.0
+        self.drdy_wait_cpu_s = 0.0
+        self.drdy_wait_max_s = 0.0
+
+    def ADS1256_WaitStats(self):
+        """Time spent waiting for DRDY since the last reset (one wait per conversion)"""
+        waits = self.drdy_waits
+        return {
+            'mode': self.drdy_mode,
+            'waits': waits,
+            'timeouts': self.drdy_timeouts,
+            'wait_s_total': self.drdy_wait_s,
+            'wait_s_mean': self.drdy_wait_s / waits if waits else 0.0,
+            'wait_s_max': self.drdy_wait_max_s,
+            'cpu_s_total': self.drdy_wait_cpu_s,
+        }
+
     def ADS1256_ReadChipID(self):
         self.ADS1256_WaitDRDY()
         id = self.ADS1256_Read_data(REG_E['REG_STATUS'])
@@ -115,6 +220,8 @@ class ADS1256:
         
     #The configuration parameters of ADC, gain and data rate
     def ADS1256_ConfigADC(self, gain, drate):
+        self.gain = gain
+        self.drate = drate
         self.ADS1256_WaitDRDY()
         buf = [0,0,0,0,0,0,0,0]
         buf[0] = (0<<3) | (1<<2) | (0<<1)
@@ -146,6 +253,13 @@ class ADS1256:
         elif Channal == 3:
             self.ADS1256_WriteReg(REG_E['REG_MUX'], (6 << 4) | 7) 	#DiffChannal   AIN6-AIN7
 
+    # Channal is either an input number (AINx against AINCOM) or a (positive, negative) pair
+    def ADS1256_MuxCode(self, Channal):
+        if isinstance(Channal, (tuple, list)):
+            pos, neg = Channal
+            return ((pos & 0x0F) << 4) | (neg & 0x0F)
+        return (Channal << 4) | (1 << 3)
+
     def ADS1256_SetMode(self, Mode):
         ScanMode = Mode
 
@@ -153,7 +267,11 @@ class ADS1256:
         if (config.module_init() != 0):
             return -1
         self.ADS1256_reset()
-        id = self.ADS1256_ReadChipID()
+        try:
+            id = self.ADS1256_ReadChipID()
+        except DRDYTimeoutError as e:
+            print("ID Read failed   (%s)" % e)
+            return -1
         if id == 3 :
             print("ID Read success  ")
         else:
@@ -174,7 +292,7 @@ class ADS1256:
         read |= (buf[1]<<8) & 0xff00
         read |= (buf[2]) & 0xff
         if (read & 0x800000):
-            read &= 0xF000000
+            read -= 0x1000000
         return read
  
     def ADS1256_GetChannalValue(self, Channel):
@@ -203,3 +321,114 @@ class ADS1256:
         for i in range(0,8,1):
             ADC_Value[i] = self.ADS1256_GetChannalValue(i)
         return ADC_Value
+
+    def ADS1256_Scan(self, Channals):
+        """Convert the inputs in Channals in order and return their raw codes.
+
+        Each entry is an input number (against AINCOM) or a (positive, negative)
+        pair. The MUX for the next input is written while the current result is
+        still in the output register ("cycling through the multiplexer"), so
+        every input costs one CS cycle and three xfer2 transactions instead of
+        four CS cycles and five SPI calls. The bytes on the bus are the same
+        and every MUX change still waits a full settling conversion, so only
+        the per-call overhead is saved: on the simulator bench_adc_scan puts
+        the pipelined scan within a few percent of the per-channel loop
+        (about 36-39 scans/s for inputs 1-6 either way). The real saving is
+        converting only the inputs a caller needs (inputs 1-6 run about 30 %
+        faster than all eight).
+        """
+        mux = [self.ADS1256_MuxCode(c) for c in Channals]
+        if not mux:
+            return []
+        self.ADS1256_WriteReg(REG_E['REG_MUX'], mux[0])
+        self.ADS1256_WriteCmd(CMD['CMD_SYNC'])
+        self.ADS1256_WriteCmd(CMD['CMD_WAKEUP'])
+
+        values = []
+        for i in range(len(mux)):
+            self.ADS1256_WaitDRDY()
+            config.digital_write(self.cs_pin, GPIO.LOW)#cs  0
+            if i + 1 < len(mux):
+                # Switch the MUX and restart conversion, then fetch the result
+                # that was converted on the previous setting
+                config.spi_xfer2([CMD['CMD_WREG'] | REG_E['REG_MUX'], 0x00, mux[i + 1],
+                                  CMD['CMD_SYNC']], SCAN_T11_US)
+                config.spi_xfer2([CMD['CMD_WAKEUP'], CMD['CMD_RDATA']], SCAN_T6_US)
+            else:
+                config.spi_xfer2([CMD['CMD_RDATA']], SCAN_T6_US)
+            buf = config.spi_xfer2([0x00, 0x00, 0x00])
+            config.digital_write(self.cs_pin, GPIO.HIGH)#cs 1
+            values.append(int(ADS1256_DecodeCodes(buf)[0]))
+        return values
+
+    # Read-data-continuous (RDATAC) mode: after the first conversion on the selected
+    # input, every following DRDY falling edge carries a new sample that is clocked
+    # out with 24 SCLKs and no command byte, so the data rate is bounded by the
+    # DRATE register instead of the per-sample MUX/SYNC/WAKEUP/RDATA sequence.
+    def ADS1256_StartContinuous(self, Channal):
+        self.ADS1256_WriteReg(REG_E['REG_MUX'], self.ADS1256_MuxCode(Channal))
+        self.ADS1256_WriteCmd(CMD['CMD_SYNC'])
+        self.ADS1256_WriteCmd(CMD['CMD_WAKEUP'])
+        self.ADS1256_WaitDRDY()
+        config.digital_write(self.cs_pin, GPIO.LOW)#cs  0, held for the whole stream
+        config.spi_writebyte([CMD['CMD_RDATAC']])
+        self.continuous = True
+        self.continuous_first = True
+
+    def ADS1256_ReadContinuous(self, n_samples):
+        """Read n_samples raw codes while in RDATAC mode"""
+        raw = bytearray()
+        for i in range(n_samples):
+            # The sample that follows the RDATAC command is already waiting
+            if self.continuous_first:
+                self.continuous_first = False
+            else:
+                self.ADS1256_WaitDRDY()
+            raw += bytes(config.spi_readbytes(3))
+        return ADS1256_DecodeCodes(raw)
+
+    def ADS1256_StopContinuous(self):
+        if not self.continuous:
+            return
+        self.continuous = False
+        try:
+            # SDATAC must be issued while DRDY is low
+            self.ADS1256_WaitDRDY()
+        finally:
+            config.spi_writebyte([CMD['CMD_SDATAC']])
+            config.digital_write(self.cs_pin, GPIO.HIGH)#cs 1
+
+    def ADS1256_Stream(self, Channal, block_size=256, n_blocks=None):
+        """Yield blocks of int32 raw codes from Channal in RDATAC mode.
+
+        The chip leaves continuous mode when the generator is exhausted,
+        closed or garbage collected, or when the consumer raises.
+        """
+        self.ADS1256_StartContinuous(Channal)
+        try:
+            count = 0
+            while n_blocks is None or count < n_blocks:
+                yield self.ADS1256_ReadContinuous(block_size)
+                count += 1
+        finally:
+            self.ADS1256_StopContinuous()
+
+    def ADS1256_ReadStream(self, Channal, duration, block_size=256):
+        """Capture Channal in RDATAC mode for duration seconds.
+
+        Returns (codes, elapsed) where codes is an int32 array.
+        """
+        blocks = []
+        start = time.time()
+        stream = self.ADS1256_Stream(Channal, block_size)
+        try:
+            for block in stream:
+                blocks.append(block)
+                if time.time() - start >= duration:
+                    break
+        finally:
+            stream.close()
+        elapsed = time.time() - start
+        if not blocks:
+            return np.empty(0, dtype=np.int32), elapsed
+        return np.concatenate(blocks), elapsed
@@ -1,5 +1,5 @@
 from . import config
-import RPi.GPIO as GPIO
+from .config import GPIO
 
 
 channel_A   = 0x30
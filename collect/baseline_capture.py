@@ -0,0 +1,348 @@
+"""
+baseline_capture.py - High-rate baseline noise capture
+Usage: capture = BaselineCapture(ADC, path, channels=[1, 3, 4, 6], data_rate=1000, duration=60)
+       capture.start(); drain capture.updates from the GUI until it yields None
+       meta, t, codes = read_capture(path)
+
+Only the inputs the baseline needs are converted, back to back at the
+chosen ADS1256 data rate; a single input is streamed in RDATAC mode. Rows
+are gathered in a preallocated block that, when full or every
+UPDATE_INTERVAL_S, updates RunningStats (and optionally the streaming
+Welch PSD of one column, for a live 1/f fit) and is appended to the
+capture file, so memory stays fixed however long the capture runs.
+
+A .capture.bin file is a JSON header padded to HEADER_BYTES, followed by
+one record per row: float64 time since the start, then the codes of every
+input, int32 unless the header's "code_dtype" says otherwise (float64 for
+the averaged codes of an oversampled time series). The header gets the row count and end status when the
+capture closes; a file without them is an interrupted capture whose rows
+can still be read.
+"""
+
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from analyze.noise_psd import SEGMENT, StreamingWelch
+
+from . import config
+from .ADS1256 import ADS1256_DRATE_E
+
+CAPTURE_SUFFIX = ".capture.bin"
+CAPTURE_VERSION = 2
+HEADER_BYTES = 4096
+
+# Default data rate of a baseline capture (samples per second per input)
+BASELINE_DATA_RATE = 1000
+# Rows per block, and the longest a block is held before it is written
+BLOCK_ROWS = 4096
+UPDATE_INTERVAL_S = 0.25
+# Rows in the ring buffer behind the recent RMS and peak-to-peak
+STATS_WINDOW = 8192
+
+CODE_SCALE = config.ADC_FULL_SCALE_V / 0x7FFFFF
+
+
+def data_rates():
+    """Data rates the ADS1256 supports, in samples per second, fastest first"""
+    return [
+        float(key[len("ADS1256_") : -len("SPS")].replace("d", "."))
+        for key in ADS1256_DRATE_E
+    ]
+
+
+def drate_code(sps):
+    """DRATE register value of the supported data rate closest to sps"""
+    rates = data_rates()
+    i = int(np.argmin([abs(rate - float(sps)) for rate in rates]))
+    return list(ADS1256_DRATE_E.values())[i], rates[i]
+
+
+class RunningStats:
+    """Mean, variance and peak-to-peak of every column of a stream of rows.
+
+    Each block updates the totals with the pairwise form of Welford's
+    algorithm (Chan et al.), so no sample is kept; the last `window` rows
+    sit in a ring buffer for the recent RMS and peak-to-peak.
+    """
+
+    def __init__(self, columns, window=STATS_WINDOW):
+        self.n = 0
+        self.mean = np.zeros(columns)
+        self.m2 = np.zeros(columns)
+        self.low = np.full(columns, np.inf)
+        self.high = np.full(columns, -np.inf)
+        self.ring = np.zeros((window, columns))
+        self.ring_pos = 0
+        self.ring_count = 0
+
+    def update(self, block):
+        block = np.asarray(block, dtype=np.float64).reshape(-1, len(self.mean))
+        m = len(block)
+        if m == 0:
+            return
+        block_mean = block.mean(axis=0)
+        block_m2 = ((block - block_mean) ** 2).sum(axis=0)
+        n = self.n + m
+        delta = block_mean - self.mean
+        self.mean += delta * m / n
+        self.m2 += block_m2 + delta**2 * self.n * m / n
+        self.n = n
+        np.minimum(self.low, block.min(axis=0), out=self.low)
+        np.maximum(self.high, block.max(axis=0), out=self.high)
+
+        window = len(self.ring)
+        tail = block[-window:]
+        first = min(len(tail), window - self.ring_pos)
+        self.ring[self.ring_pos : self.ring_pos + first] = tail[:first]
+        self.ring[: len(tail) - first] = tail[first:]
+        self.ring_pos = (self.ring_pos + len(tail)) % window
+        self.ring_count = min(window, self.ring_count + len(tail))
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.zeros_like(self.m2)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    @property
+    def peak_to_peak(self):
+        return self.high - self.low if self.n else np.zeros_like(self.mean)
+
+    def recent(self):
+        """Rows in the ring buffer, oldest first"""
+        if self.ring_count < len(self.ring):
+            return self.ring[: self.ring_count]
+        return np.roll(self.ring, -self.ring_pos, axis=0)
+
+    def snapshot(self):
+        recent = self.recent()
+        return {
+            "n": self.n,
+            "mean": self.mean.copy(),
+            "std": self.std,
+            "peak_to_peak": self.peak_to_peak,
+            "recent_std": recent.std(axis=0, ddof=1) if len(recent) > 1 else np.zeros_like(self.mean),
+            "recent_peak_to_peak": np.ptp(recent, axis=0) if len(recent) else np.zeros_like(self.mean),
+        }
+
+
+def capture_dtype(n_channels, code_dtype="<i4"):
+    return np.dtype([("t", "<f8"), ("codes", code_dtype, (n_channels,))])
+
+
+class CaptureFile:
+    """Append-only writer of one .capture.bin file"""
+
+    def __init__(self, path, header):
+        self.path = path
+        self.header = dict(header)
+        self.dtype = capture_dtype(len(header["channels"]), header.get("code_dtype", "<i4"))
+        self.rows = 0
+        self.handle = open(path, "xb")
+        self._write_header()
+
+    def _write_header(self):
+        encoded = json.dumps(self.header).encode("utf-8")
+        if len(encoded) >= HEADER_BYTES:
+            raise ValueError("capture header does not fit in HEADER_BYTES")
+        self.handle.seek(0)
+        self.handle.write(encoded.ljust(HEADER_BYTES - 1) + b"\n")
+        self.handle.seek(0, os.SEEK_END)
+
+    def append(self, t, codes):
+        records = np.empty(len(t), dtype=self.dtype)
+        records["t"] = t
+        records["codes"] = codes
+        records.tofile(self.handle)
+        self.rows += len(t)
+
+    def flush(self):
+        """Push the rows appended so far to disk"""
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+
+    def close(self, status, **extra):
+        self.header.update(extra, rows=self.rows, status=status)
+        try:
+            self._write_header()
+            self.flush()
+        finally:
+            self.handle.close()
+
+
+def read_capture(path, mmap=True):
+    """Return (header, t, codes); codes is rows x channels (int32 by default).
+    With mmap the rows stay on disk until they are used."""
+    with open(path, "rb") as f:
+        header = json.loads(f.read(HEADER_BYTES).decode("utf-8"))
+    if header.get("version", 0) > CAPTURE_VERSION:
+        raise ValueError(f"{path} uses capture format {header['version']}, newer than this reader")
+    dtype = capture_dtype(len(header["channels"]), header.get("code_dtype", "<i4"))
+    rows = (os.path.getsize(path) - HEADER_BYTES) // dtype.itemsize
+    if rows == 0:
+        return header, np.empty(0), np.empty((0, len(header["channels"])), dtype=dtype["codes"].base)
+    if mmap:
+        records = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_BYTES, shape=(rows,))
+    else:
+        records = np.fromfile(path, dtype=dtype, offset=HEADER_BYTES, count=rows)
+    return header, records["t"], records["codes"]
+
+
+def capture_volts(codes):
+    return np.asarray(codes, dtype=np.float64) * CODE_SCALE
+
+
+class BaselineCapture(threading.Thread):
+    """Capture thread: converts `channels` at `data_rate` for `duration` s.
+
+    convert(codes) maps a rows x channels block of codes to the rows x
+    len(names) values the statistics are kept on (default: volts of every
+    input). A snapshot of the statistics is queued on self.updates after
+    every block and None once the capture has ended; the final statistics
+    are then in self.stats and any exception in self.error. The ADC's gain
+    and data rate are restored afterwards.
+
+    With psd_column, that column of the values also feeds a StreamingWelch
+    on the row timestamps, and snapshots carry its 1/f fit as "noise_psd"
+    (None until the first segment is complete).
+    """
+
+    def __init__(
+        self,
+        ADC,
+        path,
+        channels,
+        data_rate=BASELINE_DATA_RATE,
+        duration=60.0,
+        convert=None,
+        names=None,
+        header=None,
+        block_rows=BLOCK_ROWS,
+        psd_column=None,
+        psd_segment=SEGMENT,
+    ):
+        super().__init__(daemon=True)
+        self.ADC = ADC
+        self.path = path
+        self.channels = list(channels)
+        self.drate, self.data_rate = drate_code(data_rate)
+        self.duration = duration
+        self.convert = convert or capture_volts
+        self.names = list(names or [f"AIN{c}" for c in self.channels])
+        self.header = dict(header or {})
+        self.block_rows = block_rows
+
+        self.updates = queue.Queue()
+        self.running_stats = RunningStats(len(self.names))
+        self.psd_column = psd_column
+        self.psd = None if psd_column is None else StreamingWelch(psd_segment)
+        self.stats = None
+        self.elapsed = 0.0
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def run(self):
+        header = {
+            "version": CAPTURE_VERSION,
+            "started": datetime.datetime.now().isoformat(timespec="seconds"),
+            "channels": self.channels,
+            "data_rate_sps": self.data_rate,
+            "adc_full_scale_v": config.ADC_FULL_SCALE_V,
+            "backend": config.BACKEND,
+            **self.header,
+        }
+        record = None
+        gain = drate = None
+        try:
+            gain, drate = self.ADC.gain, self.ADC.drate
+            record = CaptureFile(self.path, header)
+            self.ADC.ADS1256_ConfigADC(gain, self.drate)
+            if len(self.channels) == 1:
+                self._run_stream(record)
+            else:
+                self._run_scan(record)
+        except Exception as e:
+            self.error = e
+            print(f"Baseline capture error: {e}")
+        finally:
+            if drate is not None:
+                try:
+                    self.ADC.ADS1256_ConfigADC(gain, drate)
+                except Exception as e:
+                    print(f"Could not restore the ADC data rate: {e}")
+            self.stats = self.snapshot()
+            if record is not None:
+                status = "error" if self.error else "stopped" if self.stopped() else "complete"
+                try:
+                    record.close(status, elapsed_s=self.elapsed)
+                except (OSError, ValueError) as e:
+                    self.error = self.error or e
+                    print(f"Could not close {record.path}: {e}")
+            self.updates.put(None)
+
+    def snapshot(self):
+        snapshot = self.running_stats.snapshot()
+        if self.psd is not None:
+            snapshot["noise_psd"] = self.psd.fit()
+        return snapshot
+
+    def _block(self, record, t, codes):
+        record.append(t, codes)
+        values = self.convert(codes)
+        self.running_stats.update(values)
+        if self.psd is not None:
+            self.psd.update(t, np.asarray(values)[:, self.psd_column])
+        self.updates.put(self.snapshot())
+
+    def _run_scan(self, record):
+        t = np.empty(self.block_rows)
+        codes = np.empty((self.block_rows, len(self.channels)), dtype=np.int32)
+        start = time.perf_counter()
+        last_block = start
+        rows = 0
+        while not self.stopped():
+            now = time.perf_counter()
+            if now - start >= self.duration:
+                break
+            codes[rows] = self.ADC.ADS1256_Scan(self.channels)
+            t[rows] = now - start
+            rows += 1
+            if rows == self.block_rows or now - last_block >= UPDATE_INTERVAL_S:
+                self._block(record, t[:rows], codes[:rows])
+                rows, last_block = 0, now
+        if rows:
+            self._block(record, t[:rows], codes[:rows])
+        self.elapsed = time.perf_counter() - start
+
+    def _run_stream(self, record):
+        # Blocks sized for about UPDATE_INTERVAL_S; the rows of a block are
+        # spaced evenly between the reads that bound it
+        size = int(min(self.block_rows, max(1, self.data_rate * UPDATE_INTERVAL_S)))
+        start = time.perf_counter()
+        last = 0.0
+        stream = self.ADC.ADS1256_Stream(self.channels[0], size)
+        try:
+            for block in stream:
+                now = time.perf_counter() - start
+                t = last + (now - last) * np.arange(1, len(block) + 1) / len(block)
+                self._block(record, t, np.asarray(block).reshape(-1, 1))
+                last = now
+                if self.stopped() or now >= self.duration:
+                    break
+        finally:
+            stream.close()
+        self.elapsed = time.perf_counter() - start
@@ -1,28 +1,735 @@
 """
 characterization.py - Complete Device Characterization Module
 Usage: characterize_device(data_by_dac1, mode, ADC, save_path, params_entries)
+       characterize_device(..., plot_formats=("png",), plot_dpi=150)
+
+Characterization runs in two phases. The numeric phase extracts every
+parameter of every voltage condition at once (condition_numbers()); the
+analyze_* methods then write their tables and queue one figure job each.
+The render phase draws and saves the queued figures in a process pool with
+the Agg backend, after the summary report has been written.
 """
 
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy import signal, stats
-import time
 import os
 import datetime
-import openpyxl
+from concurrent.futures import ProcessPoolExecutor
 from matplotlib.backends.backend_pdf import PdfPages
 import tkinter.messagebox as msgbox
 
+from analyze.bootstrap import CI_LEVEL, chip_seed, trace_bootstrap
+from analyze.model_fit import PARAM_NAMES, fit_family, model_current
+from analyze.noise_psd import SEGMENT as PSD_SEGMENT
+from analyze.pool import pool_context
+from analyze.vectorized import column_gradient, line_fits
+from .baseline_capture import (
+    BASELINE_DATA_RATE,
+    CAPTURE_SUFFIX,
+    BaselineCapture,
+    capture_volts,
+    read_capture,
+)
+from .export import TABLE_FORMATS, write_columns
+
+# Files written for every figure, and their resolution
+PLOT_FORMATS = ("png", "pdf")
+PLOT_DPI = 300
+RENDER_WORKERS = os.cpu_count() or 1
+
+
+# Numeric phase: every extraction works on the columns of Y at once (the
+# voltage conditions of a run, or bootstrap resamples of one sorted curve),
+# with x shared by all columns (n,) or per column (n, k). Values per
+# condition are arrays over the last axis; pick one with condition_column().
+
+
+def ron_numbers(vds_sorted, Y):
+    """Ron from a line through the first 20% of every output curve"""
+    linear_region_end = int(0.2 * len(Y))
+    if linear_region_end < 3:
+        linear_region_end = min(5, len(Y))
+    mask = np.zeros(Y.shape, dtype=bool)
+    mask[:linear_region_end] = True
+    slope, intercept, r_squared, _ = line_fits(vds_sorted, Y, mask)
+    with np.errstate(divide="ignore"):
+        ron = np.where(np.isfinite(slope), np.abs(1.0 / slope), np.inf)
+    return {
+        "ron": ron,
+        "r_squared": np.nan_to_num(r_squared),
+        "slope": slope,
+        "intercept": intercept,
+        "linear_region_end": linear_region_end,
+    }
+
+
+def gds_numbers(vds_sorted, Y):
+    """Mean output conductance over the last 30% of every output curve"""
+    sat_region_start = int(0.7 * len(Y))
+    if len(Y) - sat_region_start > 1:
+        X = np.broadcast_to(np.reshape(vds_sorted, (len(Y), -1)), Y.shape)
+        gds_array = column_gradient(Y[sat_region_start:], X[sat_region_start:])
+        gds = np.abs(np.mean(gds_array, axis=0))
+    else:
+        gds_array = np.zeros((1,) + Y.shape[1:])
+        gds = np.zeros(Y.shape[1:])
+    return {"gds": gds, "gds_array": gds_array, "sat_region_start": sat_region_start}
+
+
+def snr_numbers(Y, noise_rms):
+    """SNR and dynamic range of every curve against the baseline noise"""
+    signal_rms = np.sqrt(np.mean(Y**2, axis=0))
+    noise_floor = 3 * noise_rms
+    return {
+        "snr_db": 20 * np.log10(signal_rms / noise_rms),
+        "current_detection_limit": noise_floor,
+        "dynamic_range_db": 20 * np.log10(np.max(np.abs(Y), axis=0) / noise_floor),
+        "noise_floor": noise_floor,
+    }
+
+
+def drift_numbers(time_data, Y):
+    """Linear drift of every curve over time"""
+    drift_rate, offset, _, _ = line_fits(time_data, Y, np.ones(Y.shape, dtype=bool))
+    mean_current = np.mean(Y, axis=0)
+    total_drift = drift_rate * (time_data[-1] - time_data[0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate_percent = np.where(mean_current != 0, drift_rate * 3600 / mean_current * 100, 0)
+        total_percent = np.where(mean_current != 0, total_drift / mean_current * 100, 0)
+    return {
+        "drift_rate_percent_per_hour": rate_percent,
+        "total_drift_percent": total_percent,
+        "drift_rate_A_per_s": drift_rate,
+        "offset": offset,
+    }
+
+
+def noise_1f_numbers(Y, sampling_rate):
+    """Welch PSD of every curve and a 1/f^a line through 0.1-10 Hz;
+    sampling_rate (Hz) is shared (scalar) or per curve (k,)"""
+    # The spectrum at fs = 1 scales to each curve's own rate
+    unit_freqs, unit_psd = signal.welch(Y, fs=1.0, nperseg=len(Y) // 4, axis=0)
+    fs = np.broadcast_to(np.asarray(sampling_rate, dtype=np.float64), Y.shape[1:])
+    freqs = unit_freqs[:, None] * fs
+    psd = unit_psd / fs
+    low_freq_mask = (freqs > 0.1) & (freqs < 10)
+    with np.errstate(divide="ignore"):
+        slope, intercept, _, count = line_fits(
+            np.log10(freqs), np.log10(psd), low_freq_mask & (psd > 0)
+        )
+    return {
+        "freqs": freqs,
+        "psd": psd,
+        "fit_points": count,
+        "1f_coefficient": 10**intercept,
+        "1f_exponent": -slope,
+        "noise_at_1hz": 10**intercept,
+        "sampling_rate": fs,
+    }
+
+
+def vth_numbers(vgs_sorted, Y):
+    """Vth by linear extrapolation around the gm peak of every transfer curve"""
+    n = len(Y)
+    max_gm_idx = np.argmax(np.abs(column_gradient(Y, vgs_sorted)), axis=0)
+    fit_range = min(5, n // 4)
+    start_idx = np.maximum(0, max_gm_idx - fit_range)
+    end_idx = np.minimum(n, max_gm_idx + fit_range)
+    rows = np.arange(n)[:, None]
+    mask = (rows >= start_idx) & (rows < end_idx)
+    slope, intercept, _, count = line_fits(vgs_sorted, Y, mask)
+    fitted = count > 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vth = np.where(fitted & (slope != 0), -intercept / slope, 0.0)
+    return {
+        "vth": vth,
+        "slope": np.where(fitted, slope, 0.0),
+        "intercept": np.where(fitted, intercept, 0.0),
+        "start_idx": start_idx,
+        "end_idx": end_idx,
+    }
+
+
+def gm_numbers(vgs_sorted, Y):
+    """Transconductance curve and its peak for every transfer curve"""
+    gm = column_gradient(Y, vgs_sorted)
+    return {
+        "gm_curve": gm,
+        "gm_max": np.max(np.abs(gm), axis=0),
+        "gm_max_idx": np.argmax(np.abs(gm), axis=0),
+    }
+
+
+def ss_numbers(vgs_sorted, Y):
+    """Steepest subthreshold slope (mV/decade) of every transfer curve"""
+    log_ids = np.log10(np.abs(Y) + 1e-15)
+    d_log_ids = column_gradient(log_ids, vgs_sorted)
+    rising = np.where(d_log_ids > 0, d_log_ids, -np.inf)
+    valid = (d_log_ids > 0).sum(axis=0) > 5
+    max_derivative = np.where(valid, rising.max(axis=0), 0.0)
+    with np.errstate(divide="ignore"):
+        ss = np.where(valid, 1000 / max_derivative, np.inf)
+    return {
+        "ss": ss,
+        "ss_idx": np.argmax(rising, axis=0),
+        "max_derivative": max_derivative,
+        "log_ids": log_ids,
+        "d_log_ids": d_log_ids,
+    }
+
+
+def on_off_numbers(vgs_sorted, Y):
+    """Ion/Ioff of every transfer curve (Ioff: smallest nonzero current)"""
+    abs_ids = np.abs(Y)
+    i_off = np.where(Y != 0, abs_ids, np.inf).min(axis=0)
+    i_off = np.where(np.isfinite(i_off), i_off, 1e-15)
+    i_on = abs_ids.max(axis=0)
+    return {
+        "on_off_ratio": i_on / i_off,
+        "i_on": i_on,
+        "i_off": i_off,
+        "i_on_idx": np.argmax(abs_ids, axis=0),
+        "i_off_idx": np.argmin(abs_ids, axis=0),
+    }
+
+
+# Bootstrap extractors: one value per resample column
+
+
+def ron_columns(vds_sorted, Y):
+    """Ron of analyze_channel_resistance()"""
+    return ron_numbers(vds_sorted, Y)["ron"]
+
+
+def vth_columns(vgs_sorted, Y):
+    """Vth of analyze_threshold_voltage()"""
+    return vth_numbers(vgs_sorted, Y)["vth"]
+
+
+def gm_max_columns(vgs_sorted, Y):
+    """gm_max of analyze_transconductance()"""
+    return gm_numbers(vgs_sorted, Y)["gm_max"]
+
+
+def ss_columns(vgs_sorted, Y):
+    """SS (mV/decade) of analyze_subthreshold_slope()"""
+    return ss_numbers(vgs_sorted, Y)["ss"]
+
+
+def on_off_columns(vgs_sorted, Y):
+    """Ion/Ioff of analyze_on_off_ratio()"""
+    return on_off_numbers(vgs_sorted, Y)["on_off_ratio"]
+
+
+def condition_column(numbers, j):
+    """The values of condition j from a *_numbers() dict"""
+    out = {}
+    for key, value in numbers.items():
+        if np.ndim(value):
+            value = np.asarray(value)[..., j]
+        # A 0-d array is not an np.generic, but the summary wants plain numbers
+        if isinstance(value, np.generic) or (isinstance(value, np.ndarray) and value.ndim == 0):
+            value = value.item()
+        out[key] = value
+    return out
+
+
+def condition_stacks(data_by_dac1, x_key, i_key):
+    """The voltage conditions grouped by length, each group as (labels, X, Y)
+    with one column per condition, in measurement order"""
+    groups = {}
+    for label, condition in data_by_dac1.items():
+        groups.setdefault(len(condition[i_key]), []).append(label)
+    stacks = []
+    for n, labels in groups.items():
+        X = np.column_stack([np.asarray(data_by_dac1[l][x_key][:n], float) for l in labels])
+        Y = np.column_stack([np.asarray(data_by_dac1[l][i_key][:n], float) for l in labels])
+        stacks.append((labels, X, Y))
+    return stacks
+
+
+def condition_sample_rate(condition, step_interval):
+    """Sample rate (Hz) of one condition: from its timestamps when it has
+    them (RunData "t"), else one sample per step interval"""
+    if "t" in condition:
+        dt = np.diff(np.asarray(condition["t"], dtype=float))
+        dt = dt[np.isfinite(dt) & (dt > 0)]
+        if len(dt):
+            return 1.0 / float(np.median(dt))
+    return 1.0 / step_interval
+
+
+def condition_numbers(data_by_dac1, mode, noise_rms, step_interval=None):
+    """Numeric phase of characterize_device(): every analysis of every
+    voltage condition, as {condition: {analysis: values}}"""
+    x_key, i_key = ("vsd", "isd") if mode == "output" else ("vsg", "i_drain")
+    out = {}
+    for labels, X, Y in condition_stacks(data_by_dac1, x_key, i_key):
+        order = np.argsort(X, axis=0)
+        x_sorted = np.take_along_axis(X, order, axis=0)
+        y_sorted = np.take_along_axis(Y, order, axis=0)
+        if mode == "output":
+            numbers = {
+                "ron": ron_numbers(x_sorted, y_sorted),
+                "gds": gds_numbers(x_sorted, y_sorted),
+                "snr": snr_numbers(Y, noise_rms),
+                "drift": drift_numbers(np.arange(len(Y)) * step_interval, Y),
+            }
+            if len(Y) > 100:
+                rates = [condition_sample_rate(data_by_dac1[l], step_interval) for l in labels]
+                numbers["1f_noise"] = noise_1f_numbers(Y, rates)
+        elif mode == "transfer":
+            numbers = {
+                "vth": vth_numbers(x_sorted, y_sorted),
+                "gm": gm_numbers(x_sorted, y_sorted),
+                "ss": ss_numbers(x_sorted, y_sorted),
+                "on_off": on_off_numbers(x_sorted, y_sorted),
+            }
+        else:
+            numbers = {}
+        for j, label in enumerate(labels):
+            out[label] = {name: condition_column(values, j) for name, values in numbers.items()}
+    return out
+
+
+# Render phase: each render_* function draws one figure from the arrays an
+# analysis queued; they run in the render pool, so they only use their
+# arguments
+
+
+def render_channel_resistance(
+    vds_sorted, ids_sorted, vds_linear, ids_linear, fit_line, ron, r_squared, gate_voltage
+):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(vds_sorted, ids_sorted * 1e6, "b-", linewidth=2, label="Output Curve")
+    ax.plot(vds_linear, ids_linear * 1e6, "ro", markersize=6, label="Linear Region")
+
+    if len(vds_linear) > 1:
+        ax.plot(
+            vds_linear,
+            fit_line * 1e6,
+            "r--",
+            linewidth=2,
+            label=f"Linear Fit (Ron = {ron:.1f} Ω)",
+        )
+
+    ax.set_xlabel("VDS (V)")
+    ax.set_ylabel("IDS (µA)")
+    ax.set_title(f"Channel Resistance Analysis (Gate = {gate_voltage}V)")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    ax.text(
+        0.02,
+        0.98,
+        f"Ron = {ron:.2f} Ω\nR² = {r_squared:.4f}",
+        transform=ax.transAxes,
+        fontsize=12,
+        fontweight="bold",
+        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.7),
+        verticalalignment="top",
+    )
+    return fig
+
+
+def render_output_conductance(
+    vds_sorted, ids_sorted, vds_sat, ids_sat, gds_array, gds, gate_voltage
+):
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+
+    ax1.plot(vds_sorted, ids_sorted * 1e6, "b-", linewidth=2, label="Output Curve")
+    ax1.plot(vds_sat, ids_sat * 1e6, "go", markersize=4, label="Saturation Region")
+    ax1.set_xlabel("VDS (V)")
+    ax1.set_ylabel("IDS (µA)")
+    ax1.set_title(f"Output Conductance Analysis (Gate = {gate_voltage}V)")
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    if len(vds_sat) > 1:
+        ax2.plot(vds_sat, gds_array * 1e6, "r-", linewidth=2, marker="o", markersize=4)
+        ax2.axhline(
+            gds * 1e6,
+            color="orange",
+            linestyle="--",
+            linewidth=2,
+            label=f"Average gds = {gds*1e6:.2f} µS",
+        )
+
+    ax2.set_xlabel("VDS (V)")
+    ax2.set_ylabel("gds (µS)")
+    ax2.set_title("Output Conductance vs VDS")
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+    return fig
+
+
+def render_snr(signal_data, noise_floor, snr_db, current_detection_limit, gate_voltage):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    ax.plot(signal_data * 1e6, "b-", linewidth=1.5, label="Signal")
+
+    noise_floor_ua = noise_floor * 1e6
+    ax.axhline(
+        noise_floor_ua,
+        color="r",
+        linestyle="--",
+        linewidth=2,
+        label=f"Noise Floor (+{noise_floor_ua:.2f} µA)",
+    )
+    ax.axhline(
+        -noise_floor_ua,
+        color="r",
+        linestyle="--",
+        linewidth=2,
+        label=f"Noise Floor (-{noise_floor_ua:.2f} µA)",
+    )
+    ax.fill_between(
+        range(len(signal_data)),
+        -noise_floor_ua,
+        noise_floor_ua,
+        alpha=0.2,
+        color="red",
+        label="Unreliable Region",
+    )
+
+    ax.set_xlabel("Measurement Point")
+    ax.set_ylabel("Current (µA)")
+    ax.set_title(f"SNR Analysis (Gate = {gate_voltage}V)")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    quality = "EXCELLENT" if snr_db > 40 else "GOOD" if snr_db > 20 else "POOR"
+    quality_color = "green" if snr_db > 40 else "orange" if snr_db > 20 else "red"
+
+    ax.text(
+        0.02,
+        0.98,
+        f"SNR: {snr_db:.1f} dB\n{quality}\nDetection Limit: {current_detection_limit*1e9:.2f} nA",
+        transform=ax.transAxes,
+        fontsize=12,
+        fontweight="bold",
+        bbox=dict(boxstyle="round,pad=0.3", facecolor=quality_color, alpha=0.7),
+        verticalalignment="top",
+    )
+    return fig
+
+
+def render_drift(
+    time_data, current_data, drift_rate, offset, rate_percent, total_percent, gate_voltage
+):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    ax.plot(time_data, current_data * 1e6, "b-", linewidth=2, label="Measured Current")
+
+    time_fit = np.array([min(time_data), max(time_data)])
+    current_fit = drift_rate * time_fit + offset
+    ax.plot(
+        time_fit,
+        current_fit * 1e6,
+        "r--",
+        linewidth=2,
+        label=f"Drift Trend ({rate_percent:.4f} %/hr)",
+    )
+
+    ax.set_xlabel("Time (s)")
+    ax.set_ylabel("Current (µA)")
+    ax.set_title(f"Drift Analysis (Gate = {gate_voltage}V)")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    ax.text(
+        0.02,
+        0.98,
+        f"Drift: {rate_percent:.4f} %/hr\n"
+        f"Total: {total_percent:.4f} %\n"
+        f"Duration: {time_data[-1] - time_data[0]:.1f} s",
+        transform=ax.transAxes,
+        fontsize=10,
+        fontweight="bold",
+        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightyellow", alpha=0.7),
+        verticalalignment="top",
+    )
+    return fig
+
+
+def render_1f_noise(freqs, psd, coefficient, exponent, gate_voltage):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    ax.loglog(freqs, np.sqrt(psd) * 1e12, "b-", linewidth=2, label="Measured Noise")
+
+    f_fit = np.logspace(np.log10(freqs[1]), np.log10(freqs[-1]), 100)
+    psd_fit = coefficient / (f_fit**exponent)
+    ax.loglog(
+        f_fit,
+        np.sqrt(psd_fit) * 1e12,
+        "r--",
+        linewidth=2,
+        label=f"1/f^{exponent:.2f} fit",
+    )
+
+    ax.set_xlabel("Frequency (Hz)")
+    ax.set_ylabel("Current Noise (pA/√Hz)")
+    ax.set_title(f"1/f Noise Analysis (Gate = {gate_voltage}V)")
+    ax.legend()
+    ax.grid(True, alpha=0.3, which="both")
+
+    ax.text(
+        0.02,
+        0.98,
+        f"1/f Exponent: {exponent:.2f}\n"
+        f"Noise @ 1Hz: {np.sqrt(coefficient)*1e12:.1f} pA/√Hz\n"
+        f"Coefficient: {coefficient:.2e} A²·Hz",
+        transform=ax.transAxes,
+        fontsize=10,
+        fontweight="bold",
+        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightcyan", alpha=0.7),
+        verticalalignment="top",
+    )
+    return fig
+
+
+def render_threshold_voltage(
+    vgs_sorted, ids_sorted, vgs_fit, ids_fit, slope, intercept, vth, drain_voltage
+):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    ax.semilogy(
+        vgs_sorted,
+        np.abs(ids_sorted) * 1e6,
+        "b-",
+        linewidth=2,
+        label="Transfer Curve",
+    )
+    ax.plot(
+        vgs_fit,
+        np.abs(ids_fit) * 1e6,
+        "ro",
+        markersize=6,
+        label="Linear Extrapolation Region",
+    )
+
+    if len(vgs_fit) > 1:
+
+        vgs_extrap = np.linspace(min(vgs_sorted), max(vgs_sorted), 100)
+        ids_extrap = slope * vgs_extrap + intercept
+        mask = ids_extrap > 0
+        ax.semilogy(
+            vgs_extrap[mask],
+            ids_extrap[mask] * 1e6,
+            "r--",
+            linewidth=2,
+            label=f"Linear Extrapolation",
+        )
+
+        ax.axvline(
+            vth,
+            color="orange",
+            linestyle=":",
+            linewidth=2,
+            label=f"Vth = {vth:.3f} V",
+        )
+
+    ax.set_xlabel("VGS (V)")
+    ax.set_ylabel("|IDS| (µA)")
+    ax.set_title(f"Threshold Voltage Analysis (Drain = {drain_voltage}V)")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    ax.text(
+        0.02,
+        0.98,
+        f"Vth = {vth:.3f} V",
+        transform=ax.transAxes,
+        fontsize=12,
+        fontweight="bold",
+        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.7),
+        verticalalignment="top",
+    )
+    return fig
+
+
+def render_transconductance(vgs_sorted, ids_sorted, gm, gm_max, vgs_gm_max, drain_voltage):
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+
+    ax1.plot(vgs_sorted, ids_sorted * 1e6, "b-", linewidth=2, label="Transfer Curve")
+    ax1.axvline(
+        vgs_gm_max,
+        color="red",
+        linestyle="--",
+        alpha=0.7,
+        label=f"Max gm at VGS = {vgs_gm_max:.3f} V",
+    )
+    ax1.set_xlabel("VGS (V)")
+    ax1.set_ylabel("IDS (µA)")
+    ax1.set_title(f"Transfer Characteristics (Drain = {drain_voltage}V)")
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    ax2.plot(vgs_sorted, gm * 1e6, "g-", linewidth=2, label="Transconductance")
+    ax2.plot(
+        vgs_gm_max,
+        gm_max * 1e6,
+        "ro",
+        markersize=8,
+        label=f"Max gm = {gm_max*1e6:.2f} µS",
+    )
+    ax2.set_xlabel("VGS (V)")
+    ax2.set_ylabel("gm (µS)")
+    ax2.set_title("Transconductance vs Gate Voltage")
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+    return fig
+
+
+def render_subthreshold_slope(vgs_sorted, ids_sorted, d_log_ids, ss, vgs_ss, drain_voltage):
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+
+    ax1.semilogy(
+        vgs_sorted,
+        np.abs(ids_sorted) * 1e6,
+        "b-",
+        linewidth=2,
+        label="Transfer Curve",
+    )
+    if ss != float("inf"):
+        ax1.axvline(
+            vgs_ss,
+            color="red",
+            linestyle="--",
+            alpha=0.7,
+            label=f"SS measurement point",
+        )
+    ax1.set_xlabel("VGS (V)")
+    ax1.set_ylabel("|IDS| (µA)")
+    ax1.set_title(f"Transfer Curve (Log Scale) - Drain = {drain_voltage}V")
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    ax2.plot(vgs_sorted, 1000 / d_log_ids, "r-", linewidth=2, label="Local SS")
+    if ss != float("inf"):
+        ax2.axhline(
+            ss,
+            color="orange",
+            linestyle="--",
+            linewidth=2,
+            label=f"Min SS = {ss:.1f} mV/dec",
+        )
+        ax2.plot(vgs_ss, ss, "go", markersize=8, label="SS measurement point")
+    ax2.set_xlabel("VGS (V)")
+    ax2.set_ylabel("Subthreshold Slope (mV/decade)")
+    ax2.set_title("Subthreshold Slope vs Gate Voltage")
+    ax2.set_ylim(0, min(1000, np.percentile(1000 / d_log_ids[d_log_ids > 0], 95)))
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+    return fig
+
+
+def render_on_off_ratio(
+    vgs_sorted, ids_sorted, i_on, i_off, vgs_ion, vgs_ioff, on_off_ratio, drain_voltage
+):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    ax.semilogy(
+        vgs_sorted,
+        np.abs(ids_sorted) * 1e6,
+        "b-",
+        linewidth=2,
+        label="Transfer Curve",
+    )
+    ax.plot(vgs_ion, i_on * 1e6, "go", markersize=8, label=f"Ion = {i_on*1e6:.2f} µA")
+    ax.plot(
+        vgs_ioff,
+        i_off * 1e6,
+        "ro",
+        markersize=8,
+        label=f"Ioff = {i_off*1e9:.2f} nA",
+    )
+
+    ax.set_xlabel("VGS (V)")
+    ax.set_ylabel("|IDS| (µA)")
+    ax.set_title(f"On/Off Ratio Analysis (Drain = {drain_voltage}V)")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+    ax.text(
+        0.02,
+        0.98,
+        f"Ion/Ioff = {on_off_ratio:.2e}",
+        transform=ax.transAxes,
+        fontsize=12,
+        fontweight="bold",
+        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightpink", alpha=0.7),
+        verticalalignment="top",
+    )
+    return fig
+
+
+def render_compact_model(curves, mode, r2):
+    """curves: (label, x, current, x sorted, model current sorted) per condition"""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    colors = plt.cm.viridis(np.linspace(0, 1, len(curves)))
+    for (label, x, current, x_sorted, model), color in zip(curves, colors):
+        ax.plot(x, current * 1e6, "o", color=color, markersize=3, label=f"{label} V")
+        ax.plot(x_sorted, model * 1e6, "-", color=color, linewidth=1.5)
+
+    ax.set_xlabel("VSD (V)" if mode == "output" else "VSG (V)")
+    ax.set_ylabel("Current (µA)")
+    ax.set_title(f"Compact Model Fit ({mode}, R² = {r2:.4f})")
+    ax.legend(fontsize=8)
+    ax.grid(True, alpha=0.3)
+    return fig
+
+
+def save_figure(fig, path, formats=PLOT_FORMATS, dpi=PLOT_DPI):
+    """Save fig as path.<format> for every format, then close it"""
+    for fmt in formats:
+        fig.savefig(f"{path}.{fmt}", dpi=dpi, bbox_inches="tight")
+    plt.close(fig)
+
+
+def _render_init():
+    # Workers start clean (pool_context) and only draw to files
+    plt.switch_backend("Agg")
+
+
+def _render_task(item):
+    render, data, path, formats, dpi = item
+    try:
+        save_figure(render(**data), path, formats, dpi)
+        return path, None
+    except Exception as e:
+        return path, f"{type(e).__name__}: {e}"
+
 
 class DeviceCharacterizer:
     """Complete device characterization for transistors"""
 
-    def __init__(self, save_path, chip_name, trial_name):
+    def __init__(
+        self,
+        save_path,
+        chip_name,
+        trial_name,
+        plot_formats=PLOT_FORMATS,
+        plot_dpi=PLOT_DPI,
+        render_workers=RENDER_WORKERS,
+        table_format=".xlsx",
+    ):
+        if table_format not in TABLE_FORMATS:
+            raise ValueError(f"table_format must be one of {TABLE_FORMATS}")
         self.baseline_noise_rms = None
+        self.baseline_noise_psd = None
         self.save_path = save_path
         self.chip_name = chip_name
         self.trial_name = trial_name
         self.results = {}
+        self.plot_formats = tuple(plot_formats)
+        self.plot_dpi = plot_dpi
+        self.render_workers = render_workers
+        self.table_format = table_format
+        self.plot_queue = []
+        self._render_pool = None
+        self._render_futures = []
 
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         self.char_folder = os.path.join(save_path, f"Characterization_{timestamp}")
@@ -30,7 +737,7 @@ class DeviceCharacterizer:
 
         print(f"Characterization results will be saved to: {self.char_folder}")
 
-    def measure_baseline_noise(self, ADC, duration=5.0):
+    def measure_baseline_noise(self, ADC, duration=5.0, data_rate=BASELINE_DATA_RATE):
         """Measure baseline noise for SNR calculations"""
         print(f"\n=== BASELINE NOISE MEASUREMENT ===")
         print(f"Measuring baseline noise for {duration} seconds...")
@@ -51,17 +758,46 @@ class DeviceCharacterizer:
             print("Baseline noise measurement cancelled by user")
             return None, None
 
-        noise_readings = []
-        start_time = time.time()
-
         print(f"Starting baseline noise measurement...")
-        while time.time() - start_time < duration:
-            ADC_Value = ADC.ADS1256_GetAll()
-            reading = ADC_Value[4] * 5.0 / 0x7FFFFF
-            noise_readings.append(reading)
-            time.sleep(0.01)
+        # Stream ADC4 in continuous-conversion mode; the statistics are kept
+        # while it runs and the raw codes go to baseline_noise.capture.bin
+        capture = BaselineCapture(
+            ADC,
+            os.path.join(self.char_folder, f"baseline_noise{CAPTURE_SUFFIX}"),
+            [4],
+            data_rate=data_rate,
+            duration=duration,
+            header={"chip_name": self.chip_name, "trial_name": self.trial_name},
+            psd_column=0,
+            # A few segments even in a short capture
+            psd_segment=int(max(256, min(PSD_SEGMENT, data_rate * duration / 4))),
+        )
+        capture.start()
+        for snapshot in iter(capture.updates.get, None):
+            print(
+                f"  {snapshot['n']} samples  RMS {snapshot['std'][0]*1e6:.2f} µV  "
+                f"p-p {snapshot['peak_to_peak'][0]*1e6:.2f} µV",
+                end="\r",
+            )
+        capture.join()
+        print()
+        if capture.error is not None:
+            raise capture.error
+        self.baseline_noise_psd = capture.stats["noise_psd"]
+        if self.baseline_noise_psd is not None:
+            print(
+                f"Baseline 1/f exponent {self.baseline_noise_psd['1f_exponent']:.2f}, "
+                f"corner {self.baseline_noise_psd['corner_hz']:.3g} Hz, "
+                f"white floor {np.sqrt(self.baseline_noise_psd['white_psd'])*1e9:.2f} nV/√Hz"
+            )
 
-        self.baseline_noise_rms = np.std(noise_readings)
+        _, times, codes = read_capture(capture.path)
+        noise_readings = capture_volts(codes[:, 0])
+        self.baseline_noise_rms = float(capture.stats["std"][0])
+        print(
+            f"Captured {len(noise_readings)} samples "
+            f"({len(noise_readings) / max(capture.elapsed, 1e-9):.0f} samples/s)"
+        )
         print(f"Baseline noise: {self.baseline_noise_rms*1e6:.2f} µV RMS")
 
         msgbox.showinfo(
@@ -74,77 +810,58 @@ class DeviceCharacterizer:
         self.save_excel_data(
             "baseline_noise",
             ["Time (s)", "Noise (V)"],
-            [np.arange(len(noise_readings)) * 0.01, noise_readings],
+            [times, noise_readings],
         )
 
         return self.baseline_noise_rms, noise_readings
 
-    def analyze_channel_resistance(self, vds_data, ids_data, gate_voltage):
+    def analyze_channel_resistance(self, vds_data, ids_data, gate_voltage, numbers=None):
         """Calculate and plot channel resistance (Ron)"""
         print(f"\n=== CHANNEL RESISTANCE (Ron) ANALYSIS ===")
 
         sorted_indices = np.argsort(vds_data)
         vds_sorted = np.array(vds_data)[sorted_indices]
         ids_sorted = np.array(ids_data)[sorted_indices]
+        if numbers is None:
+            numbers = condition_column(ron_numbers(vds_sorted, ids_sorted[:, None]), 0)
 
-        linear_region_end = int(0.2 * len(vds_sorted))
-        if linear_region_end < 3:
-            linear_region_end = min(5, len(vds_sorted))
-
+        linear_region_end = numbers["linear_region_end"]
         vds_linear = vds_sorted[:linear_region_end]
         ids_linear = ids_sorted[:linear_region_end]
-
-        if len(vds_linear) > 1:
-            slope, intercept = np.polyfit(vds_linear, ids_linear, 1)
-            ron = 1.0 / slope if slope != 0 else float("inf")
-            r_squared = self.calculate_r_squared(
-                ids_linear, slope * vds_linear + intercept
-            )
-        else:
-            ron = float("inf")
-            r_squared = 0
-
-        ron = abs(ron)
+        ron = numbers["ron"]
+        r_squared = numbers["r_squared"]
+        slope, intercept = numbers["slope"], numbers["intercept"]
 
         print(f"Channel Resistance (Ron): {ron:.2f} Ω")
         print(f"Linear region R²: {r_squared:.4f}")
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-        ax.plot(vds_sorted, ids_sorted * 1e6, "b-", linewidth=2, label="Output Curve")
-        ax.plot(vds_linear, ids_linear * 1e6, "ro", markersize=6, label="Linear Region")
-
-        if len(vds_linear) > 1:
-            fit_line = slope * vds_linear + intercept
-            ax.plot(
-                vds_linear,
-                fit_line * 1e6,
-                "r--",
-                linewidth=2,
-                label=f"Linear Fit (Ron = {ron:.1f} Ω)",
-            )
-
-        ax.set_xlabel("VDS (V)")
-        ax.set_ylabel("IDS (µA)")
-        ax.set_title(f"Channel Resistance Analysis (Gate = {gate_voltage}V)")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-
-        ax.text(
-            0.02,
-            0.98,
-            f"Ron = {ron:.2f} Ω\nR² = {r_squared:.4f}",
-            transform=ax.transAxes,
-            fontsize=12,
-            fontweight="bold",
-            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.7),
-            verticalalignment="top",
+        ron_lo, ron_hi = self.bootstrap_ci(
+            vds_sorted, ids_sorted, ron_columns, f"ron_gate_{gate_voltage}V"
         )
 
-        self.save_plot(fig, f"ron_analysis_gate_{gate_voltage}V")
+        self.queue_plot(
+            render_channel_resistance,
+            f"ron_analysis_gate_{gate_voltage}V",
+            vds_sorted=vds_sorted,
+            ids_sorted=ids_sorted,
+            vds_linear=vds_linear,
+            ids_linear=ids_linear,
+            fit_line=slope * vds_linear + intercept,
+            ron=ron,
+            r_squared=r_squared,
+            gate_voltage=gate_voltage,
+        )
 
         self.save_excel_data(
             f"ron_gate_{gate_voltage}V",
-            ["VDS (V)", "IDS (A)", "Linear_Region", "Fit_Line (A)"],
+            [
+                "VDS (V)",
+                "IDS (A)",
+                "Linear_Region",
+                "Fit_Line (A)",
+                "Ron (Ω)",
+                "Ron_CI_low (Ω)",
+                "Ron_CI_high (Ω)",
+            ],
             [
                 vds_sorted,
                 ids_sorted,
@@ -157,69 +874,50 @@ class DeviceCharacterizer:
                         [np.nan] * (len(vds_sorted) - len(vds_linear)),
                     ]
                 ),
+                [ron],
+                [ron_lo],
+                [ron_hi],
             ],
         )
 
         return {
             "ron": ron,
+            "ron_ci_low": ron_lo,
+            "ron_ci_high": ron_hi,
             "r_squared": r_squared,
             "linear_region_end": linear_region_end,
         }
 
-    def analyze_output_conductance(self, vds_data, ids_data, gate_voltage):
+    def analyze_output_conductance(self, vds_data, ids_data, gate_voltage, numbers=None):
         """Calculate and plot output conductance (gds)"""
         print(f"\n=== OUTPUT CONDUCTANCE (gds) ANALYSIS ===")
 
         sorted_indices = np.argsort(vds_data)
         vds_sorted = np.array(vds_data)[sorted_indices]
         ids_sorted = np.array(ids_data)[sorted_indices]
+        if numbers is None:
+            numbers = condition_column(gds_numbers(vds_sorted, ids_sorted[:, None]), 0)
 
-        sat_region_start = int(0.7 * len(vds_sorted))
+        sat_region_start = numbers["sat_region_start"]
         vds_sat = vds_sorted[sat_region_start:]
         ids_sat = ids_sorted[sat_region_start:]
-
-        if len(vds_sat) > 1:
-
-            gds_array = np.gradient(ids_sat, vds_sat)
-            gds = np.mean(gds_array)
-        else:
-            gds = 0
-            gds_array = [0]
-
-        gds = abs(gds)
+        gds = numbers["gds"]
+        gds_array = numbers["gds_array"]
 
         print(f"Output Conductance (gds): {gds*1e6:.2f} µS")
         print(f"Saturation region: VDS > {vds_sorted[sat_region_start]:.2f} V")
 
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-        ax1.plot(vds_sorted, ids_sorted * 1e6, "b-", linewidth=2, label="Output Curve")
-        ax1.plot(vds_sat, ids_sat * 1e6, "go", markersize=4, label="Saturation Region")
-        ax1.set_xlabel("VDS (V)")
-        ax1.set_ylabel("IDS (µA)")
-        ax1.set_title(f"Output Conductance Analysis (Gate = {gate_voltage}V)")
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-
-        if len(vds_sat) > 1:
-            ax2.plot(
-                vds_sat, gds_array * 1e6, "r-", linewidth=2, marker="o", markersize=4
-            )
-            ax2.axhline(
-                gds * 1e6,
-                color="orange",
-                linestyle="--",
-                linewidth=2,
-                label=f"Average gds = {gds*1e6:.2f} µS",
-            )
-
-        ax2.set_xlabel("VDS (V)")
-        ax2.set_ylabel("gds (µS)")
-        ax2.set_title("Output Conductance vs VDS")
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-
-        self.save_plot(fig, f"gds_analysis_gate_{gate_voltage}V")
+        self.queue_plot(
+            render_output_conductance,
+            f"gds_analysis_gate_{gate_voltage}V",
+            vds_sorted=vds_sorted,
+            ids_sorted=ids_sorted,
+            vds_sat=vds_sat,
+            ids_sat=ids_sat,
+            gds_array=gds_array,
+            gds=gds,
+            gate_voltage=gate_voltage,
+        )
 
         self.save_excel_data(
             f"gds_gate_{gate_voltage}V",
@@ -234,7 +932,7 @@ class DeviceCharacterizer:
 
         return {"gds": gds, "sat_region_start": sat_region_start}
 
-    def analyze_snr(self, signal_data, gate_voltage):
+    def analyze_snr(self, signal_data, gate_voltage, numbers=None):
         """Calculate and plot SNR metrics"""
         if self.baseline_noise_rms is None:
             print("ERROR: Must measure baseline noise first")
@@ -242,68 +940,30 @@ class DeviceCharacterizer:
 
         print(f"\n=== SNR ANALYSIS ===")
 
-        signal_rms = np.sqrt(np.mean(np.array(signal_data) ** 2))
-        snr_linear = signal_rms / self.baseline_noise_rms
-        snr_db = 20 * np.log10(snr_linear)
-        noise_floor = 3 * self.baseline_noise_rms
-        current_detection_limit = noise_floor
-        max_signal = np.max(np.abs(signal_data))
-        dynamic_range_db = 20 * np.log10(max_signal / noise_floor)
+        signal_data = np.asarray(signal_data)
+        if numbers is None:
+            numbers = condition_column(
+                snr_numbers(signal_data[:, None], self.baseline_noise_rms), 0
+            )
+        snr_db = numbers["snr_db"]
+        noise_floor = numbers["noise_floor"]
+        current_detection_limit = numbers["current_detection_limit"]
+        dynamic_range_db = numbers["dynamic_range_db"]
 
         print(f"SNR: {snr_db:.1f} dB")
         print(f"Current Detection Limit: {current_detection_limit*1e9:.2f} nA")
         print(f"Dynamic Range: {dynamic_range_db:.1f} dB")
         print(f"Noise Floor: {noise_floor*1e12:.2f} pA")
 
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        ax.plot(signal_data * 1e6, "b-", linewidth=1.5, label="Signal")
-
-        noise_floor_ua = noise_floor * 1e6
-        ax.axhline(
-            noise_floor_ua,
-            color="r",
-            linestyle="--",
-            linewidth=2,
-            label=f"Noise Floor (+{noise_floor_ua:.2f} µA)",
-        )
-        ax.axhline(
-            -noise_floor_ua,
-            color="r",
-            linestyle="--",
-            linewidth=2,
-            label=f"Noise Floor (-{noise_floor_ua:.2f} µA)",
+        self.queue_plot(
+            render_snr,
+            f"snr_analysis_gate_{gate_voltage}V",
+            signal_data=signal_data,
+            noise_floor=noise_floor,
+            snr_db=snr_db,
+            current_detection_limit=current_detection_limit,
+            gate_voltage=gate_voltage,
         )
-        ax.fill_between(
-            range(len(signal_data)),
-            -noise_floor_ua,
-            noise_floor_ua,
-            alpha=0.2,
-            color="red",
-            label="Unreliable Region",
-        )
-
-        ax.set_xlabel("Measurement Point")
-        ax.set_ylabel("Current (µA)")
-        ax.set_title(f"SNR Analysis (Gate = {gate_voltage}V)")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-
-        quality = "EXCELLENT" if snr_db > 40 else "GOOD" if snr_db > 20 else "POOR"
-        quality_color = "green" if snr_db > 40 else "orange" if snr_db > 20 else "red"
-
-        ax.text(
-            0.02,
-            0.98,
-            f"SNR: {snr_db:.1f} dB\n{quality}\nDetection Limit: {current_detection_limit*1e9:.2f} nA",
-            transform=ax.transAxes,
-            fontsize=12,
-            fontweight="bold",
-            bbox=dict(boxstyle="round,pad=0.3", facecolor=quality_color, alpha=0.7),
-            verticalalignment="top",
-        )
-
-        self.save_plot(fig, f"snr_analysis_gate_{gate_voltage}V")
 
         measurement_points = np.arange(len(signal_data))
         noise_floor_array = np.full_like(signal_data, noise_floor)
@@ -326,7 +986,7 @@ class DeviceCharacterizer:
             "noise_floor": noise_floor,
         }
 
-    def analyze_drift(self, time_data, current_data, gate_voltage):
+    def analyze_drift(self, time_data, current_data, gate_voltage, numbers=None):
         """Calculate and plot drift rate"""
         if len(time_data) != len(current_data) or len(time_data) < 2:
             print("ERROR: Need time series data for drift calculation")
@@ -334,15 +994,13 @@ class DeviceCharacterizer:
 
         print(f"\n=== DRIFT ANALYSIS ===")
 
-        drift_rate, offset = np.polyfit(time_data, current_data, 1)
-        mean_current = np.mean(current_data)
-        drift_rate_percent_per_hour = (
-            (drift_rate * 3600 / mean_current * 100) if mean_current != 0 else 0
-        )
-        total_drift = drift_rate * (time_data[-1] - time_data[0])
-        total_drift_percent = (
-            (total_drift / mean_current * 100) if mean_current != 0 else 0
-        )
+        current_data = np.asarray(current_data)
+        if numbers is None:
+            numbers = condition_column(drift_numbers(time_data, current_data[:, None]), 0)
+        drift_rate = numbers["drift_rate_A_per_s"]
+        offset = numbers["offset"]
+        drift_rate_percent_per_hour = numbers["drift_rate_percent_per_hour"]
+        total_drift_percent = numbers["total_drift_percent"]
 
         print(f"Drift Rate: {drift_rate*1e12:.2f} pA/s")
         print(f"Drift Rate: {drift_rate_percent_per_hour:.4f} %/hour")
@@ -350,43 +1008,18 @@ class DeviceCharacterizer:
             f"Total Drift: {total_drift_percent:.4f} % over {time_data[-1] - time_data[0]:.1f} s"
         )
 
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        ax.plot(
-            time_data, current_data * 1e6, "b-", linewidth=2, label="Measured Current"
+        self.queue_plot(
+            render_drift,
+            f"drift_analysis_gate_{gate_voltage}V",
+            time_data=time_data,
+            current_data=current_data,
+            drift_rate=drift_rate,
+            offset=offset,
+            rate_percent=drift_rate_percent_per_hour,
+            total_percent=total_drift_percent,
+            gate_voltage=gate_voltage,
         )
 
-        time_fit = np.array([min(time_data), max(time_data)])
-        current_fit = drift_rate * time_fit + offset
-        ax.plot(
-            time_fit,
-            current_fit * 1e6,
-            "r--",
-            linewidth=2,
-            label=f"Drift Trend ({drift_rate_percent_per_hour:.4f} %/hr)",
-        )
-
-        ax.set_xlabel("Time (s)")
-        ax.set_ylabel("Current (µA)")
-        ax.set_title(f"Drift Analysis (Gate = {gate_voltage}V)")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-
-        ax.text(
-            0.02,
-            0.98,
-            f"Drift: {drift_rate_percent_per_hour:.4f} %/hr\n"
-            f"Total: {total_drift_percent:.4f} %\n"
-            f"Duration: {time_data[-1] - time_data[0]:.1f} s",
-            transform=ax.transAxes,
-            fontsize=10,
-            fontweight="bold",
-            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightyellow", alpha=0.7),
-            verticalalignment="top",
-        )
-
-        self.save_plot(fig, f"drift_analysis_gate_{gate_voltage}V")
-
         self.save_excel_data(
             f"drift_gate_{gate_voltage}V",
             ["Time (s)", "Current (A)", "Drift_Fit (A)"],
@@ -399,414 +1032,380 @@ class DeviceCharacterizer:
             "drift_rate_A_per_s": drift_rate,
         }
 
-    def analyze_1f_noise(self, current_data, gate_voltage, sampling_rate=100):
-        """Analyze and plot 1/f noise"""
+    def analyze_1f_noise(self, current_data, gate_voltage, sampling_rate=None, numbers=None):
+        """Analyze and plot 1/f noise (sampling_rate: the true rate of the
+        points in Hz, e.g. condition_sample_rate())"""
         if len(current_data) < 100:
             print("ERROR: Need at least 100 data points for 1/f noise analysis")
             return None
+        if numbers is None and sampling_rate is None:
+            print("ERROR: Need the sampling rate for 1/f noise analysis")
+            return None
 
         print(f"\n=== 1/f NOISE ANALYSIS ===")
 
-        freqs, psd = signal.welch(
-            current_data, fs=sampling_rate, nperseg=len(current_data) // 4
-        )
-
-        low_freq_mask = (freqs > 0.1) & (freqs < 10)
-
-        if np.sum(low_freq_mask) > 5:
-            log_freqs = np.log10(freqs[low_freq_mask])
-            log_psd = np.log10(psd[low_freq_mask])
-
-            slope, intercept = np.polyfit(log_freqs, log_psd, 1)
-            noise_1f_coefficient = 10**intercept
-            noise_1f_exponent = -slope
-            noise_at_1hz = noise_1f_coefficient
-
-            print(f"1/f Noise Coefficient: {noise_1f_coefficient:.2e} A²·Hz")
-            print(f"1/f Noise Exponent: {noise_1f_exponent:.2f}")
-            print(f"Current Noise at 1 Hz: {np.sqrt(noise_at_1hz)*1e12:.2f} pA/√Hz")
-
-            fig, ax = plt.subplots(figsize=(10, 6))
-
-            ax.loglog(
-                freqs, np.sqrt(psd) * 1e12, "b-", linewidth=2, label="Measured Noise"
-            )
-
-            f_fit = np.logspace(-1, 2, 100)
-            psd_fit = noise_1f_coefficient / (f_fit**noise_1f_exponent)
-            ax.loglog(
-                f_fit,
-                np.sqrt(psd_fit) * 1e12,
-                "r--",
-                linewidth=2,
-                label=f"1/f^{noise_1f_exponent:.2f} fit",
+        if numbers is None:
+            numbers = condition_column(
+                noise_1f_numbers(np.asarray(current_data)[:, None], sampling_rate), 0
             )
+        if numbers["fit_points"] <= 5:
+            print("ERROR: Insufficient data points in 1/f frequency range")
+            return None
 
-            ax.set_xlabel("Frequency (Hz)")
-            ax.set_ylabel("Current Noise (pA/√Hz)")
-            ax.set_title(f"1/f Noise Analysis (Gate = {gate_voltage}V)")
-            ax.legend()
-            ax.grid(True, alpha=0.3, which="both")
-
-            ax.text(
-                0.02,
-                0.98,
-                f"1/f Exponent: {noise_1f_exponent:.2f}\n"
-                f"Noise @ 1Hz: {np.sqrt(noise_at_1hz)*1e12:.1f} pA/√Hz\n"
-                f"Coefficient: {noise_1f_coefficient:.2e} A²·Hz",
-                transform=ax.transAxes,
-                fontsize=10,
-                fontweight="bold",
-                bbox=dict(boxstyle="round,pad=0.3", facecolor="lightcyan", alpha=0.7),
-                verticalalignment="top",
-            )
+        freqs, psd = numbers["freqs"], numbers["psd"]
+        noise_1f_coefficient = numbers["1f_coefficient"]
+        noise_1f_exponent = numbers["1f_exponent"]
+        noise_at_1hz = numbers["noise_at_1hz"]
+
+        print(f"1/f Noise Coefficient: {noise_1f_coefficient:.2e} A²·Hz")
+        print(f"1/f Noise Exponent: {noise_1f_exponent:.2f}")
+        print(f"Current Noise at 1 Hz: {np.sqrt(noise_at_1hz)*1e12:.2f} pA/√Hz")
+        print(f"Sampling rate: {numbers['sampling_rate']:.3g} Hz")
+
+        self.queue_plot(
+            render_1f_noise,
+            f"1f_noise_analysis_gate_{gate_voltage}V",
+            freqs=freqs,
+            psd=psd,
+            coefficient=noise_1f_coefficient,
+            exponent=noise_1f_exponent,
+            gate_voltage=gate_voltage,
+        )
 
-            self.save_plot(fig, f"1f_noise_analysis_gate_{gate_voltage}V")
-
-            self.save_excel_data(
-                f"1f_noise_gate_{gate_voltage}V",
-                [
-                    "Frequency (Hz)",
-                    "PSD (A²/Hz)",
-                    "Noise_Density (A/√Hz)",
-                    "Fit (A/√Hz)",
-                ],
-                [
-                    freqs,
-                    psd,
-                    np.sqrt(psd),
-                    np.sqrt(noise_1f_coefficient / (freqs**noise_1f_exponent)),
-                ],
-            )
+        self.save_excel_data(
+            f"1f_noise_gate_{gate_voltage}V",
+            [
+                "Frequency (Hz)",
+                "PSD (A²/Hz)",
+                "Noise_Density (A/√Hz)",
+                "Fit (A/√Hz)",
+            ],
+            [
+                freqs,
+                psd,
+                np.sqrt(psd),
+                np.sqrt(noise_1f_coefficient / (freqs**noise_1f_exponent)),
+            ],
+        )
 
-            return {
-                "1f_coefficient": noise_1f_coefficient,
-                "1f_exponent": noise_1f_exponent,
-                "noise_at_1hz": noise_at_1hz,
-            }
-        else:
-            print("ERROR: Insufficient data points in 1/f frequency range")
-            return None
+        return {
+            "1f_coefficient": noise_1f_coefficient,
+            "1f_exponent": noise_1f_exponent,
+            "noise_at_1hz": noise_at_1hz,
+            "sampling_rate": numbers["sampling_rate"],
+        }
 
-    def analyze_threshold_voltage(self, vgs_data, ids_data, drain_voltage):
+    def analyze_threshold_voltage(self, vgs_data, ids_data, drain_voltage, numbers=None):
         """Calculate and plot threshold voltage"""
         print(f"\n=== THRESHOLD VOLTAGE (Vth) ANALYSIS ===")
 
         sorted_indices = np.argsort(vgs_data)
         vgs_sorted = np.array(vgs_data)[sorted_indices]
         ids_sorted = np.array(ids_data)[sorted_indices]
+        if numbers is None:
+            numbers = condition_column(vth_numbers(vgs_sorted, ids_sorted[:, None]), 0)
 
-        gm = np.abs(np.gradient(ids_sorted, vgs_sorted))
-        max_gm_idx = np.argmax(gm)
-
-        fit_range = min(5, len(vgs_sorted) // 4)
-        start_idx = max(0, max_gm_idx - fit_range)
-        end_idx = min(len(vgs_sorted), max_gm_idx + fit_range)
-
-        vgs_fit = vgs_sorted[start_idx:end_idx]
-        ids_fit = ids_sorted[start_idx:end_idx]
-
-        if len(vgs_fit) > 1:
-            slope, intercept = np.polyfit(vgs_fit, ids_fit, 1)
-            vth = -intercept / slope if slope != 0 else 0
-        else:
-            vth = 0
-            slope = 0
+        vgs_fit = vgs_sorted[numbers["start_idx"] : numbers["end_idx"]]
+        ids_fit = ids_sorted[numbers["start_idx"] : numbers["end_idx"]]
+        vth = numbers["vth"]
+        slope, intercept = numbers["slope"], numbers["intercept"]
 
         print(f"Threshold Voltage (Vth): {vth:.3f} V")
         print(f"Transconductance region slope: {slope*1e6:.2f} µA/V")
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        ax.semilogy(
-            vgs_sorted,
-            np.abs(ids_sorted) * 1e6,
-            "b-",
-            linewidth=2,
-            label="Transfer Curve",
+        vth_lo, vth_hi = self.bootstrap_ci(
+            vgs_sorted, ids_sorted, vth_columns, f"vth_drain_{drain_voltage}V"
         )
-        ax.plot(
-            vgs_fit,
-            np.abs(ids_fit) * 1e6,
-            "ro",
-            markersize=6,
-            label="Linear Extrapolation Region",
-        )
-
-        if len(vgs_fit) > 1:
-
-            vgs_extrap = np.linspace(min(vgs_sorted), max(vgs_sorted), 100)
-            ids_extrap = slope * vgs_extrap + intercept
-            mask = ids_extrap > 0
-            ax.semilogy(
-                vgs_extrap[mask],
-                ids_extrap[mask] * 1e6,
-                "r--",
-                linewidth=2,
-                label=f"Linear Extrapolation",
-            )
-
-            ax.axvline(
-                vth,
-                color="orange",
-                linestyle=":",
-                linewidth=2,
-                label=f"Vth = {vth:.3f} V",
-            )
 
-        ax.set_xlabel("VGS (V)")
-        ax.set_ylabel("|IDS| (µA)")
-        ax.set_title(f"Threshold Voltage Analysis (Drain = {drain_voltage}V)")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-
-        ax.text(
-            0.02,
-            0.98,
-            f"Vth = {vth:.3f} V",
-            transform=ax.transAxes,
-            fontsize=12,
-            fontweight="bold",
-            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.7),
-            verticalalignment="top",
+        self.queue_plot(
+            render_threshold_voltage,
+            f"vth_analysis_drain_{drain_voltage}V",
+            vgs_sorted=vgs_sorted,
+            ids_sorted=ids_sorted,
+            vgs_fit=vgs_fit,
+            ids_fit=ids_fit,
+            slope=slope,
+            intercept=intercept,
+            vth=vth,
+            drain_voltage=drain_voltage,
         )
 
-        self.save_plot(fig, f"vth_analysis_drain_{drain_voltage}V")
-
         extrapolation_line = slope * vgs_sorted + intercept
         self.save_excel_data(
             f"vth_drain_{drain_voltage}V",
-            ["VGS (V)", "IDS (A)", "Extrapolation_Line (A)", "Vth (V)"],
-            [vgs_sorted, ids_sorted, extrapolation_line, [vth] * len(vgs_sorted)],
+            [
+                "VGS (V)",
+                "IDS (A)",
+                "Extrapolation_Line (A)",
+                "Vth (V)",
+                "Vth_CI_low (V)",
+                "Vth_CI_high (V)",
+            ],
+            [
+                vgs_sorted,
+                ids_sorted,
+                extrapolation_line,
+                [vth] * len(vgs_sorted),
+                [vth_lo],
+                [vth_hi],
+            ],
         )
 
-        return {"vth": vth, "slope": slope}
+        return {"vth": vth, "vth_ci_low": vth_lo, "vth_ci_high": vth_hi, "slope": slope}
 
-    def analyze_transconductance(self, vgs_data, ids_data, drain_voltage):
+    def analyze_transconductance(self, vgs_data, ids_data, drain_voltage, numbers=None):
         """Calculate and plot transconductance"""
         print(f"\n=== TRANSCONDUCTANCE (gm) ANALYSIS ===")
 
         sorted_indices = np.argsort(vgs_data)
         vgs_sorted = np.array(vgs_data)[sorted_indices]
         ids_sorted = np.array(ids_data)[sorted_indices]
+        if numbers is None:
+            numbers = condition_column(gm_numbers(vgs_sorted, ids_sorted[:, None]), 0)
 
-        gm = np.gradient(ids_sorted, vgs_sorted)
-        gm_max = np.max(np.abs(gm))
-        gm_max_idx = np.argmax(np.abs(gm))
-        vgs_gm_max = vgs_sorted[gm_max_idx]
+        gm = numbers["gm_curve"]
+        gm_max = numbers["gm_max"]
+        vgs_gm_max = vgs_sorted[numbers["gm_max_idx"]]
 
         print(f"Maximum Transconductance (gm): {gm_max*1e6:.2f} µS")
         print(f"gm_max occurs at VGS = {vgs_gm_max:.3f} V")
+        gm_lo, gm_hi = self.bootstrap_ci(
+            vgs_sorted, ids_sorted, gm_max_columns, f"gm_drain_{drain_voltage}V"
+        )
 
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-        ax1.plot(
-            vgs_sorted, ids_sorted * 1e6, "b-", linewidth=2, label="Transfer Curve"
+        self.queue_plot(
+            render_transconductance,
+            f"gm_analysis_drain_{drain_voltage}V",
+            vgs_sorted=vgs_sorted,
+            ids_sorted=ids_sorted,
+            gm=gm,
+            gm_max=gm_max,
+            vgs_gm_max=vgs_gm_max,
+            drain_voltage=drain_voltage,
         )
-        ax1.axvline(
-            vgs_gm_max,
-            color="red",
-            linestyle="--",
-            alpha=0.7,
-            label=f"Max gm at VGS = {vgs_gm_max:.3f} V",
-        )
-        ax1.set_xlabel("VGS (V)")
-        ax1.set_ylabel("IDS (µA)")
-        ax1.set_title(f"Transfer Characteristics (Drain = {drain_voltage}V)")
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-
-        ax2.plot(vgs_sorted, gm * 1e6, "g-", linewidth=2, label="Transconductance")
-        ax2.plot(
-            vgs_gm_max,
-            gm_max * 1e6,
-            "ro",
-            markersize=8,
-            label=f"Max gm = {gm_max*1e6:.2f} µS",
-        )
-        ax2.set_xlabel("VGS (V)")
-        ax2.set_ylabel("gm (µS)")
-        ax2.set_title("Transconductance vs Gate Voltage")
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-
-        self.save_plot(fig, f"gm_analysis_drain_{drain_voltage}V")
 
         self.save_excel_data(
             f"gm_drain_{drain_voltage}V",
-            ["VGS (V)", "IDS (A)", "gm (S)", "gm_max (S)", "VGS_gm_max (V)"],
+            [
+                "VGS (V)",
+                "IDS (A)",
+                "gm (S)",
+                "gm_max (S)",
+                "VGS_gm_max (V)",
+                "gm_max_CI_low (S)",
+                "gm_max_CI_high (S)",
+            ],
             [
                 vgs_sorted,
                 ids_sorted,
                 gm,
                 [gm_max] * len(vgs_sorted),
                 [vgs_gm_max] * len(vgs_sorted),
+                [gm_lo],
+                [gm_hi],
             ],
         )
 
-        return {"gm_max": gm_max, "vgs_gm_max": vgs_gm_max, "gm_curve": gm}
+        return {
+            "gm_max": gm_max,
+            "gm_max_ci_low": gm_lo,
+            "gm_max_ci_high": gm_hi,
+            "vgs_gm_max": vgs_gm_max,
+            "gm_curve": gm,
+        }
 
-    def analyze_subthreshold_slope(self, vgs_data, ids_data, drain_voltage):
+    def analyze_subthreshold_slope(self, vgs_data, ids_data, drain_voltage, numbers=None):
         """Calculate and plot subthreshold slope"""
         print(f"\n=== SUBTHRESHOLD SLOPE (SS) ANALYSIS ===")
 
         sorted_indices = np.argsort(vgs_data)
         vgs_sorted = np.array(vgs_data)[sorted_indices]
         ids_sorted = np.array(ids_data)[sorted_indices]
+        if numbers is None:
+            numbers = condition_column(ss_numbers(vgs_sorted, ids_sorted[:, None]), 0)
 
-        log_ids = np.log10(np.abs(ids_sorted) + 1e-15)
-
-        d_log_ids = np.gradient(log_ids, vgs_sorted)
-
-        valid_indices = np.where(d_log_ids > 0)[0]
-        if len(valid_indices) > 5:
-            max_derivative_idx = valid_indices[np.argmax(d_log_ids[valid_indices])]
-            max_derivative = d_log_ids[max_derivative_idx]
-            ss = 1000 / max_derivative
-            vgs_ss = vgs_sorted[max_derivative_idx]
-        else:
-            ss = float("inf")
-            vgs_ss = 0
-            max_derivative = 0
+        log_ids = numbers["log_ids"]
+        d_log_ids = numbers["d_log_ids"]
+        ss = numbers["ss"]
+        vgs_ss = vgs_sorted[numbers["ss_idx"]] if ss != float("inf") else 0
 
         print(f"Subthreshold Slope (SS): {ss:.1f} mV/decade")
         print(f"SS measured at VGS = {vgs_ss:.3f} V")
+        ss_lo, ss_hi = self.bootstrap_ci(
+            vgs_sorted, ids_sorted, ss_columns, f"ss_drain_{drain_voltage}V"
+        )
 
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-
-        ax1.semilogy(
-            vgs_sorted,
-            np.abs(ids_sorted) * 1e6,
-            "b-",
-            linewidth=2,
-            label="Transfer Curve",
-        )
-        if ss != float("inf"):
-            ax1.axvline(
-                vgs_ss,
-                color="red",
-                linestyle="--",
-                alpha=0.7,
-                label=f"SS measurement point",
-            )
-        ax1.set_xlabel("VGS (V)")
-        ax1.set_ylabel("|IDS| (µA)")
-        ax1.set_title(f"Transfer Curve (Log Scale) - Drain = {drain_voltage}V")
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-
-        ax2.plot(vgs_sorted, 1000 / d_log_ids, "r-", linewidth=2, label="Local SS")
-        if ss != float("inf"):
-            ax2.axhline(
-                ss,
-                color="orange",
-                linestyle="--",
-                linewidth=2,
-                label=f"Min SS = {ss:.1f} mV/dec",
-            )
-            ax2.plot(vgs_ss, ss, "go", markersize=8, label="SS measurement point")
-        ax2.set_xlabel("VGS (V)")
-        ax2.set_ylabel("Subthreshold Slope (mV/decade)")
-        ax2.set_title("Subthreshold Slope vs Gate Voltage")
-        ax2.set_ylim(0, min(1000, np.percentile(1000 / d_log_ids[d_log_ids > 0], 95)))
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-
-        self.save_plot(fig, f"ss_analysis_drain_{drain_voltage}V")
+        self.queue_plot(
+            render_subthreshold_slope,
+            f"ss_analysis_drain_{drain_voltage}V",
+            vgs_sorted=vgs_sorted,
+            ids_sorted=ids_sorted,
+            d_log_ids=d_log_ids,
+            ss=ss,
+            vgs_ss=vgs_ss,
+            drain_voltage=drain_voltage,
+        )
 
         local_ss = 1000 / d_log_ids
         self.save_excel_data(
             f"ss_drain_{drain_voltage}V",
-            ["VGS (V)", "IDS (A)", "Log_IDS", "Local_SS (mV/dec)", "Min_SS (mV/dec)"],
-            [vgs_sorted, ids_sorted, log_ids, local_ss, [ss] * len(vgs_sorted)],
+            [
+                "VGS (V)",
+                "IDS (A)",
+                "Log_IDS",
+                "Local_SS (mV/dec)",
+                "Min_SS (mV/dec)",
+                "SS_CI_low (mV/dec)",
+                "SS_CI_high (mV/dec)",
+            ],
+            [
+                vgs_sorted,
+                ids_sorted,
+                log_ids,
+                local_ss,
+                [ss] * len(vgs_sorted),
+                [ss_lo],
+                [ss_hi],
+            ],
         )
 
-        return {"ss": ss, "vgs_ss": vgs_ss}
+        return {"ss": ss, "ss_ci_low": ss_lo, "ss_ci_high": ss_hi, "vgs_ss": vgs_ss}
 
-    def analyze_on_off_ratio(self, vgs_data, ids_data, drain_voltage):
+    def analyze_on_off_ratio(self, vgs_data, ids_data, drain_voltage, numbers=None):
         """Calculate on/off ratio"""
         print(f"\n=== ON/OFF RATIO ANALYSIS ===")
 
         sorted_indices = np.argsort(vgs_data)
         vgs_sorted = np.array(vgs_data)[sorted_indices]
         ids_sorted = np.array(ids_data)[sorted_indices]
+        if numbers is None:
+            numbers = condition_column(on_off_numbers(vgs_sorted, ids_sorted[:, None]), 0)
 
-        i_on = np.max(np.abs(ids_sorted))
-        i_off = (
-            np.min(np.abs(ids_sorted[ids_sorted != 0]))
-            if len(ids_sorted[ids_sorted != 0]) > 0
-            else 1e-15
-        )
-        on_off_ratio = i_on / i_off
-
-        i_on_idx = np.argmax(np.abs(ids_sorted))
-        i_off_idx = np.argmin(np.abs(ids_sorted))
-        vgs_ion = vgs_sorted[i_on_idx]
-        vgs_ioff = vgs_sorted[i_off_idx]
+        i_on, i_off = numbers["i_on"], numbers["i_off"]
+        on_off_ratio = numbers["on_off_ratio"]
+        vgs_ion = vgs_sorted[numbers["i_on_idx"]]
+        vgs_ioff = vgs_sorted[numbers["i_off_idx"]]
 
         print(f"On Current (Ion): {i_on*1e6:.2f} µA at VGS = {vgs_ion:.3f} V")
         print(f"Off Current (Ioff): {i_off*1e9:.2f} nA at VGS = {vgs_ioff:.3f} V")
         print(f"On/Off Ratio: {on_off_ratio:.2e}")
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-
-        ax.semilogy(
-            vgs_sorted,
-            np.abs(ids_sorted) * 1e6,
-            "b-",
-            linewidth=2,
-            label="Transfer Curve",
-        )
-        ax.plot(
-            vgs_ion, i_on * 1e6, "go", markersize=8, label=f"Ion = {i_on*1e6:.2f} µA"
-        )
-        ax.plot(
-            vgs_ioff,
-            i_off * 1e6,
-            "ro",
-            markersize=8,
-            label=f"Ioff = {i_off*1e9:.2f} nA",
+        ratio_lo, ratio_hi = self.bootstrap_ci(
+            vgs_sorted, ids_sorted, on_off_columns, f"on_off_drain_{drain_voltage}V"
         )
 
-        ax.set_xlabel("VGS (V)")
-        ax.set_ylabel("|IDS| (µA)")
-        ax.set_title(f"On/Off Ratio Analysis (Drain = {drain_voltage}V)")
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-
-        ax.text(
-            0.02,
-            0.98,
-            f"Ion/Ioff = {on_off_ratio:.2e}",
-            transform=ax.transAxes,
-            fontsize=12,
-            fontweight="bold",
-            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightpink", alpha=0.7),
-            verticalalignment="top",
+        self.queue_plot(
+            render_on_off_ratio,
+            f"on_off_ratio_drain_{drain_voltage}V",
+            vgs_sorted=vgs_sorted,
+            ids_sorted=ids_sorted,
+            i_on=i_on,
+            i_off=i_off,
+            vgs_ion=vgs_ion,
+            vgs_ioff=vgs_ioff,
+            on_off_ratio=on_off_ratio,
+            drain_voltage=drain_voltage,
         )
 
-        self.save_plot(fig, f"on_off_ratio_drain_{drain_voltage}V")
-
         self.save_excel_data(
             f"on_off_drain_{drain_voltage}V",
-            ["VGS (V)", "IDS (A)", "Ion (A)", "Ioff (A)", "Ion_Ioff_Ratio"],
+            [
+                "VGS (V)",
+                "IDS (A)",
+                "Ion (A)",
+                "Ioff (A)",
+                "Ion_Ioff_Ratio",
+                "Ratio_CI_low",
+                "Ratio_CI_high",
+            ],
             [
                 vgs_sorted,
                 ids_sorted,
                 [i_on] * len(vgs_sorted),
                 [i_off] * len(vgs_sorted),
                 [on_off_ratio] * len(vgs_sorted),
+                [ratio_lo],
+                [ratio_hi],
             ],
         )
 
         return {
             "on_off_ratio": on_off_ratio,
+            "on_off_ratio_ci_low": ratio_lo,
+            "on_off_ratio_ci_high": ratio_hi,
             "i_on": i_on,
             "i_off": i_off,
             "vgs_ion": vgs_ion,
             "vgs_ioff": vgs_ioff,
         }
 
+    def analyze_compact_model(self, data_by_dac1, mode):
+        """Fit one compact model to every curve of the run and plot it"""
+        x_key, i_key = ("vsd", "isd") if mode == "output" else ("vsg", "i_drain")
+        vsg, vsd, isd = [], [], []
+        for condition in data_by_dac1.values():
+            n = len(condition[i_key])
+            vsg.append(np.asarray(condition["vsg"][:n], dtype=float))
+            vsd.append(np.asarray(condition["vsd"][:n], dtype=float))
+            isd.append(np.asarray(condition[i_key][:n], dtype=float))
+        vsg, vsd, isd = np.concatenate(vsg), np.concatenate(vsd), np.concatenate(isd)
+
+        fit = fit_family(vsg, vsd, isd)
+        if not fit["success"]:
+            print(f"Compact model fit failed: {fit['message']}")
+            return {"r2": np.nan, "points": fit.get("points", 0)}
+
+        print(
+            f"Compact model: Vth = {fit['vth_V']:.3f} V, k = {fit['k_A_V2']*1e6:.3g} µA/V², "
+            f"λ = {fit['lambda_1_V']:.3f} 1/V, Rs = {fit['rs_ohm']/1e3:.3g} kΩ, "
+            f"SS = {fit['ss_V_dec']*1e3:.0f} mV/dec, R² = {fit['r2']:.4f}"
+        )
+        if fit["at_bounds"]:
+            print(f"Compact model parameters at a bound: {', '.join(fit['at_bounds'])}")
+
+        params = [fit[name] for name in PARAM_NAMES]
+        curves = []
+        for label, condition in data_by_dac1.items():
+            n = len(condition[i_key])
+            x = np.asarray(condition[x_key][:n], dtype=float)
+            order = np.argsort(x)
+            model = fit["polarity"] * model_current(
+                params,
+                np.asarray(condition["vsg"][:n])[order],
+                np.asarray(condition["vsd"][:n])[order],
+            )
+            curves.append((label, x, np.asarray(condition[i_key][:n], dtype=float), x[order], model))
+        self.queue_plot(
+            render_compact_model, f"compact_model_{mode}", curves=curves, mode=mode, r2=fit["r2"]
+        )
+
+        self.save_excel_data(
+            f"compact_model_{mode}",
+            ["VSG (V)", "VSD (V)", "Current (A)", "Model (A)", *PARAM_NAMES, "R2"],
+            [
+                vsg,
+                vsd,
+                isd,
+                fit["polarity"] * model_current(params, vsg, vsd),
+                *([value] for value in params),
+                [fit["r2"]],
+            ],
+        )
+
+        return {
+            **{name: fit[name] for name in PARAM_NAMES},
+            **{f"{name}_se": fit[f"{name}_se"] for name in PARAM_NAMES},
+            "rmse_A": fit["rmse_A"],
+            "r2": fit["r2"],
+            "points": fit["points"],
+        }
+
+    def bootstrap_ci(self, x_sorted, y_sorted, extract, name):
+        """Bootstrap interval (lo, hi) of extract() for one sorted curve"""
+        lo, hi, _ = trace_bootstrap(
+            x_sorted, y_sorted, extract, seed=chip_seed(f"{self.chip_name}/{name}")
+        )
+        print(f"{CI_LEVEL:.0%} CI: {lo:.4g} .. {hi:.4g}")
+        return lo, hi
+
     def calculate_r_squared(self, actual, predicted):
         """Calculate R-squared value"""
         ss_res = np.sum((actual - predicted) ** 2)
@@ -814,36 +1413,64 @@ class DeviceCharacterizer:
         return 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
 
     def save_plot(self, fig, filename):
-        """Save plot as PNG and PDF"""
-        png_path = os.path.join(self.char_folder, f"{filename}.png")
-        pdf_path = os.path.join(self.char_folder, f"{filename}.pdf")
-
-        fig.savefig(png_path, dpi=300, bbox_inches="tight")
-        fig.savefig(pdf_path, bbox_inches="tight")
-
+        """Save plot in the plot formats"""
+        save_figure(
+            fig, os.path.join(self.char_folder, filename), self.plot_formats, self.plot_dpi
+        )
         print(f"Plot saved: {filename}")
-        plt.close(fig)
+
+    def queue_plot(self, render, filename, **data):
+        """Queue render(**data) for the render phase, saved as filename"""
+        path = os.path.join(self.char_folder, filename)
+        self.plot_queue.append((render, data, path, self.plot_formats, self.plot_dpi))
+
+    def render_plots(self):
+        """Start rendering the queued figures in the render pool; returns
+        at once (wait_for_plots() collects them)"""
+        items, self.plot_queue = self.plot_queue, []
+        if len(items) > 1 and self.render_workers > 1:
+            if self._render_pool is None:
+                self._render_pool = ProcessPoolExecutor(
+                    max_workers=min(self.render_workers, len(items)),
+                    mp_context=pool_context(),
+                    initializer=_render_init,
+                )
+            self._render_futures += [self._render_pool.submit(_render_task, i) for i in items]
+        else:
+            self.plot_queue = items
+
+    def wait_for_plots(self):
+        """Finish the render phase; returns {path: error} of failed figures"""
+        try:
+            results = [future.result() for future in self._render_futures]
+            results += [_render_task(item) for item in self.plot_queue]
+        finally:
+            # Also after a BrokenProcessPool, so the workers do not outlive the run
+            self._render_futures, self.plot_queue = [], []
+            if self._render_pool is not None:
+                self._render_pool.shutdown()
+                self._render_pool = None
+
+        errors = {}
+        for path, error in results:
+            filename = os.path.basename(path)
+            if error is None:
+                print(f"Plot saved: {filename}")
+            else:
+                print(f"Plot {filename} failed: {error}")
+                errors[path] = error
+        return errors
 
     def save_excel_data(self, filename, column_names, data_arrays):
-        """Save data to Excel file"""
-        workbook = openpyxl.Workbook()
-        worksheet = workbook.active
-        worksheet.title = "Characterization Data"
-
-        for col, header in enumerate(column_names, 1):
-            worksheet.cell(row=1, column=col, value=header)
-
-        max_length = max(len(arr) for arr in data_arrays)
-        for row in range(max_length):
-            for col, data_array in enumerate(data_arrays, 1):
-                if row < len(data_array):
-                    worksheet.cell(
-                        row=row + 2, column=col, value=float(data_array[row])
-                    )
-
-        excel_path = os.path.join(self.char_folder, f"{filename}.xlsx")
-        workbook.save(excel_path)
-        print(f"Data saved: {filename}.xlsx")
+        """Save data columns as a table in the table format"""
+        name = f"{filename}{self.table_format}"
+        write_columns(
+            os.path.join(self.char_folder, name),
+            column_names,
+            data_arrays,
+            sheet_title="Characterization Data",
+        )
+        print(f"Data saved: {name}")
 
     def create_summary_report(self):
         """Create a summary report of all characterization results"""
@@ -859,7 +1486,13 @@ class DeviceCharacterizer:
             )
 
             if self.baseline_noise_rms:
-                f.write(f"Baseline Noise: {self.baseline_noise_rms*1e6:.2f} µV RMS\n\n")
+                f.write(f"Baseline Noise: {self.baseline_noise_rms*1e6:.2f} µV RMS\n")
+            if self.baseline_noise_psd:
+                f.write(
+                    f"Baseline 1/f: exponent {self.baseline_noise_psd['1f_exponent']:.2f}, "
+                    f"corner {self.baseline_noise_psd['corner_hz']:.3g} Hz\n"
+                )
+            f.write("\n")
 
             for condition, results in self.results.items():
                 f.write(f"CONDITION: {condition}\n")
@@ -884,6 +1517,10 @@ def characterize_device(
     params_entries,
     chip_name="Default_Chip",
     trial_name="Trial_1",
+    plot_formats=PLOT_FORMATS,
+    plot_dpi=PLOT_DPI,
+    render_workers=RENDER_WORKERS,
+    table_format=".xlsx",
 ):
     """
     Main characterization function
@@ -896,13 +1533,25 @@ def characterize_device(
         params_entries: Parameter entries from GUI
         chip_name: Name of the chip
         trial_name: Name of the trial
+        plot_formats: File formats every figure is saved in
+        plot_dpi: Resolution of the raster formats
+        render_workers: Processes drawing the figures (1: in this process)
+        table_format: ".xlsx", or ".csv" / ".table.npz" for faster tables
     """
 
     print(f"\n{'='*60}")
     print(f"STARTING {mode.upper()} MODE CHARACTERIZATION")
     print(f"{'='*60}")
 
-    characterizer = DeviceCharacterizer(save_path, chip_name, trial_name)
+    characterizer = DeviceCharacterizer(
+        save_path,
+        chip_name,
+        trial_name,
+        plot_formats,
+        plot_dpi,
+        render_workers,
+        table_format,
+    )
 
     baseline_noise_rms, noise_data = characterizer.measure_baseline_noise(
         ADC, duration=5.0
@@ -912,59 +1561,79 @@ def characterize_device(
         print("Characterization cancelled - baseline noise measurement required")
         return None
 
+    step_interval = float(params_entries["step_interval"].get())
+    numbers_by_condition = condition_numbers(
+        data_by_dac1, mode, baseline_noise_rms, step_interval
+    )
+
     for voltage_condition in data_by_dac1:
         print(f"\n{'='*50}")
         print(f"ANALYZING VOLTAGE CONDITION: {voltage_condition}V")
         print(f"{'='*50}")
 
         condition_results = {}
+        numbers = numbers_by_condition[voltage_condition]
 
         if mode == "output":
 
-            vds_data = np.array(data_by_dac1[voltage_condition]["vsd"])
-            ids_data = np.array(data_by_dac1[voltage_condition]["isd"])
+            ids_data = np.asarray(data_by_dac1[voltage_condition]["isd"], dtype=float)
+            vds_data = np.asarray(
+                data_by_dac1[voltage_condition]["vsd"][: len(ids_data)], dtype=float
+            )
 
             condition_results["ron"] = characterizer.analyze_channel_resistance(
-                vds_data, ids_data, voltage_condition
+                vds_data, ids_data, voltage_condition, numbers["ron"]
             )
             condition_results["gds"] = characterizer.analyze_output_conductance(
-                vds_data, ids_data, voltage_condition
+                vds_data, ids_data, voltage_condition, numbers["gds"]
             )
             condition_results["snr"] = characterizer.analyze_snr(
-                ids_data, voltage_condition
+                ids_data, voltage_condition, numbers["snr"]
             )
             condition_results["drift"] = characterizer.analyze_drift(
-                np.arange(len(ids_data)) * float(params_entries["step_interval"].get()),
+                np.arange(len(ids_data)) * step_interval,
                 ids_data,
                 voltage_condition,
+                numbers=numbers["drift"],
             )
 
             if len(ids_data) > 100:
                 condition_results["1f_noise"] = characterizer.analyze_1f_noise(
-                    ids_data, voltage_condition
+                    ids_data, voltage_condition, numbers=numbers["1f_noise"]
                 )
 
         elif mode == "transfer":
 
-            vgs_data = np.array(data_by_dac1[voltage_condition]["vsg"])
-            ids_data = np.array(data_by_dac1[voltage_condition]["i_drain"])
+            ids_data = np.asarray(data_by_dac1[voltage_condition]["i_drain"], dtype=float)
+            vgs_data = np.asarray(
+                data_by_dac1[voltage_condition]["vsg"][: len(ids_data)], dtype=float
+            )
 
             condition_results["vth"] = characterizer.analyze_threshold_voltage(
-                vgs_data, ids_data, voltage_condition
+                vgs_data, ids_data, voltage_condition, numbers["vth"]
             )
             condition_results["gm"] = characterizer.analyze_transconductance(
-                vgs_data, ids_data, voltage_condition
+                vgs_data, ids_data, voltage_condition, numbers["gm"]
             )
             condition_results["ss"] = characterizer.analyze_subthreshold_slope(
-                vgs_data, ids_data, voltage_condition
+                vgs_data, ids_data, voltage_condition, numbers["ss"]
             )
             condition_results["on_off"] = characterizer.analyze_on_off_ratio(
-                vgs_data, ids_data, voltage_condition
+                vgs_data, ids_data, voltage_condition, numbers["on_off"]
             )
 
         characterizer.results[f"{mode}_{voltage_condition}V"] = condition_results
 
+    characterizer.results[f"{mode}_compact_model"] = {
+        "model": characterizer.analyze_compact_model(data_by_dac1, mode)
+    }
+
+    # Render phase: the figures are drawn while the summary is written
+    characterizer.render_plots()
     characterizer.create_summary_report()
+    failed = characterizer.wait_for_plots()
+    if failed:
+        print(f"{len(failed)} plot(s) could not be rendered")
 
     print(f"\n{'='*60}")
     print(f"{mode.upper()} MODE CHARACTERIZATION COMPLETE")
@@ -1,15 +1,34 @@
-import time
 import datetime
 import os
-import RPi.GPIO as GPIO
+import queue
+from . import config
+from .config import GPIO
 import tkinter as tk
 from tkinter import ttk
-import openpyxl
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from . import ADS1256
 from . import DAC8532
+from .baseline_capture import CAPTURE_SUFFIX
 from .characterization import characterize_device
+from .live_plot import LivePlot
+from .export import export_journal_in_background, write_columns_in_background
+from .journal import (
+    JOURNAL_SUFFIX,
+    RunJournal,
+    journal_path,
+    load_journal,
+    resume_point,
+)
+from .run_data import RunData
+from .run_format import run_path_for, write_run
+from .sweep_engine import COLLECT_CHANNELS, SweepEngine, format_timing_stats
+from .timeseries import (
+    MinMaxDecimator,
+    TimeSeriesEngine,
+    timeseries_paths,
+    timeseries_table,
+)
 
 GPIO.setwarnings(False)
 GPIO.setmode(GPIO.BCM)
@@ -21,17 +40,21 @@ DAC.DAC8532_Out_Voltage(0x30, 3)
 DAC.DAC8532_Out_Voltage(0x34, 3)
 
 collecting_data = False
-voltages1, voltages2, voltages3 = [], [], []
-voltages4, voltages5, voltages6 = [], [], []
-vsd_values, i_source_values, i_gate_values, i_drain_values, isd_values = (
-    [],
-    [],
-    [],
-    [],
-    [],
-)
-vsg_values = []
 mode = "output"
+engine = None
+run_journal_path = None
+run_header = None
+series_engine = None
+series_path = None
+series_traces = {}
+
+# Plot and console refresh period while a sweep is running
+FRAME_MS = 100
+# Console lines kept while a time series runs, and run time between its log lines
+MAX_LOG_LINES = 2000
+SERIES_LOG_S = 5.0
+# Key that marks an injection during a time series
+MARK_KEY = "<F2>"
 
 GPIO.setup(4, GPIO.OUT)
 GPIO.output(4, GPIO.HIGH)
@@ -88,6 +111,9 @@ def collect_tab(tab_collect, root):
         mode_var,
         root,
     )
+    create_timeseries_frame(
+        notebook_collect, chip_name_entry, trial_name_entry, mode_var, root
+    )
 
     plot_frame_collect = tk.Frame(tab_collect)
     plot_frame_collect.grid(row=0, column=1, sticky="nswe")
@@ -104,7 +130,12 @@ def create_controls_frame(
 
     def on_run():
         global collecting_data, mode
+        if acquisition_running():
+            print("A sweep or time series is already running")
+            return
+
         mode = mode_var.get()
+        config.select_wiring(mode)
         sweep_start = float(params_entries["sweep_min"].get())
         sweep_end = float(params_entries["sweep_max"].get())
         sweep_step = float(params_entries["sweep_step"].get())
@@ -129,23 +160,38 @@ def create_controls_frame(
             duration,
             constant_voltage_values,
             root,
+            chip_name_entry.get(),
+            trial_name_entry.get(),
         )
 
-    def on_end():
+    def on_resume():
         global collecting_data
-        collecting_data = False
+        if acquisition_running():
+            print("A sweep or time series is already running")
+            return
 
-    def on_save():
-        chip_name = chip_name_entry.get()
-        trial_name = trial_name_entry.get()
+        from tkinter import filedialog
 
-        sweep_min = float(params_entries["sweep_min"].get())
-        sweep_max = float(params_entries["sweep_max"].get())
-        sweep_step = float(params_entries["sweep_step"].get())
+        path = filedialog.askopenfilename(
+            title="Resume Run",
+            initialdir=config.DATA_DIR,
+            filetypes=[("Run journals", f"*{JOURNAL_SUFFIX}")],
+        )
+        if not path:
+            return
+        collecting_data = True
+        resume_data_collection(path, root)
 
-        sweep_points = int((sweep_max - sweep_min) / sweep_step) + 1
+    def on_end():
+        global collecting_data
+        collecting_data = False
+        if engine is not None:
+            engine.stop()
+        if series_engine is not None:
+            series_engine.stop()
 
-        save_data(chip_name, trial_name, sweep_min, sweep_max, sweep_points)
+    def on_save():
+        save_data()
 
     def on_characterize():
         chip_name = chip_name_entry.get()
@@ -153,6 +199,14 @@ def create_controls_frame(
 
         import tkinter.messagebox as msgbox
 
+        # The baseline capture drives the same ADC the running engine is reading
+        if acquisition_running():
+            msgbox.showerror(
+                "Acquisition Running",
+                "A sweep or time series is still running.\n\nEnd it before characterizing the device.",
+            )
+            return
+
         if not data_by_dac1:
             msgbox.showerror(
                 "No Data",
@@ -175,7 +229,7 @@ def create_controls_frame(
 
         if run_characterization:
             try:
-                base_dir = "/home/pi/Desktop/Biosensor V2/data"
+                base_dir = config.DATA_DIR
                 chip_path = os.path.join(base_dir, chip_name)
 
                 print(f"\n{'='*60}")
@@ -213,18 +267,6 @@ def create_controls_frame(
                 print(f"Characterization error: {e}")
 
     def on_reset():
-        global voltages1, voltages2, voltages3, voltages4, voltages5, voltages6
-        global vsd_values, i_source_values, i_gate_values, i_drain_values, isd_values, vsg_values
-        voltages1, voltages2, voltages3 = [], [], []
-        voltages4, voltages5, voltages6 = [], [], []
-        vsd_values, i_source_values, i_gate_values, i_drain_values, isd_values = (
-            [],
-            [],
-            [],
-            [],
-            [],
-        )
-        vsg_values = []
         reset_plot()
         reset_parameters(params_entries)
 
@@ -240,11 +282,16 @@ def create_controls_frame(
     reset_button = tk.Button(frame_controls, text="Reset", width=15, command=on_reset)
     reset_button.grid(row=1, column=1, padx=5, pady=5)
 
+    resume_button = tk.Button(
+        frame_controls, text="Resume Run", width=15, command=on_resume
+    )
+    resume_button.grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+
     characterize_button = tk.Button(
         frame_controls, text="Characterize Device", command=on_characterize
     )
     characterize_button.grid(
-        row=2, column=0, columnspan=2, padx=5, pady=(10, 5), sticky="ew"
+        row=3, column=0, columnspan=2, padx=5, pady=(10, 5), sticky="ew"
     )
 
     frame_controls.grid_columnconfigure(0, weight=1)
@@ -253,7 +300,14 @@ def create_controls_frame(
 
 plot_colors = ["blue", "green", "red", "orange", "purple", "brown", "cyan", "magenta"]
 
-data_by_dac1 = {}
+data_by_dac1 = RunData()
+
+
+def acquisition_running():
+    return any(
+        run_engine is not None and run_engine.is_alive()
+        for run_engine in (engine, series_engine)
+    )
 
 
 def perform_data_collection(
@@ -264,300 +318,433 @@ def perform_data_collection(
     duration,
     constant_voltage_values,
     root,
+    chip_name,
+    trial_name,
 ):
-    global voltages1, voltages2, voltages3, voltages4, voltages5, voltages6
-    global vsd_values, vsg_values, i_source_values, i_drain_values, isd_values, data_by_dac1
-    global collecting_data, current_voltage, steps_taken, dac_index, mode
-
-    data_by_dac1 = {
-        v: {
-            "voltages1": [],
-            "voltages2": [],
-            "voltages3": [],
-            "voltages4": [],
-            "voltages5": [],
-            "voltages6": [],
-            "vsd": [],
-            "vsg": [],
-            "i_source": [],
-            "i_gate": [],
-            "i_drain": [],
-            "isd": [],
-        }
-        for v in constant_voltage_values
-    }
+    global data_by_dac1, engine, run_journal_path, run_header, series_path
 
     number_of_steps = int((sweep_end - sweep_start) / sweep_step) + 1
+    data_by_dac1 = RunData(constant_voltage_values, number_of_steps)
+    live_plot.clear()
 
-    dac_index = 0
+    # The journal is the run's record on disk from the first sample on;
+    # Save only converts it to the spreadsheet layouts
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    trial_path = os.path.join(
+        config.DATA_DIR, chip_name, f"{trial_name} - {timestamp}"
+    )
+    os.makedirs(trial_path, exist_ok=True)
+    run_journal_path = journal_path(trial_path, trial_name, timestamp)
+    run_header = {
+        "chip_name": chip_name,
+        "trial_name": trial_name,
+        "timestamp": timestamp,
+        "mode": mode,
+        "sweep_start": sweep_start,
+        "sweep_end": sweep_end,
+        "sweep_step": sweep_step,
+        "number_of_steps": number_of_steps,
+        "interval": interval,
+        "duration": duration,
+        "constant_voltage_values": constant_voltage_values,
+        "channels": COLLECT_CHANNELS,
+        "adc_full_scale_v": config.ADC_FULL_SCALE_V,
+        "shunt_ohm": {
+            "source": config.SHUNT_SOURCE_OHM,
+            "a": config.SHUNT_A_OHM,
+            "b": config.SHUNT_B_OHM,
+        },
+        "backend": config.BACKEND,
+    }
+    run_journal = RunJournal.create(run_journal_path, run_header)
+    series_path = None
+    print(f"Journaling run to {run_journal_path}")
+
+    engine = SweepEngine(
+        ADC,
+        DAC,
+        mode,
+        sweep_start,
+        sweep_end,
+        sweep_step,
+        interval,
+        duration,
+        constant_voltage_values,
+        journal=run_journal,
+    )
+    engine.start()
+    root.after(FRAME_MS, drain_samples, engine, interval, root)
 
-    def collect_data():
-        global collecting_data, current_voltage, steps_taken, dac_index
 
-        if dac_index >= len(constant_voltage_values) or not collecting_data:
-            collecting_data = False
-            return
+def resume_data_collection(path, root):
+    """Reload an interrupted run's journal and collect the samples it is missing"""
+    global collecting_data, data_by_dac1, engine, run_journal_path, run_header, mode
+    global series_path
 
-        constant_voltage = constant_voltage_values[dac_index]
-        current_voltage = sweep_start
-        steps_taken = 0
-        end_time = time.time() + duration
-
-        def collect_step():
-            global current_voltage, steps_taken, dac_index
-
-            if not collecting_data:
-                return
-
-            if steps_taken >= number_of_steps or time.time() >= end_time:
-                dac_index += 1
-                root.after(5000, collect_data)
-                return
-
-            if mode == "output":
-                DAC.DAC8532_Out_Voltage(DAC8532.channel_B, constant_voltage)
-                DAC.DAC8532_Out_Voltage(DAC8532.channel_A, current_voltage)
-            else:
-                DAC.DAC8532_Out_Voltage(DAC8532.channel_B, constant_voltage)
-                DAC.DAC8532_Out_Voltage(DAC8532.channel_A, current_voltage)
-
-            time.sleep(0.05)
-            ADC_Value = ADC.ADS1256_GetAll()
-
-            adc1 = ADC_Value[1] * 5.0 / 0x7FFFFF
-            adc2 = ADC_Value[2] * 5.0 / 0x7FFFFF
-            adc3 = ADC_Value[3] * 5.0 / 0x7FFFFF
-            adc4 = ADC_Value[4] * 5.0 / 0x7FFFFF
-            adc5 = ADC_Value[5] * 5.0 / 0x7FFFFF
-            adc6 = ADC_Value[6] * 5.0 / 0x7FFFFF
-
-            v1 = adc1
-            v2 = adc2
-            v3 = adc3
-            v4 = adc4
-            v5 = adc5
-            v6 = adc6
-
-            i_source = (adc4 - adc1) / 100.0
-
-            if mode == "output":
-                i_drain = (adc6 - adc3) / 100.0
-                i_gate = (adc5 - adc2) / 1000.0
-                vsd = adc4 - adc6
-                vsg = adc4 - adc5
-
-                isd = i_source - i_drain
-                x_value = vsd
-                y_value = isd
-                x_label = "Vsd (V)"
-                y_label = "Isd (A)"
-            else:
-                i_drain = (adc5 - adc2) / 1000.0
-                i_gate = (adc6 - adc3) / 100.0
-                vsd = adc4 - adc5
-                vsg = adc4 - adc6
-
-                x_value = vsg
-                y_value = i_drain
-                x_label = "Vsg (V)"
-                y_label = "Id (A)"
-
-            voltages1.append(v1)
-            voltages2.append(v2)
-            voltages3.append(v3)
-            voltages4.append(v4)
-            voltages5.append(v5)
-            voltages6.append(v6)
-            i_source_values.append(i_source)
-            i_gate_values.append(i_gate)
-            i_drain_values.append(i_drain)
-            vsd_values.append(vsd)
-            vsg_values.append(vsg)
-
-            if mode == "output":
-                isd_values.append(isd)
-                data_by_dac1[constant_voltage]["isd"].append(isd)
-
-            data_by_dac1[constant_voltage]["voltages1"].append(v1)
-            data_by_dac1[constant_voltage]["voltages2"].append(v2)
-            data_by_dac1[constant_voltage]["voltages3"].append(v3)
-            data_by_dac1[constant_voltage]["voltages4"].append(v4)
-            data_by_dac1[constant_voltage]["voltages5"].append(v5)
-            data_by_dac1[constant_voltage]["voltages6"].append(v6)
-            data_by_dac1[constant_voltage]["vsd"].append(vsd)
-            data_by_dac1[constant_voltage]["vsg"].append(vsg)
-            data_by_dac1[constant_voltage]["i_source"].append(i_source)
-            data_by_dac1[constant_voltage]["i_gate"].append(i_gate)
-            data_by_dac1[constant_voltage]["i_drain"].append(i_drain)
-
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            update_plot(constant_voltage, x_value, y_value, x_label, y_label)
-
-            if mode == "output":
-                log_entry = (
-                    f"Time: {current_time}\n"
-                    f"ADC1 (Src-): {adc1:.5f} V, ADC2 (Gate-): {adc2:.5f} V, ADC3 (Drn-): {adc3:.5f} V\n"
-                    f"ADC4 (Src+): {adc4:.5f} V, ADC5 (Gate+): {adc5:.5f} V, ADC6 (Drn+): {adc6:.5f} V\n"
-                    f"Vsd: {vsd:.5f} V, Is: {i_source:.6f} A, Ig: {i_gate:.6f} A, Id: {i_drain:.6f} A, Isd: {isd:.6f} A\n"
-                    "-----------------------------------------\n"
-                )
-            else:
-                log_entry = (
-                    f"Time: {current_time}\n"
-                    f"ADC1 (Src-): {adc1:.5f} V, ADC2 (Gate-): {adc2:.5f} V, ADC3 (Drn-): {adc3:.5f} V\n"
-                    f"ADC4 (Src+): {adc4:.5f} V, ADC5 (Gate+): {adc5:.5f} V, ADC6 (Drn+): {adc6:.5f} V\n"
-                    f"Vsg: {vsg:.5f} V, Is: {i_source:.6f} A, Ig: {i_gate:.6f} A, Id: {i_drain:.6f} A\n"
-                    "-----------------------------------------\n"
-                )
+    header, run_data, end = load_journal(path)
+    if end is not None:
+        print(f"{path} finished ({end['status']}); nothing to resume")
+        collecting_data = False
+        return
+    start_curve, start_step = resume_point(header, run_data)
+
+    mode = header["mode"]
+    config.select_wiring(mode)
+    data_by_dac1 = run_data
+    run_journal_path = path
+    series_path = None
+    run_header = {
+        k: v
+        for k, v in header.items()
+        if k not in ("type", "version", "started", "completed_curves")
+    }
+    live_plot.clear()
+    if run_data.samples:
+        update_plot(None, None, None, *axis_labels())
 
-            output_text.insert(tk.END, log_entry)
-            output_text.see(tk.END)
+    print(
+        f"Resuming {header['trial_name']} at curve {start_curve + 1}/"
+        f"{len(header['constant_voltage_values'])}, step {start_step + 1}"
+    )
+    engine = SweepEngine(
+        ADC,
+        DAC,
+        mode,
+        header["sweep_start"],
+        header["sweep_end"],
+        header["sweep_step"],
+        header["interval"],
+        header["duration"],
+        header["constant_voltage_values"],
+        journal=RunJournal.reopen(path),
+        start_curve=start_curve,
+        start_step=start_step,
+    )
+    engine.start()
+    root.after(FRAME_MS, drain_samples, engine, header["interval"], root)
 
-            current_voltage += sweep_step
-            steps_taken += 1
 
-            if collecting_data:
-                root.after(int(interval * 1000), collect_step)
+def axis_labels():
+    if mode == "output":
+        return "Vsd (V)", "Isd (A)"
+    return "Vsg (V)", "Id (A)"
+
+
+def drain_samples(run_engine, interval, root):
+    """Move queued samples into the run data, then plot and log once per frame"""
+    global collecting_data
+
+    x_label, y_label = axis_labels()
+    x_key, y_key = ("vsd", "isd") if mode == "output" else ("vsg", "i_drain")
+
+    log_entries = []
+    last_sample = None
+    finished = False
+    while True:
+        try:
+            sample = run_engine.samples.get_nowait()
+        except queue.Empty:
+            break
+        if sample is None:
+            finished = True
+            break
+        data_by_dac1.append(sample)
+        log_entries.append(format_log_entry(sample))
+        last_sample = sample
+
+    if last_sample is not None:
+        update_plot(
+            last_sample["constant_voltage"],
+            last_sample[x_key],
+            last_sample[y_key],
+            x_label,
+            y_label,
+        )
+        output_text.insert(tk.END, "".join(log_entries))
+        output_text.see(tk.END)
 
-        collect_step()
+    if finished:
+        if run_engine is engine:
+            collecting_data = False
+        if run_engine.error is not None:
+            output_text.insert(tk.END, f"Sweep stopped: {run_engine.error}\n")
+        report = format_timing_stats(run_engine.stats, interval)
+        report += live_plot.format_frame_stats()
+        if run_engine is engine:
+            report += save_run_file()
+        print(report, end="")
+        output_text.insert(tk.END, report)
+        output_text.see(tk.END)
+        return
+
+    root.after(FRAME_MS, drain_samples, run_engine, interval, root)
+
+
+def format_log_entry(sample):
+    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    log_entry = (
+        f"Time: {current_time} (t = {sample['t']:.3f} s)\n"
+        f"ADC1 (Src-): {sample['voltages1']:.5f} V, ADC2 (Gate-): {sample['voltages2']:.5f} V, ADC3 (Drn-): {sample['voltages3']:.5f} V\n"
+        f"ADC4 (Src+): {sample['voltages4']:.5f} V, ADC5 (Gate+): {sample['voltages5']:.5f} V, ADC6 (Drn+): {sample['voltages6']:.5f} V\n"
+    )
+    if "isd" in sample:
+        log_entry += (
+            f"Vsd: {sample['vsd']:.5f} V, Is: {sample['i_source']:.6f} A, Ig: {sample['i_gate']:.6f} A, "
+            f"Id: {sample['i_drain']:.6f} A, Isd: {sample['isd']:.6f} A\n"
+        )
+    else:
+        log_entry += (
+            f"Vsg: {sample['vsg']:.5f} V, Is: {sample['i_source']:.6f} A, Ig: {sample['i_gate']:.6f} A, "
+            f"Id: {sample['i_drain']:.6f} A\n"
+        )
+    return log_entry + "-----------------------------------------\n"
 
-    collect_data()
 
+def save_run_file():
+    """Write the finished run in the native format next to its journal"""
+    path = run_path_for(run_journal_path)
+    try:
+        write_run(path, data_by_dac1, run_header)
+    except OSError as e:
+        print(f"Could not write {path}: {e}")
+        return f"Run file not written: {e}\n"
+    return f"Run saved to {path}\n"
 
-def save_data(chip_name, trial_name, sweep_min, sweep_max, sweep_points):
-    base_dir = "/home/pi/Desktop/Biosensor V2/data"
-    chip_path = os.path.join(base_dir, chip_name)
-    if not os.path.exists(chip_path):
-        os.makedirs(chip_path)
 
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    trial_folder_name = f"{trial_name} - {timestamp}"
-    trial_path = os.path.join(chip_path, trial_folder_name)
-    os.makedirs(trial_path, exist_ok=True)
+def save_data():
+    """Export the current run's journal to the spreadsheet layouts in the background"""
+    if series_path is not None:
+        save_series()
+        return
+    if run_journal_path is None:
+        print("No run to save")
+        return
+    if engine is not None and engine.is_alive():
+        print("Run still in progress; exporting the samples journaled so far")
 
-    if mode == "output":
-        save_excel_file(
-            trial_path,
-            f"{trial_name}_VSD_ISID_{timestamp}.xlsx",
-            "OSDL Biosensor V1 - Output",
-            sweep_min,
-            sweep_max,
-            sweep_points,
-            current_key="i_drain",
-            x_key="vsd",
-            y_key="isd",
-        )
+    def on_done(paths, error):
+        if error is None:
+            print(f"Exported {len(paths)} file(s) from {run_journal_path}")
 
-        save_excel_file(
-            trial_path,
-            f"{trial_name}_VSD_ISIG_{timestamp}.xlsx",
-            "OSDL Biosensor V1 - Output",
-            sweep_min,
-            sweep_max,
-            sweep_points,
-            current_key="i_source",
-            x_key="vsd",
-            y_key="isd",
+    export_journal_in_background(run_journal_path, on_done=on_done)
+
+
+def create_timeseries_frame(parent, chip_name_entry, trial_name_entry, mode_var, root):
+    frame_series = tk.LabelFrame(
+        parent, text="Time Series", relief=tk.SUNKEN, borderwidth=2
+    )
+    frame_series.pack(fill="x", padx=10, pady=5)
+
+    series_entries = {}
+    fields = [
+        ("gate_v", "Gate Voltage (V):", "0.5"),
+        ("drain_v", "Drain Voltage (V):", "1.0"),
+        ("sample_rate", "Sample Rate (Hz):", "2"),
+        ("oversample", "Oversample:", "8"),
+        ("duration", "Duration (s, 0 = until End):", "0"),
+    ]
+    for row, (key, text, default) in enumerate(fields):
+        tk.Label(frame_series, text=text).grid(
+            row=row, column=0, sticky="e", padx=5, pady=5
         )
-    else:
-        save_excel_file(
-            trial_path,
-            f"{trial_name}_VSG_IDIS_{timestamp}.xlsx",
-            "OSDL Biosensor V1 - Transfer",
-            sweep_min,
-            sweep_max,
-            sweep_points,
-            current_key="i_source",
-            x_key="vsg",
-            y_key="i_drain",
+        entry = tk.Entry(frame_series, width=12)
+        entry.grid(row=row, column=1, pady=5, sticky="w")
+        entry.insert(0, default)
+        series_entries[key] = entry
+
+    def on_run_series():
+        global collecting_data, mode
+        if acquisition_running():
+            print("A sweep or time series is already running")
+            return
+        try:
+            settings = {
+                key: float(series_entries[key].get())
+                for key in ("gate_v", "drain_v", "sample_rate", "duration")
+            }
+            settings["oversample"] = int(series_entries["oversample"].get())
+        except ValueError as e:
+            print(f"Invalid time series setting: {e}")
+            return
+
+        mode = mode_var.get()
+        config.select_wiring(mode)
+        collecting_data = True
+        perform_time_series(
+            root, chip_name_entry.get(), trial_name_entry.get(), **settings
         )
 
+    def on_mark(event=None):
+        mark_injection()
+
+    run_series_button = tk.Button(
+        frame_series, text="Run Time Series", width=15, command=on_run_series
+    )
+    run_series_button.grid(row=len(fields), column=0, padx=5, pady=5)
+
+    mark_button = tk.Button(
+        frame_series, text="Mark Injection (F2)", width=15, command=on_mark
+    )
+    mark_button.grid(row=len(fields), column=1, padx=5, pady=5)
+
+    root.bind(MARK_KEY, on_mark)
+    frame_series.grid_columnconfigure(0, weight=1)
+    frame_series.grid_columnconfigure(1, weight=1)
+
 
-def save_excel_file(
-    directory,
-    filename,
-    title,
-    sweep_min,
-    sweep_max,
-    sweep_points,
-    current_key,
-    x_key,
-    y_key,
+def perform_time_series(
+    root, chip_name, trial_name, gate_v, drain_v, sample_rate, oversample, duration
 ):
-    workbook = openpyxl.Workbook()
-    worksheet = workbook.active
-    worksheet.title = "Data Collection"
-
-    worksheet.cell(row=1, column=1, value=title)
-    worksheet.cell(row=2, column=1, value="Sweep Min:")
-    worksheet.cell(row=2, column=2, value=sweep_min)
-    worksheet.cell(row=3, column=1, value="Sweep Max:")
-    worksheet.cell(row=3, column=2, value=sweep_max)
-    worksheet.cell(row=4, column=1, value="Sweep Points:")
-    worksheet.cell(row=4, column=2, value=sweep_points)
-
-    headers = ["X-Axis (V)"]
-    for dac1_voltage in data_by_dac1:
-        headers.append(f"{dac1_voltage:.6f}")
-    for dac1_voltage in data_by_dac1:
-        headers.append(f"{dac1_voltage:.6f}")
-    worksheet.append(headers)
-
-    max_length = max(
-        len(data_by_dac1[dac1_voltage][x_key]) for dac1_voltage in data_by_dac1
-    )
-    for i in range(max_length):
-        row_data = []
-
-        x_value = (
-            data_by_dac1[next(iter(data_by_dac1))][x_key][i]
-            if i < len(data_by_dac1[next(iter(data_by_dac1))][x_key])
-            else ""
-        )
-        row_data.append(x_value)
-
-        for dac1_voltage in data_by_dac1:
-            if mode == "output":
-                y_value = (
-                    data_by_dac1[dac1_voltage][y_key][i]
-                    if i < len(data_by_dac1[dac1_voltage][y_key])
-                    else ""
-                )
-            else:
-                y_value = (
-                    data_by_dac1[dac1_voltage][y_key][i]
-                    if i < len(data_by_dac1[dac1_voltage][y_key])
-                    else ""
-                )
-            row_data.append(y_value)
+    """Start a constant-bias time series; its record is written while it runs"""
+    global series_engine, series_path, series_traces, run_journal_path
 
-        for dac1_voltage in data_by_dac1:
-            current_value = (
-                data_by_dac1[dac1_voltage][current_key][i]
-                if i < len(data_by_dac1[dac1_voltage][current_key])
-                else ""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    trial_path = os.path.join(
+        config.DATA_DIR, chip_name, f"{trial_name} - {timestamp}"
+    )
+    os.makedirs(trial_path, exist_ok=True)
+    capture_path, _ = timeseries_paths(trial_path, trial_name, timestamp)
+
+    try:
+        run_engine = TimeSeriesEngine(
+            ADC,
+            DAC,
+            mode,
+            gate_v,
+            drain_v,
+            capture_path,
+            sample_rate=sample_rate,
+            oversample=oversample,
+            duration=duration,
+            header={
+                "chip_name": chip_name,
+                "trial_name": trial_name,
+                "timestamp": timestamp,
+            },
+        )
+    except ValueError as e:
+        print(f"Time series not started: {e}")
+        return
+
+    series_engine = run_engine
+    series_path = capture_path
+    run_journal_path = None
+    series_traces = {
+        "i_drain": MinMaxDecimator(),
+        "i_source": MinMaxDecimator(),
+    }
+    live_plot.clear()
+    live_plot.set_labels("Time (s)", "Current (A)")
+    print(f"Recording time series to {capture_path}")
+    output_text.insert(
+        tk.END,
+        f"Time series: gate {gate_v:.3f} V, drain {drain_v:.3f} V, "
+        f"{sample_rate:g} Hz x {oversample} scans; press F2 to mark an injection\n",
+    )
+    run_engine.start()
+    root.after(FRAME_MS, drain_series, run_engine, root, 0.0)
+
+
+def mark_injection():
+    """Mark an injection at the current time of the running time series"""
+    if series_engine is None or not series_engine.is_alive():
+        print("No time series running")
+        return
+    label = f"Injection {series_engine.events.count + 1}"
+    event = series_engine.mark(label)
+    if event is None:
+        return
+    live_plot.add_marker(event["t"], label)
+    live_plot.refresh()
+    output_text.insert(tk.END, f"{label} at t = {event['t']:.2f} s\n")
+    output_text.see(tk.END)
+
+
+def drain_series(run_engine, root, next_log):
+    """Feed queued time series blocks to the decimated chart; log every SERIES_LOG_S"""
+    global collecting_data
+
+    last_block = None
+    finished = False
+    while True:
+        try:
+            block = run_engine.blocks.get_nowait()
+        except queue.Empty:
+            break
+        if block is None:
+            finished = True
+            break
+        for key, trace in series_traces.items():
+            trace.add(block["t"], block[key])
+        last_block = block
+
+    if last_block is not None:
+        for key, label in (("i_drain", "Id"), ("i_source", "Is")):
+            t, y = series_traces[key].series()
+            live_plot.set_series(key, t, y, label, redo_tail=2)
+        live_plot.refresh()
+        if last_block["t"][-1] >= next_log:
+            next_log = last_block["t"][-1] + SERIES_LOG_S
+            output_text.insert(
+                tk.END,
+                f"t = {last_block['t'][-1]:.1f} s  Id: {last_block['i_drain'][-1]:.6e} A  "
+                f"Is: {last_block['i_source'][-1]:.6e} A\n",
             )
-            row_data.append(current_value)
-
-        worksheet.append(row_data)
+            trim_log()
+            output_text.see(tk.END)
 
-    file_path = os.path.join(directory, filename)
-    workbook.save(file_path)
-    print(f"Data saved to {file_path}")
+    if finished:
+        if run_engine is series_engine:
+            collecting_data = False
+        if run_engine.error is not None:
+            output_text.insert(tk.END, f"Time series stopped: {run_engine.error}\n")
+        report = f"Time series: {run_engine.points} points, {run_engine.events.count} event(s)\n"
+        report += format_timing_stats(run_engine.stats, run_engine.interval)
+        report += live_plot.format_frame_stats()
+        report += f"Record saved to {run_engine.path}\n"
+        print(report, end="")
+        output_text.insert(tk.END, report)
+        output_text.see(tk.END)
+        return
+
+    root.after(FRAME_MS, drain_series, run_engine, root, next_log)
+
+
+def trim_log():
+    lines = int(output_text.index("end-1c").split(".")[0])
+    if lines > MAX_LOG_LINES:
+        output_text.delete("1.0", f"{lines - MAX_LOG_LINES}.0")
+
+
+def save_series():
+    """Export the time series record to a workbook next to it, in the background"""
+    path = series_path
+    if series_engine is not None and series_engine.is_alive():
+        print("Time series still running; exporting the points recorded so far")
+    try:
+        headers, columns, preamble = timeseries_table(path)
+    except (OSError, ValueError) as e:
+        print(f"Could not read {path}: {e}")
+        return
+    xlsx_path = path[: -len(CAPTURE_SUFFIX)] + ".xlsx"
+
+    def on_done(written, error):
+        if error is None:
+            print(f"Time series exported to {written}")
+
+    write_columns_in_background(
+        xlsx_path,
+        headers,
+        columns,
+        on_done=on_done,
+        preamble=preamble,
+        sheet_title="Time Series",
+    )
 
 
 def reset_plot():
-    global ax, canvas, mode
-    ax.clear()
-    if mode == "output":
-        ax.set_xlabel("Vsd (V)")
-        ax.set_ylabel("Isd (A)")
-    else:
-        ax.set_xlabel("Vsg (V)")
-        ax.set_ylabel("Id (A)")
-    ax.set_xlim(-5, 5)
-    ax.set_ylim(-1, 1)
-    canvas.draw_idle()
+    global live_plot
+    live_plot.reset(*axis_labels())
 
 
 def reset_parameters(params_entries):
@@ -680,7 +867,7 @@ def create_params_frame(parent):
 
 
 def create_plot_frame(parent):
-    global fig, ax, canvas
+    global fig, ax, canvas, live_plot
 
     fig, ax = plt.subplots(figsize=(5, 3))
 
@@ -701,40 +888,25 @@ def create_plot_frame(parent):
 
     canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
+    live_plot = LivePlot(fig, ax, canvas, plot_colors)
     canvas.draw()
 
 
 def update_plot(constant_voltage, x_value, y_value, x_label, y_label):
-    global fig, ax, canvas, plot_colors, data_by_dac1, mode
-
-    ax.clear()
+    global live_plot, data_by_dac1, mode
 
+    live_plot.set_labels(x_label, y_label)
     if mode == "output":
-        for i, const_v in enumerate(data_by_dac1):
-            color = plot_colors[i % len(plot_colors)]
-            ax.plot(
-                data_by_dac1[const_v]["vsd"],
-                data_by_dac1[const_v]["isd"],
-                label=f"Gate = {const_v:.2f} V",
-                color=color,
+        for const_v, curve in data_by_dac1.items():
+            live_plot.set_series(
+                const_v, curve["vsd"], curve["isd"], f"Gate = {const_v:.2f} V"
             )
     else:
-        for i, const_v in enumerate(data_by_dac1):
-            color = plot_colors[i % len(plot_colors)]
-            ax.plot(
-                data_by_dac1[const_v]["vsg"],
-                data_by_dac1[const_v]["i_drain"],
-                label=f"Drain = {const_v:.2f} V",
-                color=color,
+        for const_v, curve in data_by_dac1.items():
+            live_plot.set_series(
+                const_v, curve["vsg"], curve["i_drain"], f"Drain = {const_v:.2f} V"
             )
-
-    ax.set_xlabel(x_label)
-    ax.set_ylabel(y_label)
-    ax.legend(loc="upper left")
-    ax.relim()
-    ax.autoscale_view()
-
-    canvas.draw_idle()
+    live_plot.refresh()
 
 def create_console_log_frame(parent):
     frame_output = tk.LabelFrame(
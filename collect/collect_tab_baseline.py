@@ -1,15 +1,28 @@
 import time
 import datetime
 import os
-import RPi.GPIO as GPIO
+import queue
+import numpy as np
+from . import config
+from .config import GPIO
 import tkinter as tk
 from tkinter import ttk
-import openpyxl
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from . import ADS1256
 from . import DAC8532
+from .baseline_capture import (
+    BASELINE_DATA_RATE,
+    CAPTURE_SUFFIX,
+    BaselineCapture,
+    capture_volts,
+    data_rates,
+    drate_code,
+    read_capture,
+)
 from .characterization import characterize_device
+from .export import export_run_in_background, write_columns_in_background
+from .live_plot import LivePlot
 
 GPIO.setwarnings(False)
 GPIO.setmode(GPIO.BCM)
@@ -33,31 +46,84 @@ vsd_values, i_source_values, i_gate_values, i_drain_values, isd_values = (
 vsg_values = []
 mode = "output"
 
-def run_baseline_and_save(ADC, chip_name, trial_name, duration_s=60.0, sample_interval_s=0.01):
+# ADC inputs used by the sweep: Src-, Gate-, Drn-, Src+, Gate+, Drn+
+COLLECT_CHANNELS = [1, 2, 3, 4, 5, 6]
+# Baseline only needs Src-, Drn-, Src+, Drn+
+BASELINE_CHANNELS = [1, 3, 4, 6]
+
+BASELINE_NAMES = ["VSD (V)", "IS (A)", "ID (A)", "IDIS (A)"]
+# How often the GUI drains the capture's statistics
+BASELINE_POLL_MS = 100
+
+
+def baseline_columns(codes):
+    """VSD, IS, ID and IDIS of a rows x BASELINE_CHANNELS block of codes"""
+    volts = capture_volts(codes)
+    adc1, adc3, adc4, adc6 = volts.T
+    i_source = (adc4 - adc1) / config.SHUNT_SOURCE_OHM
+    i_drain = (adc6 - adc3) / config.SHUNT_A_OHM
+    return np.column_stack([adc4 - adc6, i_source, i_drain, i_source - i_drain])
+
+
+def format_noise(snapshot):
+    """Noise readout of a BaselineCapture snapshot"""
+    j = BASELINE_NAMES.index("IDIS (A)")
+    text = (
+        f"{snapshot['n']} samples  IDIS RMS {snapshot['std'][j]:.3e} A  "
+        f"p-p {snapshot['peak_to_peak'][j]:.3e} A  "
+        f"(recent RMS {snapshot['recent_std'][j]:.3e} A)"
+    )
+    fit = snapshot.get("noise_psd")
+    if fit is not None:
+        text += (
+            f"\n1/f: S(1 Hz) {fit['1f_coefficient']:.2e} A²/Hz  "
+            f"exponent {fit['1f_exponent']:.2f}  corner {fit['corner_hz']:.3g} Hz  "
+            f"({fit['segments']} segments)"
+        )
+    return text
+
+
+def run_baseline_and_save(
+    ADC,
+    chip_name,
+    trial_name,
+    duration_s=60.0,
+    data_rate=BASELINE_DATA_RATE,
+    root=None,
+    on_update=None,
+    on_done=None,
+):
     """
     Baseline capture with ALL probes grounded:
-      - Reads ADC continuously for 'duration_s'
+      - Converts ADC1, ADC3, ADC4 and ADC6 back to back at data_rate for
+        'duration_s' on a capture thread
       - Computes:
             VSD = ADC4 - ADC6
             IS  = (ADC4 - ADC1)/100
             ID  = (ADC6 - ADC3)/100
             IDIS = IS - ID
-      - Saves Excel with columns: Time (s), VSD (V), IS (A), ID (A), IDIS (A)
+        with running mean/RMS/peak-to-peak passed to on_update(snapshot)
+      - Keeps the raw codes in a .capture.bin file and exports Excel with
+        columns: Time (s), VSD (V), IS (A), ID (A), IDIS (A)
+
+    With root the statistics are polled from the Tk loop and this returns
+    at once; on_done(result) is called when the capture has ended.
     """
     import tkinter.messagebox as msgbox
 
+    _, data_rate = drate_code(data_rate)
     ready = msgbox.askyesno(
         "Baseline Capture",
         "Record BASELINE with ALL probes grounded?\n\n"
         f"Duration: {duration_s:.1f} s\n"
-        f"Sample interval: {sample_interval_s:.3f} s\n\n"
+        f"Data rate: {data_rate:g} SPS per input\n\n"
         "Click 'Yes' to start."
     )
     if not ready:
         print("[Baseline] Cancelled by user.")
         return None
 
-    base_dir = "/home/pi/Desktop/Biosensor V2/data"
+    base_dir = config.DATA_DIR
     chip_path = os.path.join(base_dir, chip_name)
     os.makedirs(chip_path, exist_ok=True)
 
@@ -65,78 +131,101 @@ def run_baseline_and_save(ADC, chip_name, trial_name, duration_s=60.0, sample_in
     out_folder = os.path.join(chip_path, f"Baseline_{trial_name}_{timestamp}")
     os.makedirs(out_folder, exist_ok=True)
 
-    times, vsd_V, is_A, id_A, idis_A = [], [], [], [], []
+    capture_path = os.path.join(out_folder, f"baseline_{timestamp}{CAPTURE_SUFFIX}")
+    capture = BaselineCapture(
+        ADC,
+        capture_path,
+        BASELINE_CHANNELS,
+        data_rate=data_rate,
+        duration=duration_s,
+        convert=baseline_columns,
+        names=BASELINE_NAMES,
+        header={"chip_name": chip_name, "trial_name": trial_name, "timestamp": timestamp},
+        psd_column=BASELINE_NAMES.index("IDIS (A)"),
+    )
+    result = {"folder": out_folder, "file": capture_path, "capture": capture}
 
     print("[Baseline] Starting capture...")
-    t0 = time.time()
-    while (time.time() - t0) < duration_s:
-        ADC_Value = ADC.ADS1256_GetAll()
-
-        # Scale same as elsewhere
-        adc1 = ADC_Value[1] * 5.0 / 0x7FFFFF
-        adc3 = ADC_Value[3] * 5.0 / 0x7FFFFF
-        adc4 = ADC_Value[4] * 5.0 / 0x7FFFFF
-        adc6 = ADC_Value[6] * 5.0 / 0x7FFFFF
-
-        vsd = adc4 - adc6
-        i_source = (adc4 - adc1) / 100.0
-        i_drain  = (adc6 - adc3) / 100.0
-        idis = i_source - i_drain
-
-        times.append(time.time() - t0)
-        vsd_V.append(vsd)
-        is_A.append(i_source)
-        id_A.append(i_drain)
-        idis_A.append(idis)
-
-        time.sleep(sample_interval_s)
-
-    # Save Excel
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Baseline"
-
-    ws.cell(row=1, column=1, value="Baseline VSD, IS, ID, IDIS (all probes grounded)")
-    ws.cell(row=2, column=1, value="Chip");       ws.cell(row=2, column=2, value=chip_name)
-    ws.cell(row=3, column=1, value="Trial");      ws.cell(row=3, column=2, value=trial_name)
-    ws.cell(row=4, column=1, value="Timestamp");  ws.cell(row=4, column=2, value=timestamp)
-    ws.cell(row=5, column=1, value="Duration (s)"); ws.cell(row=5, column=2, value=float(duration_s))
-    ws.cell(row=6, column=1, value="Sample Interval (s)"); ws.cell(row=6, column=2, value=float(sample_interval_s))
-
-    # Headers
-    ws.cell(row=8, column=1, value="Time (s)")
-    ws.cell(row=8, column=2, value="VSD (V)")
-    ws.cell(row=8, column=3, value="IS (A)")
-    ws.cell(row=8, column=4, value="ID (A)")
-    ws.cell(row=8, column=5, value="IDIS (A)")
-
-    for i in range(len(times)):
-        ws.cell(row=9+i, column=1, value=float(times[i]))
-        ws.cell(row=9+i, column=2, value=float(vsd_V[i]))
-        ws.cell(row=9+i, column=3, value=float(is_A[i]))
-        ws.cell(row=9+i, column=4, value=float(id_A[i]))
-        ws.cell(row=9+i, column=5, value=float(idis_A[i]))
-
-    fname = f"baseline_VSD_IS_ID_IDIS_{timestamp}.xlsx"
-    fpath = os.path.join(out_folder, fname)
-    wb.save(fpath)
-
-    import numpy as np
-    idis_arr = np.asarray(idis_A, dtype=float)
-    idis_rms = float(np.std(idis_arr - np.median(idis_arr)))
-
-    print(f"[Baseline] Saved: {fpath}")
-    print(f"[Baseline] Samples: {len(times)}  IDIS_RMS?{idis_rms:.3e} A")
-
-    msgbox.showinfo(
-        "Baseline Complete",
-        f"Saved baseline to:\n{fpath}\n\n"
-        f"Samples: {len(times)}\n"
-        f"IDIS RMS (demeaned): {idis_rms:.3e} A"
-    )
+    capture.start()
 
-    return {"folder": out_folder, "file": fpath, "samples": len(times), "idis_rms_A": idis_rms}
+    def finish():
+        capture.join()
+        if capture.error is not None:
+            msgbox.showerror("Baseline Error", f"Baseline capture failed:\n\n{capture.error}")
+            return
+        header, t, codes = read_capture(capture_path)
+        samples = len(t)
+        elapsed = header.get("elapsed_s", duration_s)
+        idis_rms = float(capture.stats["std"][BASELINE_NAMES.index("IDIS (A)")])
+
+        # Save Excel on a worker thread; the file is complete when it prints "Saved"
+        fpath = os.path.join(out_folder, f"baseline_VSD_IS_ID_IDIS_{timestamp}.xlsx")
+
+        def on_saved(path, error):
+            if error is None:
+                print(f"[Baseline] Saved: {path}")
+
+        write_columns_in_background(
+            fpath,
+            ["Time (s)"] + BASELINE_NAMES,
+            [t, *baseline_columns(codes).T],
+            on_done=on_saved,
+            preamble=[
+                ["Baseline VSD, IS, ID, IDIS (all probes grounded)"],
+                ["Chip", chip_name],
+                ["Trial", trial_name],
+                ["Timestamp", timestamp],
+                ["Duration (s)", float(elapsed)],
+                ["Data Rate (SPS)", float(data_rate)],
+                [],
+            ],
+            sheet_title="Baseline",
+        )
 
+        print(f"[Baseline] Capture: {capture_path}")
+        print(f"[Baseline] Samples: {samples}  IDIS_RMS?{idis_rms:.3e} A")
+        print(f"[Baseline] {format_noise(capture.stats)}")
+
+        msgbox.showinfo(
+            "Baseline Complete",
+            f"Saved baseline to:\n{capture_path}\n\n"
+            f"Samples: {samples} ({samples / max(elapsed, 1e-9):.0f} per s)\n"
+            f"IDIS RMS (demeaned): {idis_rms:.3e} A"
+        )
+        result.update(xlsx=fpath, samples=samples, idis_rms_A=idis_rms)
+        if on_done is not None:
+            on_done(result)
+
+    def drain():
+        # Only the newest snapshot is shown; True once the capture has ended
+        latest, ended = None, False
+        while True:
+            try:
+                snapshot = capture.updates.get_nowait()
+            except queue.Empty:
+                break
+            if snapshot is None:
+                ended = True
+                break
+            latest = snapshot
+        if latest is not None and on_update is not None:
+            on_update(latest)
+        return ended
+
+    def poll():
+        if drain():
+            finish()
+        else:
+            root.after(BASELINE_POLL_MS, poll)
+
+    if root is not None:
+        root.after(BASELINE_POLL_MS, poll)
+        return result
+
+    while not drain():
+        time.sleep(BASELINE_POLL_MS / 1000.0)
+    finish()
+    return result
 
 
 def collect_tab(tab_collect, root):
@@ -254,9 +343,16 @@ def create_controls_frame(
         chip_name = chip_name_entry.get()
         trial_name = trial_name_entry.get()
 
-        # Use Duration from Parameters; use Step Interval as sampling interval
+        # Duration and data rate from Parameters
         duration = float(params_entries["duration"].get())
-        sample_interval = float(params_entries["step_interval"].get())
+        data_rate = float(params_entries["data_rate"].get())
+
+        def on_update(snapshot):
+            noise_var.set(format_noise(snapshot))
+
+        def on_done(result):
+            output_text.insert(tk.END, f"Baseline saved: {result['file']}\n")
+            output_text.see(tk.END)
 
         try:
             print("\n" + "="*60)
@@ -269,15 +365,14 @@ def create_controls_frame(
                 chip_name=chip_name,
                 trial_name=trial_name,
                 duration_s=duration,
-                sample_interval_s=sample_interval
+                data_rate=data_rate,
+                root=root,
+                on_update=on_update,
+                on_done=on_done,
             )
             if result is None:
                 return  # user cancelled
 
-            # Optional console log entry
-            output_text.insert(tk.END, f"Baseline saved: {result['file']}\n")
-            output_text.see(tk.END)
-
         except Exception as e:
             import tkinter.messagebox as msgbox
             msgbox.showerror("Baseline Error", f"An error occurred during baseline capture:\n\n{str(e)}")
@@ -318,6 +413,10 @@ def create_controls_frame(
         row=2, column=0, columnspan=2, padx=5, pady=(10, 5), sticky="ew"
     )
 
+    noise_var = tk.StringVar(value="Baseline noise: -")
+    noise_label = tk.Label(frame_controls, textvariable=noise_var, anchor="w", justify="left")
+    noise_label.grid(row=3, column=0, columnspan=2, padx=5, pady=(0, 5), sticky="ew")
+
     frame_controls.grid_columnconfigure(0, weight=1)
     frame_controls.grid_columnconfigure(1, weight=1)
 
@@ -357,6 +456,7 @@ def perform_data_collection(
         }
         for v in constant_voltage_values
     }
+    live_plot.clear()
 
     number_of_steps = int((sweep_end - sweep_start) / sweep_step) + 1
 
@@ -393,7 +493,9 @@ def perform_data_collection(
                 DAC.DAC8532_Out_Voltage(DAC8532.channel_A, current_voltage)
 
             time.sleep(0.05)
-            ADC_Value = ADC.ADS1256_GetAll()
+            ADC_Value = dict(
+                zip(COLLECT_CHANNELS, ADC.ADS1256_Scan(COLLECT_CHANNELS))
+            )
 
             adc1 = ADC_Value[1] * 5.0 / 0x7FFFFF
             adc2 = ADC_Value[2] * 5.0 / 0x7FFFFF
@@ -496,7 +598,7 @@ def perform_data_collection(
 
 
 def save_data(chip_name, trial_name, sweep_min, sweep_max, sweep_points):
-    base_dir = "/home/pi/Desktop/Biosensor V2/data"
+    base_dir = config.DATA_DIR
     chip_path = os.path.join(base_dir, chip_name)
     if not os.path.exists(chip_path):
         os.makedirs(chip_path)
@@ -506,129 +608,24 @@ def save_data(chip_name, trial_name, sweep_min, sweep_max, sweep_points):
     trial_path = os.path.join(chip_path, trial_folder_name)
     os.makedirs(trial_path, exist_ok=True)
 
-    if mode == "output":
-        save_excel_file(
-            trial_path,
-            f"{trial_name}_VSD_ISID_{timestamp}.xlsx",
-            "OSDL Biosensor V1 - Output",
-            sweep_min,
-            sweep_max,
-            sweep_points,
-            current_key="i_drain",
-            x_key="vsd",
-            y_key="isd",
-        )
-
-        save_excel_file(
-            trial_path,
-            f"{trial_name}_VSD_ISIG_{timestamp}.xlsx",
-            "OSDL Biosensor V1 - Output",
-            sweep_min,
-            sweep_max,
-            sweep_points,
-            current_key="i_source",
-            x_key="vsd",
-            y_key="isd",
-        )
-    else:
-        save_excel_file(
-            trial_path,
-            f"{trial_name}_VSG_IDIS_{timestamp}.xlsx",
-            "OSDL Biosensor V1 - Transfer",
-            sweep_min,
-            sweep_max,
-            sweep_points,
-            current_key="i_source",
-            x_key="vsg",
-            y_key="i_drain",
-        )
-
-
-def save_excel_file(
-    directory,
-    filename,
-    title,
-    sweep_min,
-    sweep_max,
-    sweep_points,
-    current_key,
-    x_key,
-    y_key,
-):
-    workbook = openpyxl.Workbook()
-    worksheet = workbook.active
-    worksheet.title = "Data Collection"
-
-    worksheet.cell(row=1, column=1, value=title)
-    worksheet.cell(row=2, column=1, value="Sweep Min:")
-    worksheet.cell(row=2, column=2, value=sweep_min)
-    worksheet.cell(row=3, column=1, value="Sweep Max:")
-    worksheet.cell(row=3, column=2, value=sweep_max)
-    worksheet.cell(row=4, column=1, value="Sweep Points:")
-    worksheet.cell(row=4, column=2, value=sweep_points)
-
-    headers = ["X-Axis (V)"]
-    for dac1_voltage in data_by_dac1:
-        headers.append(f"{dac1_voltage:.6f}")
-    for dac1_voltage in data_by_dac1:
-        headers.append(f"{dac1_voltage:.6f}")
-    worksheet.append(headers)
-
-    max_length = max(
-        len(data_by_dac1[dac1_voltage][x_key]) for dac1_voltage in data_by_dac1
+    export_run_in_background(
+        trial_path,
+        trial_name,
+        timestamp,
+        mode,
+        data_by_dac1,
+        sweep_min,
+        sweep_max,
+        sweep_points,
     )
-    for i in range(max_length):
-        row_data = []
-
-        x_value = (
-            data_by_dac1[next(iter(data_by_dac1))][x_key][i]
-            if i < len(data_by_dac1[next(iter(data_by_dac1))][x_key])
-            else ""
-        )
-        row_data.append(x_value)
-
-        for dac1_voltage in data_by_dac1:
-            if mode == "output":
-                y_value = (
-                    data_by_dac1[dac1_voltage][y_key][i]
-                    if i < len(data_by_dac1[dac1_voltage][y_key])
-                    else ""
-                )
-            else:
-                y_value = (
-                    data_by_dac1[dac1_voltage][y_key][i]
-                    if i < len(data_by_dac1[dac1_voltage][y_key])
-                    else ""
-                )
-            row_data.append(y_value)
-
-        for dac1_voltage in data_by_dac1:
-            current_value = (
-                data_by_dac1[dac1_voltage][current_key][i]
-                if i < len(data_by_dac1[dac1_voltage][current_key])
-                else ""
-            )
-            row_data.append(current_value)
-
-        worksheet.append(row_data)
-
-    file_path = os.path.join(directory, filename)
-    workbook.save(file_path)
-    print(f"Data saved to {file_path}")
 
 
 def reset_plot():
-    global ax, canvas, mode
-    ax.clear()
+    global live_plot, mode
     if mode == "output":
-        ax.set_xlabel("Vsd (V)")
-        ax.set_ylabel("Isd (A)")
+        live_plot.reset("Vsd (V)", "Isd (A)")
     else:
-        ax.set_xlabel("Vsg (V)")
-        ax.set_ylabel("Id (A)")
-    ax.set_xlim(-5, 5)
-    ax.set_ylim(-1, 1)
-    canvas.draw_idle()
+        live_plot.reset("Vsg (V)", "Id (A)")
 
 
 def reset_parameters(params_entries):
@@ -747,11 +744,21 @@ def create_params_frame(parent):
     constant_voltage_entry.insert(0, "0.5")
     params_entries["constant_voltage"] = constant_voltage_entry
 
+    tk.Label(frame_params, text="Data Rate (SPS):").grid(
+        row=5, column=0, sticky="e", padx=5, pady=5
+    )
+    data_rate_box = ttk.Combobox(
+        frame_params, width=18, values=[f"{rate:g}" for rate in data_rates()]
+    )
+    data_rate_box.grid(row=5, column=1, columnspan=3, pady=5, sticky="w")
+    data_rate_box.set(f"{BASELINE_DATA_RATE:g}")
+    params_entries["data_rate"] = data_rate_box
+
     return params_entries
 
 
 def create_plot_frame(parent):
-    global fig, ax, canvas
+    global fig, ax, canvas, live_plot
 
     fig, ax = plt.subplots(figsize=(5, 3))
 
@@ -772,40 +779,25 @@ def create_plot_frame(parent):
 
     canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
+    live_plot = LivePlot(fig, ax, canvas, plot_colors)
     canvas.draw()
 
 
 def update_plot(constant_voltage, x_value, y_value, x_label, y_label):
-    global fig, ax, canvas, plot_colors, data_by_dac1, mode
-
-    ax.clear()
+    global live_plot, data_by_dac1, mode
 
+    live_plot.set_labels(x_label, y_label)
     if mode == "output":
-        for i, const_v in enumerate(data_by_dac1):
-            color = plot_colors[i % len(plot_colors)]
-            ax.plot(
-                data_by_dac1[const_v]["vsd"],
-                data_by_dac1[const_v]["isd"],
-                label=f"Gate = {const_v:.2f} V",
-                color=color,
+        for const_v, curve in data_by_dac1.items():
+            live_plot.set_series(
+                const_v, curve["vsd"], curve["isd"], f"Gate = {const_v:.2f} V"
             )
     else:
-        for i, const_v in enumerate(data_by_dac1):
-            color = plot_colors[i % len(plot_colors)]
-            ax.plot(
-                data_by_dac1[const_v]["vsg"],
-                data_by_dac1[const_v]["i_drain"],
-                label=f"Drain = {const_v:.2f} V",
-                color=color,
+        for const_v, curve in data_by_dac1.items():
+            live_plot.set_series(
+                const_v, curve["vsg"], curve["i_drain"], f"Drain = {const_v:.2f} V"
             )
-
-    ax.set_xlabel(x_label)
-    ax.set_ylabel(y_label)
-    ax.legend(loc="upper left")
-    ax.relim()
-    ax.autoscale_view()
-
-    canvas.draw_idle()
+    live_plot.refresh()
 
 def create_console_log_frame(parent):
     frame_output = tk.LabelFrame(
@@ -1,7 +1,8 @@
 import time
 import datetime
 import os
-import RPi.GPIO as GPIO
+from . import config
+from .config import GPIO
 import tkinter as tk
 from tkinter import ttk
 import openpyxl
@@ -9,6 +10,7 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from . import ADS1256
 from . import DAC8532
+from .live_plot import LivePlot
 
 GPIO.setwarnings(False)
 GPIO.setmode(GPIO.BCM)
@@ -189,6 +191,7 @@ def perform_data_collection(
         }
         for v in dac1_voltage_values
     }
+    live_plot.clear()
 
     number_of_steps = int((sweep_end - sweep_start) / sweep_step) + 1
 
@@ -293,7 +296,7 @@ def perform_data_collection(
 
 def save_data(chip_name, trial_name, sweep_min, sweep_max, sweep_points):
 
-    base_dir = "/home/pi/Desktop/Biosensor V2/data"
+    base_dir = config.DATA_DIR
     chip_path = os.path.join(base_dir, chip_name)
     if not os.path.exists(chip_path):
         os.makedirs(chip_path)
@@ -383,13 +386,8 @@ def save_excel_file(
 
 
 def reset_plot():
-    global ax, canvas
-    ax.clear()
-    ax.set_xlabel("Vsd (V)")
-    ax.set_ylabel("Isd (A)")
-    ax.set_xlim(-5, 5)
-    ax.set_ylim(-1, 1)
-    canvas.draw_idle()
+    global live_plot
+    live_plot.reset("Vsd (V)", "Isd (A)")
 
 
 def reset_parameters(params_entries):
@@ -492,7 +490,7 @@ def create_params_frame(parent):
 
 
 def create_plot_frame(parent):
-    global fig, ax, canvas
+    global fig, ax, canvas, live_plot
 
     fig, ax = plt.subplots(figsize=(5, 3))
 
@@ -513,30 +511,16 @@ def create_plot_frame(parent):
 
     canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
+    live_plot = LivePlot(fig, ax, canvas, plot_colors)
     canvas.draw()
 
 
 def update_plot(dac1_voltage):
-    global fig, ax, canvas, plot_colors, data_by_dac1
-
-    ax.clear()
-
-    for i, dac1 in enumerate(data_by_dac1):
-        color = plot_colors[i % len(plot_colors)]
-        ax.plot(
-            data_by_dac1[dac1]["vsd"],
-            data_by_dac1[dac1]["isd"],
-            label=f"DAC1 = {dac1:.2f} V",
-            color=color,
-        )
-
-    ax.set_xlabel("Vsd (V)")
-    ax.set_ylabel("Isd (A)")
-    ax.legend(loc="upper left")
-    ax.relim()
-    ax.autoscale_view()
+    global live_plot, data_by_dac1
 
-    canvas.draw_idle()
+    for dac1, curve in data_by_dac1.items():
+        live_plot.set_series(dac1, curve["vsd"], curve["isd"], f"DAC1 = {dac1:.2f} V")
+    live_plot.refresh()
 
 
 def create_console_log_frame(parent):
@@ -1,7 +1,8 @@
 import time
 import datetime
 import os
-import RPi.GPIO as GPIO
+from . import config
+from .config import GPIO
 import tkinter as tk
 from tkinter import ttk
 import openpyxl
@@ -10,6 +11,7 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 from . import ADS1256
 from . import DAC8532
 from .characterization import characterize_device
+from .live_plot import LivePlot
 
 GPIO.setwarnings(False)
 GPIO.setmode(GPIO.BCM)
@@ -173,7 +175,7 @@ def create_controls_frame(
 
         if run_characterization:
             try:
-                base_dir = "/home/pi/Desktop/Biosensor V2/data"
+                base_dir = config.DATA_DIR
                 chip_path = os.path.join(base_dir, chip_name)
 
                 print(f"\n{'='*60}")
@@ -284,6 +286,7 @@ def perform_data_collection(
         }
         for v in constant_voltage_values
     }
+    live_plot.clear()
 
     number_of_steps = int((sweep_end - sweep_start) / sweep_step) + 1
 
@@ -423,7 +426,7 @@ def perform_data_collection(
 
 
 def save_data(chip_name, trial_name, sweep_min, sweep_max, sweep_points):
-    base_dir = "/home/pi/Desktop/Biosensor V2/data"
+    base_dir = config.DATA_DIR
     chip_path = os.path.join(base_dir, chip_name)
     if not os.path.exists(chip_path):
         os.makedirs(chip_path)
@@ -545,17 +548,11 @@ def save_excel_file(
 
 
 def reset_plot():
-    global ax, canvas, mode
-    ax.clear()
+    global live_plot, mode
     if mode == "output":
-        ax.set_xlabel("Vsd (V)")
-        ax.set_ylabel("Isd (A)")
+        live_plot.reset("Vsd (V)", "Isd (A)")
     else:
-        ax.set_xlabel("Vsg (V)")
-        ax.set_ylabel("Id (A)")
-    ax.set_xlim(-5, 5)
-    ax.set_ylim(-1, 1)
-    canvas.draw_idle()
+        live_plot.reset("Vsg (V)", "Id (A)")
 
 
 def reset_parameters(params_entries):
@@ -678,7 +675,7 @@ def create_params_frame(parent):
 
 
 def create_plot_frame(parent):
-    global fig, ax, canvas
+    global fig, ax, canvas, live_plot
 
     fig, ax = plt.subplots(figsize=(5, 3))
 
@@ -699,40 +696,25 @@ def create_plot_frame(parent):
 
     canvas_widget.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
+    live_plot = LivePlot(fig, ax, canvas, plot_colors)
     canvas.draw()
 
 
 def update_plot(constant_voltage, x_value, y_value, x_label, y_label):
-    global fig, ax, canvas, plot_colors, data_by_dac1, mode
-
-    ax.clear()
+    global live_plot, data_by_dac1, mode
 
+    live_plot.set_labels(x_label, y_label)
     if mode == "output":
-        for i, const_v in enumerate(data_by_dac1):
-            color = plot_colors[i % len(plot_colors)]
-            ax.plot(
-                data_by_dac1[const_v]["vsd"],
-                data_by_dac1[const_v]["isd"],
-                label=f"Gate = {const_v:.2f} V",
-                color=color,
+        for const_v, curve in data_by_dac1.items():
+            live_plot.set_series(
+                const_v, curve["vsd"], curve["isd"], f"Gate = {const_v:.2f} V"
             )
     else:
-        for i, const_v in enumerate(data_by_dac1):
-            color = plot_colors[i % len(plot_colors)]
-            ax.plot(
-                data_by_dac1[const_v]["vsg"],
-                data_by_dac1[const_v]["i_drain"],
-                label=f"Drain = {const_v:.2f} V",
-                color=color,
+        for const_v, curve in data_by_dac1.items():
+            live_plot.set_series(
+                const_v, curve["vsg"], curve["i_drain"], f"Drain = {const_v:.2f} V"
             )
-
-    ax.set_xlabel(x_label)
-    ax.set_ylabel(y_label)
-    ax.legend(loc="upper left")
-    ax.relim()
-    ax.autoscale_view()
-
-    canvas.draw_idle()
+    live_plot.refresh()
 
 def create_console_log_frame(parent):
     frame_output = tk.LabelFrame(
@@ -1,5 +1,4 @@
-import spidev
-import RPi.GPIO as GPIO
+import os
 import time
 
 # Pin definition
@@ -8,14 +7,52 @@ CS_PIN          = 22
 CS_DAC_PIN      = 23
 DRDY_PIN        = 17
 
-# SPI device, bus = 0, device = 0
-SPI = spidev.SpiDev(0, 0)
+# Board front end: ADC full scale and the current-sense shunts. The source
+# shunt sits between the source rail and AIN4/AIN1, shunt A between DAC
+# channel A and AIN6/AIN3, shunt B between DAC channel B and AIN5/AIN2
+ADC_FULL_SCALE_V = 5.0
+SHUNT_SOURCE_OHM = 100.0
+SHUNT_A_OHM = 100.0
+SHUNT_B_OHM = 1000.0
+
+# "hardware" talks to the Pi HAT, "sim" to collect/simulator.py
+BACKEND = os.environ.get("BIOSENSOR_BACKEND", "hardware")
+
+# Where the collect tabs save their runs
+DATA_DIR = os.environ.get("BIOSENSOR_DATA_DIR", "/home/pi/Desktop/Biosensor V2/data")
+
+if BACKEND == "sim":
+    from . import simulator
+    BENCH = simulator.SimulatedBench(cs_adc_pin=CS_PIN, cs_dac_pin=CS_DAC_PIN,
+                                     drdy_pin=DRDY_PIN, rst_pin=RST_PIN,
+                                     r_source=SHUNT_SOURCE_OHM,
+                                     r_a=SHUNT_A_OHM, r_b=SHUNT_B_OHM)
+    GPIO = BENCH.gpio
+    SPI = BENCH.spi
+else:
+    import spidev
+    import RPi.GPIO as GPIO
+    BENCH = None
+    # SPI device, bus = 0, device = 0
+    SPI = spidev.SpiDev(0, 0)
+
+def select_wiring(mode):
+    # The simulator needs to know which DAC drives the gate; on hardware the
+    # operator rewires the board, so this is a no-op
+    if BENCH is not None:
+        BENCH.set_wiring(mode)
 
 def digital_write(pin, value):
     GPIO.output(pin, value)
 
 def digital_read(pin):
-    return GPIO.input(DRDY_PIN)
+    return GPIO.input(pin)
+
+def wait_falling_edge(pin, timeout_s):
+    # Blocks in the kernel until the pin falls; returns False on timeout.
+    # Raises RuntimeError when edge detection is unavailable for the pin.
+    timeout_ms = max(1, int(timeout_s * 1000))
+    return GPIO.wait_for_edge(pin, GPIO.FALLING, timeout=timeout_ms) is not None
 
 def delay_ms(delaytime):
     time.sleep(delaytime // 1000.0)
@@ -25,6 +62,10 @@ def spi_writebyte(data):
     
 def spi_readbytes(reg):
     return SPI.readbytes(reg)
+
+def spi_xfer2(data, delay_us=0):
+    # One full-duplex transaction; delay_us is held after the last byte
+    return SPI.xfer2(list(data), 0, delay_us)
     
 
 def module_init():
@@ -0,0 +1,255 @@
+"""
+export.py - Spreadsheet export of collected runs
+Usage: export_run(trial_path, trial_name, timestamp, mode, data_by_dac1, sweep_min, sweep_max, sweep_points)
+       write_columns(path, headers, columns, preamble=[["Title"]])
+       python -m collect.export <run.journal.jsonl | run.run.npz> [...]
+
+Writes the *_VSD_ISID_* / *_VSD_ISIG_* (output) and *_VSG_IDIS_* (transfer)
+workbooks read by the analyze and plot tabs. Journals can be exported in a
+background thread while the GUI keeps running.
+
+Every table goes through write_columns(), which takes whole columns
+(ragged columns are padded with blank cells) and streams them into a
+write-only workbook in chunks of rows. The suffix of the path picks the
+format: .xlsx, .csv, or the .table.npz layout of run_format.py.
+"""
+
+import csv
+import os
+import sys
+import threading
+
+import numpy as np
+import openpyxl
+
+from .journal import JOURNAL_SUFFIX, load_journal
+from .run_format import RUN_SUFFIX, TABLE_SUFFIX, is_run_file, read_run, write_table
+
+# Rows converted to Python values at a time
+EXPORT_CHUNK_ROWS = 4096
+# Formats write_columns() understands, by file suffix
+TABLE_FORMATS = (".xlsx", ".csv", TABLE_SUFFIX)
+
+
+def _row_chunks(columns, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Rows of the column arrays, chunk_rows at a time; short columns end in None"""
+    n = max((len(column) for column in columns), default=0)
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        parts = []
+        for column in columns:
+            part = column[start:stop].tolist()
+            parts.append(part + [None] * (stop - start - len(part)))
+        yield zip(*parts)
+
+
+def write_columns(
+    path, headers, columns, preamble=(), sheet_title="Sheet", chunk_rows=EXPORT_CHUNK_ROWS
+):
+    """Write columns under one header row, after the preamble rows.
+
+    columns are array-likes of numbers, one per header; a column may be
+    shorter than the others. The preamble (title and settings rows) is
+    kept in .xlsx and .csv and stored as metadata in .table.npz.
+    """
+    columns = [np.asarray(column, dtype=np.float64).ravel() for column in columns]
+    if path.endswith(TABLE_SUFFIX):
+        n = max((len(column) for column in columns), default=0)
+        data = np.full((n, len(columns)), np.nan)
+        for j, column in enumerate(columns):
+            data[: len(column), j] = column
+        meta = {"preamble": [[str(value) for value in row] for row in preamble]}
+        return write_table(path, headers, data, meta)
+
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerows(preamble)
+            writer.writerow(headers)
+            for rows in _row_chunks(columns, chunk_rows):
+                writer.writerows(rows)
+        return path
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_title)
+    for row in preamble:
+        worksheet.append(list(row))
+    worksheet.append(list(headers))
+    for rows in _row_chunks(columns, chunk_rows):
+        for row in rows:
+            worksheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def write_columns_in_background(path, headers, columns, on_done=None, **kwargs):
+    """Run write_columns on a worker thread; on_done(path, error) is called from it.
+    The columns are copied first, so the caller may keep filling its arrays."""
+    columns = [np.array(column, dtype=np.float64) for column in columns]
+
+    def work():
+        try:
+            write_columns(path, headers, columns, **kwargs)
+            error = None
+        except Exception as e:
+            error = e
+            print(f"Writing {path} failed: {e}")
+        if on_done is not None:
+            on_done(path, error)
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    return thread
+
+
+def save_excel_file(
+    directory,
+    filename,
+    title,
+    data_by_dac1,
+    sweep_min,
+    sweep_max,
+    sweep_points,
+    current_key,
+    x_key,
+    y_key,
+):
+    conditions = list(data_by_dac1)
+    columns = [data_by_dac1[conditions[0]][x_key]] if conditions else [[]]
+    columns += [data_by_dac1[v][y_key] for v in conditions]
+    columns += [data_by_dac1[v][current_key] for v in conditions]
+    headers = ["X-Axis (V)"] + [f"{v:.6f}" for v in conditions] * 2
+    preamble = [
+        [title],
+        ["Sweep Min:", sweep_min],
+        ["Sweep Max:", sweep_max],
+        ["Sweep Points:", sweep_points],
+    ]
+
+    file_path = os.path.join(directory, filename)
+    write_columns(file_path, headers, columns, preamble, sheet_title="Data Collection")
+    print(f"Data saved to {file_path}")
+    return file_path
+
+
+def export_run(
+    trial_path,
+    trial_name,
+    timestamp,
+    mode,
+    data_by_dac1,
+    sweep_min,
+    sweep_max,
+    sweep_points,
+):
+    """Write the workbooks for mode into trial_path; returns their paths"""
+    if mode == "output":
+        return [
+            save_excel_file(
+                trial_path,
+                f"{trial_name}_VSD_ISID_{timestamp}.xlsx",
+                "OSDL Biosensor V1 - Output",
+                data_by_dac1,
+                sweep_min,
+                sweep_max,
+                sweep_points,
+                current_key="i_drain",
+                x_key="vsd",
+                y_key="isd",
+            ),
+            save_excel_file(
+                trial_path,
+                f"{trial_name}_VSD_ISIG_{timestamp}.xlsx",
+                "OSDL Biosensor V1 - Output",
+                data_by_dac1,
+                sweep_min,
+                sweep_max,
+                sweep_points,
+                current_key="i_source",
+                x_key="vsd",
+                y_key="isd",
+            ),
+        ]
+    return [
+        save_excel_file(
+            trial_path,
+            f"{trial_name}_VSG_IDIS_{timestamp}.xlsx",
+            "OSDL Biosensor V1 - Transfer",
+            data_by_dac1,
+            sweep_min,
+            sweep_max,
+            sweep_points,
+            current_key="i_source",
+            x_key="vsg",
+            y_key="i_drain",
+        )
+    ]
+
+
+def export_run_in_background(*args, on_done=None):
+    """Run export_run(*args) on a worker thread; on_done(paths, error) is called from it"""
+
+    def work():
+        try:
+            paths, error = export_run(*args), None
+        except Exception as e:
+            paths, error = [], e
+            print(f"Export failed: {e}")
+        if on_done is not None:
+            on_done(paths, error)
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    return thread
+
+
+def export_journal(path, trial_path=None):
+    """Export a (possibly interrupted) journal or a run file next to itself or into trial_path"""
+    if is_run_file(path):
+        header, run_data = read_run(path)
+    else:
+        header, run_data, end = load_journal(path)
+        if end is None:
+            print(f"{os.path.basename(path)} was interrupted; exporting the samples it holds")
+    return export_run(
+        trial_path or os.path.dirname(os.path.abspath(path)),
+        header["trial_name"],
+        header["timestamp"],
+        header["mode"],
+        run_data,
+        header["sweep_start"],
+        header["sweep_end"],
+        header["number_of_steps"],
+    )
+
+
+def export_journal_in_background(path, trial_path=None, on_done=None):
+    """Run export_journal on a worker thread; on_done(paths, error) is called from it"""
+
+    def work():
+        try:
+            paths, error = export_journal(path, trial_path), None
+        except Exception as e:
+            paths, error = [], e
+            print(f"Export of {path} failed: {e}")
+        if on_done is not None:
+            on_done(paths, error)
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    return thread
+
+
+def main(argv):
+    if not argv:
+        print(
+            f"Usage: python -m collect.export <run{JOURNAL_SUFFIX} | run{RUN_SUFFIX}> [...]"
+        )
+        return 2
+    for path in argv:
+        export_journal(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,193 @@
+"""
+journal.py - Append-only run journal
+Usage: journal = RunJournal.create(path, header); journal.append(sample); journal.close("complete")
+       header, run_data, end = load_journal(path)
+
+A journal is a JSON-lines file written by the acquisition thread while a
+sweep runs. The first line is a header with the sweep parameters, then one
+line per sample, then an end record. Samples are buffered and written with
+an fsync every FLUSH_EVERY samples or FLUSH_INTERVAL_S seconds, so a crash
+or power cut loses at most one batch. A journal without an end record is
+an interrupted run; it can be loaded, resumed or exported as it is.
+"""
+
+import datetime
+import json
+import os
+import time
+
+from .run_data import RunData
+
+JOURNAL_VERSION = 1
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+FLUSH_EVERY = 32
+FLUSH_INTERVAL_S = 2.0
+
+
+class JournalError(Exception):
+    pass
+
+
+def _to_json(value):
+    # numpy scalars from the scan path
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in a journal")
+
+
+class RunJournal:
+    """Buffered, fsync'ed JSON-lines writer for one run"""
+
+    def __init__(self, path, handle):
+        self.path = path
+        self.handle = handle
+        self.buffer = []
+        self.last_flush = time.monotonic()
+        self.samples_written = 0
+
+    @classmethod
+    def create(cls, path, header):
+        """Start a new journal; header holds the sweep parameters"""
+        record = {
+            "type": "header",
+            "version": JOURNAL_VERSION,
+            "started": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        record.update(header)
+        handle = open(path, "x", encoding="utf-8")
+        journal = cls(path, handle)
+        journal._write([record])
+        return journal
+
+    @classmethod
+    def reopen(cls, path):
+        """Append to an interrupted journal, marking where acquisition resumed"""
+        _, samples, end = read_journal(path)
+        if end is not None:
+            raise JournalError(f"{path} is already closed ({end.get('status')})")
+        _truncate_partial_line(path)
+        handle = open(path, "a", encoding="utf-8")
+        journal = cls(path, handle)
+        journal.samples_written = len(samples)
+        journal._write(
+            [
+                {
+                    "type": "resume",
+                    "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                }
+            ]
+        )
+        return journal
+
+    def append(self, sample):
+        record = {"type": "sample"}
+        record.update(sample)
+        self.buffer.append(record)
+        if (
+            len(self.buffer) >= FLUSH_EVERY
+            or time.monotonic() - self.last_flush >= FLUSH_INTERVAL_S
+        ):
+            self.flush()
+
+    def end_curve(self, curve):
+        """Record that curve (index into constant_voltage_values) finished"""
+        self.buffer.append({"type": "curve_end", "curve": curve})
+        self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.samples_written += sum(r["type"] == "sample" for r in self.buffer)
+            self._write(self.buffer)
+            self.buffer = []
+        self.last_flush = time.monotonic()
+
+    def close(self, status, stats=None):
+        """Write the end record; status is "complete", "stopped" or "error" """
+        if self.handle is None:
+            return
+        self.flush()
+        self._write(
+            [
+                {
+                    "type": "end",
+                    "status": status,
+                    "samples": self.samples_written,
+                    "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "stats": stats,
+                }
+            ]
+        )
+        self.handle.close()
+        self.handle = None
+
+    def _write(self, records):
+        self.handle.write(
+            "".join(json.dumps(r, default=_to_json) + "\n" for r in records)
+        )
+        self.handle.flush()
+        os.fsync(self.handle.fileno())
+
+
+def _truncate_partial_line(path):
+    # A crash mid-write can leave half a line; drop it before appending
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def read_journal(path):
+    """Return (header, sample records, end record or None).
+
+    header["completed_curves"] lists the curves that ran to the end; a torn
+    last line is ignored.
+    """
+    header = None
+    samples = []
+    completed_curves = []
+    end = None
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.endswith("\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise JournalError(f"{path}:{line_number} is not valid JSON")
+            kind = record.get("type")
+            if kind == "header":
+                header = record
+            elif kind == "sample":
+                samples.append(record)
+            elif kind == "curve_end":
+                completed_curves.append(record["curve"])
+            elif kind == "end":
+                end = record
+    if header is None:
+        raise JournalError(f"{path} has no header")
+    header["completed_curves"] = completed_curves
+    return header, samples, end
+
+
+def load_journal(path):
+    """Return (header, RunData, end record or None)"""
+    header, samples, end = read_journal(path)
+    run_data = RunData(header["constant_voltage_values"], header.get("number_of_steps", 0))
+    for sample in samples:
+        run_data.append(sample)
+    return header, run_data, end
+
+
+def resume_point(header, run_data):
+    """(curve index, step index) of the first sample still missing"""
+    constant_voltage_values = header["constant_voltage_values"]
+    for curve, constant_voltage in enumerate(constant_voltage_values):
+        if curve in header["completed_curves"]:
+            continue
+        return curve, run_data[constant_voltage].n
+    return len(constant_voltage_values), 0
+
+
+def journal_path(trial_path, trial_name, timestamp):
+    return os.path.join(trial_path, f"{trial_name}_{timestamp}{JOURNAL_SUFFIX}")
@@ -0,0 +1,219 @@
+"""
+live_plot.py - Incremental live plotting for the collect tabs
+Usage: live_plot = LivePlot(fig, ax, canvas, plot_colors)
+       live_plot.set_series(key, xs, ys, label); live_plot.refresh()
+
+Keeps one Line2D per curve and updates it with set_data. Frames are
+blitted over a cached background; a full redraw only happens when a curve
+is added, the labels change or the data leaves the current axis limits.
+Redraws are capped at max_fps; a skipped frame is flushed later from the
+Tk event loop so the last point always reaches the screen. Markers
+(vertical lines for events such as injections) are static artists and
+live in the cached background.
+"""
+
+import collections
+import math
+import time
+
+MAX_FPS = 10
+# Room left around the data when the limits are first fitted, and when they
+# have to grow; the larger growth margin keeps full redraws logarithmic in
+# the number of points during a monotonic sweep
+LIMIT_MARGIN = 0.05
+GROW_MARGIN = 0.25
+FRAME_HISTORY = 200
+MARKER_COLOR = "black"
+
+
+class LivePlot:
+    """Persistent-artist, blitted line plot on a FigureCanvasTkAgg"""
+
+    def __init__(self, fig, ax, canvas, colors, max_fps=MAX_FPS, legend_loc="upper left"):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.colors = colors
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.legend_loc = legend_loc
+
+        self.lines = {}
+        self.counts = {}
+        self.markers = []
+        self.bounds = None
+        self.background = None
+        self.needs_full_draw = True
+        self.last_frame = 0.0
+        self.pending = None
+
+        self.frame_times = collections.deque(maxlen=FRAME_HISTORY)
+        self.frames = 0
+        self.full_draws = 0
+
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def clear(self):
+        """Drop every curve; the next data refits the limits"""
+        for line in self.lines.values():
+            line.remove()
+        self.lines.clear()
+        self.counts.clear()
+        for artist in self.markers:
+            artist.remove()
+        self.markers.clear()
+        self.bounds = None
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        self.needs_full_draw = True
+
+    def reset(self, x_label, y_label, xlim=(-5, 5), ylim=(-1, 1)):
+        """Clear the curves and restore the idle axes"""
+        self.clear()
+        self.ax.set_xlabel(x_label)
+        self.ax.set_ylabel(y_label)
+        self.ax.set_xlim(*xlim)
+        self.ax.set_ylim(*ylim)
+        self.refresh(force=True)
+
+    def set_labels(self, x_label, y_label):
+        if self.ax.get_xlabel() != x_label or self.ax.get_ylabel() != y_label:
+            self.ax.set_xlabel(x_label)
+            self.ax.set_ylabel(y_label)
+            self.needs_full_draw = True
+
+    def set_series(self, key, xs, ys, label, redo_tail=0):
+        """Point curve key at xs/ys; only points added since the last call are scanned,
+        plus the last redo_tail points of the previous call when those may have changed"""
+        n = min(len(xs), len(ys))
+        if n == 0:
+            return
+        line = self.lines.get(key)
+        if line is None:
+            color = self.colors[len(self.lines) % len(self.colors)]
+            (line,) = self.ax.plot([], [], label=label, color=color, animated=True)
+            self.lines[key] = line
+            self.counts[key] = 0
+            self.ax.legend(loc=self.legend_loc)
+            self.needs_full_draw = True
+
+        start = max(0, self.counts[key] - redo_tail) if self.counts[key] <= n else 0
+        self._extend_bounds(xs[start:n], ys[start:n])
+        self.counts[key] = n
+        line.set_data(xs[:n], ys[:n])
+
+    def add_marker(self, x, label=None):
+        """Dashed vertical line at x, labelled along its top"""
+        self.markers.append(
+            self.ax.axvline(x, color=MARKER_COLOR, linestyle="--", linewidth=0.8)
+        )
+        if label:
+            self.markers.append(
+                self.ax.annotate(
+                    label,
+                    xy=(x, 1.0),
+                    xycoords=("data", "axes fraction"),
+                    xytext=(-2, -2),
+                    textcoords="offset points",
+                    rotation=90,
+                    ha="right",
+                    va="top",
+                    fontsize=8,
+                    color=MARKER_COLOR,
+                )
+            )
+        self.needs_full_draw = True
+
+    def _extend_bounds(self, xs, ys):
+        points = [
+            (x, y) for x, y in zip(xs, ys) if math.isfinite(x) and math.isfinite(y)
+        ]
+        if not points:
+            return
+        x_new = [p[0] for p in points]
+        y_new = [p[1] for p in points]
+        if self.bounds is None:
+            self.bounds = [min(x_new), max(x_new), min(y_new), max(y_new)]
+            self._fit_limits(LIMIT_MARGIN)
+            return
+        b = self.bounds
+        b[0] = min(b[0], min(x_new))
+        b[1] = max(b[1], max(x_new))
+        b[2] = min(b[2], min(y_new))
+        b[3] = max(b[3], max(y_new))
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        if b[0] < min(x0, x1) or b[1] > max(x0, x1) or b[2] < min(y0, y1) or b[3] > max(y0, y1):
+            self._fit_limits(GROW_MARGIN)
+
+    def _fit_limits(self, margin):
+        x0, x1, y0, y1 = self.bounds
+        self.ax.set_xlim(*_padded(x0, x1, margin))
+        self.ax.set_ylim(*_padded(y0, y1, margin))
+        self.needs_full_draw = True
+
+    def refresh(self, force=False):
+        """Draw a frame now if the fps cap allows, otherwise schedule one"""
+        now = time.perf_counter()
+        wait = self.min_interval - (now - self.last_frame)
+        if not force and wait > 0:
+            if self.pending is None:
+                widget = self.canvas.get_tk_widget()
+                self.pending = widget.after(int(wait * 1000) + 1, self._flush)
+            return
+        self._draw_frame()
+
+    def _flush(self):
+        self.pending = None
+        self._draw_frame()
+
+    def _draw_frame(self):
+        start = time.perf_counter()
+        if self.needs_full_draw or self.background is None:
+            # draw() fires draw_event, which recaptures the background and
+            # draws the animated lines on top of it
+            self.needs_full_draw = False
+            self.canvas.draw()
+            self.full_draws += 1
+        else:
+            self.canvas.restore_region(self.background)
+            self._draw_lines()
+            self.canvas.blit(self.fig.bbox)
+        self.last_frame = time.perf_counter()
+        self.frame_times.append(self.last_frame - start)
+        self.frames += 1
+
+    def _on_draw(self, event):
+        # Any full draw (ours, a resize, the toolbar) invalidates the background
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
+
+    def _draw_lines(self):
+        for line in self.lines.values():
+            self.ax.draw_artist(line)
+
+    def frame_stats(self):
+        """Frame count and frame time over the recent history, in seconds"""
+        times = list(self.frame_times)
+        return {
+            "frames": self.frames,
+            "full_draws": self.full_draws,
+            "frame_s_mean": sum(times) / len(times) if times else 0.0,
+            "frame_s_max": max(times) if times else 0.0,
+        }
+
+    def format_frame_stats(self):
+        stats = self.frame_stats()
+        return (
+            f"Plot: {stats['frames']} frames ({stats['full_draws']} full redraws), "
+            f"frame time mean {stats['frame_s_mean'] * 1e3:.1f} ms, "
+            f"max {stats['frame_s_max'] * 1e3:.1f} ms\n"
+        )
+
+
+def _padded(lo, hi, margin):
+    span = hi - lo
+    if span <= 0:
+        span = abs(hi) if hi else 1.0
+    pad = span * margin
+    return lo - pad, hi + pad
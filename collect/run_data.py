@@ -0,0 +1,163 @@
+"""
+run_data.py - Columnar sample store for one collection run
+Usage: data_by_dac1 = RunData(constant_voltage_values, number_of_steps)
+       data_by_dac1.append(sample); data_by_dac1[0.5]["vsd"]
+
+Each constant-voltage condition keeps raw ADC codes as an int32 array and
+every derived quantity as a float64 column, preallocated for the expected
+number of steps and grown geometrically when a timed run goes past it.
+Indexing returns views of the filled part, so RunData can stand in for the
+old data_by_dac1 dict-of-lists without copying.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+# ADC inputs stored per sample: Src-, Gate-, Drn-, Src+, Gate+, Drn+
+CODE_CHANNELS = (1, 2, 3, 4, 5, 6)
+
+FLOAT_COLUMNS = (
+    "t",
+    "step",
+    "sweep_voltage",
+    "voltages1",
+    "voltages2",
+    "voltages3",
+    "voltages4",
+    "voltages5",
+    "voltages6",
+    "vsd",
+    "vsg",
+    "i_source",
+    "i_gate",
+    "i_drain",
+    "isd",
+)
+
+# Capacity used for timed runs that have no step count, and the growth factor
+MIN_CAPACITY = 64
+GROWTH = 2
+
+
+class ConditionData(Mapping):
+    """Samples of one constant-voltage condition; values are zero-copy views"""
+
+    def __init__(self, capacity=MIN_CAPACITY, channels=CODE_CHANNELS):
+        capacity = max(int(capacity), 1)
+        self.channels = tuple(channels)
+        self.n = 0
+        self._codes = np.zeros((capacity, len(self.channels)), dtype=np.int32)
+        self._columns = {
+            name: np.full(capacity, np.nan, dtype=np.float64) for name in FLOAT_COLUMNS
+        }
+
+    @classmethod
+    def from_arrays(cls, codes, columns, channels=CODE_CHANNELS):
+        """Wrap existing arrays (e.g. from a run file) without copying"""
+        data = cls.__new__(cls)
+        data.channels = tuple(channels)
+        data.n = len(codes)
+        data._codes = np.asarray(codes, dtype=np.int32)
+        data._columns = {}
+        for name in FLOAT_COLUMNS:
+            column = columns.get(name)
+            if column is None:
+                column = np.full(data.n, np.nan)
+            data._columns[name] = np.asarray(column, dtype=np.float64)
+        return data
+
+    @property
+    def capacity(self):
+        return len(self._codes)
+
+    def _grow(self, needed):
+        capacity = max(needed, self.capacity * GROWTH, MIN_CAPACITY)
+        codes = np.zeros((capacity, len(self.channels)), dtype=np.int32)
+        codes[: self.n] = self._codes[: self.n]
+        self._codes = codes
+        for name, column in self._columns.items():
+            grown = np.full(capacity, np.nan, dtype=np.float64)
+            grown[: self.n] = column[: self.n]
+            self._columns[name] = grown
+
+    def append(self, sample):
+        """Store one sample dict; "codes" holds the raw scan, missing columns stay NaN"""
+        if self.n == self.capacity:
+            self._grow(self.n + 1)
+        i = self.n
+        codes = sample.get("codes")
+        if codes is not None:
+            self._codes[i] = codes
+        for name, column in self._columns.items():
+            value = sample.get(name)
+            if value is not None:
+                column[i] = value
+        self.n += 1
+
+    @property
+    def codes(self):
+        """Raw ADC codes, shape (samples, channels)"""
+        return self._codes[: self.n]
+
+    def __getitem__(self, key):
+        if key == "codes":
+            return self.codes
+        return self._columns[key][: self.n]
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def nbytes(self):
+        return self._codes.nbytes + sum(c.nbytes for c in self._columns.values())
+
+
+class RunData(Mapping):
+    """Constant voltage -> ConditionData, in the order the sweeps run"""
+
+    def __init__(self, constant_voltage_values=(), capacity=MIN_CAPACITY, channels=CODE_CHANNELS):
+        self.capacity = capacity
+        self.channels = tuple(channels)
+        self._conditions = {
+            v: ConditionData(capacity, self.channels) for v in constant_voltage_values
+        }
+
+    def condition(self, constant_voltage):
+        """ConditionData for constant_voltage, created on first use"""
+        data = self._conditions.get(constant_voltage)
+        if data is None:
+            data = ConditionData(self.capacity, self.channels)
+            self._conditions[constant_voltage] = data
+        return data
+
+    def append(self, sample):
+        self.condition(sample["constant_voltage"]).append(sample)
+
+    def add_condition(self, constant_voltage, data):
+        self._conditions[constant_voltage] = data
+
+    def column(self, key):
+        """One column across every condition, in sweep order (a copy)"""
+        parts = [data[key] for data in self._conditions.values()]
+        if not parts:
+            return np.empty(0, dtype=np.int32 if key == "codes" else np.float64)
+        return np.concatenate(parts)
+
+    @property
+    def samples(self):
+        return sum(data.n for data in self._conditions.values())
+
+    def nbytes(self):
+        return sum(data.nbytes() for data in self._conditions.values())
+
+    def __getitem__(self, constant_voltage):
+        return self._conditions[constant_voltage]
+
+    def __iter__(self):
+        return iter(self._conditions)
+
+    def __len__(self):
+        return len(self._conditions)
@@ -0,0 +1,149 @@
+"""
+run_format.py - Native run file (.run.npz)
+Usage: write_run(path, run_data, meta); meta, run_data = read_run(path)
+
+One compressed NumPy archive per run holding, for every constant-voltage
+condition, the raw 24-bit ADC codes (int32) and the float64 columns of
+RunData (timestamps, sweep voltage, converted channels, currents). The run
+metadata (mode, chip/trial names, sweep parameters, shunt values, ...) is
+stored as JSON in the same archive. Spreadsheet export stays available in
+collect/export.py. Tables that are not sweeps (characterization output,
+migrated summaries) use the simpler .table.npz layout.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .run_data import CODE_CHANNELS, FLOAT_COLUMNS, ConditionData, RunData
+
+RUN_FORMAT_VERSION = 1
+RUN_SUFFIX = ".run.npz"
+
+
+class RunFormatError(Exception):
+    pass
+
+
+def run_path_for(path):
+    """Native run file that sits next to path (journal, xlsx or csv)"""
+    base = os.path.basename(path)
+    for suffix in (".journal.jsonl", RUN_SUFFIX):
+        if base.endswith(suffix):
+            return os.path.join(os.path.dirname(path), base[: -len(suffix)] + RUN_SUFFIX)
+    return os.path.splitext(path)[0] + RUN_SUFFIX
+
+
+def is_run_file(path):
+    return path.endswith(RUN_SUFFIX)
+
+
+def write_run(path, run_data, meta, compress=True):
+    """Write run_data and its metadata; the file is renamed into place when complete"""
+    arrays = {
+        "constant_voltages": np.asarray(list(run_data), dtype=np.float64),
+    }
+    for i, constant_voltage in enumerate(run_data):
+        condition = run_data[constant_voltage]
+        arrays[f"c{i}_codes"] = np.asarray(condition.codes, dtype=np.int32)
+        for name in FLOAT_COLUMNS:
+            column = condition[name]
+            # Columns that were never filled (e.g. isd in transfer mode) are skipped
+            if len(column) and not np.isnan(column).all():
+                arrays[f"c{i}_{name}"] = column
+
+    meta = dict(meta)
+    meta["format_version"] = RUN_FORMAT_VERSION
+    meta["channels"] = list(getattr(run_data, "channels", CODE_CHANNELS))
+    arrays["meta"] = np.array(json.dumps(meta))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        if compress:
+            np.savez_compressed(f, **arrays)
+        else:
+            np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_meta(path):
+    """Metadata only; the sample arrays are not decompressed"""
+    with np.load(path, allow_pickle=False) as archive:
+        return _meta(archive, path)
+
+
+def _meta(archive, path):
+    if "meta" not in archive.files:
+        raise RunFormatError(f"{path} is not a run file")
+    meta = json.loads(str(archive["meta"]))
+    if meta.get("format_version", 0) > RUN_FORMAT_VERSION:
+        raise RunFormatError(
+            f"{path} uses run format {meta['format_version']}, newer than this reader"
+        )
+    return meta
+
+
+def read_run(path):
+    """Return (meta, RunData)"""
+    with np.load(path, allow_pickle=False) as archive:
+        meta = _meta(archive, path)
+        channels = tuple(meta.get("channels", CODE_CHANNELS))
+        run_data = RunData(channels=channels)
+        for i, constant_voltage in enumerate(archive["constant_voltages"].tolist()):
+            columns = {
+                name: archive[f"c{i}_{name}"]
+                for name in FLOAT_COLUMNS
+                if f"c{i}_{name}" in archive.files
+            }
+            run_data.add_condition(
+                constant_voltage,
+                ConditionData.from_arrays(archive[f"c{i}_codes"], columns, channels),
+            )
+    return meta, run_data
+
+
+def sweep_blocks(run_data, x_key="vsd", a_key="i_source", b_key="i_drain"):
+    """Per-condition columns as 2-D arrays (points x conditions), NaN-padded.
+
+    Returns (x of the first condition, constant voltages, a block, b block),
+    the layout of the Is/Id blocks in the analyze tab's CSV files.
+    """
+    constant_voltages = list(run_data)
+    n = max((run_data[v].n for v in constant_voltages), default=0)
+    a = np.full((n, len(constant_voltages)), np.nan)
+    b = np.full((n, len(constant_voltages)), np.nan)
+    for j, v in enumerate(constant_voltages):
+        a[: run_data[v].n, j] = run_data[v][a_key]
+        b[: run_data[v].n, j] = run_data[v][b_key]
+    x = np.full(n, np.nan)
+    if constant_voltages:
+        first = run_data[constant_voltages[0]][x_key]
+        x[: len(first)] = first
+    return x, constant_voltages, a, b
+
+
+TABLE_SUFFIX = ".table.npz"
+
+
+def write_table(path, header, data, meta=None):
+    """Store a plain header + float matrix table (characterization output, summaries)"""
+    meta = dict(meta or {})
+    meta["format_version"] = RUN_FORMAT_VERSION
+    meta["columns"] = list(header)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(
+            f, data=np.asarray(data, dtype=np.float64), meta=np.array(json.dumps(meta))
+        )
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(path):
+    """Return (meta, {column name: array}) for a file from write_table"""
+    with np.load(path, allow_pickle=False) as archive:
+        meta = _meta(archive, path)
+        data = archive["data"]
+    return meta, {name: data[:, j] for j, name in enumerate(meta["columns"])}
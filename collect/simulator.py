@@ -0,0 +1,503 @@
+"""
+simulator.py - Simulated ADS1256/DAC8532 bench with an OEGFET device model
+Usage: BIOSENSOR_BACKEND=sim python main.py
+
+config.py swaps spidev and RPi.GPIO for SimulatedBench.spi and
+SimulatedBench.gpio, so the drivers, the collect tab and the benchmarks
+run unchanged on a machine without the Pi HAT.
+
+Bench wiring (ADC input: node). "+" is the driven side of each shunt:
+    AIN4 Src+   source rail (GPIO 4 high)     AIN1 Src-   source terminal
+    AIN6 A+     DAC channel A output          AIN3 A-     terminal on DAC A
+    AIN5 B+     DAC channel B output          AIN2 B-     terminal on DAC B
+    source shunt 100 ohm, A shunt 100 ohm, B shunt 1 kohm
+In "output" wiring DAC A drives the drain and DAC B the gate; "transfer"
+wiring swaps them, matching the formulas in collect_tab.
+"""
+
+import math
+import threading
+import time
+
+import numpy as np
+
+
+# ADS1256 commands and registers used by the emulation
+CMD_WAKEUP = 0x00
+CMD_RDATA = 0x01
+CMD_RDATAC = 0x03
+CMD_SDATAC = 0x0F
+CMD_SYNC = 0xFC
+CMD_STANDBY = 0xFD
+CMD_RESET = 0xFE
+REG_STATUS = 0
+REG_MUX = 1
+REG_ADCON = 2
+REG_DRATE = 3
+ADS1256_RESET_REGS = [0x30, 0x01, 0x20, 0xF0, 0xE0, 0x00, 0x00, 0x00, 0x00, 0x00, 0x40]
+
+# DRATE register -> (samples per second, settling time after SYNC/WAKEUP in s)
+ADS1256_TIMING = {
+    0xF0: (30000.0, 0.21e-3),
+    0xE0: (15000.0, 0.25e-3),
+    0xD0: (7500.0, 0.31e-3),
+    0xC0: (3750.0, 0.44e-3),
+    0xB0: (2000.0, 0.68e-3),
+    0xA1: (1000.0, 1.18e-3),
+    0x92: (500.0, 2.18e-3),
+    0x82: (100.0, 10.18e-3),
+    0x72: (60.0, 16.84e-3),
+    0x63: (50.0, 20.18e-3),
+    0x53: (30.0, 33.51e-3),
+    0x43: (25.0, 40.18e-3),
+    0x33: (15.0, 66.84e-3),
+    0x23: (10.0, 100.18e-3),
+    0x20: (10.0, 100.18e-3),
+    0x13: (5.0, 200.18e-3),
+    0x03: (2.5, 400.18e-3),
+}
+
+ADC_FULL_SCALE_V = 5.0
+ADC_CODE_MAX = 0x7FFFFF
+DAC_VREF = 3.3
+DAC_VALUE_MAX = 65535
+DAC_CONTROL_A = 0x30
+DAC_CONTROL_B = 0x34
+
+# Thermal voltage at room temperature
+UT = 0.0259
+
+
+class OEGFETModel:
+    """Square-law p-type transistor with channel-length modulation.
+
+    A smooth overdrive (EKV-style interpolation) keeps the current continuous
+    through threshold, so weak inversion gives an exponential subthreshold
+    tail instead of a hard cut-off.
+    """
+
+    def __init__(
+        self,
+        vt=0.35,
+        k=2.0e-4,
+        lam=0.08,
+        n=1.5,
+        gate_leak_ohm=1e9,
+        vt_drift_v_per_s=0.0,
+        current_noise_a=0.0,
+    ):
+        self.vt = vt
+        self.k = k
+        self.lam = lam
+        self.n = n
+        self.gate_leak_ohm = gate_leak_ohm
+        self.vt_drift_v_per_s = vt_drift_v_per_s
+        self.current_noise_a = current_noise_a
+
+    def threshold(self, t):
+        return self.vt + self.vt_drift_v_per_s * t
+
+    def channel_current(self, vs, vd, vg, t=0.0):
+        """Current flowing from source to drain (A)"""
+        sign = 1.0
+        if vd > vs:
+            # p-type: the higher terminal acts as the source
+            vs, vd, sign = vd, vs, -1.0
+        vsg = vs - vg
+        vsd = vs - vd
+        nut = self.n * UT
+        x = (vsg - self.threshold(t)) / (2.0 * nut)
+        vov = 2.0 * nut * (x if x > 30.0 else math.log1p(math.exp(x)))
+        vsd_eff = min(vsd, vov)
+        ids = self.k * (vov * vsd_eff - 0.5 * vsd_eff * vsd_eff) * (1.0 + self.lam * vsd)
+        return sign * ids
+
+
+class SimulatedBench:
+    """DAC outputs, shunt network, device and converters sharing one SPI bus"""
+
+    def __init__(
+        self,
+        cs_adc_pin=22,
+        cs_dac_pin=23,
+        drdy_pin=17,
+        rst_pin=18,
+        source_rail_pin=4,
+        source_rail_v=3.3,
+        r_source=100.0,
+        r_a=100.0,
+        r_b=1000.0,
+        adc_noise_v=20e-6,
+        wiring="output",
+        model=None,
+        seed=None,
+    ):
+        self.cs_adc_pin = cs_adc_pin
+        self.cs_dac_pin = cs_dac_pin
+        self.drdy_pin = drdy_pin
+        self.rst_pin = rst_pin
+        self.source_rail_pin = source_rail_pin
+        self.source_rail_v = source_rail_v
+        self.r_source = r_source
+        self.r_a = r_a
+        self.r_b = r_b
+        self.adc_noise_v = adc_noise_v
+        self.wiring = wiring
+        self.model = model if model is not None else OEGFETModel()
+        self.rng = np.random.default_rng(seed)
+        self.t0 = time.monotonic()
+        self.lock = threading.RLock()
+
+        self.pins = {}
+        self.dac_v = {DAC_CONTROL_A: 0.0, DAC_CONTROL_B: 0.0}
+        self._solution = None
+        self._solution_key = None
+
+        self.adc = SimulatedADS1256(self)
+        self.dac = SimulatedDAC8532(self)
+        self.gpio = SimulatedGPIO(self)
+        self.spi = SimulatedSpiDev(self)
+
+    def now(self):
+        return time.monotonic() - self.t0
+
+    def set_wiring(self, wiring):
+        with self.lock:
+            self.wiring = wiring
+            self._solution_key = None
+
+    def source_rail(self):
+        return self.source_rail_v if self.pins.get(self.source_rail_pin, 0) else 0.0
+
+    def solve(self, t):
+        """Node voltages of the shunt network; cached per 10 ms of drift"""
+        key = (
+            self.dac_v[DAC_CONTROL_A],
+            self.dac_v[DAC_CONTROL_B],
+            self.source_rail(),
+            self.wiring,
+            round(t * 100.0) if self.model.vt_drift_v_per_s else 0,
+        )
+        if key == self._solution_key:
+            return self._solution
+
+        v_a, v_b = self.dac_v[DAC_CONTROL_A], self.dac_v[DAC_CONTROL_B]
+        v_rail = self.source_rail()
+        if self.wiring == "transfer":
+            v_drain_dac, r_drain, v_gate_dac, r_gate = v_b, self.r_b, v_a, self.r_a
+        else:
+            v_drain_dac, r_drain, v_gate_dac, r_gate = v_a, self.r_a, v_b, self.r_b
+
+        # Gate leakage is tiny; take the gate terminal from the unloaded shunt
+        # and solve the series source/drain loop for the channel current
+        v_gate = v_gate_dac
+        model = self.model
+
+        def residual(i):
+            vs = v_rail - i * self.r_source
+            vd = v_drain_dac + i * r_drain
+            return i - model.channel_current(vs, vd, v_gate, t)
+
+        bound = abs(v_rail - v_drain_dac) / (self.r_source + r_drain) + 1e-12
+        lo, hi = -bound, bound
+        f_lo = residual(lo)
+        for _ in range(60):
+            mid = 0.5 * (lo + hi)
+            f_mid = residual(mid)
+            if (f_mid < 0) == (f_lo < 0):
+                lo, f_lo = mid, f_mid
+            else:
+                hi = mid
+        i_ch = 0.5 * (lo + hi)
+
+        v_s = v_rail - i_ch * self.r_source
+        v_d = v_drain_dac + i_ch * r_drain
+        i_gate = (v_gate - 0.5 * (v_s + v_d)) / model.gate_leak_ohm
+        v_g = v_gate_dac - i_gate * r_gate
+
+        if self.wiring == "transfer":
+            a_minus, b_minus = v_g, v_d
+        else:
+            a_minus, b_minus = v_d, v_g
+        nodes = [0.0] * 9
+        nodes[1] = v_s
+        nodes[2] = b_minus
+        nodes[3] = a_minus
+        nodes[4] = v_rail
+        nodes[5] = v_b
+        nodes[6] = v_a
+
+        self._solution_key = key
+        self._solution = (nodes, i_ch)
+        return self._solution
+
+    def sample(self, mux, t):
+        """Differential input voltage selected by a MUX register value"""
+        nodes, i_ch = self.solve(t)
+        p, n = (mux >> 4) & 0x0F, mux & 0x0F
+        v = nodes[p if p < 9 else 8] - nodes[n if n < 9 else 8]
+        if self.model.current_noise_a and p in (1, 4):
+            # Channel current noise shows up across the source shunt
+            v += self.rng.normal(0.0, self.model.current_noise_a) * self.r_source
+        if self.adc_noise_v:
+            v += self.rng.normal(0.0, self.adc_noise_v)
+        return v
+
+    def write_pin(self, pin, value):
+        with self.lock:
+            previous = self.pins.get(pin, 1)
+            self.pins[pin] = value
+            if pin == self.rst_pin and previous and not value:
+                self.adc.reset()
+            if pin == self.cs_dac_pin and value and not previous:
+                self.dac.end_frame()
+
+
+class SimulatedADS1256:
+    """Command, register and DRDY behaviour of the ADS1256"""
+
+    def __init__(self, bench):
+        self.bench = bench
+        self.reset()
+
+    def reset(self):
+        self.regs = list(ADS1256_RESET_REGS)
+        self.continuous = False
+        self.out = []
+        self.pending = []
+        self.data_code = 0
+        self.restart(self.regs[REG_MUX])
+
+    def timing(self):
+        return ADS1256_TIMING.get(self.regs[REG_DRATE], (30000.0, 0.21e-3))
+
+    def restart(self, mux):
+        self.running = True
+        self.run_start = self.bench.now()
+        self.run_mux = mux
+        self.data_index = -1
+        self.read_index = -1
+
+    def completed_index(self, t):
+        """Index of the latest finished conversion of the current run, -1 if none"""
+        if not self.running:
+            return self.data_index
+        rate, settle = self.timing()
+        elapsed = t - self.run_start - settle
+        if elapsed < 0:
+            return -1
+        return int(elapsed * rate)
+
+    def next_ready_time(self, t):
+        rate, settle = self.timing()
+        if not self.running:
+            return None
+        first = self.run_start + settle
+        if t < first:
+            return first
+        return first + (int((t - first) * rate) + 1) / rate
+
+    def update(self):
+        t = self.bench.now()
+        k = self.completed_index(t)
+        if k > self.data_index:
+            rate, settle = self.timing()
+            t_k = self.run_start + settle + k / rate
+            gain = 1 << (self.regs[REG_ADCON] & 0x07)
+            volts = self.bench.sample(self.run_mux, t_k) * gain
+            code = int(round(volts / ADC_FULL_SCALE_V * ADC_CODE_MAX))
+            self.data_code = max(-ADC_CODE_MAX - 1, min(ADC_CODE_MAX, code))
+            self.data_index = k
+
+    def drdy(self):
+        self.update()
+        return 0 if self.data_index > self.read_index else 1
+
+    def read_data(self):
+        self.update()
+        self.read_index = self.data_index
+        code = self.data_code & 0xFFFFFF
+        return [(code >> 16) & 0xFF, (code >> 8) & 0xFF, code & 0xFF]
+
+    def transfer(self, byte):
+        if self.out:
+            return self.out.pop(0)
+        if self.pending:
+            self.pending.pop(0)(byte)
+            return 0
+        if self.continuous:
+            if byte == CMD_SDATAC:
+                self.continuous = False
+                return 0
+            # In RDATAC every 24 SCLKs shift out the latest conversion
+            self.out = self.read_data()
+            return self.out.pop(0)
+        self.command(byte)
+        return 0
+
+    def command(self, byte):
+        high = byte & 0xF0
+        if byte == CMD_RDATA:
+            self.out = self.read_data()
+        elif byte == CMD_RDATAC:
+            self.continuous = True
+            self.out = self.read_data()
+        elif byte == CMD_SYNC or byte == CMD_STANDBY:
+            self.update()
+            self.running = False
+        elif byte == CMD_WAKEUP:
+            self.update()
+            self.restart(self.regs[REG_MUX])
+        elif byte == CMD_RESET:
+            self.reset()
+        elif high == 0x50:
+            self.pending.append(lambda count, reg=byte & 0x0F: self._queue_write(reg, count))
+        elif high == 0x10:
+            self.pending.append(lambda count, reg=byte & 0x0F: self._queue_read(reg, count))
+
+    def _queue_write(self, reg, count):
+        for offset in range(count + 1):
+            self.pending.append(
+                lambda value, r=reg + offset: self._write_reg(r, value)
+            )
+
+    def _write_reg(self, reg, value):
+        if reg < len(self.regs) and reg != REG_STATUS:
+            self.regs[reg] = value & 0xFF
+        elif reg == REG_STATUS:
+            # ID bits are read-only
+            self.regs[REG_STATUS] = (self.regs[REG_STATUS] & 0xF0) | (value & 0x0E)
+
+    def _queue_read(self, reg, count):
+        self.out.extend(
+            self.regs[r] if r < len(self.regs) else 0 for r in range(reg, reg + count + 1)
+        )
+
+
+class SimulatedDAC8532:
+    """24-bit frames: control byte, then 16-bit code, latched when CS rises"""
+
+    def __init__(self, bench):
+        self.bench = bench
+        self.frame = []
+
+    def transfer(self, byte):
+        self.frame.append(byte)
+        if len(self.frame) == 3:
+            self.end_frame()
+        return 0
+
+    def end_frame(self):
+        if len(self.frame) == 3 and self.frame[0] in self.bench.dac_v:
+            code = (self.frame[1] << 8) | self.frame[2]
+            self.bench.dac_v[self.frame[0]] = code * DAC_VREF / DAC_VALUE_MAX
+        self.frame = []
+
+
+class SimulatedGPIO:
+    """Subset of the RPi.GPIO module used by config and the collect tabs"""
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self, bench):
+        self.bench = bench
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        if direction == self.OUT:
+            self.bench.write_pin(pin, self.HIGH if initial is None else initial)
+
+    def output(self, pin, value):
+        self.bench.write_pin(pin, 1 if value else 0)
+
+    def input(self, pin):
+        with self.bench.lock:
+            if pin == self.bench.drdy_pin:
+                return self.bench.adc.drdy()
+            return self.bench.pins.get(pin, 1)
+
+    def wait_for_edge(self, pin, edge, bouncetime=None, timeout=None):
+        if pin != self.bench.drdy_pin or edge != self.FALLING:
+            raise RuntimeError("Edge detection is only simulated for DRDY falling")
+        deadline = time.monotonic() + (timeout / 1000.0 if timeout else 3600.0)
+        while True:
+            with self.bench.lock:
+                adc = self.bench.adc
+                adc.update()
+                ready_at = adc.next_ready_time(self.bench.now())
+            now = time.monotonic()
+            if ready_at is None:
+                time.sleep(max(0.0, deadline - now))
+                return None
+            wake = self.bench.t0 + ready_at
+            if wake > deadline:
+                time.sleep(max(0.0, deadline - now))
+                return None
+            time.sleep(max(0.0, wake - now))
+            with self.bench.lock:
+                if adc.drdy() == 0:
+                    return pin
+
+    def cleanup(self, *args):
+        self.bench.pins.clear()
+
+
+class SimulatedSpiDev:
+    """spidev.SpiDev stand-in that routes bytes to the device whose CS is low.
+
+    Transfers take as long as the configured SCLK would on the real bus.
+    """
+
+    def __init__(self, bench):
+        self.bench = bench
+        self.max_speed_hz = 500000
+        self.mode = 0
+
+    def _transfer(self, data, speed_hz=0, delay_usecs=0):
+        data = list(data)
+        hz = speed_hz or self.max_speed_hz
+        with self.bench.lock:
+            if not self.bench.pins.get(self.bench.cs_adc_pin, 1):
+                out = [self.bench.adc.transfer(b) for b in data]
+            elif not self.bench.pins.get(self.bench.cs_dac_pin, 1):
+                out = [self.bench.dac.transfer(b) for b in data]
+            else:
+                out = [0] * len(data)
+        busy = len(data) * 8.0 / hz + delay_usecs * 1e-6
+        if busy > 0:
+            time.sleep(busy)
+        return out
+
+    def writebytes(self, data):
+        self._transfer(data)
+
+    def readbytes(self, n):
+        return self._transfer([0] * n)
+
+    def xfer2(self, data, speed_hz=0, delay_usecs=0, bits_per_word=0):
+        return self._transfer(data, speed_hz, delay_usecs)
+
+    def xfer(self, data, speed_hz=0, delay_usecs=0, bits_per_word=0):
+        return self._transfer(data, speed_hz, delay_usecs)
+
+    def open(self, bus, device):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,238 @@
+"""
+sweep_engine.py - Sweep acquisition thread
+Usage: engine = SweepEngine(ADC, DAC, mode, ...); engine.start()
+       then drain engine.samples from the GUI until it yields None
+
+The engine owns the DAC and ADC for the length of a run. Steps are
+scheduled on absolute deadlines (start + k * interval) so plotting and
+logging on the Tk side no longer stretch the step interval.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+from . import config
+from . import DAC8532
+
+# ADC inputs used by the sweep: Src-, Gate-, Drn-, Src+, Gate+, Drn+
+COLLECT_CHANNELS = [1, 2, 3, 4, 5, 6]
+
+# Settling time between the DAC write and the ADC scan
+SETTLE_S = 0.05
+# Pause between the curves of consecutive constant voltages
+CURVE_PAUSE_S = 5.0
+
+
+def compute_sample(mode, codes):
+    """Terminal voltages and currents from a {channel: code} scan"""
+    scale = config.ADC_FULL_SCALE_V / 0x7FFFFF
+    adc = {ch: codes[ch] * scale for ch in COLLECT_CHANNELS}
+
+    sample = {f"voltages{ch}": adc[ch] for ch in COLLECT_CHANNELS}
+    sample["i_source"] = (adc[4] - adc[1]) / config.SHUNT_SOURCE_OHM
+    if mode == "output":
+        sample["i_drain"] = (adc[6] - adc[3]) / config.SHUNT_A_OHM
+        sample["i_gate"] = (adc[5] - adc[2]) / config.SHUNT_B_OHM
+        sample["vsd"] = adc[4] - adc[6]
+        sample["vsg"] = adc[4] - adc[5]
+        sample["isd"] = sample["i_source"] - sample["i_drain"]
+    else:
+        sample["i_drain"] = (adc[5] - adc[2]) / config.SHUNT_B_OHM
+        sample["i_gate"] = (adc[6] - adc[3]) / config.SHUNT_A_OHM
+        sample["vsd"] = adc[4] - adc[5]
+        sample["vsg"] = adc[4] - adc[6]
+    return sample
+
+
+def timing_stats(step_times, interval):
+    """Step-interval accuracy and jitter from the step start times of one curve"""
+    if len(step_times) < 2:
+        return None
+    intervals = np.diff(np.asarray(step_times))
+    error = intervals - interval
+    return {
+        "steps": len(step_times),
+        "interval_mean_s": float(intervals.mean()),
+        "interval_error_mean_s": float(error.mean()),
+        "jitter_std_s": float(intervals.std()),
+        "error_max_s": float(np.abs(error).max()),
+        "late_steps": int((error > 0.5 * interval).sum()),
+    }
+
+
+def merge_timing_stats(per_curve):
+    """Combine timing_stats() of several curves, weighting by interval count"""
+    per_curve = [s for s in per_curve if s]
+    if not per_curve:
+        return None
+    n = np.array([s["steps"] - 1 for s in per_curve], dtype=float)
+    mean = np.array([s["interval_mean_s"] for s in per_curve])
+    std = np.array([s["jitter_std_s"] for s in per_curve])
+    error = np.array([s["interval_error_mean_s"] for s in per_curve])
+    total_mean = float((n * mean).sum() / n.sum())
+    # Pooled variance including the spread between curve means
+    var = float((n * (std ** 2 + (mean - total_mean) ** 2)).sum() / n.sum())
+    return {
+        "steps": int(sum(s["steps"] for s in per_curve)),
+        "interval_mean_s": total_mean,
+        "interval_error_mean_s": float((n * error).sum() / n.sum()),
+        "jitter_std_s": var ** 0.5,
+        "error_max_s": max(s["error_max_s"] for s in per_curve),
+        "late_steps": sum(s["late_steps"] for s in per_curve),
+    }
+
+
+def format_timing_stats(stats, interval):
+    if stats is None:
+        return "Step timing: not enough steps to measure\n"
+    return (
+        f"Step timing over {stats['steps']} steps (target {interval * 1e3:.1f} ms): "
+        f"mean {stats['interval_mean_s'] * 1e3:.2f} ms, "
+        f"error {stats['interval_error_mean_s'] * 1e3:+.2f} ms, "
+        f"jitter {stats['jitter_std_s'] * 1e3:.2f} ms rms, "
+        f"max error {stats['error_max_s'] * 1e3:.2f} ms, "
+        f"late {stats['late_steps']}\n"
+    )
+
+
+class SweepEngine(threading.Thread):
+    """Runs the sweeps of one collection and queues every sample.
+
+    Each queued item is a dict from compute_sample() plus "codes" (raw
+    scan in COLLECT_CHANNELS order), "t" (seconds since the run started),
+    "constant_voltage", "sweep_voltage", "curve" and "step". None is
+    queued once the run has finished, been stopped or failed; the timing
+    report is then in self.stats and any exception in self.error.
+
+    With a journal, every sample is appended to it from this thread and the
+    journal is closed when the run ends. start_curve/start_step resume an
+    interrupted run at the first missing sample.
+    """
+
+    def __init__(
+        self,
+        ADC,
+        DAC,
+        mode,
+        sweep_start,
+        sweep_end,
+        sweep_step,
+        interval,
+        duration,
+        constant_voltage_values,
+        settle_s=SETTLE_S,
+        curve_pause_s=CURVE_PAUSE_S,
+        journal=None,
+        start_curve=0,
+        start_step=0,
+    ):
+        super().__init__(daemon=True)
+        self.ADC = ADC
+        self.DAC = DAC
+        self.mode = mode
+        self.sweep_start = sweep_start
+        self.sweep_step = sweep_step
+        self.interval = interval
+        self.duration = duration
+        self.constant_voltage_values = list(constant_voltage_values)
+        self.settle_s = settle_s
+        self.curve_pause_s = curve_pause_s
+        self.number_of_steps = int((sweep_end - sweep_start) / sweep_step) + 1
+        self.journal = journal
+        self.start_curve = start_curve
+        self.start_step = start_step
+
+        self.samples = queue.Queue()
+        self.stats = None
+        self.curve_stats = []
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def _wait_until(self, deadline):
+        """Sleep until the perf_counter deadline; False if stopped meanwhile"""
+        remaining = deadline - time.perf_counter()
+        if remaining > 0:
+            return not self._stop_event.wait(remaining)
+        return not self.stopped()
+
+    def run(self):
+        try:
+            self._run()
+        except Exception as e:
+            self.error = e
+            print(f"Sweep engine error: {e}")
+        finally:
+            self.stats = merge_timing_stats(self.curve_stats)
+            if self.journal is not None:
+                if self.error is not None:
+                    status = "error"
+                elif self.stopped():
+                    status = "stopped"
+                else:
+                    status = "complete"
+                try:
+                    self.journal.close(status, self.stats)
+                except OSError as e:
+                    print(f"Could not close journal {self.journal.path}: {e}")
+            self.samples.put(None)
+
+    def _run(self):
+        run_start = time.perf_counter()
+        for curve, constant_voltage in enumerate(self.constant_voltage_values):
+            if curve < self.start_curve:
+                continue
+            first_step = self.start_step if curve == self.start_curve else 0
+            if curve > self.start_curve and not self._wait_until(
+                time.perf_counter() + self.curve_pause_s
+            ):
+                return
+
+            # Both modes drive the constant voltage on channel B and sweep
+            # channel A; the wiring decides which terminal each one reaches
+            self.DAC.DAC8532_Out_Voltage(DAC8532.channel_B, constant_voltage)
+
+            # A resumed curve keeps the remaining share of its duration
+            curve_start = time.perf_counter() - first_step * self.interval
+            end_time = curve_start + self.duration
+            step_times = []
+            self.curve_stats.append(None)
+            for step in range(first_step, self.number_of_steps):
+                deadline = curve_start + step * self.interval
+                if deadline >= end_time or not self._wait_until(deadline):
+                    break
+
+                step_start = time.perf_counter()
+                step_times.append(step_start)
+                sweep_voltage = self.sweep_start + step * self.sweep_step
+                self.DAC.DAC8532_Out_Voltage(DAC8532.channel_A, sweep_voltage)
+                if self._stop_event.wait(self.settle_s):
+                    break
+                codes = dict(
+                    zip(COLLECT_CHANNELS, self.ADC.ADS1256_Scan(COLLECT_CHANNELS))
+                )
+
+                sample = compute_sample(self.mode, codes)
+                sample["codes"] = [codes[ch] for ch in COLLECT_CHANNELS]
+                sample["t"] = time.perf_counter() - run_start
+                sample["constant_voltage"] = constant_voltage
+                sample["sweep_voltage"] = sweep_voltage
+                sample["curve"] = curve
+                sample["step"] = step
+                if self.journal is not None:
+                    self.journal.append(sample)
+                self.samples.put(sample)
+
+            self.curve_stats[-1] = timing_stats(step_times, self.interval)
+            if self.stopped():
+                return
+            if self.journal is not None:
+                self.journal.end_curve(curve)
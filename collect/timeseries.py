@@ -0,0 +1,418 @@
+"""
+timeseries.py - Constant-bias current time series (biosensing runs)
+Usage: engine = TimeSeriesEngine(ADC, DAC, mode, gate_v, drain_v, path, sample_rate=2, oversample=8)
+       engine.start(); drain engine.blocks from the GUI until it yields None
+       engine.mark("Injection 1")        # from the GUI, e.g. on a keypress
+       headers, columns, preamble = timeseries_table(path)
+
+The DACs hold the gate and drain at fixed voltages while the six inputs of
+the sweep are scanned `oversample` times per point; the mean codes of a
+point are its record. Points are scheduled on absolute deadlines
+(start + k / sample_rate) like the sweep steps, and a deadline missed
+because a point overran is skipped rather than crowding the next ones.
+
+Points are gathered in a preallocated block that is appended to a
+.capture.bin file (float64 codes; see baseline_capture.py) and queued for
+the GUI every UPDATE_INTERVAL_S, with an fsync every SYNC_INTERVAL_S. Event
+markers go to an .events.jsonl file next to it as they happen. The
+MinMaxDecimator keeps the live chart at a fixed number of points however
+long the run, so memory stays constant over multi-hour runs.
+"""
+
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from . import config
+from . import DAC8532
+from .baseline_capture import (
+    CAPTURE_SUFFIX,
+    CAPTURE_VERSION,
+    UPDATE_INTERVAL_S,
+    CaptureFile,
+    RunningStats,
+    read_capture,
+)
+from .sweep_engine import COLLECT_CHANNELS, SETTLE_S, compute_sample
+
+EVENTS_SUFFIX = ".events.jsonl"
+
+# Points per second and conversions averaged into each point
+SAMPLE_RATE_HZ = 2.0
+OVERSAMPLE = 8
+# Points per block, and the longest the record goes without an fsync
+BLOCK_ROWS = 1024
+SYNC_INTERVAL_S = 2.0
+# Buckets of the live chart; each is drawn as its minimum and maximum
+DISPLAY_BUCKETS = 1000
+
+TIMESERIES_TITLE = "OSDL Biosensor V1 - Time Series"
+TIMESERIES_COLUMNS = (
+    ("t", "Time (s)"),
+    ("i_drain", "Id (A)"),
+    ("i_source", "Is (A)"),
+    ("i_gate", "Ig (A)"),
+    ("vsd", "Vsd (V)"),
+    ("vsg", "Vsg (V)"),
+)
+
+
+def timeseries_paths(trial_path, trial_name, timestamp):
+    """(capture, events) paths of a time series in trial_path"""
+    base = os.path.join(trial_path, f"{trial_name}_TS_{timestamp}")
+    return base + CAPTURE_SUFFIX, base + EVENTS_SUFFIX
+
+
+def events_path_for(capture_path):
+    return capture_path[: -len(CAPTURE_SUFFIX)] + EVENTS_SUFFIX
+
+
+def bias_channels(mode):
+    """(gate, drain) DAC channels for the board wiring of mode.
+    Output wiring puts the drain on DAC A and the gate on DAC B; transfer swaps them."""
+    if mode == "transfer":
+        return DAC8532.channel_A, DAC8532.channel_B
+    return DAC8532.channel_B, DAC8532.channel_A
+
+
+def point_columns(mode, codes):
+    """compute_sample() of a rows x COLLECT_CHANNELS block of (mean) codes, as columns"""
+    codes = np.asarray(codes, dtype=np.float64)
+    return compute_sample(mode, {ch: codes[:, j] for j, ch in enumerate(COLLECT_CHANNELS)})
+
+
+class EventLog:
+    """Append-only JSON-lines log of timestamped events, fsync'ed per event"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.lock = threading.Lock()
+        self.handle = open(path, "a", encoding="utf-8")
+
+    def add(self, event):
+        """Write event; False once the log is closed"""
+        with self.lock:
+            if self.handle is None:
+                return False
+            self.handle.write(json.dumps(event) + "\n")
+            self.handle.flush()
+            os.fsync(self.handle.fileno())
+            self.count += 1
+            return True
+
+    def close(self):
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
+
+
+def read_events(path):
+    """Events of an .events.jsonl file in time order; [] when there is none.
+    A line cut short by a crash is skipped."""
+    if not os.path.exists(path):
+        return []
+    events = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return sorted(events, key=lambda event: event["t"])
+
+
+class MinMaxDecimator:
+    """Fixed-size min/max envelope of a growing series, for display.
+
+    Points are gathered into buckets of `width` points; each bucket keeps
+    its minimum and maximum with their times, so spikes survive any amount
+    of decimation. When all `buckets` are full, neighbouring pairs are
+    merged and the width doubles.
+    """
+
+    def __init__(self, buckets=DISPLAY_BUCKETS):
+        self.size = buckets - buckets % 2
+        self.t_low = np.empty(self.size)
+        self.low = np.empty(self.size)
+        self.t_high = np.empty(self.size)
+        self.high = np.empty(self.size)
+        self.count = 0
+        self.width = 1
+        self.filled = 0
+        self.points = 0
+
+    def add(self, t, y):
+        t = np.asarray(t, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        keep = np.isfinite(y)
+        t, y = t[keep], y[keep]
+        i = 0
+        while i < len(y):
+            if self.count == self.size:
+                self._merge()
+            take = min(len(y) - i, self.width - self.filled)
+            self._fill(t[i : i + take], y[i : i + take])
+            i += take
+            if self.filled == self.width:
+                self.count += 1
+                self.filled = 0
+        self.points += len(y)
+
+    def _fill(self, t, y):
+        # Extend the open bucket (index count) with a chunk of points
+        lo, hi = int(np.argmin(y)), int(np.argmax(y))
+        k = self.count
+        if self.filled == 0 or y[lo] < self.low[k]:
+            self.t_low[k], self.low[k] = t[lo], y[lo]
+        if self.filled == 0 or y[hi] > self.high[k]:
+            self.t_high[k], self.high[k] = t[hi], y[hi]
+        self.filled += len(y)
+
+    def _merge(self):
+        half = self.size // 2
+        for times, values, pick in (
+            (self.t_low, self.low, np.argmin),
+            (self.t_high, self.high, np.argmax),
+        ):
+            pairs = values.reshape(half, 2)
+            j = pick(pairs, axis=1)
+            rows = np.arange(half)
+            times[:half] = times.reshape(half, 2)[rows, j]
+            values[:half] = pairs[rows, j]
+        self.count = half
+        self.width *= 2
+
+    def series(self):
+        """(t, y) of the envelope, two points per bucket in time order"""
+        n = self.count + (self.filled > 0)
+        low_first = self.t_low[:n] <= self.t_high[:n]
+        t = np.empty(2 * n)
+        y = np.empty(2 * n)
+        t[0::2] = np.where(low_first, self.t_low[:n], self.t_high[:n])
+        y[0::2] = np.where(low_first, self.low[:n], self.high[:n])
+        t[1::2] = np.where(low_first, self.t_high[:n], self.t_low[:n])
+        y[1::2] = np.where(low_first, self.high[:n], self.low[:n])
+        return t, y
+
+
+class TimeSeriesEngine(threading.Thread):
+    """Acquisition thread of one constant-bias time series.
+
+    Each item queued on self.blocks is point_columns() of the points taken
+    since the previous one plus their times "t" (seconds since the start);
+    None is queued once the run has reached `duration` (0 runs until
+    stop()), been stopped or failed. The step timing of the points is then
+    in self.stats (format_timing_stats() layout) and any exception in
+    self.error.
+    """
+
+    def __init__(
+        self,
+        ADC,
+        DAC,
+        mode,
+        gate_v,
+        drain_v,
+        path,
+        sample_rate=SAMPLE_RATE_HZ,
+        oversample=OVERSAMPLE,
+        duration=0.0,
+        header=None,
+        settle_s=SETTLE_S,
+        block_rows=BLOCK_ROWS,
+    ):
+        super().__init__(daemon=True)
+        if sample_rate <= 0 or oversample < 1:
+            raise ValueError("sample rate must be positive and oversample at least 1")
+        self.ADC = ADC
+        self.DAC = DAC
+        self.mode = mode
+        self.gate_v = gate_v
+        self.drain_v = drain_v
+        self.path = path
+        self.sample_rate = float(sample_rate)
+        self.interval = 1.0 / self.sample_rate
+        self.oversample = int(oversample)
+        self.duration = duration
+        self.header = dict(header or {})
+        self.settle_s = settle_s
+        self.block_rows = block_rows
+
+        self.blocks = queue.Queue()
+        self.events = EventLog(events_path_for(path))
+        self.intervals = RunningStats(1, window=1)
+        self.late_points = 0
+        self.points = 0
+        self.run_start = None
+        self.stats = None
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def elapsed(self):
+        return 0.0 if self.run_start is None else time.perf_counter() - self.run_start
+
+    def mark(self, label):
+        """Record an event at the current run time; returns it, or None when the
+        run has not started or has ended. Safe to call from any thread."""
+        if self.run_start is None:
+            return None
+        event = {
+            "t": self.elapsed(),
+            "label": label,
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        return event if self.events.add(event) else None
+
+    def timing(self):
+        """Step timing of the points so far, as sweep_engine.timing_stats() reports it"""
+        n = self.intervals.n
+        if n < 1:
+            return None
+        mean = float(self.intervals.mean[0])
+        return {
+            "steps": n + 1,
+            "interval_mean_s": mean,
+            "interval_error_mean_s": mean - self.interval,
+            "jitter_std_s": float(self.intervals.std[0]),
+            "error_max_s": float(
+                max(abs(self.intervals.high[0] - self.interval), abs(self.intervals.low[0] - self.interval))
+            ),
+            "late_steps": self.late_points,
+        }
+
+    def run(self):
+        gate_channel, drain_channel = bias_channels(self.mode)
+        header = {
+            "version": CAPTURE_VERSION,
+            "kind": "timeseries",
+            "started": datetime.datetime.now().isoformat(timespec="seconds"),
+            "channels": COLLECT_CHANNELS,
+            "code_dtype": "<f8",
+            "mode": self.mode,
+            "gate_v": self.gate_v,
+            "drain_v": self.drain_v,
+            "sample_rate_hz": self.sample_rate,
+            "oversample": self.oversample,
+            "duration": self.duration,
+            "adc_full_scale_v": config.ADC_FULL_SCALE_V,
+            "shunt_ohm": {
+                "source": config.SHUNT_SOURCE_OHM,
+                "a": config.SHUNT_A_OHM,
+                "b": config.SHUNT_B_OHM,
+            },
+            "backend": config.BACKEND,
+            **self.header,
+        }
+        record = None
+        try:
+            record = CaptureFile(self.path, header)
+            self.DAC.DAC8532_Out_Voltage(gate_channel, self.gate_v)
+            self.DAC.DAC8532_Out_Voltage(drain_channel, self.drain_v)
+            if not self._stop_event.wait(self.settle_s):
+                self._run(record)
+        except Exception as e:
+            self.error = e
+            print(f"Time series error: {e}")
+        finally:
+            self.stats = self.timing()
+            self.events.close()
+            if record is not None:
+                status = "error" if self.error else "stopped" if self.stopped() else "complete"
+                try:
+                    record.close(
+                        status, elapsed_s=self.elapsed(), events=self.events.count, timing=self.stats
+                    )
+                except (OSError, ValueError) as e:
+                    self.error = self.error or e
+                    print(f"Could not close {record.path}: {e}")
+            self.blocks.put(None)
+
+    def _block(self, record, t, codes):
+        record.append(t, codes)
+        columns = point_columns(self.mode, codes)
+        columns["t"] = t.copy()
+        self.blocks.put(columns)
+
+    def _run(self, record):
+        t = np.empty(self.block_rows)
+        codes = np.empty((self.block_rows, len(COLLECT_CHANNELS)))
+        scans = np.empty((self.oversample, len(COLLECT_CHANNELS)))
+        starts = np.empty(self.block_rows + 1)
+
+        self.run_start = time.perf_counter()
+        last_block = last_sync = self.run_start
+        rows = 0
+        k = 0
+        while True:
+            deadline = self.run_start + k * self.interval
+            if self.duration and deadline - self.run_start >= self.duration:
+                break
+            remaining = deadline - time.perf_counter()
+            if remaining > 0 and self._stop_event.wait(remaining):
+                break
+            if self.stopped():
+                break
+
+            point_start = time.perf_counter()
+            for i in range(self.oversample):
+                scans[i] = self.ADC.ADS1256_Scan(COLLECT_CHANNELS)
+            point_end = time.perf_counter()
+            codes[rows] = scans.mean(axis=0)
+            t[rows] = 0.5 * (point_start + point_end) - self.run_start
+            starts[rows + 1] = point_start
+            rows += 1
+            self.points += 1
+
+            # The next deadline that has not passed yet
+            k = max(k + 1, int(np.ceil((point_end - self.run_start) / self.interval)))
+
+            if rows == self.block_rows or point_end - last_block >= UPDATE_INTERVAL_S:
+                self._add_intervals(starts, rows)
+                self._block(record, t[:rows], codes[:rows])
+                if point_end - last_sync >= SYNC_INTERVAL_S:
+                    record.flush()
+                    last_sync = point_end
+                starts[0] = starts[rows]
+                rows, last_block = 0, point_end
+        if rows:
+            self._add_intervals(starts, rows)
+            self._block(record, t[:rows], codes[:rows])
+
+    def _add_intervals(self, starts, rows):
+        # starts[0] is the last point of the previous block (unset before the first)
+        first = 1 if self.points == rows else 0
+        intervals = np.diff(starts[first : rows + 1])
+        if len(intervals):
+            self.intervals.update(intervals)
+            self.late_points += int((intervals - self.interval > 0.5 * self.interval).sum())
+
+
+def timeseries_table(path):
+    """(headers, columns, preamble) of a time series record for export.write_columns"""
+    header, t, codes = read_capture(path)
+    columns = point_columns(header["mode"], codes)
+    columns["t"] = t
+    preamble = [
+        [TIMESERIES_TITLE],
+        ["Gate Voltage (V):", header["gate_v"]],
+        ["Drain Voltage (V):", header["drain_v"]],
+        ["Sample Rate (Hz):", header["sample_rate_hz"]],
+        ["Oversample:", header["oversample"]],
+    ]
+    for event in read_events(events_path_for(path)):
+        preamble.append(["Event:", event["t"], event["label"]])
+    headers = [name for _, name in TIMESERIES_COLUMNS]
+    return headers, [columns[key] for key, _ in TIMESERIES_COLUMNS], preamble
@@ -2,13 +2,16 @@ import tkinter as tk
 from tkinter import ttk
 from PIL import Image, ImageTk
 import os
-from collect.collect_tab import collect_tab
-from analyze.analyze_tab import analyze_tab
-from plot.plot_tab import plot_tab
-from settings.settings_tab import settings_tab
 
 
 def main():
+    # Imported here, not at module level: worker processes re-import this
+    # module, and collect_tab resets the ADC and drives the DACs on import
+    from collect.collect_tab import collect_tab
+    from analyze.analyze_tab import analyze_tab
+    from plot.plot_tab import plot_tab
+    from settings.settings_tab import settings_tab
+
     root = tk.Tk()
     root.title("OSDL OEGFET")
 
@@ -6,6 +6,10 @@ import matplotlib.pyplot as plt
 import os
 import threading
 
+from analyze.catalog_picker import create_catalog_picker
+from analyze.layouts import DATA_ROOT
+from collect.run_format import RUN_SUFFIX, is_run_file, read_run
+
 # Global variable for plot tab's output text
 output_text = None
 
@@ -31,6 +35,7 @@ def plot_tab(tab_plot):
     notebook_plot.pack(fill="both", expand=True)
 
     create_data_setup_frame(notebook_plot)
+    create_catalog_picker(notebook_plot, on_catalog_select, with_files=True, log=log_plot)
     create_console_log_frame(notebook_plot)
 
     fig, ax = plt.subplots(figsize=(5, 3))
@@ -42,6 +47,21 @@ def plot_tab(tab_plot):
     create_plot_frame(plot_frame_plot)
 
 
+def log_plot(message):
+    if output_text is not None:
+        output_text.insert(tk.END, message + "\n")
+        output_text.see(tk.END)
+
+
+def on_catalog_select(path):
+    """Catalog picker callback; only data files (not folders) become the selection"""
+    global selected_file
+    if os.path.isfile(path):
+        selected_file = path
+        file_label.config(text=os.path.basename(path))
+        log_plot(f"Selected file: {path}")
+
+
 def create_console_log_frame(parent):
     global output_text
 
@@ -128,9 +148,13 @@ def create_data_setup_frame(parent):
     def select_file():
         global selected_file
         selected_file = filedialog.askopenfilename(
-            initialdir="/home/pi/Desktop/Biosensor V2/data",
-            title="Select an ISID Excel File",
-            filetypes=(("Excel files", "*.xlsx"), ("All files", "*.*")),
+            initialdir=DATA_ROOT,
+            title="Select a Run or ISID Excel File",
+            filetypes=(
+                ("Run files", f"*{RUN_SUFFIX}"),
+                ("Excel files", "*.xlsx"),
+                ("All files", "*.*"),
+            ),
         )
         if selected_file:
 
@@ -177,7 +201,39 @@ def create_plot_frame(parent):
     canvas.draw()
 
 
+def plot_run_file(file_path, fig_obj, ax_obj):
+    """plot_data_internal() for a native .run.npz"""
+    meta, run_data = read_run(file_path)
+    if not len(run_data):
+        raise ValueError("No DAC1 values found in the run file.")
+
+    if meta.get("mode") == "transfer":
+        x_key, y_key, x_label, y_label = "vsg", "i_drain", "Vsg (V)", "Id (A)"
+    else:
+        x_key, y_key, x_label, y_label = "vsd", "isd", "Vsd (V)", "Isd (A)"
+
+    ax_obj.clear()
+    colors = plt.get_cmap("tab10", len(run_data))
+    for idx, dac1 in enumerate(run_data):
+        ax_obj.plot(
+            run_data[dac1][x_key],
+            run_data[dac1][y_key],
+            label=f"DAC1 = {dac1:.6f}",
+            color=colors(idx),
+        )
+
+    ax_obj.set_xlabel(x_label)
+    ax_obj.set_ylabel(y_label)
+    ax_obj.legend(title="DAC1 Values")
+    ax_obj.relim()
+    ax_obj.autoscale_view()
+
+    fig_obj.subplots_adjust(left=0.15, right=0.95, top=0.9, bottom=0.15)
+
+
 def plot_data_internal(file_path, fig_obj, ax_obj):
+    if is_run_file(file_path):
+        return plot_run_file(file_path, fig_obj, ax_obj)
     try:
         workbook = openpyxl.load_workbook(file_path, data_only=True)
         sheet = workbook.active